@@ -0,0 +1,84 @@
+"""财务数据累积方式基准测试
+
+对比循环内 ``pd.concat`` 累积与 ``LatestRowAccumulator`` 收集后一次性构建，
+分别在 100、1000、5000 只合成股票上记录耗时与峰值内存（tracemalloc）。
+
+运行：python benchmarks/bench_accumulator.py
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.financial_fetcher import LatestRowAccumulator  # noqa: E402
+
+SIZES = (100, 1000, 5000)
+N_COLUMNS = 80  # stock_financial_analysis_indicator 约返回 80+ 列
+N_PERIODS = 8
+
+
+def make_frames(n_stocks: int, seed: int = 0) -> Dict[str, pd.DataFrame]:
+    """生成合成的单只股票财务指标表"""
+    rng = np.random.default_rng(seed)
+    columns = [f'指标{i}' for i in range(N_COLUMNS)]
+    dates = pd.date_range('2023-03-31', periods=N_PERIODS, freq='QE').strftime('%Y-%m-%d')
+    frames = {}
+    for i in range(n_stocks):
+        frame = pd.DataFrame(rng.standard_normal((N_PERIODS, N_COLUMNS)), columns=columns)
+        frame.insert(0, '日期', dates)
+        frames[f'{i:06d}'] = frame
+    return frames
+
+
+def concat_loop(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """原实现：每只股票 concat 一次"""
+    financial_data = pd.DataFrame()
+    for code, financial in frames.items():
+        latest_data = financial.iloc[[-1]].copy()
+        latest_data['代码'] = code
+        financial_data = pd.concat([financial_data, latest_data])
+    return financial_data
+
+
+def accumulate(frames: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """新实现：收集行记录后一次性构建"""
+    accumulator = LatestRowAccumulator()
+    for code, financial in frames.items():
+        accumulator.add(code, financial)
+    return accumulator.build()
+
+
+def measure(func: Callable[[Dict[str, pd.DataFrame]], pd.DataFrame],
+            frames: Dict[str, pd.DataFrame]) -> Dict[str, float]:
+    """返回耗时（秒）与峰值内存（MB）"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(frames)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'seconds': elapsed, 'peak_mb': peak / 1024 / 1024}
+
+
+def main() -> None:
+    """主函数"""
+    rows: List[dict] = []
+    for size in SIZES:
+        frames = make_frames(size)
+        for name, func in (('concat_loop', concat_loop), ('accumulator', accumulate)):
+            result = measure(func, frames)
+            rows.append({'stocks': size, 'method': name, **result})
+            print(f"{size:>5} 只 {name:<12} 耗时 {result['seconds']:.3f}s "
+                  f"峰值内存 {result['peak_mb']:.1f}MB")
+    print(pd.DataFrame(rows).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
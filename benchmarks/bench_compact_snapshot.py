@@ -0,0 +1,93 @@
+"""紧凑内存快照基准测试
+
+把 ``--days`` 个日期的合成全市场快照（5000 只股票，约 110 列）写入快照存储，
+对比在内存中同时保留全部日期时的占用与读取耗时：
+
+- 完整读取：全部列，字符串为 pandas 默认类型，数值为 float64
+- 只读取策略列：施洛斯与神奇公式声明的列
+- ``CompactSnapshots``：只读取策略列，字符串转为共用字典的分类类型，数值降为 float32
+
+运行：python benchmarks/bench_compact_snapshot.py --stocks 5000 --days 60
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.compact_snapshot import CompactSnapshots, format_bytes, strategy_columns  # noqa: E402
+from src.magic_formula import MagicFormulaScreener  # noqa: E402
+from src.snapshot_store import SnapshotStore  # noqa: E402
+from src.walter_schloss import SchlossStockScreening  # noqa: E402
+
+
+def make_snapshot(n_stocks: int, seed: int) -> pd.DataFrame:
+    """合成的合并快照：行情列、财务指标列与若干字符串列"""
+    rng = np.random.default_rng(seed)
+    data = {
+        '代码': [f'{i:06d}' for i in range(n_stocks)],
+        '名称': [f'股票{i}' for i in range(n_stocks)],
+        '行业': rng.choice(['银行', '医药', '电子', '化工'], n_stocks),
+        '日期': '2025-03-31',
+    }
+    for column in ('最新价', '涨跌幅', '成交量', '成交额', '振幅', '最高', '最低', '今开', '昨收',
+                   '量比', '换手率', '市盈率-动态', '市净率', '流通市值', '涨速'):
+        data[column] = rng.standard_normal(n_stocks) * 100
+    data['总市值'] = rng.uniform(1e9, 1e12, n_stocks)
+    for i in range(86):
+        data[f'财务指标{i}'] = rng.standard_normal(n_stocks)
+    for column in ('资产负债率', '净利润同比增长率', '净资产收益率'):
+        data[column] = rng.standard_normal(n_stocks) * 30
+    return pd.DataFrame(data)
+
+
+def deep_bytes(frames) -> int:
+    """数据表的实际占用"""
+    return sum(int(frame.memory_usage(deep=True).sum()) for frame in frames)
+
+
+def main() -> None:
+    """运行基准"""
+    parser = argparse.ArgumentParser(description='紧凑内存快照基准')
+    parser.add_argument('--stocks', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=60)
+    args = parser.parse_args()
+
+    columns = strategy_columns(SchlossStockScreening, MagicFormulaScreener)
+    dates = [day.strftime('%Y-%m-%d') for day in pd.bdate_range('2025-01-01', periods=args.days)]
+    with tempfile.TemporaryDirectory() as root:
+        store = SnapshotStore(root)
+        for seed, date in enumerate(dates):
+            store.save('stocks', make_snapshot(args.stocks, seed), date=date)
+
+        rows = []
+        for label, load in (
+                ('完整读取', lambda: [store.load('stocks', date) for date in dates]),
+                ('只读取策略列', lambda: [store.load('stocks', date, columns=columns)
+                                         for date in dates])):
+            start = time.perf_counter()
+            frames = load()
+            rows.append((label, time.perf_counter() - start, deep_bytes(frames)))
+            del frames
+
+        start = time.perf_counter()
+        snapshots = CompactSnapshots(columns)
+        snapshots.load(store, 'stocks')
+        rows.append(('CompactSnapshots', time.perf_counter() - start,
+                     snapshots.memory()['total_bytes']))
+
+    print(f"{args.days} 个日期 × {args.stocks} 只股票，策略列 {len(columns)} 列")
+    for label, seconds, size in rows:
+        print(f"{label:<18} 读取 {seconds:6.2f}s  内存 {format_bytes(size):>10}"
+              f"  x{rows[0][2] / size:.1f}")
+    print(snapshots.report())
+
+
+if __name__ == '__main__':
+    main()
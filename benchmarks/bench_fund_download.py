@@ -0,0 +1,107 @@
+"""基金报告下载基准测试
+
+在本地启动一个模拟 PDF 服务器（每个请求带固定延迟），分别用原先的线程版
+``fund_downloader.download_file`` 与 ``async_downloader`` 下载同一批文件，
+比较耗时、吞吐与峰值内存。每种方式在独立子进程中运行，峰值内存互不影响。
+
+运行：python benchmarks/bench_fund_download.py --files 200 --size-kb 2048
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+
+def make_handler(size: int, latency: float):
+    """生成返回 ``size`` 字节内容的请求处理类"""
+    block = b'%PDF' + b'0' * 65532
+
+    class Handler(BaseHTTPRequestHandler):
+        """模拟 PDF 服务"""
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):  # noqa: N802
+            """按块返回固定大小的内容"""
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header('Content-Length', str(size))
+            self.end_headers()
+            remaining = size
+            while remaining > 0:
+                chunk = block[:min(remaining, len(block))]
+                self.wfile.write(chunk)
+                remaining -= len(chunk)
+
+        def log_message(self, *args):
+            """不输出访问日志"""
+
+    return Handler
+
+
+def run_engine(engine: str, base: str, n_files: int, concurrency: int) -> None:
+    """子进程：用指定方式下载，输出 JSON 结果"""
+    from src import fund_downloader  # pylint: disable=import-outside-toplevel
+    from src.async_downloader import download_all  # pylint: disable=import-outside-toplevel
+
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        urls = [f'{base}/pdf/H2_{i}_1.pdf' for i in range(n_files)]
+        start = time.perf_counter()
+        if engine == 'threaded':
+            fund_downloader.multitasking.set_max_threads(concurrency)
+            for i, url in enumerate(urls):
+                fund_downloader.download_file('bench', url, f'f{i}')
+            fund_downloader.multitasking.wait_for_tasks()
+        else:
+            download_all([(url, os.path.join('bench', f'f{i}.pdf'))
+                          for i, url in enumerate(urls)], concurrency=concurrency)
+        elapsed = time.perf_counter() - start
+        total = sum(os.path.getsize(os.path.join('bench', name)) for name in os.listdir('bench'))
+        os.chdir('/')
+    print(json.dumps({'elapsed': elapsed, 'bytes': total,
+                      'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))
+
+
+def main() -> None:
+    """主函数"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--files', type=int, default=100)
+    parser.add_argument('--size-kb', type=int, default=2048)
+    parser.add_argument('--latency', type=float, default=0.05)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--engine', help=argparse.SUPPRESS)
+    parser.add_argument('--base', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.engine:
+        run_engine(args.engine, args.base, args.files, args.concurrency)
+        return
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0),
+                                make_handler(args.size_kb * 1024, args.latency))
+    httpd.daemon_threads = True
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{httpd.server_address[1]}'
+    print(f"{args.files} 个文件 × {args.size_kb} KB，并发 {args.concurrency}")
+    for engine in ('threaded', 'async'):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--engine', engine, '--base', base,
+             '--files', str(args.files), '--concurrency', str(args.concurrency)],
+            capture_output=True, text=True, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(f"{engine:>8}: {result['elapsed']:.2f}s，"
+              f"{result['bytes'] / result['elapsed'] / 2 ** 20:.1f} MB/s，"
+              f"峰值内存 {result['max_rss_mb']:.0f} MB")
+    httpd.shutdown()
+
+
+if __name__ == '__main__':
+    main()
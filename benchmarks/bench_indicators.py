@@ -0,0 +1,115 @@
+"""面板技术指标基准测试
+
+在合成的 (交易日 × 股票) 价格面板上：
+
+- 对比 ``indicators`` 的批量指标（均线、52 周最高/最低、指数均线、ATR、收缩幅度）
+  与 pandas ``DataFrame.rolling``/``ewm`` 的耗时及结果占用
+- 对比 ``IndicatorEngine`` 每日追加一根 K 线与每日重新批量计算最近一个窗口的耗时
+
+运行：python benchmarks/bench_indicators.py --stocks 5000 --days 500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.indicators import (  # noqa: E402
+    IndicatorEngine,
+    atr,
+    contraction_depths,
+    ema,
+    rolling_max,
+    rolling_min,
+    sma,
+)
+
+
+def make_bars(n_days: int, n_symbols: int, seed: int = 0):
+    """随机游走的收盘价、最高价与最低价面板"""
+    rng = np.random.default_rng(seed)
+    close = 10 * np.cumprod(1 + rng.normal(0.0005, 0.02, (n_days, n_symbols)), axis=0)
+    high = close * (1 + rng.uniform(0, 0.03, close.shape))
+    low = close * (1 - rng.uniform(0, 0.03, close.shape))
+    return close, high, low
+
+
+def timed(func):
+    """运行一次并返回 (结果, 秒)"""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def main() -> None:
+    """运行基准"""
+    parser = argparse.ArgumentParser(description='面板技术指标基准')
+    parser.add_argument('--stocks', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=500)
+    parser.add_argument('--ticks', type=int, default=20, help='逐日追加的交易日数')
+    args = parser.parse_args()
+
+    close, high, low = make_bars(args.days, args.stocks)
+    frames = [pd.DataFrame(panel) for panel in (close, high, low)]
+    print(f"面板 {args.days} 日 × {args.stocks} 只")
+
+    def with_pandas():
+        previous = frames[0].shift()
+        ranges = [frames[1] - frames[2], (frames[1] - previous).abs(), (frames[2] - previous).abs()]
+        true_range = pd.concat(ranges, keys=range(3)).groupby(level=1).max()
+        return [frames[0].rolling(w).mean() for w in (10, 20, 50, 150, 200)] + [
+            frames[1].rolling(252, min_periods=1).max(),
+            frames[2].rolling(252, min_periods=1).min(),
+            frames[0].ewm(span=21, adjust=False).mean(),
+            true_range.ewm(alpha=1 / 14, adjust=False).mean()]
+
+    def with_indicators():
+        return [sma(close, w) for w in (10, 20, 50, 150, 200)] + [
+            rolling_max(high, 252, 1), rolling_min(low, 252, 1), ema(close, 21),
+            atr(high, low, close)]
+
+    expected, pandas_time = timed(with_pandas)
+    results, numpy_time = timed(with_indicators)
+    for frame, values in zip(expected, results):
+        assert np.allclose(frame.to_numpy(), values, rtol=1e-5, equal_nan=True)
+    _, depth_time = timed(lambda: contraction_depths(high[-252:], low[-252:]))
+    pandas_bytes = sum(frame.memory_usage(index=False).sum() for frame in expected)
+    numpy_bytes = sum(values.nbytes for values in results)
+    print(f"pandas rolling/ewm: {pandas_time:.3f}s，结果 {pandas_bytes / 2 ** 20:.0f}MB")
+    print(f"indicators 批量: {numpy_time:.3f}s，结果 {numpy_bytes / 2 ** 20:.0f}MB"
+          f"（加速 {pandas_time / numpy_time:.1f}x）")
+    print(f"最近 252 日的收缩幅度: {depth_time * 1000:.1f}ms")
+
+    history = args.days - args.ticks
+    engine, warmup = timed(lambda: IndicatorEngine.from_history(
+        frames[0].iloc[:history], frames[1].iloc[:history], frames[2].iloc[:history]))
+    start = time.perf_counter()
+    for row in range(history, args.days):
+        latest = engine.update(close[row], high[row], low[row])
+    incremental = (time.perf_counter() - start) / args.ticks
+
+    def recompute(end: int) -> dict:
+        window = slice(max(0, end + 1 - 252), end + 1)
+        return {'sma200': sma(close[window], 200)[-1],
+                'high_252': rolling_max(high[window], 252, 1)[-1],
+                'low_252': rolling_min(low[window], 252, 1)[-1]}
+
+    start = time.perf_counter()
+    for row in range(history, args.days):
+        batch = recompute(row)
+    recomputed = (time.perf_counter() - start) / args.ticks
+    for key, values in batch.items():
+        assert np.allclose(latest[key], values, rtol=1e-5, equal_nan=True)
+    print(f"引擎预热 {history} 日: {warmup:.2f}s")
+    print(f"每日追加一根 K 线（全部指标）: {incremental * 1000:.2f}ms")
+    print(f"每日重算最近 252 日（仅均线与高低点）: {recomputed * 1000:.2f}ms"
+          f"（加速 {recomputed / incremental:.1f}x）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+"""凯利蒙特卡洛模拟基准测试
+
+对比 ``simulate_paths`` 一次模拟 10000 条路径 × 10000 次下注与原先
+``kelly.main`` 的逐步 Python 循环。循环只测 20 条路径，再按比例换算。
+
+运行：python benchmarks/bench_kelly.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.kelly import kelly, simulate_paths, summarize  # noqa: E402
+
+N_PATHS = 10000
+N_STEPS = 10000
+LOOP_SAMPLE = 20
+
+
+def loop_path(fraction: float, p: float, win: float, lose: float, n_steps: int) -> float:
+    """逐步循环的参考写法"""
+    money = 1.0
+    for _ in range(n_steps):
+        if random.random() < p:
+            money *= 1 + fraction * win
+        else:
+            money *= 1 - fraction * lose
+    return money
+
+
+def main() -> None:
+    """主函数"""
+    p, win, lose = 0.55, 0.1, 0.1
+    fraction = kelly(p, 1 - p, win, lose)
+
+    start = time.perf_counter()
+    stats = summarize(*simulate_paths(fraction, p, win, lose, N_PATHS, N_STEPS, seed=0), N_STEPS)
+    vectorized = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(LOOP_SAMPLE):
+        loop_path(fraction, p, win, lose, N_STEPS)
+    loop = (time.perf_counter() - start) * N_PATHS / LOOP_SAMPLE
+
+    print(f"{N_PATHS} 条路径 × {N_STEPS} 次，终值中位数 {stats['median_terminal']:.4f}，"
+          f"破产概率 {stats['ruin_probability']:.2%}")
+    print(f"向量化模拟: {vectorized:.3f}s")
+    print(f"逐步循环（按 {LOOP_SAMPLE} 条换算）: {loop:.3f}s")
+    print(f"加速比: {loop / vectorized:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,71 @@
+"""全文索引基准测试
+
+生成 (基金数 × 每只报告数) 个合成的报告文本，建立索引后测量检索耗时。
+提取函数直接读取文本文件，只衡量索引与查询本身。
+
+运行：python benchmarks/bench_report_index.py --funds 500 --reports 10
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.report_index import ReportIndex  # noqa: E402
+
+WORDS = ['新能源', '医药', '半导体', '消费', '银行', '地产', '光伏', '军工', '白酒', '人工智能',
+         '基金经理', '报告期内', '仓位', '增持', '减持', '估值', '业绩', '行业', '配置', '市场']
+
+
+def read_pages(path):
+    """读取以换页符分页的文本"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read().split('\f')
+
+
+def main() -> None:
+    """主函数"""
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--funds', type=int, default=500)
+    parser.add_argument('--reports', type=int, default=10)
+    parser.add_argument('--pages', type=int, default=5)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as root:
+        for fund in range(args.funds):
+            directory = os.path.join(root, f'{fund:06d}')
+            os.makedirs(directory)
+            for report in range(args.reports):
+                pages = ['，'.join(rng.choice(WORDS) for _ in range(200))
+                         for _ in range(args.pages)]
+                if rng.random() < 0.01:
+                    pages[0] += '，量子计算'  # 少见的词
+                with open(os.path.join(directory, f'第{report}季度报告.pdf'), 'w',
+                          encoding='utf-8') as f:
+                    f.write('\f'.join(pages))
+
+        with ReportIndex(os.path.join(root, 'index.db'), extractor=read_pages) as index:
+            start = time.perf_counter()
+            count = index.update(root, progress_every=0)
+            print(f"索引 {count} 个文件 / {index.stats()['pages']} 页: "
+                  f"{time.perf_counter() - start:.2f}s")
+            start = time.perf_counter()
+            index.update(root, progress_every=0)
+            print(f"无变化时增量更新: {time.perf_counter() - start:.3f}s")
+            queries = (('量子计算', None), ('人工智能', None), ('光伏', '第3季度'),
+                       ('白酒 估值', None))
+            for query, title in queries:
+                start = time.perf_counter()
+                funds = index.funds_mentioning(query, title=title)
+                elapsed = (time.perf_counter() - start) * 1000
+                hits = index.search(query, title=title, limit=20)
+                print(f"查询 {query!r}（标题 {title}）: {len(funds)} 只基金，"
+                      f"{elapsed:.1f} ms，前 20 条命中 {len(hits)}")
+
+
+if __name__ == '__main__':
+    main()
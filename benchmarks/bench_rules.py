@@ -0,0 +1,79 @@
+"""选股规则基准测试
+
+在合成的 5000 只股票快照上计算 50 个施洛斯策略变体（市盈率与市净率阈值不同），对比：
+
+- 原写法：每个变体逐条件生成布尔 Series 并 ``frame[mask].copy()``
+- ``rules.evaluate_many``：列只转换一次，相同规则的结果在变体之间共享
+
+运行：python benchmarks/bench_rules.py --stocks 5000 --variants 50
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.market_replay import SyntheticBackend  # noqa: E402
+from src.rules import evaluate_many  # noqa: E402
+from src.walter_schloss import SCHLOSS_RULES  # noqa: E402
+
+
+def make_snapshot(n_stocks: int) -> pd.DataFrame:
+    """合并了最新一期财务指标的快照"""
+    backend = SyntheticBackend(n_stocks, n_days=30)
+    spot = backend.spot()
+    financial = pd.DataFrame([backend.financial(code, '1990').iloc[-1] for code in spot['代码']])
+    financial = financial.rename(columns={'资产负债率(%)': '资产负债率',
+                                          '净利润增长率(%)': '净利润同比增长率'})
+    return pd.concat([spot, financial.reset_index(drop=True)], axis=1)
+
+
+def pandas_variant(frame: pd.DataFrame, pe: float, pb: float) -> pd.DataFrame:
+    """原 ``apply_schloss_strategy`` 的写法"""
+    pe_filter = pd.Series([True] * len(frame), index=frame.index)
+    pb_filter = pd.Series([True] * len(frame), index=frame.index)
+    pe_filter = (frame['市盈率-动态'] > 0) & (frame['市盈率-动态'] < pe)
+    pb_filter = (frame['市净率'] > 0) & (frame['市净率'] < pb)
+    debt_filter = frame['资产负债率'] < 50
+    profit_filter = frame['净利润同比增长率'] > 0
+    market_value_filter = frame['总市值'] > 1000000000
+    return frame[pe_filter & pb_filter & debt_filter & profit_filter & market_value_filter].copy()
+
+
+def main() -> None:
+    """运行基准"""
+    parser = argparse.ArgumentParser(description='选股规则基准')
+    parser.add_argument('--stocks', type=int, default=5000)
+    parser.add_argument('--variants', type=int, default=50)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    frame = make_snapshot(args.stocks)
+    grid = [(10 + i % 10 * 2, 1.0 + i // 10 * 0.25) for i in range(args.variants)]
+    variants = [SCHLOSS_RULES.with_rules(
+        {'name': '市盈率', 'rule': f'0 < 市盈率-动态 < {pe}'},
+        {'name': '市净率', 'rule': f'0 < 市净率 < {pb}'}, name=f'pe{pe}_pb{pb}')
+        for pe, pb in grid]
+
+    timings = {}
+    for label, run in (
+            ('pandas', lambda: [len(pandas_variant(frame, pe, pb)) for pe, pb in grid]),
+            ('evaluate_many', lambda: evaluate_many(frame, variants)[1]['selected'].tolist())):
+        best = float('inf')
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            counts = run()
+            best = min(best, time.perf_counter() - start)
+        timings[label] = (best, counts)
+        print(f"{label:<14} {best * 1000:8.2f} ms")
+    assert timings['pandas'][1] == timings['evaluate_many'][1], "两种写法结果不一致"
+    print(f"加速比 x{timings['pandas'][0] / timings['evaluate_many'][0]:.1f}"
+          f"（{args.variants} 个变体 × {args.stocks} 只股票）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+"""快照存储格式基准测试
+
+在合成的全市场快照（5000 只股票，约 110 列：行情列 + 财务指标列）上对比
+CSV 与 Parquet/Feather 的文件大小、完整读取耗时，以及只读取策略所需列的耗时。
+
+运行：python benchmarks/bench_snapshot_store.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+from typing import Callable, List
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.snapshot_store import SnapshotStore  # noqa: E402
+from src.walter_schloss import SchlossStockScreening  # noqa: E402
+
+N_STOCKS = 5000
+N_FINANCIAL = 86
+REPEAT = 5
+
+
+def make_snapshot(n_stocks: int = N_STOCKS, seed: int = 0) -> pd.DataFrame:
+    """生成合成的合并快照"""
+    rng = np.random.default_rng(seed)
+    frame = pd.DataFrame({
+        '代码': [f'{i:06d}' for i in range(n_stocks)],
+        '名称': [f'股票{i}' for i in range(n_stocks)],
+        '行业': rng.choice(['银行', '医药', '电子', '化工'], n_stocks),
+        '日期': '2025-03-31',
+    })
+    spot = ['最新价', '涨跌幅', '涨跌额', '成交量', '成交额', '振幅', '最高', '最低', '今开',
+            '昨收', '量比', '换手率', '市盈率-动态', '市净率', '总市值', '流通市值', '涨速',
+            '5分钟涨跌', '60日涨跌幅', '年初至今涨跌幅']
+    for col in spot:
+        frame[col] = rng.standard_normal(n_stocks) * 100
+    for i in range(N_FINANCIAL):
+        frame[f'财务指标{i}'] = rng.standard_normal(n_stocks)
+    frame['资产负债率'] = rng.uniform(0, 100, n_stocks)
+    frame['净利润同比增长率'] = rng.standard_normal(n_stocks) * 30
+    return frame
+
+
+def best_of(func: Callable[[], object], repeat: int = REPEAT) -> float:
+    """多次运行取最短耗时"""
+    timings: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    """主函数"""
+    frame = make_snapshot()
+    columns = SchlossStockScreening.SNAPSHOT_COLUMNS
+    rows = []
+    with tempfile.TemporaryDirectory() as root:
+        csv_path = os.path.join(root, 'stock_data_all_by_ws.csv')
+        frame.to_csv(csv_path, index=False)
+        reloaded = pd.read_csv(csv_path)
+        print(f"CSV 读回后代码列类型: {reloaded['代码'].dtype}，首行 {reloaded['代码'].iloc[1]!r}")
+        rows.append({
+            'format': 'csv',
+            'size_mb': os.path.getsize(csv_path) / 1024 / 1024,
+            'full_load_s': best_of(lambda: pd.read_csv(csv_path)),
+            'projected_load_s': best_of(lambda: pd.read_csv(csv_path, usecols=columns)),
+        })
+
+        for fmt in ('parquet', 'feather'):
+            store = SnapshotStore(os.path.join(root, fmt), fmt=fmt)
+            path = store.save('stock_data_all_by_ws', frame, date='2025-01-02')
+            rows.append({
+                'format': fmt,
+                'size_mb': os.path.getsize(path) / 1024 / 1024,
+                'full_load_s': best_of(lambda s=store: s.load('stock_data_all_by_ws')),
+                'projected_load_s': best_of(
+                    lambda s=store: s.load('stock_data_all_by_ws', columns=columns)),
+            })
+
+    print(f"{N_STOCKS} 只股票 × {frame.shape[1]} 列，投影读取 {len(columns)} 列")
+    print(pd.DataFrame(rows).to_string(index=False, float_format=lambda v: f'{v:.4f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""盘中流式重新筛选基准测试
+
+5000 只股票，每次轮询随机 ``--fraction`` 比例的股票价格变化，对比：
+
+- 批处理：合并行情与财务数据后整表计算施洛斯规则 / 神奇公式排名
+- ``StreamScreener`` / ``MagicFormulaStreamScreener``：只重新计算价格有变化的股票
+
+运行：python benchmarks/bench_stream_screen.py --stocks 5000 --ticks 50 --fraction 0.02
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.magic_formula import MagicFormulaScreener  # noqa: E402
+from src.market_replay import SyntheticBackend  # noqa: E402
+from src.stream_screen import MagicFormulaStreamScreener, StreamScreener  # noqa: E402
+from src.walter_schloss import SCHLOSS_RULES  # noqa: E402
+
+PRICE_COLUMNS = ('最新价', '市盈率-动态', '市净率', '总市值')
+
+
+def make_ticks(spot: pd.DataFrame, ticks: int, fraction: float) -> list:
+    """逐次轮询的行情快照"""
+    rng = np.random.default_rng(0)
+    snapshots = []
+    for _ in range(ticks):
+        spot = spot.copy()
+        rows = rng.random(len(spot)) < fraction
+        factor = rng.uniform(0.95, 1.05, rows.sum())
+        for column in PRICE_COLUMNS:
+            spot.loc[rows, column] = spot.loc[rows, column] * factor
+        snapshots.append(spot)
+    return snapshots
+
+
+def batch_schloss(spot: pd.DataFrame, financial: pd.DataFrame) -> int:
+    """整表合并后重新筛选"""
+    merged = pd.merge(spot, financial, on='代码')
+    return SCHLOSS_RULES.evaluate(merged).selected
+
+
+def batch_magic(spot: pd.DataFrame, financial: pd.DataFrame) -> int:
+    """整表合并后重新计算指标与排名"""
+    screener = MagicFormulaScreener()
+    screener.stocks_data = pd.merge(spot, financial, on='代码')
+    with contextlib.redirect_stdout(io.StringIO()):
+        screener.calculate_magic_formula_metrics()
+        screener.apply_magic_formula_screening()
+    return len(screener.screened_stocks)
+
+
+def timed(run, snapshots) -> float:
+    """每次轮询的平均毫秒数"""
+    start = time.perf_counter()
+    for spot in snapshots:
+        run(spot)
+    return (time.perf_counter() - start) / len(snapshots) * 1000
+
+
+def main() -> None:
+    """运行基准"""
+    parser = argparse.ArgumentParser(description='流式重新筛选基准')
+    parser.add_argument('--stocks', type=int, default=5000)
+    parser.add_argument('--ticks', type=int, default=50)
+    parser.add_argument('--fraction', type=float, default=0.02)
+    args = parser.parse_args()
+
+    backend = SyntheticBackend(args.stocks, n_days=30)
+    spot = backend.spot()
+    financial = pd.DataFrame([backend.financial(code, '1990').iloc[-1] for code in spot['代码']])
+    financial = financial.rename(columns={'资产负债率(%)': '资产负债率',
+                                          '净利润增长率(%)': '净利润同比增长率',
+                                          '净资产收益率(%)': '净资产收益率'})
+    financial['代码'] = spot['代码'].to_numpy()
+    snapshots = make_ticks(spot, args.ticks, args.fraction)
+
+    for label, batch, stream in (
+            ('schloss', batch_schloss, StreamScreener(SCHLOSS_RULES, financial)),
+            ('magic_formula', batch_magic, MagicFormulaStreamScreener(financial))):
+        stream.update(spot)
+        full = timed(lambda frame, batch=batch: batch(frame, financial), snapshots)
+        incremental = timed(stream.update, snapshots)
+        print(f"{label:<14} 批处理 {full:7.2f} ms/次  增量 {incremental:7.2f} ms/次"
+              f"  加速比 x{full / incremental:.1f}")
+
+
+if __name__ == '__main__':
+    main()
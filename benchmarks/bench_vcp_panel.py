@@ -0,0 +1,73 @@
+"""VCP 批量筛选基准测试
+
+在合成的 (500 个交易日 × 5000 只股票) 收盘价面板上，对比 ``screen_stage2`` 一次向量化计算
+与逐只股票用 ``tail().mean()`` 计算均线（``vcp.my_filter`` 的写法）的耗时。
+逐只计算只测 500 只股票，再按比例换算到全市场。
+
+运行：python benchmarks/bench_vcp_panel.py
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.vcp_panel import screen_stage2  # noqa: E402
+
+N_DAYS = 500
+N_SYMBOLS = 5000
+LOOP_SAMPLE = 500
+
+
+def make_panel(n_days: int = N_DAYS, n_symbols: int = N_SYMBOLS, seed: int = 0) -> pd.DataFrame:
+    """生成随机游走收盘价面板"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0005, 0.02, (n_days, n_symbols))
+    return pd.DataFrame(10 * np.cumprod(1 + returns, axis=0),
+                        index=pd.bdate_range('2023-01-02', periods=n_days),
+                        columns=[f'{i:06d}' for i in range(n_symbols)])
+
+
+def per_symbol(close: pd.DataFrame) -> list:
+    """逐只股票计算的参考写法"""
+    selected = []
+    for symbol in close.columns:
+        series = close[symbol]
+        price = series.iloc[-1]
+        sma50, sma150, sma200 = (series.tail(w).mean() for w in (50, 150, 200))
+        sma200_lag = series.iloc[-221:-21].mean()
+        year = series.tail(252)
+        if (price > max(sma50, sma150, sma200) and sma50 > sma150 > sma200
+                and sma200 > sma200_lag and price >= 1.3 * year.min()
+                and price >= 0.75 * year.max()):
+            selected.append(symbol)
+    return selected
+
+
+def main() -> None:
+    """主函数"""
+    close = make_panel()
+    rules = ['above_ma', 'ma_order', 'ma200_rising', 'above_52w_low', 'near_52w_high']
+
+    start = time.perf_counter()
+    mask, _ = screen_stage2(close, rules=rules)
+    vectorized = time.perf_counter() - start
+
+    sample = close.iloc[:, :LOOP_SAMPLE]
+    start = time.perf_counter()
+    selected = per_symbol(sample)
+    loop = (time.perf_counter() - start) * N_SYMBOLS / LOOP_SAMPLE
+
+    assert sorted(selected) == sorted(mask.index[mask][mask.index[mask].isin(sample.columns)])
+    print(f"面板 {N_DAYS} 日 × {N_SYMBOLS} 只，通过 {int(mask.sum())} 只")
+    print(f"向量化批量筛选: {vectorized:.3f}s")
+    print(f"逐只计算（按 {LOOP_SAMPLE} 只换算）: {loop:.3f}s")
+    print(f"加速比: {loop / vectorized:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
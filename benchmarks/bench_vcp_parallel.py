@@ -0,0 +1,55 @@
+"""VCP 多进程筛选基准测试
+
+在合成的收盘价面板上比较 ``screen_stage2`` 与不同进程数下 ``screen_stage2_parallel``
+的耗时，并校验结果一致。可用 ``--symbols`` 放大股票数量观察扩展性。
+
+运行：python benchmarks/bench_vcp_parallel.py --symbols 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.vcp_panel import screen_stage2, screen_stage2_parallel  # noqa: E402
+
+
+def make_panel(n_days: int, n_symbols: int, seed: int = 0) -> pd.DataFrame:
+    """生成随机游走收盘价面板"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0005, 0.02, (n_days, n_symbols)).astype(np.float64)
+    return pd.DataFrame(10 * np.cumprod(1 + returns, axis=0),
+                        columns=[f'{i:06d}' for i in range(n_symbols)])
+
+
+def main() -> None:
+    """主函数"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--days', type=int, default=300)
+    parser.add_argument('--symbols', type=int, default=20000)
+    args = parser.parse_args()
+
+    close = make_panel(args.days, args.symbols)
+    start = time.perf_counter()
+    mask, _ = screen_stage2(close)
+    serial = time.perf_counter() - start
+    print(f"面板 {args.days} 日 × {args.symbols} 只，CPU 核数 {os.cpu_count()}")
+    print(f"单进程: {serial:.3f}s")
+
+    workers = 1
+    while workers <= (os.cpu_count() or 1):
+        start = time.perf_counter()
+        parallel_mask, _ = screen_stage2_parallel(close, workers=workers)
+        elapsed = time.perf_counter() - start
+        assert parallel_mask.equals(mask)
+        print(f"{workers} 进程: {elapsed:.3f}s  加速比 {serial / elapsed:.2f}x")
+        workers *= 2
+
+
+if __name__ == '__main__':
+    main()
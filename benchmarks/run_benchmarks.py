@@ -0,0 +1,279 @@
+"""策略与下载的基准测试套件
+
+在 ``market_replay.SyntheticBackend`` 合成的确定性全市场数据（默认 5000 只股票 ×
+1000 个交易日）上计时：
+
+- ``magic_formula``：``MagicFormulaScreener.run``
+- ``schloss``：``SchlossStockScreening.run``
+- ``vcp_bars``：把全部主板股票的日线写入空的本地日线存储
+- ``vcp_screen``：日线已是最新时的 ``vcp.stage2_screen``
+- ``fund_download``：``FundScheduler`` 从本地 HTTP 替身服务下载报告
+
+数据与请求都在本地，不访问网络。结果保存为 JSON，``--compare`` 比较两次结果，
+耗时增加超过阈值时以非零状态退出，可用于比较不同提交。
+
+运行：python benchmarks/run_benchmarks.py --stocks 5000 --days 1000 --output bench.json
+比较：python benchmarks/run_benchmarks.py --compare base.json bench.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, ROOT)
+
+from src.data_provider import DataProvider, filter_tradable  # noqa: E402
+from src.magic_formula import MagicFormulaScreener  # noqa: E402
+from src.market_replay import SyntheticBackend, exchange_symbol  # noqa: E402
+from src.snapshot_store import SnapshotStore  # noqa: E402
+from src.symbol_cache import SymbolCache  # noqa: E402
+from src.vcp import stage2_screen  # noqa: E402
+from src.walter_schloss import SchlossStockScreening  # noqa: E402
+
+# 不限速（令牌桶仍然参与计时）
+NO_LIMIT = 1e9
+
+
+def best_of(repeat: int, run: Callable[[], Dict]) -> Dict:
+    """运行 ``repeat`` 次，返回耗时最短的一次结果，并记录每次耗时"""
+    results = []
+    for _ in range(max(1, repeat)):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = run()
+            result['seconds'] = time.perf_counter() - start
+        results.append(result)
+    best = min(results, key=lambda item: item['seconds'])
+    best['runs'] = [round(item['seconds'], 4) for item in results]
+    return best
+
+
+def make_provider(backend: SyntheticBackend) -> DataProvider:
+    """冷缓存的提供者"""
+    return DataProvider(backend, cache=SymbolCache())
+
+
+def bench_magic_formula(backend: SyntheticBackend, workdir: str) -> Dict:
+    """神奇公式完整流程"""
+    provider = make_provider(backend)
+    screener = MagicFormulaScreener(provider=provider, rate_limit=NO_LIMIT)
+    screener.snapshot_store = SnapshotStore(os.path.join(workdir, 'snapshots'))
+    screener.result_path = os.path.join(workdir, 'magic_formula_results.csv')
+    result = screener.run()
+    return {'selected': 0 if result is None else len(result), **provider.stats}
+
+
+def bench_schloss(backend: SyntheticBackend, workdir: str) -> Dict:
+    """施洛斯选股完整流程"""
+    provider = make_provider(backend)
+    screener = SchlossStockScreening(max_workers=4, rate_limit=NO_LIMIT, provider=provider)
+    screener.snapshot_store = SnapshotStore(os.path.join(workdir, 'snapshots'))
+    screener.result_path_csv = os.path.join(workdir, 'schloss_results.csv')
+    result = screener.run()
+    return {'selected': 0 if result is None else len(result), **provider.stats}
+
+
+def vcp_symbols(backend: SyntheticBackend) -> List[str]:
+    """参与 VCP 筛选的沪深主板股票"""
+    codes = filter_tradable(backend.spot())['代码']
+    return [exchange_symbol(code) for code in codes if code[:2] in ('00', '60')]
+
+
+def bench_vcp(backend: SyntheticBackend, workdir: str, workers: int, repeat: int) -> Dict:
+    """先计时写入全部日线，再计时日线已是最新时的第二阶段筛选"""
+    symbols = vcp_symbols(backend)
+    start_date = backend.dates[0].strftime('%Y%m%d')
+    end_date = backend.dates[-1].strftime('%Y%m%d')
+    state = {}
+
+    def fill() -> Dict:
+        root = tempfile.mkdtemp(dir=workdir)
+        provider = make_provider(backend)
+        state['store'] = store = provider.bar_store(root, start_date=start_date)
+        rows = store.update_many(symbols, end_date)
+        return {'symbols': len(rows), **provider.stats}
+
+    def screen() -> Dict:
+        passed = stage2_screen(symbols, state['store'], workers=workers, end_date=end_date)
+        return {'symbols': len(symbols), 'selected': len(passed)}
+
+    return {'vcp_bars': best_of(repeat, fill), 'vcp_screen': best_of(repeat, screen)}
+
+
+def make_handler(n_reports: int, size: int):
+    """公告列表与 PDF 的本地替身服务"""
+    body = b'%PDF' + b'0' * (size - 4)
+
+    class Handler(BaseHTTPRequestHandler):
+        """``/list?fundcode=`` 返回 ``n_reports`` 条公告，``/pdf/<ID>`` 返回固定内容"""
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):  # noqa: N802
+            """处理 GET 请求"""
+            path, _, query = self.path.partition('?')
+            if path == '/list':
+                params = dict(item.split('=', 1) for item in query.split('&'))
+                code = params['fundcode']
+                data = json.dumps({'Data': [{'ID': f'{code}{i:04d}', 'TITLE': f'报告{i}'}
+                                            for i in range(n_reports)]}).encode()
+            else:
+                data = body
+            self.send_response(200)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            """不输出访问日志"""
+
+    return Handler
+
+
+def bench_fund_download(funds: int, reports: int, size_kb: int, workers: int,
+                        repeat: int, workdir: str) -> Dict:
+    """调度器从本地服务下载全部基金报告"""
+    try:
+        from src.fund_scheduler import FundScheduler  # pylint: disable=import-outside-toplevel
+    except ImportError as err:
+        return {'skipped': f'缺少依赖: {err}'}
+
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), make_handler(reports, size_kb * 1024))
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f'http://127.0.0.1:{httpd.server_address[1]}'
+    codes = [f'{i:06d}' for i in range(funds)]
+
+    def run() -> Dict:
+        scheduler = FundScheduler(tempfile.mkdtemp(dir=workdir), workers=workers, rates={},
+                                  progress_every=0, list_url=f'{base}/list',
+                                  pdf_url=base + '/pdf/{}')
+        scheduler.run(codes)
+        stats = scheduler.stats.snapshot()
+        return {'files': stats['files_done'], 'failed': stats['files_failed'],
+                'bytes': stats['bytes']}
+
+    try:
+        return best_of(repeat, run)
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+
+def git_commit() -> str:
+    """当前提交，不在 git 仓库中时为空"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, check=True,
+                              capture_output=True, text=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def run_all(args: argparse.Namespace) -> Dict:
+    """运行选中的基准，返回可写入 JSON 的结果"""
+    backend = SyntheticBackend(args.stocks, args.days, seed=args.seed)
+    selected = set(args.only or ['magic_formula', 'schloss', 'vcp', 'fund_download'])
+    results: Dict[str, Dict] = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        start = time.perf_counter()
+        backend.spot()
+        results['synthesize'] = {'seconds': time.perf_counter() - start}
+        if 'magic_formula' in selected:
+            results['magic_formula'] = best_of(
+                args.repeat, lambda: bench_magic_formula(backend, workdir))
+        if 'schloss' in selected:
+            results['schloss'] = best_of(args.repeat, lambda: bench_schloss(backend, workdir))
+        if 'vcp' in selected:
+            results.update(bench_vcp(backend, workdir, args.workers, args.repeat))
+        if 'fund_download' in selected:
+            results['fund_download'] = bench_fund_download(
+                args.funds, args.reports, args.size_kb, args.download_workers, args.repeat,
+                workdir)
+    for name, result in results.items():
+        if 'seconds' in result:
+            print(f"{name:<14} {result['seconds']:8.3f}s")
+        else:
+            print(f"{name:<14} {result}")
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'cpus': os.cpu_count(),
+            'params': {key: value for key, value in vars(args).items()
+                       if key not in ('output', 'compare', 'threshold')},
+        },
+        'results': results,
+    }
+
+
+def compare(base_path: str, new_path: str, threshold: float) -> int:
+    """打印两次结果的耗时对比，存在超过阈值的变慢时返回 1"""
+    with open(base_path, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+    print(f"基准 {base['meta'].get('commit')} → {new['meta'].get('commit')}")
+    if base['meta'].get('params') != new['meta'].get('params'):
+        print("警告: 两次运行的参数不同")
+    regressions = []
+    for name, result in new['results'].items():
+        before = base['results'].get(name, {}).get('seconds')
+        after = result.get('seconds')
+        if before is None or after is None:
+            continue
+        ratio = after / before if before > 0 else float('inf')
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  变慢'
+            regressions.append(name)
+        print(f"{name:<14} {before:8.3f}s → {after:8.3f}s  x{ratio:.2f}{flag}")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    """命令行入口"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--stocks', type=int, default=5000)
+    parser.add_argument('--days', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=1, help='每项运行次数，取最快一次')
+    parser.add_argument('--workers', type=int, default=1, help='VCP 筛选进程数')
+    parser.add_argument('--funds', type=int, default=20)
+    parser.add_argument('--reports', type=int, default=20, help='每只基金的公告数')
+    parser.add_argument('--size-kb', type=int, default=256)
+    parser.add_argument('--download-workers', type=int, default=16)
+    parser.add_argument('--only', nargs='+',
+                        choices=['magic_formula', 'schloss', 'vcp', 'fund_download'])
+    parser.add_argument('--output', default='', help='结果 JSON 路径')
+    parser.add_argument('--compare', nargs=2, metavar=('BASE', 'NEW'),
+                        help='比较两个结果文件')
+    parser.add_argument('--threshold', type=float, default=0.1, help='判定变慢的相对阈值')
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+    report = run_all(args)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"结果已保存到 {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,206 @@
+"""异步基金报告下载引擎
+
+``fund_downloader.download_file`` 为每个 PDF 起一个线程、单独发起 ``requests.get``，
+并通过 ``response.content`` 把整个文件读入内存后再写盘。这里改为：
+
+- 全部请求共用一个保持连接的 ``aiohttp.ClientSession``（连接池）
+- 用信号量限制同时进行的下载数
+- 按块读取响应并直接写入临时文件，完成后原子重命名，空文件不会留在目录中
+- 中断后保留 ``.part`` 文件，下次用 ``Range`` 请求从断点继续
+- 可按域名设置令牌桶限速（复用 ``financial_fetcher.TokenBucket``）
+"""
+
+import asyncio
+import hashlib
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp  # pylint: disable=import-error
+except ImportError:
+    aiohttp = None
+
+try:
+    from src.financial_fetcher import TokenBucket
+    from src.fund_api import HEADERS, LIST_URL, PDF_URL, list_params
+except ImportError:  # 作为脚本直接运行时
+    from financial_fetcher import TokenBucket
+    from fund_api import HEADERS, LIST_URL, PDF_URL, list_params
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+# 单个下载失败时记录并继续的异常
+DOWNLOAD_ERRORS = (OSError, asyncio.TimeoutError) + ((aiohttp.ClientError,) if aiohttp else ())
+
+
+class AsyncDownloader:
+    """共享连接池、限制并发的异步下载器
+
+    需在 ``async with`` 中使用::
+
+        async with AsyncDownloader(concurrency=16) as downloader:
+            await downloader.download_many(jobs)
+
+    Args:
+        concurrency: 同时进行的请求数，同时也是连接池大小
+        chunk_size: 每次读取并写入的字节数
+        timeout: 单个请求的超时时间（秒）
+        headers: 请求头，默认为 ``fund_api.HEADERS``
+        limiters: 按域名（如 ``pdf.dfcfw.com``）的令牌桶，请求前等待令牌
+    """
+
+    def __init__(self, concurrency: int = 8, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 timeout: float = 30, headers: Optional[Dict[str, str]] = None,
+                 limiters: Optional[Dict[str, TokenBucket]] = None):
+        if aiohttp is None:
+            raise ImportError("缺少依赖 aiohttp")
+        self.concurrency = max(1, concurrency)
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.headers = HEADERS if headers is None else headers
+        self.limiters = limiters or {}
+        self.errors: Dict[str, str] = {}
+        self.bytes_downloaded = 0
+        self.throttled = 0.0
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def __aenter__(self) -> "AsyncDownloader":
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        self._session = aiohttp.ClientSession(
+            connector=connector, headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout))
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self._session.close()
+        self._session = None
+
+    async def _throttle(self, url: str) -> None:
+        """按域名限速；在占用并发名额之前等待，等待期间不占用连接"""
+        bucket = self.limiters.get(urlsplit(url).hostname)
+        if bucket is None:
+            return
+        wait = bucket.reserve()
+        if wait > 0:
+            self.throttled += wait
+            await asyncio.sleep(wait)
+
+    async def get_json(self, url: str, params=None):
+        """请求 JSON 接口"""
+        await self._throttle(url)
+        async with self._semaphore:
+            async with self._session.get(url, params=params) as response:
+                response.raise_for_status()
+                # 接口返回的 Content-Type 不一定是 application/json
+                return await response.json(content_type=None)
+
+    async def fetch(self, url: str, path: str, resume: bool = False) -> Tuple[int, str]:
+        """流式下载到 ``path``，返回 (字节数, sha256)；内容为空时不保留文件
+
+        ``resume`` 为 True 时若存在上次未完成的 ``.part`` 文件，则请求剩余部分并追加；
+        服务器不支持 ``Range`` 时从头下载。
+        """
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f'{path}.part'
+        digest = hashlib.sha256()
+        offset = 0
+        if resume and os.path.exists(tmp_path):
+            with open(tmp_path, 'rb') as f:
+                for block in iter(lambda: f.read(self.chunk_size), b''):
+                    digest.update(block)
+                    offset += len(block)
+        headers = {'Range': f'bytes={offset}-'} if offset else None
+        size = offset
+        transferred = 0
+        await self._throttle(url)
+        async with self._semaphore:
+            async with self._session.get(url, headers=headers) as response:
+                # 416 说明 .part 已是完整文件，只差重命名
+                if not (offset and response.status == 416):
+                    response.raise_for_status()
+                    if offset and response.status != 206:
+                        # 服务器忽略了 Range，从头写
+                        digest, size = hashlib.sha256(), 0
+                    with open(tmp_path, 'ab' if size else 'wb') as f:
+                        async for chunk in response.content.iter_chunked(self.chunk_size):
+                            f.write(chunk)
+                            digest.update(chunk)
+                            transferred += len(chunk)
+                    size += transferred
+        self.bytes_downloaded += transferred
+        if size == 0:
+            os.remove(tmp_path)
+            return 0, ''
+        os.replace(tmp_path, path)
+        return size, digest.hexdigest()
+
+    async def download(self, url: str, path: str) -> int:
+        """流式下载到 ``path``，返回写入的字节数；内容为空时不保留文件"""
+        size, _ = await self.fetch(url, path)
+        return size
+
+    async def _download_safe(self, url: str, path: str) -> int:
+        try:
+            return await self.download(url, path)
+        except DOWNLOAD_ERRORS as err:
+            self.errors[url] = repr(err)
+            if os.path.exists(f'{path}.part'):
+                os.remove(f'{path}.part')
+            return 0
+
+    async def download_many(self, jobs: Iterable[Tuple[str, str]]) -> Dict[str, int]:
+        """并发下载 ``(url, path)`` 列表，返回每个路径写入的字节数，失败记录在 ``errors``"""
+        jobs = list(jobs)
+        sizes = await asyncio.gather(*(self._download_safe(url, path) for url, path in jobs))
+        return {path: size for (_, path), size in zip(jobs, sizes)}
+
+    async def list_reports(self, code: str, list_url: str = LIST_URL) -> List[Dict]:
+        """获取基金的公告列表"""
+        data = await self.get_json(list_url, params=list_params(code))
+        return data.get('Data') or []
+
+    async def fetch_fund_reports(self, code: str, root: str = '.', list_url: str = LIST_URL,
+                                 pdf_url: str = PDF_URL) -> Dict[str, int]:
+        """下载一只基金的全部 PDF 报告到 ``root/code/标题.pdf``"""
+        reports = await self.list_reports(code, list_url)
+        jobs = [(pdf_url.format(item['ID']), os.path.join(root, code, f"{item['TITLE']}.pdf"))
+                for item in reports]
+        return await self.download_many(jobs)
+
+
+def download_all(jobs: Iterable[Tuple[str, str]], concurrency: int = 8,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, int]:
+    """同步入口：并发下载 ``(url, path)`` 列表"""
+    async def _run():
+        async with AsyncDownloader(concurrency, chunk_size) as downloader:
+            sizes = await downloader.download_many(jobs)
+            for url, err in downloader.errors.items():
+                print(f"下载 {url} 失败: {err}")
+            return sizes
+    return asyncio.run(_run())
+
+
+def download_funds(codes: Iterable[str], root: str = '.', concurrency: int = 8) -> Dict[str, int]:
+    """同步入口：依次列出并下载多只基金的报告，返回每只基金下载的文件数"""
+    async def _run():
+        counts = {}
+        async with AsyncDownloader(concurrency) as downloader:
+            for code in codes:
+                sizes = await downloader.fetch_fund_reports(code, root)
+                counts[code] = sum(1 for size in sizes.values() if size)
+                print(f'{code} 的 pdf 全部下载完毕并存储在文件夹 {os.path.join(root, code)} 里面')
+        return counts
+    return asyncio.run(_run())
+
+
+def main() -> None:
+    """演示用异步引擎下载指定基金代码的 PDF 报告。"""
+    download_funds(['110011', '161725'])
+
+
+if __name__ == '__main__':
+    main()
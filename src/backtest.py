@@ -0,0 +1,366 @@
+"""选股策略的时点回测
+
+按调仓日（默认每月最后一个交易日）重放选股：
+
+- 财务指标只在公告日之后可见。数据中有 ``公告日期`` 列时直接使用，否则按法定披露
+  截止日推算（一季报 4 月 30 日、半年报 8 月 31 日、三季报 10 月 31 日、
+  年报次年 4 月 30 日），避免用到当时尚未公布的数据
+- 市盈率、市净率、总市值由调仓日收盘价与当时可见的每股收益、每股净资产、股本计算
+- 全部调仓日 × 全部股票的特征拼成一张长表，规则（``rules.RuleSet``）与排名一次算完，
+  持有期收益由价格面板向量化计算
+- 调仓日没有价格（停牌或退市）的股票不能买卖，已持有的继续持有并按最后成交价计值
+
+策略是一个函数，输入 ``FeaturePanel``，返回 (调仓日 × 股票) 的目标权重。
+``magic_formula_strategy`` 与 ``schloss_strategy`` 复用两个选股器的默认规则。
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+try:
+    from src.magic_formula import MAGIC_FORMULA_PREFILTER, MAGIC_FORMULA_RULES
+    from src.rules import RuleSet
+    from src.walter_schloss import SCHLOSS_RULES
+except ImportError:  # 作为脚本直接运行时
+    from magic_formula import MAGIC_FORMULA_PREFILTER, MAGIC_FORMULA_RULES
+    from rules import RuleSet
+    from walter_schloss import SCHLOSS_RULES
+
+# 财务指标列名 → 选股器使用的列名
+FUNDAMENTAL_COLUMNS = {
+    '摊薄每股收益(元)': '每股收益',
+    '每股净资产_调整后(元)': '每股净资产',
+    '净资产收益率(%)': '净资产收益率',
+    '资产负债率(%)': '资产负债率',
+    '净利润增长率(%)': '净利润同比增长率',
+}
+
+# 报告期月份 → (披露截止月份, 截止日, 是否在次年)
+DISCLOSURE_DEADLINES = {3: (4, 30, False), 6: (8, 31, False), 9: (10, 31, False),
+                        12: (4, 30, True)}
+
+Strategy = Callable[['FeaturePanel'], np.ndarray]
+
+# pandas 2.2 起月末频率写作 'ME'，更早的版本只认 'M'
+try:
+    pd.tseries.frequencies.to_offset('ME')
+    MONTH_END = 'ME'
+except ValueError:
+    MONTH_END = 'M'
+
+
+def publication_dates(periods: pd.Series) -> pd.Series:
+    """按法定披露截止日推算报告期的公告日期"""
+    periods = pd.to_datetime(periods)
+    months = periods.dt.month
+    if not months.isin(list(DISCLOSURE_DEADLINES)).all():
+        raise ValueError("报告期必须为季末日期")
+    deadline = pd.DataFrame({
+        'year': periods.dt.year + months.map(lambda m: int(DISCLOSURE_DEADLINES[m][2])),
+        'month': months.map(lambda m: DISCLOSURE_DEADLINES[m][0]),
+        'day': months.map(lambda m: DISCLOSURE_DEADLINES[m][1]),
+    })
+    return pd.to_datetime(deadline).set_axis(periods.index)
+
+
+def point_in_time(fundamentals: pd.DataFrame, dates: pd.DatetimeIndex,
+                  codes: pd.Index, columns: Iterable[str],
+                  lag_days: int = 0) -> Dict[str, np.ndarray]:
+    """各调仓日可见的最新一期财务指标，返回 列名 → (调仓日 × 股票) 数组
+
+    同一天公告多期报告时（如年报与一季报）取报告期较晚的一期。额外返回
+    ``报告期季度``（1-4），用于把累计的每股收益年化。
+    """
+    frame = fundamentals[fundamentals['代码'].isin(codes)].copy()
+    frame['日期'] = pd.to_datetime(frame['日期'])
+    if '公告日期' in frame.columns:
+        published = pd.to_datetime(frame['公告日期'])
+    else:
+        published = publication_dates(frame['日期'])
+    frame['_visible'] = published + pd.Timedelta(days=lag_days)
+    frame['报告期季度'] = frame['日期'].dt.month // 3
+    frame = frame.sort_values(['_visible', '日期']).drop_duplicates(['_visible', '代码'],
+                                                                    keep='last')
+    frame = frame.reset_index(drop=True)
+    # 公告日 × 股票的行号表，前向填充后按调仓日取行：各列取自同一期报告，
+    # 最新一期缺少某列时不会混入上一期的值
+    index = pd.DatetimeIndex(frame['_visible'].drop_duplicates().sort_values())
+    pointer = frame.assign(_row=np.arange(len(frame), dtype=np.float64)).pivot(
+        index='_visible', columns='代码', values='_row')
+    pointer = pointer.reindex(index=index, columns=codes).ffill().to_numpy(
+        dtype=np.float64, na_value=np.nan)
+    positions = index.searchsorted(dates, side='right') - 1
+    rows = np.full((len(dates), len(codes)), np.nan)
+    visible = positions >= 0
+    rows[visible] = pointer[positions[visible]]
+    # 尚无可见报告的位置指向末尾追加的 NaN
+    rows = np.where(np.isnan(rows), len(frame), rows).astype(np.intp)
+    result = {}
+    for column in list(columns) + ['报告期季度']:
+        if column not in frame.columns:
+            continue
+        values = frame[column].to_numpy(dtype=np.float64, na_value=np.nan)
+        result[column] = np.append(values, np.nan)[rows]
+    return result
+
+
+class FeaturePanel:
+    """(调仓日 × 股票) 的特征面板
+
+    Attributes:
+        dates: 调仓日
+        codes: 股票代码
+        arrays: 列名 → 二维数组
+        tradable: 调仓日有价格的股票
+    """
+
+    def __init__(self, dates: pd.DatetimeIndex, codes: pd.Index,
+                 arrays: Dict[str, np.ndarray], tradable: np.ndarray):
+        self.dates = dates
+        self.codes = codes
+        self.arrays = arrays
+        self.tradable = tradable
+        self._frame: Optional[pd.DataFrame] = None
+
+    @property
+    def shape(self):
+        """(调仓日数, 股票数)"""
+        return self.tradable.shape
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.arrays[column]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.arrays
+
+    def frame(self) -> pd.DataFrame:
+        """全部 (调仓日, 股票) 行的长表，供规则一次求值；只构造一次"""
+        if self._frame is None:
+            self._frame = pd.DataFrame({name: values.ravel()
+                                        for name, values in self.arrays.items()})
+        return self._frame
+
+    def screen(self, rules: RuleSet) -> np.ndarray:
+        """规则在全部调仓日上的通过掩码（不可交易的股票不通过）"""
+        mask = rules.evaluate(self.frame()).mask.reshape(self.shape)
+        return mask & self.tradable
+
+
+def equal_weight(selected: np.ndarray) -> np.ndarray:
+    """每个调仓日对选中的股票等权"""
+    counts = selected.sum(axis=1, keepdims=True)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(selected, 1.0 / counts, 0.0)
+
+
+def hold_untradable(weights: np.ndarray, tradable: np.ndarray) -> np.ndarray:
+    """调仓日停牌或退市（无价格）的股票无法买卖：已持有的沿用上期权重，其余不持有，
+    可交易股票的权重按剩余仓位等比缩小"""
+    held = np.where(tradable, weights, 0.0)
+    for row in range(1, len(held)):
+        stuck = ~tradable[row] & (held[row - 1] > 0)
+        if not stuck.any():
+            continue
+        held[row, stuck] = held[row - 1, stuck]
+        free = max(1.0 - held[row, stuck].sum(), 0.0)
+        total = held[row, tradable[row]].sum()
+        if total > free:
+            held[row, tradable[row]] *= free / total
+    return held
+
+
+def top_by_rank(scores: np.ndarray, top: int) -> np.ndarray:
+    """每个调仓日分数最小的 ``top`` 只（NaN 不选），并列时保留先出现的"""
+    order = pd.DataFrame(scores).rank(axis=1, method='first').to_numpy()
+    return order <= top
+
+
+def magic_formula_strategy(top: int = 50, rules: Optional[RuleSet] = None,
+                           prefilter: Optional[RuleSet] = None) -> Strategy:
+    """神奇公式：与选股器相同先做预筛选（市值、市盈率），过滤后按 ROIC 与盈利收益率的
+    名次之和取前 ``top`` 只，等权持有。未提供股本时没有总市值，市值条件被跳过"""
+    rules = MAGIC_FORMULA_RULES if rules is None else rules
+    prefilter = MAGIC_FORMULA_PREFILTER if prefilter is None else prefilter
+
+    def strategy(panel: FeaturePanel) -> np.ndarray:
+        valid = panel.screen(prefilter) & panel.screen(rules)
+        roic = np.where(valid, panel['ROIC_proxy'], np.nan)
+        earnings_yield = np.where(valid, panel['earnings_yield'], np.nan)
+        score = (pd.DataFrame(roic).rank(axis=1, ascending=False).to_numpy()
+                 + pd.DataFrame(earnings_yield).rank(axis=1, ascending=False).to_numpy())
+        return equal_weight(top_by_rank(score, top))
+
+    return strategy
+
+
+def schloss_strategy(rules: Optional[RuleSet] = None) -> Strategy:
+    """施洛斯：通过全部条件的股票等权持有"""
+    rules = SCHLOSS_RULES if rules is None else rules
+
+    def strategy(panel: FeaturePanel) -> np.ndarray:
+        return equal_weight(panel.screen(rules))
+
+    return strategy
+
+
+def performance(returns: pd.Series, periods_per_year: float) -> Dict[str, float]:
+    """累计收益、年化收益、年化波动、夏普比率（无风险利率为 0）与最大回撤"""
+    if returns.empty:
+        return {'total_return': 0.0, 'cagr': 0.0, 'volatility': 0.0, 'sharpe': 0.0,
+                'max_drawdown': 0.0}
+    wealth = (1.0 + returns).cumprod()
+    years = len(returns) / periods_per_year
+    volatility = float(returns.std(ddof=0) * np.sqrt(periods_per_year))
+    drawdown = 1.0 - wealth / np.maximum(wealth.cummax(), 1.0)
+    return {
+        'total_return': float(wealth.iloc[-1] - 1.0),
+        'cagr': float(wealth.iloc[-1] ** (1.0 / years) - 1.0) if wealth.iloc[-1] > 0 else -1.0,
+        'volatility': volatility,
+        'sharpe': float(returns.mean() * periods_per_year / volatility) if volatility else 0.0,
+        'max_drawdown': float(drawdown.max()),
+    }
+
+
+class BacktestResult:
+    """回测结果
+
+    Attributes:
+        returns: 每个持有期的组合收益（索引为持有期结束日）
+        benchmark: 同期全部可交易股票等权的收益
+        weights: (调仓日 × 股票) 目标权重
+        holdings: 每个调仓日的持股数
+        turnover: 每个调仓日的单边换手率
+    """
+
+    def __init__(self, returns: pd.Series, benchmark: pd.Series, weights: np.ndarray,
+                 dates: pd.DatetimeIndex, codes: pd.Index, turnover: np.ndarray,
+                 periods_per_year: float):
+        self.returns = returns
+        self.benchmark = benchmark
+        self.weights = weights
+        self.dates = dates
+        self.codes = codes
+        self.holdings = pd.Series((weights > 0).sum(axis=1), index=dates, name='holdings')
+        self.turnover = pd.Series(turnover, index=dates, name='turnover')
+        self.periods_per_year = periods_per_year
+
+    def stats(self) -> Dict[str, float]:
+        """组合与基准的绩效指标"""
+        stats = performance(self.returns, self.periods_per_year)
+        stats.update({f'benchmark_{key}': value for key, value in
+                      performance(self.benchmark, self.periods_per_year).items()})
+        stats['avg_holdings'] = float(self.holdings.iloc[:-1].mean()) if len(self.holdings) > 1 \
+            else 0.0
+        stats['avg_turnover'] = float(self.turnover.iloc[:-1].mean()) if len(self.turnover) > 1 \
+            else 0.0
+        return stats
+
+    def positions(self, date) -> pd.Series:
+        """某个调仓日的目标持仓权重"""
+        row = self.dates.get_loc(pd.Timestamp(date))
+        weights = pd.Series(self.weights[row], index=self.codes)
+        return weights[weights > 0]
+
+
+class Backtester:
+    """时点回测引擎
+
+    Args:
+        prices: (交易日 × 股票代码) 收盘价面板，如 ``BarStore.load_panel`` 的结果
+        fundamentals: 财务指标长表，含 ``代码``、``日期``（报告期），可选 ``公告日期``
+        shares: 股票代码 → 总股本，用于计算总市值；不提供时市值条件被跳过
+        lag_days: 公告后再延迟的天数
+        cost_bps: 单边交易成本（基点），按每个调仓日的成交金额扣除
+    """
+
+    def __init__(self, prices: pd.DataFrame, fundamentals: pd.DataFrame,
+                 shares: Optional[pd.Series] = None, lag_days: int = 0,
+                 cost_bps: float = 0.0):
+        self.prices = prices.sort_index()
+        self.codes = pd.Index(self.prices.columns.astype(str))
+        self.fundamentals = fundamentals.rename(columns=FUNDAMENTAL_COLUMNS)
+        self.fundamentals = self.fundamentals.assign(代码=self.fundamentals['代码'].astype(str))
+        self.shares = shares
+        self.lag_days = lag_days
+        self.cost_bps = cost_bps
+        self._filled = self.prices.ffill()
+
+    def rebalance_dates(self, freq: str = MONTH_END, start: Optional[str] = None,
+                        end: Optional[str] = None) -> pd.DatetimeIndex:
+        """每个周期内最后一个交易日"""
+        index = self.prices.index
+        if start is not None:
+            index = index[index >= pd.Timestamp(start)]
+        if end is not None:
+            index = index[index <= pd.Timestamp(end)]
+        last = pd.Series(index, index=index).resample(freq).last().dropna()
+        return pd.DatetimeIndex(last.to_numpy())
+
+    def features(self, dates: pd.DatetimeIndex) -> FeaturePanel:
+        """调仓日的特征面板：时点财务指标与由价格计算的估值"""
+        price = self._filled.reindex(dates).to_numpy(dtype=np.float64, na_value=np.nan)
+        arrays = point_in_time(self.fundamentals, dates, self.codes,
+                               [column for column in self.fundamentals.columns
+                                if column not in ('代码', '日期', '公告日期')],
+                               self.lag_days)
+        arrays['最新价'] = price
+        with np.errstate(invalid='ignore', divide='ignore'):
+            if '每股收益' in arrays:
+                # 累计每股收益按报告期年化（动态市盈率）
+                annual = arrays['每股收益'] * 4.0 / arrays['报告期季度']
+                arrays['市盈率-动态'] = np.where(annual != 0, price / annual, np.nan)
+            if '每股净资产' in arrays:
+                arrays['市净率'] = np.where(arrays['每股净资产'] > 0,
+                                         price / arrays['每股净资产'], np.nan)
+            if self.shares is not None:
+                shares = self.shares.reindex(self.codes).to_numpy(dtype=np.float64)
+                arrays['总市值'] = price * shares
+            # 与 MagicFormulaScreener.calculate_magic_formula_metrics 一致
+            if '市盈率-动态' in arrays:
+                pe = arrays['市盈率-动态']
+                arrays['earnings_yield'] = np.where(np.isfinite(pe) & (pe != 0), 1.0 / pe, 0.0)
+                arrays['ROIC_proxy'] = arrays.get('净资产收益率', arrays['earnings_yield'])
+        # 估值用最近一次收盘价，可交易与否看调仓日当天是否有价格
+        tradable = self.prices.reindex(dates).notna().to_numpy()
+        return FeaturePanel(dates, self.codes, arrays, tradable)
+
+    def run(self, strategy: Strategy, freq: str = MONTH_END, start: Optional[str] = None,
+            end: Optional[str] = None, panel: Optional[FeaturePanel] = None) -> BacktestResult:
+        """按调仓日运行策略；传入 ``panel`` 时复用已计算的特征"""
+        if panel is None:
+            panel = self.features(self.rebalance_dates(freq, start, end))
+        dates = panel.dates
+        weights = hold_untradable(np.nan_to_num(np.asarray(strategy(panel), dtype=np.float64)),
+                                  panel.tradable)
+
+        # 前向填充的收盘价：持有期内停牌的股票按最后成交价计值，复牌后的涨跌计入复牌所在的持有期
+        price = panel['最新价']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            forward = price[1:] / price[:-1] - 1.0
+        forward = np.where(np.isfinite(forward), forward, 0.0)
+        gross = (weights[:-1] * forward).sum(axis=1)
+        previous = np.vstack([np.zeros((1, weights.shape[1])), weights[:-1]])
+        traded = np.abs(weights - previous).sum(axis=1)
+        turnover = traded / 2.0
+        net = gross - traded[:-1] * self.cost_bps / 1e4
+
+        tradable = panel.tradable[:-1]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            benchmark = (forward * tradable).sum(axis=1) / tradable.sum(axis=1)
+        periods_per_year = 365.25 / max(np.diff(dates.values).mean() / np.timedelta64(1, 'D'),
+                                        1.0) if len(dates) > 1 else 12.0
+        return BacktestResult(pd.Series(net, index=dates[1:], name='return'),
+                              pd.Series(np.nan_to_num(benchmark), index=dates[1:],
+                                        name='benchmark'),
+                              weights, dates, panel.codes, turnover, periods_per_year)
+
+    def run_many(self, strategies: Dict[str, Strategy], freq: str = MONTH_END,
+                 start: Optional[str] = None, end: Optional[str] = None) -> pd.DataFrame:
+        """在同一组调仓日上运行多个策略（特征只计算一次），返回每个策略一行的绩效表"""
+        panel = self.features(self.rebalance_dates(freq, start, end))
+        rows: List[Dict[str, float]] = []
+        for name, strategy in strategies.items():
+            rows.append({'strategy': name, **self.run(strategy, panel=panel).stats()})
+        return pd.DataFrame(rows).set_index('strategy')
@@ -0,0 +1,190 @@
+"""本地日线行情存储
+
+按股票保存日线 OHLCV 数据（列式文件），并在索引文件中记录每只股票最后保存的日期。
+更新时只请求缺失的尾部数据，同时重新请求最近几根 K 线与本地比较：
+前复权（qfq）价格在除权除息后会整体调整，重叠部分不一致时说明复权因子变化，
+此时重新获取全部历史并覆盖本地文件。
+
+读取时只加载需要的列，``load_panel`` 可把大量股票的某一列拼成 (日期 × 股票) 面板。
+"""
+
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+try:
+    import akshare as ak  # pylint: disable=import-error
+except ImportError:
+    ak = None
+
+try:
+    import pyarrow  # noqa: F401  pylint: disable=import-error,unused-import
+    _HAS_ARROW = True
+except ImportError:
+    _HAS_ARROW = False
+
+try:
+    from src.snapshot_store import FORMATS, read_frame, write_frame
+except ImportError:  # 作为脚本直接运行时
+    from snapshot_store import FORMATS, read_frame, write_frame
+
+INDEX_FILE = '_index.json'
+
+
+class BarStore:
+    """按股票保存的日线存储
+
+    Args:
+        root: 存储目录
+        fetch_func: 形如 ``ak.stock_zh_a_daily`` 的函数，默认使用 akshare
+        adjust: 复权方式，传给 ``fetch_func``
+        start_date: 首次获取时的起始日期（``YYYYMMDD``），默认约两年前
+        overlap: 增量更新时重新请求并比对的 K 线数量
+        rtol: 判断重叠部分价格一致的相对误差
+        fmt: 文件格式，默认有 pyarrow 时用 feather，否则用 pickle
+    """
+
+    def __init__(self, root: str, fetch_func: Optional[Callable[..., pd.DataFrame]] = None,
+                 adjust: str = 'qfq', start_date: Optional[str] = None, overlap: int = 5,
+                 rtol: float = 1e-4, fmt: Optional[str] = None):
+        if fetch_func is None:
+            if ak is None:
+                raise ImportError("缺少依赖 akshare，请传入 fetch_func")
+            fetch_func = ak.stock_zh_a_daily
+        self.root = root
+        self.fetch_func = fetch_func
+        self.adjust = adjust
+        self.start_date = start_date or (datetime.now() - timedelta(days=730)).strftime('%Y%m%d')
+        self.overlap = max(1, overlap)
+        self.rtol = rtol
+        self.fmt = fmt or ('feather' if _HAS_ARROW else 'pickle')
+        os.makedirs(root, exist_ok=True)
+        self._index_path = os.path.join(root, INDEX_FILE)
+        self.index: Dict[str, Dict] = self._load_index()
+        self.restatements: List[str] = []
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if not os.path.exists(self._index_path):
+            return {}
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as err:
+            print(f"读取行情索引失败，将按文件重建: {err}")
+            return {}
+
+    def save_index(self) -> None:
+        """写回索引文件"""
+        tmp_path = f'{self._index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=0)
+        os.replace(tmp_path, self._index_path)
+
+    def path(self, symbol: str) -> str:
+        """股票数据文件路径"""
+        return os.path.join(self.root, f'{symbol}{FORMATS[self.fmt]}')
+
+    def last_date(self, symbol: str) -> Optional[str]:
+        """最后保存的日期（``YYYY-MM-DD``），没有数据时返回 None"""
+        entry = self.index.get(symbol)
+        return entry['last_date'] if entry else None
+
+    def load(self, symbol: str, columns: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+        """读取本地日线，``columns`` 为需要的列（``date`` 列总会加载）"""
+        path = self.path(symbol)
+        if not os.path.exists(path):
+            return None
+        if columns is not None:
+            columns = ['date'] + [col for col in columns if col != 'date']
+        return read_frame(path, self.fmt, columns)
+
+    def _fetch(self, symbol: str, start_date: str, end_date: str) -> pd.DataFrame:
+        bars = self.fetch_func(symbol=symbol, start_date=start_date, end_date=end_date,
+                               adjust=self.adjust)
+        if bars is None or bars.empty:
+            return pd.DataFrame()
+        bars = bars.copy()
+        bars['date'] = pd.to_datetime(bars['date'])
+        return bars.sort_values('date').reset_index(drop=True)
+
+    def _write(self, symbol: str, bars: pd.DataFrame) -> None:
+        write_frame(bars, self.path(symbol), self.fmt)
+        self.index[symbol] = {
+            'last_date': bars['date'].iloc[-1].strftime('%Y-%m-%d'),
+            'rows': len(bars),
+        }
+
+    def _restated(self, stored: pd.DataFrame, fetched: pd.DataFrame) -> bool:
+        """比较重叠日期的收盘价，不一致说明复权价格已调整"""
+        merged = stored[['date', 'close']].merge(fetched[['date', 'close']], on='date')
+        if merged.empty:
+            return True
+        return not np.allclose(merged['close_x'].to_numpy(float),
+                               merged['close_y'].to_numpy(float), rtol=self.rtol)
+
+    def update(self, symbol: str, end_date: Optional[str] = None) -> pd.DataFrame:
+        """把本地数据更新到 ``end_date``（默认今天），返回完整日线"""
+        end_date = end_date or datetime.now().strftime('%Y%m%d')
+        stored = self.load(symbol)
+        if stored is None or stored.empty:
+            bars = self._fetch(symbol, self.start_date, end_date)
+            if not bars.empty:
+                self._write(symbol, bars)
+            return bars
+
+        last = stored['date'].iloc[-1]
+        if last.strftime('%Y%m%d') >= end_date:
+            return stored
+
+        overlap_start = stored['date'].iloc[-min(self.overlap, len(stored))]
+        fetched = self._fetch(symbol, overlap_start.strftime('%Y%m%d'), end_date)
+        if fetched.empty:
+            return stored
+        if self._restated(stored, fetched):
+            print(f"{symbol} 复权价格已调整，重新获取全部历史")
+            self.restatements.append(symbol)
+            bars = self._fetch(symbol, stored['date'].iloc[0].strftime('%Y%m%d'), end_date)
+        else:
+            new_rows = fetched[fetched['date'] > last]
+            if new_rows.empty:
+                return stored
+            bars = pd.concat([stored, new_rows], ignore_index=True)
+        self._write(symbol, bars)
+        return bars
+
+    def update_many(self, symbols: Iterable[str], end_date: Optional[str] = None,
+                    progress_every: int = 100) -> Dict[str, int]:
+        """批量更新，返回每只股票更新后的行数；单只失败时跳过"""
+        symbols = list(symbols)
+        rows: Dict[str, int] = {}
+        for i, symbol in enumerate(symbols, start=1):
+            try:
+                rows[symbol] = len(self.update(symbol, end_date))
+            except (KeyError, ValueError, OSError) as err:
+                print(f"更新 {symbol} 日线时出错: {err}")
+            if progress_every and (i % progress_every == 0 or i == len(symbols)):
+                print(f"已更新 {i}/{len(symbols)} 只股票日线")
+                self.save_index()
+        self.save_index()
+        return rows
+
+    def load_panel(self, symbols: Iterable[str], field: str = 'close',
+                   start: Optional[str] = None) -> pd.DataFrame:
+        """把多只股票的某一列拼成 (日期 × 股票) 面板，只读取 ``date`` 与该列"""
+        columns = {}
+        for symbol in symbols:
+            bars = self.load(symbol, columns=[field])
+            if bars is None or bars.empty:
+                continue
+            columns[symbol] = pd.Series(bars[field].to_numpy(np.float64),
+                                        index=pd.DatetimeIndex(bars['date']))
+        if not columns:
+            return pd.DataFrame()
+        panel = pd.DataFrame(columns).sort_index()
+        if start is not None:
+            panel = panel.loc[pd.Timestamp(start):]
+        return panel
@@ -0,0 +1,221 @@
+"""紧凑的内存快照
+
+合并后的 ``stocks_data`` 保留了 ``stock_zh_a_spot_em`` 与 ``stock_financial_analysis_indicator``
+返回的全部列（字符串列与 float64），而各策略只读取其中十几列。这里只加载策略声明的列，
+并压缩类型：
+
+- 字符串列（代码、名称、行业等）转为分类类型，``CompactSnapshots`` 中多个日期共用同一份类别字典，
+  每行只存 1-2 字节的类别编号
+- float64 在相对误差不超过 ``rtol`` 时降为 float32，整数列降为能容纳取值的最小整数类型
+
+用于在内存中同时保留多个日期的快照（回测、多策略比较），``memory_report`` 报告占用。
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+try:
+    from src.rules import RuleSet
+    from src.snapshot_store import SnapshotStore, normalize_object_columns
+except ImportError:  # 作为脚本直接运行时
+    from rules import RuleSet
+    from snapshot_store import SnapshotStore, normalize_object_columns
+
+# 默认允许的 float32 相对误差（float32 本身约 6e-8）
+DEFAULT_RTOL = 1e-6
+_FLOAT32_MAX = float(np.finfo(np.float32).max)
+
+
+def strategy_columns(*sources) -> List[str]:
+    """多个策略声明的列的并集（保持首次出现的顺序）
+
+    ``sources`` 可以是带 ``SNAPSHOT_COLUMNS`` 的策略类或实例、``RuleSet`` 或列名列表。
+    """
+    columns: List[str] = []
+    for source in sources:
+        if isinstance(source, RuleSet):
+            columns.extend(source.columns)
+        elif hasattr(source, 'SNAPSHOT_COLUMNS'):
+            columns.extend(source.SNAPSHOT_COLUMNS)
+        else:
+            columns.extend(source)
+    return list(dict.fromkeys(columns))
+
+
+def fits_float32(values: np.ndarray, rtol: float = DEFAULT_RTOL) -> bool:
+    """float64 数组转为 float32 后相对误差是否都在 ``rtol`` 以内"""
+    finite = values[np.isfinite(values)]
+    if not len(finite):
+        return True
+    if np.abs(finite).max() > _FLOAT32_MAX:
+        return False
+    rounded = finite.astype(np.float32).astype(np.float64)
+    return bool(np.all(np.abs(rounded - finite) <= rtol * np.abs(finite)))
+
+
+def downcast(series: pd.Series, rtol: float = DEFAULT_RTOL) -> pd.Series:
+    """数值列降为更小的类型，其他列原样返回"""
+    dtype = series.dtype
+    if pd.api.types.is_bool_dtype(dtype) or not pd.api.types.is_numeric_dtype(dtype):
+        return series
+    if pd.api.types.is_integer_dtype(dtype):
+        return pd.to_numeric(series, downcast='integer')
+    if dtype == np.float64 and fits_float32(series.to_numpy(), rtol):
+        return series.astype(np.float32)
+    return series
+
+
+def compact_frame(frame: pd.DataFrame, columns: Optional[Sequence[str]] = None,
+                  rtol: float = DEFAULT_RTOL,
+                  categories: Optional[Dict[str, pd.CategoricalDtype]] = None) -> pd.DataFrame:
+    """只保留 ``columns``（不存在的列忽略）并压缩类型，返回新的数据表
+
+    Args:
+        frame: 原始快照
+        columns: 需要保留的列，默认全部
+        rtol: float64 降为 float32 允许的相对误差
+        categories: 列名 → 分类类型，指定的字符串列按该类型编码（不在类别中的值为缺失）
+    """
+    if columns is not None:
+        frame = frame[[column for column in columns if column in frame.columns]]
+    frame = normalize_object_columns(frame)
+    categories = categories or {}
+    data = {}
+    for column in frame.columns:
+        series = frame[column]
+        if column in categories:
+            data[column] = pd.Categorical(series, dtype=categories[column])
+        elif pd.api.types.is_string_dtype(series.dtype) or series.dtype == object:
+            data[column] = series.astype('category')
+        else:
+            data[column] = downcast(series, rtol)
+    return pd.DataFrame(data, index=frame.index)
+
+
+def memory_report(frame: pd.DataFrame) -> pd.DataFrame:
+    """各列的类型与占用字节数（含字符串与类别字典），最后一行为合计"""
+    usage = frame.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({'dtype': frame.dtypes.astype(str), 'bytes': usage})
+    report.loc['合计'] = ['', int(usage.sum())]
+    return report
+
+
+def format_bytes(size: float) -> str:
+    """可读的字节数"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f'{size:.1f} {unit}'
+        size /= 1024
+    return f'{size:.1f} GB'
+
+
+class CompactSnapshots:
+    """在内存中保留多个日期的紧凑快照，字符串列的类别字典在各日期之间共用
+
+    Args:
+        columns: 保留的列，通常为 ``strategy_columns(...)`` 的结果
+        rtol: float64 降为 float32 允许的相对误差
+    """
+
+    def __init__(self, columns: Sequence[str], rtol: float = DEFAULT_RTOL):
+        self.columns = list(columns)
+        self.rtol = rtol
+        self.frames: Dict[str, pd.DataFrame] = {}
+        self._categories: Dict[str, pd.CategoricalDtype] = {}
+
+    def __len__(self) -> int:
+        return len(self.frames)
+
+    def __contains__(self, date: str) -> bool:
+        return date in self.frames
+
+    @property
+    def dates(self) -> List[str]:
+        """已加载的日期（升序）"""
+        return sorted(self.frames)
+
+    def _extend_categories(self, frame: pd.DataFrame) -> None:
+        """把新出现的字符串取值追加到共用字典，已加载的快照只替换类型，编号不变"""
+        for column in frame.columns:
+            series = frame[column]
+            if not (pd.api.types.is_string_dtype(series.dtype) or series.dtype == object
+                    or isinstance(series.dtype, pd.CategoricalDtype)):
+                continue
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                values = pd.Index(series.cat.categories)
+            else:
+                values = pd.Index(series.dropna().unique())
+            if pd.api.types.infer_dtype(values, skipna=True) not in ('string', 'empty'):
+                continue
+            dtype = self._categories.get(column)
+            if dtype is None:
+                dtype = pd.CategoricalDtype(values)
+            else:
+                new = values[dtype.categories.get_indexer(values) < 0]
+                if not len(new):
+                    continue
+                dtype = pd.CategoricalDtype(dtype.categories.append(new))
+            self._categories[column] = dtype
+            for loaded in self.frames.values():
+                if column in loaded.columns:
+                    loaded[column] = pd.Categorical.from_codes(loaded[column].cat.codes,
+                                                               dtype=dtype)
+
+    def add(self, date: str, frame: pd.DataFrame) -> pd.DataFrame:
+        """加入（或替换）一个日期的快照，返回压缩后的数据表"""
+        frame = frame[[column for column in self.columns if column in frame.columns]]
+        frame = normalize_object_columns(frame)
+        self._extend_categories(frame)
+        compact = compact_frame(frame, rtol=self.rtol, categories=self._categories)
+        self.frames[date] = compact
+        return compact
+
+    def load(self, store: SnapshotStore, name: str,
+             dates: Optional[Iterable[str]] = None) -> List[str]:
+        """从快照存储读取 ``dates``（默认全部日期）的策略列，返回新加载的日期"""
+        loaded = []
+        for date in store.dates(name) if dates is None else dates:
+            frame = store.load(name, date, columns=self.columns)
+            if frame is not None:
+                self.add(date, frame)
+                loaded.append(date)
+        return loaded
+
+    def frame(self, date: Optional[str] = None) -> pd.DataFrame:
+        """某日（默认最新）的快照"""
+        return self.frames[date if date is not None else self.dates[-1]]
+
+    def panel(self, column: str, key: str = '代码') -> pd.DataFrame:
+        """某列的 (日期 × 股票) 面板，可直接用于回测"""
+        series = {date: self.frames[date].set_index(key)[column] for date in self.dates}
+        panel = pd.DataFrame(series).T
+        panel.columns = panel.columns.astype(str)
+        return panel
+
+    def memory(self) -> Dict[str, int]:
+        """占用字节数：各日期的数据（类别列只计编号）与共用的类别字典分开统计"""
+        data = 0
+        for frame in self.frames.values():
+            data += int(frame.index.memory_usage(deep=True))
+            for column in frame.columns:
+                series = frame[column]
+                if column in self._categories:
+                    data += series.cat.codes.nbytes
+                else:
+                    data += int(series.memory_usage(deep=True, index=False))
+        dictionary = sum(int(dtype.categories.memory_usage(deep=True))
+                         for dtype in self._categories.values())
+        rows = sum(len(frame) for frame in self.frames.values())
+        return {'snapshots': len(self.frames), 'rows': rows, 'data_bytes': data,
+                'dictionary_bytes': dictionary, 'total_bytes': data + dictionary}
+
+    def report(self) -> str:
+        """占用摘要"""
+        memory = self.memory()
+        per_row = memory['total_bytes'] / memory['rows'] if memory['rows'] else 0.0
+        return (f"紧凑快照 {memory['snapshots']} 个日期，共 {memory['rows']} 行，"
+                f"{len(self.columns)} 列；数据 {format_bytes(memory['data_bytes'])}，"
+                f"类别字典 {format_bytes(memory['dictionary_bytes'])}，"
+                f"合计 {format_bytes(memory['total_bytes'])}（每行 {per_row:.0f} 字节）")
@@ -0,0 +1,315 @@
+"""统一的行情数据提供层
+
+各策略不再直接调用 akshare，而是通过 ``DataProvider`` 读取：
+
+- ``spot()``：全市场行情快照，按 ``SymbolCache`` 的有效期复用，同一进程内多个策略只下载一次
+- ``financial(code)`` / ``financial_table(codes)``：财务分析指标，逐只缓存最新一期
+- ``daily(symbol, ...)``：日线行情，进程内按参数记忆，可作为 ``BarStore`` 的 ``fetch_func``
+
+同一数据同时被多个线程请求时只发起一次调用，其余调用方等待并共享结果。
+数据来源由后端决定：``AkshareBackend``（在线接口）、``SnapshotBackend``（本地快照与日线存储）
+或 ``FixtureBackend``（内存数据，用于测试与基准）。
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+import pandas as pd  # pylint: disable=import-error
+
+try:
+    import akshare as ak  # pylint: disable=import-error
+except ImportError:
+    ak = None
+
+try:
+    from src.bar_store import BarStore
+    from src.financial_fetcher import FinancialFetcher
+    from src.snapshot_store import SnapshotStore
+    from src.symbol_cache import SymbolCache
+except ImportError:  # 作为脚本直接运行时
+    from bar_store import BarStore
+    from financial_fetcher import FinancialFetcher
+    from snapshot_store import SnapshotStore
+    from symbol_cache import SymbolCache
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'symbol_cache.pkl')
+
+# ST、*ST 与退市整理期股票
+EXCLUDED_NAME_PATTERN = 'ST|退'
+
+
+def filter_tradable(spot: pd.DataFrame, name_column: str = '名称') -> pd.DataFrame:
+    """去掉 ST 与退市股票"""
+    return spot[~spot[name_column].astype(str).str.contains(EXCLUDED_NAME_PATTERN, na=False)]
+
+
+class AkshareBackend:
+    """akshare 在线接口"""
+
+    def __init__(self):
+        if ak is None:
+            raise ImportError("缺少依赖 akshare")
+
+    def spot(self) -> pd.DataFrame:
+        """全市场行情快照"""
+        return ak.stock_zh_a_spot_em()
+
+    def financial(self, symbol: str, start_year: str) -> pd.DataFrame:
+        """单只股票的财务分析指标"""
+        return ak.stock_financial_analysis_indicator(symbol=symbol, start_year=start_year)
+
+    def daily(self, symbol: str, start_date: str, end_date: str, adjust: str) -> pd.DataFrame:
+        """单只股票的日线行情"""
+        return ak.stock_zh_a_daily(symbol=symbol, start_date=start_date, end_date=end_date,
+                                   adjust=adjust)
+
+
+class FixtureBackend:
+    """内存数据后端
+
+    Args:
+        spot: 行情快照
+        financial: 代码 → 财务指标表
+        bars: 代码 → 日线表（含 ``date`` 列）
+    """
+
+    def __init__(self, spot: Optional[pd.DataFrame] = None,
+                 financial: Optional[Dict[str, pd.DataFrame]] = None,
+                 bars: Optional[Dict[str, pd.DataFrame]] = None):
+        self._spot = spot
+        self._financial = financial or {}
+        self._bars = bars or {}
+        self.calls: Dict[str, int] = {'spot': 0, 'financial': 0, 'daily': 0}
+
+    def spot(self) -> pd.DataFrame:
+        """行情快照"""
+        self.calls['spot'] += 1
+        if self._spot is None:
+            raise KeyError("没有行情快照数据")
+        return self._spot.copy()
+
+    def financial(self, symbol: str, start_year: str) -> pd.DataFrame:
+        """财务指标，只返回 ``日期`` 不早于 ``start_year`` 的行"""
+        self.calls['financial'] += 1
+        frame = self._financial.get(symbol)
+        if frame is None:
+            return pd.DataFrame()
+        if '日期' in frame.columns:
+            frame = frame[frame['日期'].astype(str) >= str(start_year)]
+        return frame.copy()
+
+    def daily(self, symbol: str, start_date: str, end_date: str, adjust: str) -> pd.DataFrame:
+        """日线，按日期区间截取"""
+        self.calls['daily'] += 1
+        bars = self._bars.get(symbol)
+        if bars is None:
+            return pd.DataFrame()
+        dates = pd.to_datetime(bars['date'])
+        mask = (dates >= pd.Timestamp(start_date)) & (dates <= pd.Timestamp(end_date))
+        return bars[mask.to_numpy()].reset_index(drop=True)
+
+
+class SnapshotBackend:
+    """本地数据后端：行情与财务读取 ``SnapshotStore`` 中保存的快照，日线读取 ``BarStore``
+
+    Args:
+        store: 快照存储
+        spot_name: 行情快照名称
+        financial_name: 财务快照名称（每只股票一行或多行，含 ``代码`` 列）
+        date: 快照日期，默认最新
+        bar_store: 本地日线存储
+    """
+
+    def __init__(self, store: SnapshotStore, spot_name: str = 'spot',
+                 financial_name: str = 'financial', date: Optional[str] = None,
+                 bar_store: Optional[BarStore] = None):
+        self.store = store
+        self.spot_name = spot_name
+        self.financial_name = financial_name
+        self.date = date
+        self.bar_store = bar_store
+        self._financial: Optional[Dict[str, pd.DataFrame]] = None
+
+    def spot(self) -> pd.DataFrame:
+        """已保存的行情快照"""
+        frame = self.store.load(self.spot_name, self.date)
+        if frame is None:
+            raise KeyError(f"没有快照 {self.spot_name}")
+        return frame
+
+    def financial(self, symbol: str, start_year: str) -> pd.DataFrame:
+        """已保存的财务快照中该股票的行"""
+        if self._financial is None:
+            frame = self.store.load(self.financial_name, self.date)
+            self._financial = {} if frame is None else {
+                str(code): group.drop(columns='代码').reset_index(drop=True)
+                for code, group in frame.groupby('代码', sort=False)}
+        frame = self._financial.get(symbol)
+        return pd.DataFrame() if frame is None else frame.copy()
+
+    def daily(self, symbol: str, start_date: str, end_date: str, adjust: str) -> pd.DataFrame:
+        """本地日线存储中的数据，不请求网络"""
+        if self.bar_store is None:
+            return pd.DataFrame()
+        bars = self.bar_store.load(symbol)
+        if bars is None:
+            return pd.DataFrame()
+        mask = (bars['date'] >= pd.Timestamp(start_date)) & (bars['date'] <= pd.Timestamp(end_date))
+        return bars[mask].reset_index(drop=True)
+
+
+class _Coalescer:
+    """同一键的并发调用只执行一次，其余调用方等待同一结果"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._inflight: Dict[Hashable, Future] = {}
+        self.coalesced = 0
+
+    def run(self, key: Hashable, func: Callable):
+        """执行 ``func``，同一键已有进行中的调用时等待其结果"""
+        with self._lock:
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as err:
+            future.set_exception(err)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._inflight[key]
+
+
+class DataProvider:
+    """带缓存与请求合并的数据提供者
+
+    Args:
+        backend: 数据后端，默认 ``AkshareBackend``
+        cache: 行情/财务缓存；默认 akshare 后端持久化到 ``src/symbol_cache.pkl``，
+            其他后端（测试数据、快照等）使用内存缓存，不读写该文件
+        max_bars: 进程内记忆的日线请求数
+    """
+
+    def __init__(self, backend=None, cache: Optional[SymbolCache] = None,
+                 max_bars: int = 512):
+        self.backend = backend if backend is not None else AkshareBackend()
+        if cache is None:
+            cache = SymbolCache(DEFAULT_CACHE_PATH if isinstance(self.backend, AkshareBackend)
+                                else None)
+        self.cache = cache
+        self.max_bars = max_bars
+        self._bars: "OrderedDict[tuple, pd.DataFrame]" = OrderedDict()
+        self._bars_lock = threading.Lock()
+        self._coalescer = _Coalescer()
+        self.requests: Dict[str, int] = {'spot': 0, 'financial': 0, 'daily': 0}
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """各类实际发出的请求数、被合并的调用数与缓存统计"""
+        return {**{f'{kind}_requests': count for kind, count in self.requests.items()},
+                'coalesced': self._coalescer.coalesced, **self.cache.stats}
+
+    def spot(self, refresh: bool = False) -> pd.DataFrame:
+        """全市场行情快照，缓存有效期内直接复用"""
+        if not refresh:
+            cached = self.cache.get_table('spot')
+            if cached is not None:
+                return cached
+
+        def load() -> pd.DataFrame:
+            # 等待期间其他调用方可能已刷新
+            cached = None if refresh else self.cache.get_table('spot')
+            if cached is not None:
+                return cached
+            self.requests['spot'] += 1
+            frame = self.backend.spot()
+            self.cache.put_table('spot', frame)
+            return frame
+
+        return self._coalescer.run(('spot',), load)
+
+    def tradable_spot(self, refresh: bool = False) -> pd.DataFrame:
+        """去掉 ST 与退市股票后的行情快照"""
+        return filter_tradable(self.spot(refresh))
+
+    def financial(self, symbol: str, start_year: str = "2025") -> pd.DataFrame:
+        """单只股票的财务分析指标（未缓存的原始表），同参数的并发调用只请求一次"""
+        def load() -> pd.DataFrame:
+            self.requests['financial'] += 1
+            return self.backend.financial(symbol, start_year)
+
+        return self._coalescer.run(('financial', symbol, start_year), load)
+
+    def financial_fetcher(self, start_year: str = "2025", max_workers: int = 4,
+                          rate: float = 3.0, **kwargs) -> FinancialFetcher:
+        """使用本提供者与缓存的并发财务数据获取器"""
+        return FinancialFetcher(fetch_func=self.financial, start_year=start_year,
+                                max_workers=max_workers, rate=rate, cache=self.cache, **kwargs)
+
+    def financial_table(self, codes: Iterable[str], start_year: str = "2025",
+                        max_workers: int = 4, rate: float = 3.0,
+                        progress_every: int = 50) -> pd.DataFrame:
+        """多只股票最新一期财务指标，只请求缓存中缺失或过期的股票"""
+        fetcher = self.financial_fetcher(start_year, max_workers, rate)
+        return fetcher.fetch(codes, progress_every=progress_every)
+
+    def daily(self, symbol: str, start_date: str, end_date: str,
+              adjust: str = 'qfq') -> pd.DataFrame:
+        """日线行情，同参数的结果在进程内复用；签名与 ``ak.stock_zh_a_daily`` 一致"""
+        key = (symbol, start_date, end_date, adjust)
+        with self._bars_lock:
+            if key in self._bars:
+                self._bars.move_to_end(key)
+                return self._bars[key].copy()
+
+        def load() -> pd.DataFrame:
+            self.requests['daily'] += 1
+            bars = self.backend.daily(symbol, start_date, end_date, adjust)
+            with self._bars_lock:
+                self._bars[key] = bars
+                if len(self._bars) > self.max_bars:
+                    self._bars.popitem(last=False)
+            return bars
+
+        return self._coalescer.run(('daily',) + key, load).copy()
+
+    def bar_store(self, root: str, **kwargs) -> BarStore:
+        """通过本提供者获取数据的本地日线存储"""
+        return BarStore(root, fetch_func=self.daily, **kwargs)
+
+    def save(self) -> None:
+        """写回缓存文件"""
+        self.cache.save()
+
+
+_default: Optional[DataProvider] = None
+_default_lock = threading.Lock()
+
+
+def get_provider() -> DataProvider:
+    """进程内共享的默认提供者（akshare 后端），多个策略在同一进程中共用缓存"""
+    global _default  # pylint: disable=global-statement
+    with _default_lock:
+        if _default is None:
+            _default = DataProvider()
+        return _default
+
+
+def set_provider(provider: Optional[DataProvider]) -> None:
+    """替换默认提供者（如切换为快照或测试数据），传 None 恢复默认"""
+    global _default  # pylint: disable=global-statement
+    with _default_lock:
+        _default = provider
@@ -0,0 +1,296 @@
+"""并发限速的财务指标获取模块
+
+以有界线程池并发调用 ``ak.stock_financial_analysis_indicator``，
+通过令牌桶限制整体请求速率，并对单只股票的请求做带退避的重试。
+每只股票的最新一期数据先收集为行记录，最后一次性构建 DataFrame，
+避免循环内反复 ``pd.concat`` 带来的平方级复制。
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+try:
+    import akshare as ak  # pylint: disable=import-error
+except ImportError:
+    ak = None
+
+try:
+    from src.symbol_cache import SymbolCache
+except ImportError:  # 作为脚本直接运行时
+    from symbol_cache import SymbolCache
+
+# 默认视为可重试的异常：akshare 解析失败多为 ValueError/KeyError，网络异常均为 OSError 子类
+RETRY_EXCEPTIONS = (ValueError, KeyError, IndexError, AttributeError, OSError)
+
+
+class TokenBucket:
+    """线程安全的令牌桶限速器
+
+    每秒补充 ``rate`` 个令牌，最多累积 ``capacity`` 个。
+    ``reserve`` 只计算需要等待的时间而不阻塞，便于在线程与协程中复用。
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 sleep: Callable[[float], None] = time.sleep):
+        if rate <= 0:
+            raise ValueError("rate 必须为正数")
+        self.rate = float(rate)
+        self.capacity = float(capacity) if capacity is not None else max(1.0, self.rate)
+        self._tokens = self.capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._last = clock()
+        self._lock = threading.Lock()
+
+    def reserve(self, tokens: float = 1.0) -> float:
+        """预定令牌，返回调用方需要等待的秒数（0 表示可立即执行）"""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        """阻塞直到获得令牌，返回实际等待的秒数"""
+        wait = self.reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+class _ColumnBuffer:
+    """同一列结构与 dtype 的行缓冲：同 dtype 的数值列写入按倍数扩容的二维数组，其余列保存为列表"""
+
+    def __init__(self, columns: Tuple[str, ...], dtypes: Tuple):
+        self.columns = columns
+        self.dtypes = dtypes
+        blocks: Dict[np.dtype, List[int]] = {}
+        self.other_pos: List[int] = []
+        for pos, dtype in enumerate(dtypes):
+            if isinstance(dtype, np.dtype) and dtype.kind in 'iuf':
+                blocks.setdefault(dtype, []).append(pos)
+            else:
+                self.other_pos.append(pos)
+        self.blocks = [(np.array(positions), np.empty((16, len(positions)), dtype=dtype))
+                       for dtype, positions in blocks.items()]
+        self.objects: List[list] = [[] for _ in self.other_pos]
+        self.size = 0
+
+    def append(self, row: np.ndarray) -> int:
+        """写入一行（按 ``columns`` 顺序的一维数组），返回槽位"""
+        for index, (positions, values) in enumerate(self.blocks):
+            if self.size == len(values):
+                grown = np.empty((2 * len(values), len(positions)), dtype=values.dtype)
+                grown[:self.size] = values[:self.size]
+                self.blocks[index] = positions, values = positions, grown
+            values[self.size] = row[positions]
+        for column, value in zip(self.objects, row[self.other_pos]):
+            column.append(value)
+        self.size += 1
+        return self.size - 1
+
+    def frame(self, slots: List[int]) -> pd.DataFrame:
+        """按槽位一次构建 DataFrame，各列保持加入时的 dtype"""
+        slots = np.asarray(slots)
+        data = {}
+        for positions, values in self.blocks:
+            block = values[slots]
+            for offset, pos in enumerate(positions):
+                data[pos] = block[:, offset]
+        for pos, values in zip(self.other_pos, self.objects):
+            data[pos] = [values[slot] for slot in slots]
+        frame = pd.DataFrame({self.columns[pos]: data[pos] for pos in range(len(self.columns))})
+        return frame.astype(dict(zip(self.columns, self.dtypes)))
+
+
+class LatestRowAccumulator:
+    """收集每只股票的最新一期数据，最后一次性构建 DataFrame
+
+    行数据按列结构与 dtype 写入预分配的列缓冲（同 dtype 的数值列为一个二维数组），
+    ``build`` 时每种结构只构建一次，通常只有一种；结构不同时与逐次 ``pd.concat``
+    一样合并列与 dtype。同一代码重复加入时以最后一次为准。
+    """
+
+    def __init__(self, key: str = '代码'):
+        self.key = key
+        self._buffers: Dict[Tuple[Tuple[str, ...], Tuple], _ColumnBuffer] = {}
+        self._slots: Dict[str, Tuple[_ColumnBuffer, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._slots
+
+    def add(self, code: str, frame: Optional[pd.DataFrame]) -> bool:
+        """加入 ``frame`` 的最后一行（假设最后一行是最新一期），空数据返回 False"""
+        if frame is None or frame.empty:
+            return False
+        if self.key in frame.columns:
+            frame = frame.drop(columns=self.key)
+        structure = (tuple(frame.columns), tuple(frame.dtypes.tolist()))
+        buffer = self._buffers.get(structure)
+        if buffer is None:
+            buffer = self._buffers[structure] = _ColumnBuffer(*structure)
+        self._slots[code] = (buffer, buffer.append(frame.iloc[-1].to_numpy()))
+        return True
+
+    def add_row(self, code: str, row: dict) -> None:
+        """直接加入一条行记录"""
+        self.add(code, pd.DataFrame([row]))
+
+    def build(self, order: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """构建 DataFrame，``order`` 指定行顺序（缺失的代码跳过），默认按加入顺序"""
+        codes = list(self._slots) if order is None else [c for c in order if c in self._slots]
+        if not codes:
+            return pd.DataFrame()
+        groups: Dict[int, Tuple[_ColumnBuffer, List[str], List[int], List[int]]] = {}
+        for position, code in enumerate(codes):
+            buffer, slot = self._slots[code]
+            group = groups.setdefault(id(buffer), (buffer, [], [], []))
+            group[1].append(code)
+            group[2].append(slot)
+            group[3].append(position)
+        frames = []
+        for buffer, group_codes, slots, positions in groups.values():
+            frame = buffer.frame(slots)
+            frame[self.key] = group_codes
+            frame.index = positions
+            frames.append(frame)
+        if len(frames) == 1:
+            return frames[0].reset_index(drop=True)
+        return pd.concat(frames).sort_index().reset_index(drop=True)
+
+
+def latest_row(financial: pd.DataFrame) -> dict:
+    """财务指标表的最后一行（最新一期）转为行记录"""
+    return dict(zip(financial.columns, financial.iloc[-1].tolist()))
+
+
+class FinancialFetcher:
+    """并发获取多只股票最新一期财务分析指标
+
+    Args:
+        fetch_func: 形如 ``ak.stock_financial_analysis_indicator`` 的函数，默认使用 akshare
+        start_year: 传给 ``fetch_func`` 的起始年份
+        max_workers: 并发线程数，1 即退化为顺序获取
+        rate: 全局每秒请求数上限
+        burst: 令牌桶容量，默认与 ``rate`` 相同
+        retries: 单只股票失败后的最大重试次数
+        backoff: 首次重试前的等待秒数，之后按 2 的幂递增
+        cache: 按股票的缓存，传入时只请求缓存中缺失或过期的股票
+    """
+
+    def __init__(self, fetch_func: Optional[Callable[..., pd.DataFrame]] = None,
+                 start_year: str = "2025", max_workers: int = 4, rate: float = 3.0,
+                 burst: Optional[float] = None, retries: int = 2, backoff: float = 0.5,
+                 retry_exceptions: Tuple[type, ...] = RETRY_EXCEPTIONS,
+                 sleep: Callable[[float], None] = time.sleep,
+                 cache: Optional[SymbolCache] = None):
+        if fetch_func is None:
+            if ak is None:
+                raise ImportError("缺少依赖 akshare，请传入 fetch_func")
+            fetch_func = ak.stock_financial_analysis_indicator
+        if max_workers < 1:
+            raise ValueError("max_workers 至少为 1")
+        self.fetch_func = fetch_func
+        self.start_year = start_year
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
+        self.retry_exceptions = retry_exceptions
+        self._sleep = sleep
+        self.limiter = TokenBucket(rate, burst, sleep=sleep)
+        self.cache = cache
+        self.errors: Dict[str, Exception] = {}
+        self.skipped: List[str] = []
+
+    def fetch_one(self, code: str) -> Optional[pd.DataFrame]:
+        """获取单只股票的财务指标，失败或无数据时返回 None"""
+        for attempt in range(self.retries + 1):
+            self.limiter.acquire()
+            try:
+                financial = self.fetch_func(symbol=code, start_year=self.start_year)
+            except self.retry_exceptions as err:
+                if attempt == self.retries:
+                    self.errors[code] = err
+                    print(f"获取股票 {code} 财务数据时出错: {err}")
+                    return None
+                self._sleep(self.backoff * (2 ** attempt))
+                continue
+            if financial is None or financial.empty:
+                return None
+            return financial
+        return None
+
+    def iter_fetch(self, codes: Iterable[str]) -> Iterator[Tuple[str, Optional[pd.DataFrame]]]:
+        """按完成顺序逐只产出 ``(代码, 财务指标)``"""
+        codes = list(codes)
+        if self.max_workers == 1:
+            for code in codes:
+                yield code, self.fetch_one(code)
+            return
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self.fetch_one, code): code for code in codes}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+
+    def _store(self, code: str, financial: Optional[pd.DataFrame]) -> None:
+        """把最新一期写入缓存，无数据的股票记为空记录，避免重复请求"""
+        if financial is None:
+            if code not in self.errors:
+                self.cache.put('financial', code, {})
+            return
+        row = latest_row(financial)
+        period = row.get('日期')
+        self.cache.put('financial', code, row, period=None if period is None else str(period))
+
+    def stream(self, codes: Iterable[str],
+               budget: Optional[int] = None) -> Iterator[Tuple[str, Optional[dict]]]:
+        """逐只产出 ``(代码, 最新一期行记录)``，无数据时为 None
+
+        缓存命中的股票先产出且不计入请求；其余股票按输入顺序取前 ``budget`` 只并发获取，
+        按完成顺序产出，超出预算的代码记入 ``skipped``。
+        """
+        pending = list(codes)
+        if self.cache is not None:
+            cached, pending = self.cache.partition('financial', pending)
+            for code, row in cached.items():
+                yield code, row or None
+        self.skipped = [] if budget is None else pending[budget:]
+        if budget is not None:
+            pending = pending[:budget]
+        for code, financial in self.iter_fetch(pending):
+            if self.cache is not None:
+                self._store(code, financial)
+            yield code, None if financial is None else latest_row(financial)
+
+    def fetch(self, codes: Iterable[str], progress_every: int = 50) -> pd.DataFrame:
+        """获取全部股票并按输入顺序拼接，结果与逐只顺序获取一致"""
+        codes = list(codes)
+        accumulator = LatestRowAccumulator()
+        pending = codes
+        if self.cache is not None:
+            cached, pending = self.cache.partition('financial', codes)
+            for code, row in cached.items():
+                if row:
+                    accumulator.add_row(code, row)
+            if cached:
+                print(f"缓存命中 {len(cached)} 只，需要获取 {len(pending)} 只股票财务数据")
+
+        for done, (code, financial) in enumerate(self.iter_fetch(pending), start=1):
+            accumulator.add(code, financial)
+            if self.cache is not None:
+                self._store(code, financial)
+            if progress_every and (done % progress_every == 0 or done == len(pending)):
+                print(f"已获取 {done}/{len(pending)} 只股票财务数据")
+        return accumulator.build(order=codes)
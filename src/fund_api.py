@@ -0,0 +1,29 @@
+"""东方财富基金公告接口
+
+基金报告下载用到的请求头、公告列表与 PDF 地址及列表请求参数。只依赖标准库，
+``fund_downloader``（线程）与 ``async_downloader``（asyncio）共用。
+"""
+
+HEADERS = {
+    'Connection': 'keep-alive',
+    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
+                   'AppleWebKit/537.36 (KHTML, like Gecko) '
+                   'Chrome/89.0.4389.128 Safari/537.36 Edg/89.0.774.77'),
+    'Accept': '*/*',
+    'Referer': 'http://fundf10.eastmoney.com/',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
+}
+
+# 公告列表接口与 PDF 直链
+LIST_URL = 'http://api.fund.eastmoney.com/f10/JJGG'
+PDF_URL = 'http://pdf.dfcfw.com/pdf/H2_{}_1.pdf'
+
+
+def list_params(code: str, page_size: int = 20000) -> tuple:
+    """公告列表接口的请求参数"""
+    return (
+        ('fundcode', code),
+        ('pageIndex', '1'),
+        ('pageSize', str(page_size)),
+        ('type', '3'),
+    )
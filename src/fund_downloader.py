@@ -13,15 +13,10 @@ except ImportError:
     multitasking = None
     _HAS_DEPS = False
 
-HEADERS = {
-    'Connection': 'keep-alive',
-    'User-Agent': ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) '
-                   'AppleWebKit/537.36 (KHTML, like Gecko) '
-                   'Chrome/89.0.4389.128 Safari/537.36 Edg/89.0.774.77'),
-    'Accept': '*/*',
-    'Referer': 'http://fundf10.eastmoney.com/',
-    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8,en-GB;q=0.7,en-US;q=0.6',
-}
+try:
+    from src.fund_api import HEADERS, LIST_URL, PDF_URL, list_params
+except ImportError:  # 作为脚本直接运行时
+    from fund_api import HEADERS, LIST_URL, PDF_URL, list_params
 
 
 @multitasking.task
@@ -33,13 +28,19 @@ def download_file(code: str, url: str, filename: str, file_type: str = '.pdf') -
     code = str(code)
     if not os.path.exists(code):
         os.mkdir(code)
-    response = requests.get(url, headers=HEADERS, timeout=30)
     path = f'{code}/{filename}{file_type}'
-    with open(path, 'wb') as f:
-        f.write(response.content)
-    if os.path.getsize(path) == 0:
-        os.remove(path)
+    tmp_path = f'{path}.part'
+    size = 0
+    with requests.get(url, headers=HEADERS, timeout=30, stream=True) as response:
+        with open(tmp_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                f.write(chunk)
+                size += len(chunk)
+    # 写完再重命名，中断或空内容都不会留下不完整的文件
+    if size == 0:
+        os.remove(tmp_path)
         return
+    os.replace(tmp_path, path)
     print(filename + file_type, '下载完毕')
 
 
@@ -55,20 +56,11 @@ def get_pdf_by_fund_code(code: str) -> None:
         print("缺少依赖 requests/multitasking，跳过下载")
         return
 
-    params = (
-        ('fundcode', code),
-        ('pageIndex', '1'),
-        ('pageSize', '20000'),
-        ('type', '3'),
-    )
-
-    response = requests.get(
-        'http://api.fund.eastmoney.com/f10/JJGG', headers=HEADERS, params=params, timeout=30)
+    response = requests.get(LIST_URL, headers=HEADERS, params=list_params(code), timeout=30)
 
-    base_link = 'http://pdf.dfcfw.com/pdf/H2_{}_1.pdf'
     for item in response.json()['Data']:
         title = item['TITLE']
-        download_url = base_link.format(item['ID'])
+        download_url = PDF_URL.format(item['ID'])
         download_file(code, download_url, title)
     multitasking.wait_for_tasks()
     print(f'{code} 的 pdf 全部下载完毕并存储在文件夹 {code} 里面')
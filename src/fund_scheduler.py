@@ -0,0 +1,215 @@
+"""多基金报告下载调度
+
+``fund_downloader.main`` 逐只基金调用 ``get_pdf_by_fund_code``，每只都要等
+``multitasking.wait_for_tasks()`` 全部结束后才开始下一只。这里把所有基金的
+“列公告”与“下载 PDF”放进同一个任务队列，由固定数量的协程（全局并发预算）处理：
+
+- 下载任务优先于列表任务，队列中待下载的文件不会无限堆积
+- ``api.fund.eastmoney.com`` 与 ``pdf.dfcfw.com`` 各有独立的令牌桶限速
+- 每只基金的清单在它的全部文件处理完后写回（增量同步逻辑见 ``fund_sync``）
+- 可选按内容寻址存储（``pdf_store``），多只基金共有的公告只下载一次
+- 运行中定期打印进度与吞吐量
+"""
+
+import asyncio
+import itertools
+import os
+import time
+from typing import Dict, Iterable, Optional
+
+try:
+    from src.async_downloader import DOWNLOAD_ERRORS, AsyncDownloader
+    from src.financial_fetcher import TokenBucket
+    from src.fund_api import LIST_URL, PDF_URL
+    from src.fund_sync import Manifest, download_report, plan_reports
+    from src.pdf_store import PdfStore
+except ImportError:  # 作为脚本直接运行时
+    from async_downloader import DOWNLOAD_ERRORS, AsyncDownloader
+    from financial_fetcher import TokenBucket
+    from fund_api import LIST_URL, PDF_URL
+    from fund_sync import Manifest, download_report, plan_reports
+    from pdf_store import PdfStore
+
+# 每秒请求数
+DEFAULT_RATES = {
+    'api.fund.eastmoney.com': 5.0,
+    'pdf.dfcfw.com': 20.0,
+}
+
+_DOWNLOAD, _LIST = 0, 1
+
+
+class SchedulerStats:
+    """调度进度与吞吐统计"""
+
+    def __init__(self, funds: int, clock=time.monotonic):
+        self.clock = clock
+        self.started = clock()
+        self.funds_total = funds
+        self.funds_listed = 0
+        self.funds_done = 0
+        self.funds_failed = 0
+        self.files_queued = 0
+        self.files_done = 0
+        self.files_failed = 0
+        self.files_skipped = 0
+        self.bytes = 0
+
+    def snapshot(self) -> Dict[str, float]:
+        """当前统计，含耗时、每秒文件数与 MB/s"""
+        elapsed = max(self.clock() - self.started, 1e-9)
+        return {
+            'elapsed': elapsed,
+            'funds_total': self.funds_total, 'funds_listed': self.funds_listed,
+            'funds_done': self.funds_done, 'funds_failed': self.funds_failed,
+            'files_queued': self.files_queued, 'files_done': self.files_done,
+            'files_failed': self.files_failed, 'files_skipped': self.files_skipped,
+            'bytes': self.bytes,
+            'files_per_sec': self.files_done / elapsed,
+            'mb_per_sec': self.bytes / elapsed / 2 ** 20,
+        }
+
+    def format(self) -> str:
+        """进度文字"""
+        s = self.snapshot()
+        return (f"基金 {s['funds_done']}/{s['funds_total']}（已列出 {s['funds_listed']}），"
+                f"文件 {s['files_done']}/{s['files_queued']}，跳过 {s['files_skipped']}，"
+                f"失败 {s['files_failed']}，{s['files_per_sec']:.1f} 个/s，"
+                f"{s['mb_per_sec']:.2f} MB/s")
+
+
+class FundScheduler:
+    """跨基金流水线下载调度器
+
+    Args:
+        root: 下载根目录，每只基金一个子目录
+        workers: 全局并发预算（同时进行的列表与下载请求总数）
+        rates: 按域名的每秒请求数，默认 ``DEFAULT_RATES``
+        verify: 是否校验已下载文件的 sha256
+        progress_every: 打印进度的间隔（秒），0 表示不打印
+        dedupe: 是否使用 ``PdfStore`` 按公告 ID 与内容去重
+    """
+
+    def __init__(self, root: str = '.', workers: int = 16,
+                 rates: Optional[Dict[str, float]] = None, verify: bool = False,
+                 progress_every: float = 10.0, list_url: str = LIST_URL,
+                 pdf_url: str = PDF_URL, dedupe: bool = False):
+        self.root = root
+        self.workers = max(1, workers)
+        self.rates = DEFAULT_RATES if rates is None else rates
+        self.verify = verify
+        self.progress_every = progress_every
+        self.list_url = list_url
+        self.pdf_url = pdf_url
+        self.store = PdfStore(root) if dedupe else None
+        self.stats: Optional[SchedulerStats] = None
+        self.summary: Dict[str, Dict[str, int]] = {}
+
+    def _limiters(self) -> Dict[str, TokenBucket]:
+        # 桶容量为 1，避免开始时的突发请求
+        return {host: TokenBucket(rate, capacity=1) for host, rate in self.rates.items()}
+
+    async def run_async(self, codes: Iterable[str],
+                        downloader: Optional[AsyncDownloader] = None) -> Dict[str, Dict[str, int]]:
+        """协程入口，返回每只基金的统计"""
+        codes = list(dict.fromkeys(codes))
+        self.stats = stats = SchedulerStats(len(codes))
+        self.summary = {}
+        queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        order = itertools.count()
+        for code in codes:
+            queue.put_nowait((_LIST, next(order), code, None))
+        manifests: Dict[str, Manifest] = {}
+        remaining: Dict[str, int] = {}
+
+        def finish(code: str) -> None:
+            manifests.pop(code).save()
+            stats.funds_done += 1
+
+        async def handle(client: AsyncDownloader, kind: int, code: str, job) -> None:
+            if kind == _LIST:
+                manifest = Manifest(os.path.join(self.root, code))
+                try:
+                    reports = await client.list_reports(code, self.list_url)
+                except DOWNLOAD_ERRORS + (ValueError,) as err:
+                    client.errors[code] = repr(err)
+                    stats.funds_failed += 1
+                    self.summary[code] = {'listed': 0, 'skipped': 0, 'downloaded': 0,
+                                          'failed': 0}
+                    return
+                pending, _ = plan_reports(manifest, reports, self.verify)
+                stats.funds_listed += 1
+                stats.files_queued += len(pending)
+                stats.files_skipped += len(reports) - len(pending)
+                self.summary[code] = {'listed': len(reports),
+                                      'skipped': len(reports) - len(pending),
+                                      'downloaded': 0, 'failed': 0}
+                manifests[code] = manifest
+                remaining[code] = len(pending)
+                for report_id, filename in pending:
+                    queue.put_nowait((_DOWNLOAD, next(order), code, (report_id, filename)))
+                if not pending:
+                    finish(code)
+                return
+            manifest = manifests[code]
+            ok = await download_report(client, manifest, *job, pdf_url=self.pdf_url,
+                                       store=self.store)
+            stats.bytes = client.bytes_downloaded - initial_bytes
+            if ok:
+                stats.files_done += 1
+                self.summary[code]['downloaded'] += 1
+            else:
+                stats.files_failed += 1
+                self.summary[code]['failed'] += 1
+            remaining[code] -= 1
+            if remaining[code] == 0:
+                finish(code)
+
+        async def worker(client: AsyncDownloader) -> None:
+            while True:
+                kind, _, code, job = await queue.get()
+                try:
+                    await handle(client, kind, code, job)
+                except (KeyError, TypeError, OSError) as err:
+                    # 接口返回格式异常或写清单失败时只影响这一项，不中断调度
+                    print(f"处理 {code} {job or ''} 时出错: {err}")
+                finally:
+                    queue.task_done()
+
+        async def report() -> None:
+            while True:
+                await asyncio.sleep(self.progress_every)
+                print(stats.format())
+
+        client = downloader or AsyncDownloader(self.workers, limiters=self._limiters())
+        initial_bytes = client.bytes_downloaded
+        async with client:
+            tasks = [asyncio.create_task(worker(client)) for _ in range(self.workers)]
+            if self.progress_every:
+                tasks.append(asyncio.create_task(report()))
+            try:
+                await queue.join()
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                # 中断时也写回已完成部分的清单
+                for manifest in manifests.values():
+                    manifest.save()
+                if self.store is not None:
+                    self.store.save()
+        print(stats.format())
+        return self.summary
+
+    def run(self, codes: Iterable[str]) -> Dict[str, Dict[str, int]]:
+        """同步入口"""
+        return asyncio.run(self.run_async(codes))
+
+
+def main() -> None:
+    """演示调度下载多只基金的 PDF 报告。"""
+    FundScheduler(workers=16, dedupe=True).run(['110011', '161725'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,210 @@
+"""基金 PDF 报告增量同步
+
+每只基金的目录下保存一个清单 ``.manifest.json``，记录已下载公告的 ID、文件名、
+字节数与 sha256。同步时仍请求一次公告列表，但只下载清单中没有的 ID，
+以及本地文件缺失或大小（``verify=True`` 时校验和）与清单不一致的 ID。
+未完成的下载保留为 ``.part`` 文件，下次同步时断点续传。
+目录中已有、但清单里没有记录的文件（如旧版下载器保存的）直接计算校验和后纳入清单。
+同一基金内标题重复的公告文件名加上公告 ID，避免互相覆盖。
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from src.async_downloader import DOWNLOAD_ERRORS, AsyncDownloader
+    from src.fund_api import LIST_URL, PDF_URL
+except ImportError:  # 作为脚本直接运行时
+    from async_downloader import DOWNLOAD_ERRORS, AsyncDownloader
+    from fund_api import LIST_URL, PDF_URL
+
+MANIFEST_FILE = '.manifest.json'
+
+
+def safe_filename(title: str) -> str:
+    """公告标题转为文件名，去掉路径分隔符"""
+    return title.replace('/', '_').replace('\\', '_').strip() or 'untitled'
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """分块计算文件的 sha256"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Manifest:
+    """单只基金的下载清单
+
+    Args:
+        directory: 基金目录，清单保存为其中的 ``.manifest.json``
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_FILE)
+        self.reports: Dict[str, Dict] = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.reports = json.load(f).get('reports', {})
+            except (OSError, ValueError) as err:
+                print(f"读取清单 {self.path} 失败，将重新同步: {err}")
+
+    def __contains__(self, report_id: str) -> bool:
+        return report_id in self.reports
+
+    def is_current(self, report_id: str, filename: str, verify: bool = False) -> bool:
+        """本地文件与清单记录一致时返回 True"""
+        entry = self.reports.get(report_id)
+        if entry is None or entry['file'] != filename:
+            return False
+        path = os.path.join(self.directory, filename)
+        if not os.path.exists(path) or os.path.getsize(path) != entry['size']:
+            return False
+        return not verify or file_sha256(path) == entry['sha256']
+
+    def owner(self, filename: str) -> Optional[str]:
+        """清单中记录该文件的公告 ID，没有时返回 None"""
+        for report_id, entry in self.reports.items():
+            if entry['file'] == filename:
+                return report_id
+        return None
+
+    def adopt(self, report_id: str, filename: str) -> bool:
+        """把已存在的非空文件纳入清单，成功时返回 True；文件已记在其他公告名下时不纳入"""
+        path = os.path.join(self.directory, filename)
+        if report_id in self.reports or not os.path.exists(path) or not os.path.getsize(path):
+            return False
+        if self.owner(filename) is not None:
+            return False
+        self.record(report_id, filename, os.path.getsize(path), file_sha256(path))
+        return True
+
+    def record(self, report_id: str, filename: str, size: int, sha256: str) -> None:
+        """记录一个下载完成的公告"""
+        self.reports[report_id] = {'file': filename, 'size': size, 'sha256': sha256}
+
+    def save(self) -> None:
+        """原子写回清单"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'reports': self.reports}, f, ensure_ascii=False, indent=0)
+        os.replace(tmp_path, self.path)
+
+
+def report_filenames(manifest: Manifest, reports: List[Dict]) -> List[Tuple[str, str]]:
+    """为公告列表分配文件名，返回 ``[(ID, 文件名)]``
+
+    清单中已有的公告沿用记录的文件名；其余按标题命名，标题在列表中重复（重发、更正公告常见）
+    或文件名已被其他公告占用时加上公告 ID，如 ``公司公告_123.pdf``，保证一个文件只对应一个公告。
+    """
+    titles = Counter(safe_filename(item['TITLE']) for item in reports)
+    taken = {entry['file']: report_id for report_id, entry in manifest.reports.items()}
+    names = []
+    for item in reports:
+        report_id = str(item['ID'])
+        if report_id in manifest.reports:
+            filename = manifest.reports[report_id]['file']
+        else:
+            title = safe_filename(item['TITLE'])
+            filename = f"{title}.pdf"
+            if titles[title] > 1 or taken.get(filename, report_id) != report_id:
+                filename = f"{title}_{safe_filename(report_id)}.pdf"
+        taken[filename] = report_id
+        names.append((report_id, filename))
+    return names
+
+
+def plan_reports(manifest: Manifest, reports: List[Dict],
+                 verify: bool = False) -> Tuple[List[Tuple[str, str]], int]:
+    """对比公告列表与清单，返回 (需要下载的 ``(ID, 文件名)``, 纳入清单的已有文件数)"""
+    pending = []
+    adopted = 0
+    for report_id, filename in report_filenames(manifest, reports):
+        if manifest.adopt(report_id, filename):
+            adopted += 1
+        elif not manifest.is_current(report_id, filename, verify):
+            pending.append((report_id, filename))
+    return pending, adopted
+
+
+async def download_report(downloader: AsyncDownloader, manifest: Manifest, report_id: str,
+                          filename: str, pdf_url: str = PDF_URL, store=None) -> bool:
+    """下载单个公告并记入清单，失败时保留 ``.part`` 供下次续传
+
+    传入 ``store``（``pdf_store.PdfStore``）时按公告 ID 去重：已保存过的公告直接
+    硬链接到基金目录，不再下载。
+    """
+    url = pdf_url.format(report_id)
+    path = os.path.join(manifest.directory, filename)
+    try:
+        if store is None:
+            size, sha256 = await downloader.fetch(url, path, resume=True)
+        else:
+            entry = await store.fetch_once(
+                report_id, lambda staging: downloader.fetch(url, staging, resume=True))
+            size, sha256 = (entry['size'], entry['sha256']) if entry else (0, '')
+            if entry:
+                store.link(entry, path)
+    except DOWNLOAD_ERRORS as err:
+        downloader.errors[url] = repr(err)
+        return False
+    if size:
+        manifest.record(report_id, filename, size, sha256)
+    return bool(size)
+
+
+async def sync_fund(downloader: AsyncDownloader, code: str, root: str = '.',
+                    verify: bool = False, list_url: str = LIST_URL,
+                    pdf_url: str = PDF_URL, store=None) -> Dict[str, int]:
+    """增量同步一只基金的报告，``store`` 见 ``download_report``
+
+    Returns:
+        dict: ``listed``（公告数）、``skipped``（已是最新）、``downloaded``、``failed``
+    """
+    manifest = Manifest(os.path.join(root, code))
+    reports = await downloader.list_reports(code, list_url)
+    pending, adopted = plan_reports(manifest, reports, verify)
+    results = await asyncio.gather(
+        *(download_report(downloader, manifest, report_id, filename, pdf_url, store)
+          for report_id, filename in pending))
+    if pending or adopted:
+        manifest.save()
+    if store is not None:
+        store.save()
+    downloaded = sum(results)
+    return {'listed': len(reports), 'skipped': len(reports) - len(pending),
+            'downloaded': downloaded, 'failed': len(pending) - downloaded}
+
+
+def sync_funds(codes: Iterable[str], root: str = '.', concurrency: int = 8,
+               verify: bool = False, downloader: Optional[AsyncDownloader] = None,
+               store=None) -> Dict[str, Dict[str, int]]:
+    """同步入口：依次增量同步多只基金，返回每只基金的统计"""
+    async def _run():
+        summary = {}
+        async with (downloader or AsyncDownloader(concurrency)) as client:
+            for code in codes:
+                summary[code] = await sync_fund(client, code, root, verify, store=store)
+                stats = summary[code]
+                print(f"{code}: 公告 {stats['listed']}，已是最新 {stats['skipped']}，"
+                      f"新下载 {stats['downloaded']}，失败 {stats['failed']}")
+        return summary
+    return asyncio.run(_run())
+
+
+def main() -> None:
+    """演示增量同步指定基金代码的 PDF 报告。"""
+    sync_funds(['110011', '161725'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,451 @@
+"""面板技术指标
+
+对 (日期 × 股票) 的价格面板一次计算全部股票的指标，供 VCP 筛选与均线图共用：
+
+- 简单均线：累计和相减，任意窗口、任意结束行都是两行相减（``WindowSums``、``sma``）
+- 指数均线与 ATR：按行递推，每一步是整行的向量运算（``ema``、``atr``）
+- 滚动最高/最低：把时间轴按窗口长度切块（reshape 视图），块内前缀与后缀极值各累积一次，
+  每个窗口是前一块的后缀与当前块的前缀取极值，与窗口长度无关（van Herk/Gil-Werman）
+- 成交量：相对前 ``window`` 日均量的量比（``volume_ratio``）
+- 波动收缩：各股票最近几次回调（摆动高点到下一个高点之前的最低点）的幅度序列
+
+结果均为 float32 数组，一维输入返回一维结果。``IndicatorEngine`` 保存各指标的滚动状态，
+每个交易日追加一根 K 线只做 O(股票数) 的运算，不重算整个窗口；收缩幅度只依赖最近一段走势，
+仍按批量方式计算。
+"""
+
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+
+def _as_panel(values) -> Tuple[np.ndarray, bool]:
+    """转为 (行 × 股票) 的 float64 数组，同时返回输入是否为一维"""
+    values = np.asarray(values, dtype=np.float64)
+    if values.ndim == 1:
+        return values[:, None], True
+    if values.ndim != 2:
+        raise ValueError("指标输入须为一维序列或 (日期 × 股票) 二维面板")
+    return values, False
+
+
+def _result(values: np.ndarray, vector: bool) -> np.ndarray:
+    values = values.astype(np.float32, copy=False)
+    return values[:, 0] if vector else values
+
+
+def _window_total(cumulative: np.ndarray, window: int) -> np.ndarray:
+    """由首行为 0 的累计和得到每行截至当前（含）的 ``window`` 行之和"""
+    total = cumulative[1:].copy()
+    rows = len(total)
+    if rows > window:
+        total[window:] -= cumulative[1:rows - window + 1]
+    return total
+
+
+def _window_counts(valid: np.ndarray, window: int) -> np.ndarray:
+    """每行截至当前（含）的 ``window`` 行内有效值的个数"""
+    counts = np.zeros((len(valid) + 1, valid.shape[1]), np.int32)
+    np.cumsum(valid, axis=0, out=counts[1:])
+    return _window_total(counts, window)
+
+
+def _check_window(window: int) -> None:
+    if window < 1:
+        raise ValueError("窗口长度须为正整数")
+
+
+class WindowSums:
+    """基于累计和的任意窗口均值，窗口内有效值少于 ``min_periods``（默认窗口长度）时为 NaN
+
+    Args:
+        values: 一维序列或 (日期 × 股票) 面板，NaN 视为缺失
+    """
+
+    def __init__(self, values):
+        values, self._vector = _as_panel(values)
+        valid = ~np.isnan(values)
+        self._sums = np.zeros((len(values) + 1, values.shape[1]))
+        np.cumsum(np.where(valid, values, 0.0), axis=0, out=self._sums[1:])
+        self._counts = np.zeros(self._sums.shape, np.int32)
+        np.cumsum(valid, axis=0, out=self._counts[1:])
+
+    def __len__(self) -> int:
+        return len(self._sums) - 1
+
+    def mean(self, end: int, window: int, min_periods: Optional[int] = None):
+        """截至第 ``end`` 行（含）的 ``window`` 日均值（float64），一维输入时返回标量"""
+        _check_window(window)
+        min_periods = window if min_periods is None else min_periods
+        if end < 0 or end >= len(self):
+            result = np.full(self._sums.shape[1], np.nan)
+        else:
+            start = max(0, end + 1 - window)
+            total = self._sums[end + 1] - self._sums[start]
+            count = self._counts[end + 1] - self._counts[start]
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result = np.where((count >= min_periods) & (count > 0), total / count, np.nan)
+        return float(result[0]) if self._vector else result
+
+    def means(self, window: int, min_periods: Optional[int] = None,
+              dtype=np.float32) -> np.ndarray:
+        """每一行的 ``window`` 日均值，默认为 float32"""
+        _check_window(window)
+        min_periods = window if min_periods is None else min_periods
+        total = _window_total(self._sums, window)
+        count = _window_total(self._counts, window)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = np.where((count >= min_periods) & (count > 0), total / count, np.nan)
+        means = means.astype(dtype, copy=False)
+        return means[:, 0] if self._vector else means
+
+
+def sma(values, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """简单移动平均"""
+    return WindowSums(values).means(window, min_periods)
+
+
+def _rolling_extreme(values: np.ndarray, window: int, min_periods: Optional[int],
+                     largest: bool) -> np.ndarray:
+    """(行 × 股票) float64 数组的滚动极值，结果仍为 float64"""
+    _check_window(window)
+    rows, cols = values.shape
+    op = np.maximum if largest else np.minimum
+    fill = -np.inf if largest else np.inf
+    valid = ~np.isnan(values)
+    blocks = -(-rows // window)
+    padded = np.full((blocks * window, cols), fill)
+    padded[:rows] = np.where(valid, values, fill)
+    shaped = padded.reshape(blocks, window, cols)
+    prefix = op.accumulate(shaped, axis=1).reshape(-1, cols)[:rows]
+    suffix = op.accumulate(shaped[:, ::-1], axis=1)[:, ::-1].reshape(-1, cols)
+    result = prefix.copy()
+    if rows >= window:
+        result[window - 1:] = op(suffix[:rows - window + 1], prefix[window - 1:])
+    min_periods = window if min_periods is None else max(min_periods, 1)
+    result[_window_counts(valid, window) < min_periods] = np.nan
+    return result
+
+
+def rolling_max(values, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """滚动最高值，忽略缺失值，有效值少于 ``min_periods``（默认窗口长度）时为 NaN"""
+    values, vector = _as_panel(values)
+    return _result(_rolling_extreme(values, window, min_periods, largest=True), vector)
+
+
+def rolling_min(values, window: int, min_periods: Optional[int] = None) -> np.ndarray:
+    """滚动最低值，规则同 ``rolling_max``"""
+    values, vector = _as_panel(values)
+    return _result(_rolling_extreme(values, window, min_periods, largest=False), vector)
+
+
+def _alpha(span: Optional[float], alpha: Optional[float]) -> float:
+    if (span is None) == (alpha is None):
+        raise ValueError("span 与 alpha 须且只能指定一个")
+    alpha = 2.0 / (span + 1.0) if alpha is None else alpha
+    if not 0 < alpha <= 1:
+        raise ValueError("alpha 须在 (0, 1] 之间")
+    return alpha
+
+
+def ema(values, span: Optional[float] = None, alpha: Optional[float] = None) -> np.ndarray:
+    """指数移动平均（同 ``ewm(adjust=False, ignore_na=True)``），缺失值处沿用上一值"""
+    values, vector = _as_panel(values)
+    average = ExponentialAverage(values.shape[1], _alpha(span, alpha))
+    result = np.empty(values.shape, dtype=np.float32)
+    for row, value in enumerate(values):
+        result[row] = average.append(value)
+    return _result(result, vector)
+
+
+def true_range(high, low, close) -> np.ndarray:
+    """真实波幅：当日最高最低之差与两者到前收盘价距离的最大值，首日为最高减最低"""
+    high, vector = _as_panel(high)
+    low, _ = _as_panel(low)
+    close, _ = _as_panel(close)
+    previous = np.vstack([np.full((1, close.shape[1]), np.nan), close[:-1]])
+    gap = np.fmax(np.abs(high - previous), np.abs(low - previous))
+    result = np.where(np.isnan(high - low), np.nan, np.fmax(high - low, gap))
+    return _result(result, vector)
+
+
+def atr(high, low, close, window: int = 14) -> np.ndarray:
+    """平均真实波幅，Wilder 平滑（``alpha = 1 / window``）"""
+    _check_window(window)
+    return ema(true_range(high, low, close), alpha=1.0 / window)
+
+
+def volume_ratio(volume, window: int = 50) -> np.ndarray:
+    """量比：当日成交量 / 前 ``window`` 日（不含当日）平均成交量"""
+    volume, vector = _as_panel(volume)
+    means = WindowSums(volume).means(window, dtype=np.float64)
+    previous = np.vstack([np.full((1, volume.shape[1]), np.nan), means[:-1]])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(previous > 0, volume / previous, np.nan)
+    return _result(ratio, vector)
+
+
+def _pivot_highs(high: np.ndarray, order: int) -> np.ndarray:
+    """摆动高点：高于前 ``order`` 日且不低于后 ``order`` 日的最高价，最后 ``order`` 日尚未确认"""
+    filled = np.where(np.isnan(high), -np.inf, high)
+    left = np.full(filled.shape, -np.inf)
+    right = np.full(filled.shape, -np.inf)
+    # order 通常只有几日，逐个平移比较比滚动极值更快
+    for shift in range(1, min(order, len(filled) - 1) + 1):
+        np.maximum(left[shift:], filled[:-shift], out=left[shift:])
+        np.maximum(right[:-shift], filled[shift:], out=right[:-shift])
+    pivots = (filled > left) & (filled >= right)
+    pivots[max(len(filled) - order, 0):] = False
+    return pivots
+
+
+def contraction_depths(high, low=None, order: int = 5, count: int = 4) -> np.ndarray:
+    """最近 ``count`` 次回调的幅度，按时间先后排列（最后一行为最近一次），不足时为 NaN
+
+    每个摆动高点到下一个摆动高点之前（最近一次到最后一日）的最低价构成一次回调，
+    幅度为 ``1 - 最低价 / 高点``。VCP 要求幅度逐次收窄。只有收盘价时 ``low`` 可省略。
+
+    Args:
+        high: 最高价，一维序列或 (日期 × 股票) 面板
+        low: 最低价，默认与 ``high`` 相同
+        order: 摆动高点两侧比较的交易日数
+        count: 保留的回调次数
+    Returns:
+        (count × 股票数) 的 float32 数组，一维输入时为长度 ``count`` 的数组
+    """
+    _check_window(order)
+    high, vector = _as_panel(high)
+    low = high if low is None else _as_panel(low)[0]
+    rows, cols = high.shape
+    depths = np.full((count, cols), np.nan)
+    pivots = _pivot_highs(high, order)
+    # 按列展平后，每次回调是相邻两个边界（摆动高点或列起点）之间的一段，reduceat 一次取完最低价
+    positions = np.flatnonzero(pivots.T)
+    if len(positions) and count > 0:
+        flat_low = np.where(np.isnan(low), np.inf, low).T.ravel()
+        bounds = pivots.copy()
+        bounds[0] = True
+        starts = np.flatnonzero(bounds.T)
+        lows = np.minimum.reduceat(flat_low, starts)[pivots.T.ravel()[starts]]
+        peaks = high.T.ravel()[positions]
+        column = positions // rows
+        per_column = np.bincount(column, minlength=cols)
+        first = np.cumsum(per_column) - per_column
+        from_end = per_column[column] - 1 - (np.arange(len(positions)) - first[column])
+        keep = from_end < count
+        depths[count - 1 - from_end[keep], column[keep]] = 1.0 - lows[keep] / peaks[keep]
+    return depths[:, 0].astype(np.float32) if vector else depths.astype(np.float32)
+
+
+def shrinking_contractions(depths: np.ndarray) -> np.ndarray:
+    """从最近一次回调往前数，幅度逐次收窄的回调次数（最近一次缺失时为 0）"""
+    depths = np.asarray(depths, dtype=np.float64)
+    vector = depths.ndim == 1
+    depths = depths[:, None] if vector else depths
+    with np.errstate(invalid='ignore'):
+        shrinking = depths[1:] < depths[:-1]
+    streak = np.cumprod(shrinking[::-1], axis=0).sum(axis=0) if len(shrinking) \
+        else np.zeros(depths.shape[1], np.int64)
+    result = np.where(np.isnan(depths[-1]), 0, streak + 1) if len(depths) \
+        else np.zeros(depths.shape[1], np.int64)
+    return result[0] if vector else result
+
+
+class RollingMean:
+    """逐行追加的滚动均值，环形缓冲保存窗口内的值，每次只加入新值、减去移出窗口的值
+
+    Args:
+        window: 窗口长度
+        n_symbols: 股票数
+        min_periods: 窗口内有效值的下限，默认窗口长度
+    """
+
+    def __init__(self, window: int, n_symbols: int, min_periods: Optional[int] = None):
+        _check_window(window)
+        self.window = window
+        self.min_periods = window if min_periods is None else max(min_periods, 1)
+        self._ring = np.full((window, n_symbols), np.nan)
+        self._sum = np.zeros(n_symbols)
+        self._valid = np.zeros(n_symbols, np.int64)
+        self._count = 0
+
+    def append(self, row: np.ndarray) -> np.ndarray:
+        """追加一行，返回新的均值"""
+        pos = self._count % self.window
+        old = self._ring[pos]
+        old_valid = ~np.isnan(old)
+        valid = ~np.isnan(row)
+        self._sum += np.where(valid, row, 0.0) - np.where(old_valid, old, 0.0)
+        self._valid += valid.astype(np.int64) - old_valid
+        self._ring[pos] = row
+        self._count += 1
+        if pos == self.window - 1:
+            # 每满一个窗口按缓冲重算一次，消除逐次加减累积的舍入误差
+            self._sum = np.nansum(self._ring, axis=0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean = np.where(self._valid >= self.min_periods, self._sum / self._valid, np.nan)
+        return mean.astype(np.float32)
+
+
+class RollingExtreme:
+    """逐行追加的滚动最高/最低值（van Herk/Gil-Werman）
+
+    时间轴按窗口长度分块：当前块维护前缀极值，上一块写满时计算一次后缀极值，
+    窗口极值为两者之一取极值，每次追加均摊 O(股票数)。缺失值忽略。
+
+    Args:
+        window: 窗口长度
+        n_symbols: 股票数
+        largest: True 为最高值，False 为最低值
+        min_periods: 窗口内有效值的下限，默认 1
+    """
+
+    def __init__(self, window: int, n_symbols: int, largest: bool = True,
+                 min_periods: int = 1):
+        _check_window(window)
+        self.window = window
+        self.min_periods = max(min_periods, 1)
+        self._op = np.maximum if largest else np.minimum
+        self._fill = -np.inf if largest else np.inf
+        self._block = np.full((window, n_symbols), self._fill)
+        self._suffix = np.full((window, n_symbols), self._fill)
+        self._block_valid = np.zeros((window, n_symbols), bool)
+        self._previous_valid = np.zeros((window, n_symbols), bool)
+        self._prefix = np.full(n_symbols, self._fill)
+        self._valid = np.zeros(n_symbols, np.int64)
+        self._count = 0
+
+    def append(self, row: np.ndarray) -> np.ndarray:
+        """追加一行，返回新的窗口极值"""
+        pos = self._count % self.window
+        if pos == 0 and self._count:
+            self._suffix = self._op.accumulate(self._block[::-1], axis=0)[::-1]
+            self._previous_valid, self._block_valid = self._block_valid, self._previous_valid
+        valid = ~np.isnan(row)
+        value = np.where(valid, row, self._fill)
+        self._block[pos] = value
+        self._block_valid[pos] = valid
+        self._prefix = value if pos == 0 else self._op(self._prefix, value)
+        if self._count >= self.window:
+            self._valid -= self._previous_valid[pos]
+        self._valid += valid
+        self._count += 1
+        if pos == self.window - 1:
+            extreme = self._prefix
+        else:
+            extreme = self._op(self._suffix[pos + 1], self._prefix)
+        return np.where(self._valid >= self.min_periods, extreme, np.nan).astype(np.float32)
+
+
+class ExponentialAverage:
+    """逐行追加的指数移动平均，第一个有效值作为初值，缺失值处沿用上一值"""
+
+    def __init__(self, n_symbols: int, alpha: float):
+        self.alpha = alpha
+        self._state = np.full(n_symbols, np.nan)
+
+    def append(self, row: np.ndarray) -> np.ndarray:
+        """追加一行，返回新的均值"""
+        state = self._state
+        updated = np.where(np.isnan(row), state, state + self.alpha * (row - state))
+        self._state = np.where(np.isnan(state), row, updated)
+        return self._state.astype(np.float32)
+
+
+Bar = Union[pd.Series, np.ndarray, Sequence[float]]
+
+
+class IndicatorEngine:
+    """逐日追加 K 线的全市场指标
+
+    每个指标保存自己的滚动状态，``update`` 追加一根 K 线后返回全部股票的最新指标，
+    只做 O(股票数) 的运算。没有最高/最低价时用收盘价代替，没有成交量时不计算量能指标。
+
+    Args:
+        symbols: 股票代码，决定列顺序
+        sma_windows: 简单均线窗口
+        ema_spans: 指数均线周期
+        extreme_window: 滚动最高/最低的窗口（默认 52 周）
+        atr_window: ATR 窗口
+        volume_window: 平均成交量窗口
+    """
+
+    def __init__(self, symbols: Sequence[str], sma_windows: Sequence[int] = (10, 20, 50, 150, 200),
+                 ema_spans: Sequence[int] = (10, 21), extreme_window: int = 252,
+                 atr_window: int = 14, volume_window: int = 50):
+        self.symbols = pd.Index(symbols)
+        n_symbols = len(self.symbols)
+        self._sma = {window: RollingMean(window, n_symbols) for window in sma_windows}
+        self._ema = {span: ExponentialAverage(n_symbols, 2.0 / (span + 1.0))
+                     for span in ema_spans}
+        self.extreme_window = extreme_window
+        self._high = RollingExtreme(extreme_window, n_symbols, largest=True)
+        self._low = RollingExtreme(extreme_window, n_symbols, largest=False)
+        self.atr_window = atr_window
+        self._atr = ExponentialAverage(n_symbols, 1.0 / atr_window)
+        self._previous_close = np.full(n_symbols, np.nan)
+        self.volume_window = volume_window
+        self._volume = RollingMean(volume_window, n_symbols)
+        self._volume_mean = np.full(n_symbols, np.nan, dtype=np.float32)
+        self.count = 0
+        self.latest: Dict[str, np.ndarray] = {}
+
+    @classmethod
+    def from_history(cls, close: pd.DataFrame, high: Optional[pd.DataFrame] = None,
+                     low: Optional[pd.DataFrame] = None,
+                     volume: Optional[pd.DataFrame] = None, **kwargs) -> 'IndicatorEngine':
+        """由历史面板（列为股票代码）逐行预热"""
+        engine = cls(close.columns, **kwargs)
+        panels = [None if panel is None else
+                  panel.reindex(index=close.index, columns=close.columns).to_numpy(np.float64)
+                  for panel in (close, high, low, volume)]
+        for row in range(len(close)):
+            engine.update(*(None if panel is None else panel[row] for panel in panels))
+        return engine
+
+    def _row(self, values: Optional[Bar]) -> Optional[np.ndarray]:
+        if values is None:
+            return None
+        if isinstance(values, pd.Series):
+            return values.reindex(self.symbols).to_numpy(dtype=np.float64)
+        row = np.asarray(values, dtype=np.float64)
+        if row.shape != (len(self.symbols),):
+            raise ValueError(f"K 线长度 {row.shape} 与股票数 {len(self.symbols)} 不一致")
+        return row
+
+    def update(self, close: Bar, high: Optional[Bar] = None, low: Optional[Bar] = None,
+               volume: Optional[Bar] = None) -> Dict[str, np.ndarray]:
+        """追加一个交易日（Series 按代码对齐，缺失记为 NaN），返回各指标的最新值"""
+        close = self._row(close)
+        high = self._row(high)
+        low = self._row(low)
+        high = close if high is None else high
+        low = close if low is None else low
+        latest = {'close': close.astype(np.float32)}
+        for window, mean in self._sma.items():
+            latest[f'sma{window}'] = mean.append(close)
+        for span, average in self._ema.items():
+            latest[f'ema{span}'] = average.append(close)
+        latest[f'high_{self.extreme_window}'] = self._high.append(high)
+        latest[f'low_{self.extreme_window}'] = self._low.append(low)
+        previous = self._previous_close
+        gap = np.fmax(np.abs(high - previous), np.abs(low - previous))
+        true_ranges = np.where(np.isnan(high - low), np.nan, np.fmax(high - low, gap))
+        latest[f'atr{self.atr_window}'] = self._atr.append(true_ranges)
+        self._previous_close = close
+        volume = self._row(volume)
+        if volume is not None:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                latest['volume_ratio'] = np.where(self._volume_mean > 0,
+                                                  volume / self._volume_mean,
+                                                  np.nan).astype(np.float32)
+            self._volume_mean = self._volume.append(volume)
+            latest[f'volume_sma{self.volume_window}'] = self._volume_mean
+        self.count += 1
+        self.latest = latest
+        return latest
+
+    def frame(self) -> pd.DataFrame:
+        """最新指标表，行为股票代码"""
+        return pd.DataFrame(self.latest, index=self.symbols)
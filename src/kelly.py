@@ -4,9 +4,20 @@
 - 基于赔率与胜率的形式
 - 基于胜/负概率与盈亏比例的广义形式
 
+以及基于 NumPy 的蒙特卡洛模拟：多条资金曲线 × 多轮下注作为一次数组运算，
+统计终值中位数、最大回撤分位数与破产概率；``kelly_sweep`` 通过广播一次计算
+胜率、盈亏比与凯利比例缩放组成的整个参数网格。
 """
 
-import random
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd  # pylint: disable=import-error
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+# simulate_paths 每批的元素数（曲线条数 × 下注次数），每批的临时数组合计约 35 字节/元素
+CHUNK_ELEMENTS = 2_000_000
 
 
 def kelly_from_odds(b, p):
@@ -30,34 +41,189 @@ def kelly(p, q, win_return, lose_return):
     return (p * win_return - q * lose_return) / win_return * lose_return
 
 
-def main() -> None:
-    """演示使用凯利公式进行多轮模拟。"""
-    # b 赔率，p 获胜概率 n 下注次数
-    # 赔率计算方式：赚的钱(包含本金) / 亏损的钱
+def _kelly_formula(p, q, win_return, lose_return):
+    """使期望对数增长率最大的下注比例 ``(p*w - q*l) / (w*l)``，标量与数组通用，不做胜率检查
+
+    与 ``kelly()`` 的返回值不同：这里是 ``growth_rate`` 的最大值点，大于 1 时表示需要加杠杆。
+    """
+    return (p * win_return - q * lose_return) / (win_return * lose_return)
+
+
+def growth_rate(fraction, p, win_return, lose_return):
+    """每轮下注的期望对数增长率 ``p*log(1+f*w) + q*log(1-f*l)``，输光本金时为 -inf"""
+    fraction, p, win_return, lose_return = np.broadcast_arrays(
+        *(np.asarray(x, dtype=np.float64) for x in (fraction, p, win_return, lose_return)))
+    loss = 1 - fraction * lose_return
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_lose = np.where(loss > 0, np.log(np.where(loss > 0, loss, 1.0)), -np.inf)
+        rate = p * np.log1p(fraction * win_return) + (1 - p) * log_lose
+    # 必输（p=1 时 q=0）的项不计入
+    return np.where((p == 1) & (loss <= 0), np.log1p(fraction * win_return), rate)
+
+
+def kelly_sweep(p: ArrayLike, win_return: ArrayLike, lose_return: ArrayLike,
+                fraction: ArrayLike = (1.0, 0.5, 0.25), n_steps: Optional[int] = None,
+                n_paths: int = 1000, seed: Optional[int] = None) -> pd.DataFrame:
+    """在 (胜率 × 净利润率 × 净亏损率 × 凯利缩放) 网格上批量计算凯利比例与增长率
+
+    ``kelly`` 列为使期望对数增长率最大的比例 ``(p*w - q*l) / (w*l)``（大于 1 表示加杠杆），
+    与 ``kelly()`` 的返回值不同。胜率小于失败率的格子不抛异常，``valid`` 为 False，
+    比例与增长率为 NaN。
+
+    Args:
+        p: 获胜概率
+        win_return: 净利润率
+        lose_return: 净亏损率
+        fraction: 对凯利比例的缩放，1 为全凯利，0.5 为半凯利
+        n_steps: 指定时额外模拟每个格子 ``n_paths`` 条、每条 ``n_steps`` 次下注的增长率；
+            终值只取决于获胜次数，因此按二项分布抽样，不需要逐步模拟
+        seed: 随机种子
+    Returns:
+        DataFrame: 每个格子一行，列为 p、q、win_return、lose_return、scale、kelly、
+        bet_fraction、valid、growth_rate，模拟时另有 sim_growth_median、sim_growth_p05
+    """
+    grid = np.meshgrid(*(np.atleast_1d(np.asarray(x, dtype=np.float64))
+                         for x in (p, win_return, lose_return, fraction)), indexing='ij')
+    p_, win, lose, scale = (axis.ravel() for axis in grid)
+    q = 1 - p_
+    valid = p_ >= q
+    with np.errstate(divide='ignore', invalid='ignore'):
+        full = np.where(valid, _kelly_formula(p_, q, win, lose), np.nan)
+    bet = full * scale
+    table = pd.DataFrame({
+        'p': p_, 'q': q, 'win_return': win, 'lose_return': lose, 'scale': scale,
+        'kelly': full, 'bet_fraction': bet, 'valid': valid,
+        'growth_rate': np.where(valid, growth_rate(np.nan_to_num(bet), p_, win, lose), np.nan),
+    })
+    if n_steps:
+        rng = np.random.default_rng(seed)
+        wins = rng.binomial(n_steps, p_[:, None], size=(len(p_), n_paths))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_win = np.log1p(np.nan_to_num(bet) * win)[:, None]
+            loss = (1 - np.nan_to_num(bet) * lose)[:, None]
+            log_lose = np.where(loss > 0, np.log(np.where(loss > 0, loss, 1.0)), -np.inf)
+            losses = n_steps - wins
+            sim = (wins * log_win + np.where(losses > 0, losses * log_lose, 0.0)) / n_steps
+        table['sim_growth_median'] = np.where(valid, np.median(sim, axis=1), np.nan)
+        table['sim_growth_p05'] = np.where(valid, np.percentile(sim, 5, axis=1), np.nan)
+    return table
+
+
+def simulate_paths(fraction, p, win_return, lose_return, n_paths=10000, n_steps=1000,
+                   seed=None, chunk_size=None, ruin_level=0.01
+                   ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """模拟多条资金曲线（初始资金为 1）。
+
+    每轮以 ``fraction`` 比例下注，获胜概率 ``p``，赢时资金乘以 ``1 + fraction * win_return``，
+    输时乘以 ``1 - fraction * lose_return``。在对数空间中累加，避免连乘溢出。
+
+    Args:
+        fraction (float): 每轮下注比例
+        p (float): 获胜概率
+        win_return (float): 净利润率
+        lose_return (float): 净亏损率
+        n_paths (int): 资金曲线条数
+        n_steps (int): 每条曲线的下注次数
+        seed (int | None): 随机种子，相同种子结果可复现
+        chunk_size (int | None): 每批模拟的曲线条数，用于限制内存，默认每批约
+            ``CHUNK_ELEMENTS`` 个元素（约 70MB 临时数组）
+        ruin_level (float): 资金跌破初始资金的该比例即视为破产
+    Returns:
+        tuple: (终值资金, 最大回撤, 是否破产)，均为长度 ``n_paths`` 的数组
+    """
+    rng = np.random.default_rng(seed)
+    if chunk_size is None:
+        chunk_size = max(1, CHUNK_ELEMENTS // max(n_steps, 1))
+    with np.errstate(divide='ignore'):
+        log_win = np.log1p(fraction * win_return)
+        log_lose = np.log1p(-fraction * lose_return) if fraction * lose_return < 1 else -np.inf
+    log_ruin = np.log(ruin_level)
+
+    terminal = np.empty(n_paths)
+    drawdown = np.empty(n_paths)
+    ruined = np.empty(n_paths, dtype=bool)
+    for start in range(0, n_paths, chunk_size):
+        stop = min(start + chunk_size, n_paths)
+        wins = rng.random((stop - start, n_steps)) < p
+        log_wealth = np.where(wins, log_win, log_lose)
+        np.cumsum(log_wealth, axis=1, out=log_wealth)
+        peak = np.maximum.accumulate(np.maximum(log_wealth, 0.0), axis=1)
+        with np.errstate(invalid='ignore'):
+            drawdown[start:stop] = 1 - np.exp(np.nanmin(log_wealth - peak, axis=1))
+        terminal[start:stop] = np.exp(log_wealth[:, -1]) if n_steps else 1.0
+        ruined[start:stop] = log_wealth.min(axis=1) < log_ruin if n_steps else False
+    return terminal, drawdown, ruined
+
+
+def summarize(terminal, drawdown, ruined, n_steps) -> Dict[str, float]:
+    """汇总模拟结果：终值分位数、最大回撤分位数、破产概率与每轮对数增长率。"""
+    with np.errstate(divide='ignore'):
+        growth = np.log(terminal) / max(n_steps, 1)
+    return {
+        'median_terminal': float(np.median(terminal)),
+        'mean_terminal': float(np.mean(terminal)),
+        'p05_terminal': float(np.percentile(terminal, 5)),
+        'p95_terminal': float(np.percentile(terminal, 95)),
+        'median_drawdown': float(np.percentile(drawdown, 50)),
+        'p95_drawdown': float(np.percentile(drawdown, 95)),
+        'p99_drawdown': float(np.percentile(drawdown, 99)),
+        'ruin_probability': float(np.mean(ruined)),
+        'median_growth_rate': float(np.median(growth)),
+    }
+
+
+def monte_carlo_kelly(p, win_return, lose_return, fraction_scale=1.0, fraction=None,
+                      n_paths=10000, n_steps=1000, seed=None, chunk_size=None,
+                      ruin_level=0.01) -> Dict[str, float]:
+    """按凯利比例（默认由 ``kelly()`` 计算）模拟并返回统计结果。
+
+    Args:
+        fraction_scale (float): 凯利比例的缩放，如 0.5 为半凯利
+        fraction (float | None): 直接指定下注比例，忽略凯利公式
+    """
+    if fraction is None:
+        fraction = kelly(p, 1 - p, win_return, lose_return) * fraction_scale
+    terminal, drawdown, ruined = simulate_paths(
+        fraction, p, win_return, lose_return, n_paths, n_steps, seed, chunk_size, ruin_level)
+    result = summarize(terminal, drawdown, ruined, n_steps)
+    result['fraction'] = float(fraction)
+    return result
+
+
+def monte_carlo_odds(b, p, fraction_scale=1.0, n_paths=10000, n_steps=1000, seed=None,
+                     chunk_size=None, ruin_level=0.01) -> Dict[str, float]:
+    """赔率形式：赢时获得下注额 ``b`` 倍的净利润，输时损失全部下注额
+
+    比例由 ``kelly_from_odds()`` 计算。
+    """
+    fraction = kelly_from_odds(b, p) * fraction_scale
+    return monte_carlo_kelly(p, b, 1.0, fraction=fraction, n_paths=n_paths, n_steps=n_steps,
+                             seed=seed, chunk_size=chunk_size, ruin_level=ruin_level)
+
+
+def main(seed: Optional[int] = None) -> None:
+    """演示使用凯利公式进行多路径蒙特卡洛模拟。"""
+    # p 获胜概率 n 下注次数
     # pre_money 本金
     # result 投注比例
-    b = 5.0
-    p = 0.5
     n = 1000
+    paths = 10000
     p, win_return, lose_return = 0.55, 0.1, 0.1
     q = 1 - p
     result = kelly(p, q, win_return, lose_return)
     money = 10
-    print(f"本金{money:.4f}\n赔率为{b:.4f}\n胜率为{p:.4f}\n投注比例 {result:.4f}")
-    x = [1]
-    y = [money]
-
-    for i in range(2, n + 1):
-        te = random.random()
-        if te <= p:
-            money *= 1 + result * (b - 1.0)
-        else:
-            money *= 1 - result
-        x.append(i)
-        y.append(money)
-        outcome = "猜错" if te > 0.5 else "猜对"
-        print(f"概率为{te:.2f} {outcome} 剩余金钱：{money:.2f}")
-    print(f"运行{n}次后,最后剩余{money:.2f}")
+    print(f"本金{money:.4f}\n胜率为{p:.4f}\n投注比例 {result:.4f}")
+
+    for scale, label in ((1.0, '全凯利'), (0.5, '半凯利')):
+        stats = monte_carlo_kelly(p, win_return, lose_return, fraction_scale=scale,
+                                  n_paths=paths, n_steps=n, seed=seed)
+        print(f"{label}: {paths}条路径运行{n}次后，剩余金钱中位数 "
+              f"{money * stats['median_terminal']:.2f}，"
+              f"5%/95%分位 {money * stats['p05_terminal']:.2f}/"
+              f"{money * stats['p95_terminal']:.2f}，"
+              f"最大回撤中位数 {stats['median_drawdown']:.2%}，"
+              f"95%分位 {stats['p95_drawdown']:.2%}，"
+              f"破产概率 {stats['ruin_probability']:.2%}")
 
 
 if __name__ == '__main__':
@@ -8,55 +8,187 @@
 策略思路：选择高 ROIC 和高盈利收益率的股票，即"好公司+好价格"。
 """
 
+import math
 import os
 import warnings
 from datetime import datetime
 from typing import Optional
 
+import numpy as np  # pylint: disable=import-error
 import pandas as pd  # pylint: disable=import-error
-import akshare as ak  # pylint: disable=import-error
+
+try:
+    from src.data_provider import DataProvider, get_provider
+    from src.ranking import CompositeRanking
+    from src.rules import RuleSet
+    from src.snapshot_store import SnapshotStore
+    from src.symbol_cache import SymbolCache
+except ImportError:  # 作为脚本直接运行时
+    from data_provider import DataProvider, get_provider
+    from ranking import CompositeRanking
+    from rules import RuleSet
+    from snapshot_store import SnapshotStore
+    from symbol_cache import SymbolCache
 
 warnings.filterwarnings('ignore')
 
+# 参与排名的有效数据
+MAGIC_FORMULA_RULES = RuleSet([
+    {'name': 'ROIC', 'rule': 'ROIC_proxy > 0'},
+    {'name': '盈利收益率', 'rule': 'earnings_yield > 0'},
+    {'name': '市盈率', 'rule': '0 < 市盈率-动态 < 50'},  # 排除过高市盈率
+], name='magic_formula')
+
+# 获取财务数据前在行情快照上的预筛选，只为通过的股票请求财务数据
+MAGIC_FORMULA_PREFILTER = RuleSet([
+    {'name': '市值', 'rule': '总市值 > 5000000000'},  # 50亿以上，流动性要求
+    {'name': '市盈率', 'rule': '0 < 市盈率-动态 < 50'},
+], name='magic_formula_prefilter')
+
+# 财务分析指标列 -> 策略使用的列名
+FINANCIAL_COLUMNS = {'净资产收益率(%)': '净资产收益率'}
+
+
+def earnings_yield(pe):
+    """盈利收益率的替代：市盈率倒数，市盈率为 0 或无穷大时为 0
+
+    传入数组时返回数组，传入标量时返回浮点数。
+    """
+    with np.errstate(divide='ignore'):
+        result = 1 / np.asarray(pe, dtype=np.float64)
+    result = np.where(np.isinf(result), 0.0, result)
+    return float(result) if result.ndim == 0 else result
+
+
+def _to_float(value) -> float:
+    """转为浮点数，无法解析（如 ``'--'``）时为 NaN"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return math.nan
+
+
+class MagicFormulaRanking:
+    """可逐只更新的神奇公式排名
+
+    只保留 ROIC 与盈利收益率均为正的股票，名次与 ``Series.rank(ascending=False)`` 相同
+    （并列取平均名次）。每个指标维护 ``RankIndex``（有序数组），更新一只股票是二分查找
+    加一次 O(n) 的数组平移；``top`` 用部分选择取前 k 名而不对全部股票排序。选股器在获取
+    财务数据时逐只计入排名，盘中行情变化时也只需更新变化的股票。
+    """
+
+    METRICS = ('ROIC_proxy', 'earnings_yield')
+
+    def __init__(self):
+        self._ranking = CompositeRanking(self.METRICS)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame,
+                   key: Optional[str] = '代码') -> 'MagicFormulaRanking':
+        """由含两个指标列的数据表批量构建，``key`` 为代码列，None 时使用行索引"""
+        values = frame[list(cls.METRICS)].apply(pd.to_numeric, errors='coerce')
+        valid = ((values > 0).all(axis=1)).to_numpy()
+        values = values[valid]
+        if key is not None:
+            values.index = frame.loc[valid, key].to_numpy()
+        ranking = cls()
+        ranking._ranking = CompositeRanking.from_frame(values, cls.METRICS)
+        return ranking
+
+    def __len__(self) -> int:
+        return len(self._ranking)
+
+    def __contains__(self, code: str) -> bool:
+        return code in self._ranking
+
+    def update(self, code: str, roic, earnings_yield) -> bool:
+        """加入或更新一只股票，指标无效时移出排名并返回 False"""
+        roic, earnings_yield = _to_float(roic), _to_float(earnings_yield)
+        if not (roic > 0 and earnings_yield > 0):
+            self._ranking.remove(code)
+            return False
+        self._ranking.update(code, {'ROIC_proxy': roic, 'earnings_yield': earnings_yield})
+        return True
+
+    def remove(self, code: str) -> bool:
+        """移出一只股票"""
+        return self._ranking.remove(code)
+
+    def top(self, k: int = 50) -> pd.DataFrame:
+        """当前综合排名前 ``k`` 的股票，同分按代码排序"""
+        top = self._ranking.top(k)
+        codes = [code for code, _ in top]
+        values, ranks = self._ranking.lookup(codes)
+        return pd.DataFrame({
+            '代码': codes,
+            'ROIC_proxy': values[:, 0], 'earnings_yield': values[:, 1],
+            'ROIC_rank': ranks[:, 0], 'earnings_yield_rank': ranks[:, 1],
+            'magic_score': [score for _, score in top],
+        })
+
 
 class MagicFormulaScreener:
     """神奇公式选股器。"""
 
-    def __init__(self):
-        """初始化选股器。"""
+    # 策略用到的快照列，读取快照时只加载这些列
+    SNAPSHOT_COLUMNS = ['代码', '名称', '最新价', '涨跌幅', '总市值', '流通市值',
+                        '市盈率-动态', '市净率', '净资产收益率']
+
+    def __init__(self, cache: Optional[SymbolCache] = None,
+                 provider: Optional[DataProvider] = None, rate_limit: float = 3.0,
+                 rules: Optional[RuleSet] = None, prefilter: Optional[RuleSet] = None,
+                 max_workers: int = 4, request_budget: Optional[int] = None):
+        """初始化选股器。
+
+        Args:
+            cache: 按股票的行情/财务缓存，只传缓存时使用 akshare 后端
+            provider: 数据提供者，默认使用进程内共享的 ``get_provider()``
+            rate_limit: 财务数据接口每秒请求数上限
+            rules: 参与排名前的过滤条件，默认 ``MAGIC_FORMULA_RULES``
+            prefilter: 行情快照上的预筛选条件，默认 ``MAGIC_FORMULA_PREFILTER``
+            max_workers: 并发获取财务数据的线程数
+            request_budget: 单次运行最多请求财务数据的股票数（缓存命中不计），
+                超出时优先请求盈利收益率高的股票，默认不限
+        """
+        self.rate_limit = rate_limit
+        self.rules = rules if rules is not None else MAGIC_FORMULA_RULES
+        self.prefilter = prefilter if prefilter is not None else MAGIC_FORMULA_PREFILTER
+        self.max_workers = max_workers
+        self.request_budget = request_budget
+        self.ranking = MagicFormulaRanking()
+        # ranking 是否由本次获取的财务数据逐只计入（此时筛选时直接沿用）
+        self.ranking_streamed = False
         self.stocks_data: Optional[pd.DataFrame] = None
         self.screened_stocks: Optional[pd.DataFrame] = None
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.data_path = os.path.join(self.script_dir, '..', 'magic_formula_data.csv')
+        self.snapshot_name = 'magic_formula_data'
+        self.snapshot_store = SnapshotStore(os.path.join(self.script_dir, 'snapshots'))
         self.result_path = os.path.join(self.script_dir, '..', 'magic_formula_results.csv')
+        if provider is None:
+            provider = DataProvider(cache=cache) if cache is not None else get_provider()
+        self.provider = provider
+        self.cache = provider.cache
 
     def get_stock_data(self) -> None:
         """获取A股股票数据。"""
         print("正在获取A股股票数据...")
 
-        # 检查本地缓存
-        if os.path.exists(self.data_path):
-            file_mtime = datetime.fromtimestamp(os.path.getmtime(self.data_path))
-            file_date = file_mtime.strftime('%Y-%m-%d')
-            today = datetime.now().strftime('%Y-%m-%d')
+        # 行情快照在缓存有效期内直接复用，已过滤ST股票和退市股票
+        stock_list = self.provider.tradable_spot()
 
-            if file_date == today:
-                print("读取本地缓存数据...")
-                self.stocks_data = pd.read_csv(self.data_path)
-                print(f"成功读取{len(self.stocks_data)}只股票数据")
-                return
+        # 在行情快照上预筛选（市值、市盈率），只为通过的股票请求财务数据
+        prefiltered = self.prefilter.evaluate(stock_list)
+        print(prefiltered.report())
+        stock_list = prefiltered.select(stock_list)
 
-        stock_list = ak.stock_zh_a_spot_em()
-
-        # 过滤ST股票和退市股票
-        stock_list = stock_list[~stock_list['名称'].str.contains('ST|退', na=False)]
-
-        # 过滤市值过小的股票（流动性要求）
-        stock_list = stock_list[stock_list['总市值'] > 5000000000]  # 50亿以上
-
-        # 获取财务数据
+        # 获取财务数据，只请求缓存中缺失或过期的股票
         financial_data = self._get_financial_data(stock_list)
+        self.provider.save()
+        print(f"缓存统计: {self.cache.stats}")
 
+        # 财务数据没有 ROE 时 ROIC 改用盈利收益率，与逐只计入的排名不同，筛选时重建
+        self.ranking_streamed = (financial_data is not None
+                                 and '净资产收益率' in financial_data.columns)
         if financial_data is None:
             print("未能获取到财务数据，将使用基础股票信息")
             self.stocks_data = stock_list[
@@ -71,43 +203,52 @@ class MagicFormulaScreener:
                 how='inner'
             )
 
-        # 保存到本地
-        self.stocks_data.to_csv(self.data_path, index=False)
+        # 保存当日快照
+        self.snapshot_store.save(self.snapshot_name, self.stocks_data)
         print(f"成功获取{len(self.stocks_data)}只股票数据并保存到本地")
 
+    def load_snapshot(self, date: Optional[str] = None) -> bool:
+        """读取已保存的快照（默认最新一天），只加载策略需要的列。"""
+        data = self.snapshot_store.load(self.snapshot_name, date, columns=self.SNAPSHOT_COLUMNS)
+        if data is None:
+            print("没有可用的本地快照")
+            return False
+        self.stocks_data = data
+        self.ranking_streamed = False
+        print(f"成功读取{len(self.stocks_data)}只股票快照数据")
+        return True
+
     def _get_financial_data(self, stock_list: pd.DataFrame) -> Optional[pd.DataFrame]:
-        """获取财务数据。"""
+        """获取预筛选后全部股票的财务数据，每只到达后立即计入排名。"""
         print("正在获取财务数据...")
-        financial_data = pd.DataFrame()
-        stock_codes = stock_list['代码'].tolist()
-
-        # 限制处理数量，避免请求过多
-        stock_codes = stock_codes[:100]  # 只处理前100只股票作为示例
-
-        for i, code in enumerate(stock_codes):
-            try:
-                # 获取财务指标
-                financial = ak.stock_financial_analysis_indicator(
-                    symbol=code, start_year="2024"
-                )
-
-                if not financial.empty:
-                    # 只保留最新一期数据
-                    latest_data = financial.iloc[[-1]].copy()
-                    latest_data['代码'] = code
-                    financial_data = pd.concat([financial_data, latest_data])
-
-                print(f"已处理 {i + 1}/{len(stock_codes)} 只股票")
-
-            except (KeyError, ValueError, RuntimeError) as err:  # noqa: PERF203
-                # 根据实际 akshare 可能抛出的异常类型调整
-                print(f"获取股票 {code} 财务数据时出错: {err}")
-                continue
-
-        if financial_data.empty:
+        # 盈利收益率高（市盈率低）的股票优先请求，预算不足时跳过的是排名靠后的股票
+        pe = pd.to_numeric(stock_list['市盈率-动态'], errors='coerce')
+        order = pe.sort_values(kind='stable').index
+        yields = dict(zip(stock_list.loc[order, '代码'], earnings_yield(pe[order])))
+        stock_codes = list(yields)
+
+        # 只请求缓存中缺失或过期的股票
+        fetcher = self.provider.financial_fetcher(
+            start_year="2024", max_workers=self.max_workers, rate=self.rate_limit)
+        self.ranking = MagicFormulaRanking()
+        rows = []
+        for done, (code, row) in enumerate(
+                fetcher.stream(stock_codes, budget=self.request_budget), start=1):
+            if row:
+                rows.append({**row, '代码': code})
+                # 与 calculate_magic_formula_metrics 一致，ROIC 用 ROE
+                self.ranking.update(code, row.get('净资产收益率(%)'), yields[code])
+            if done % 200 == 0 and len(self.ranking):
+                leader = self.ranking.top(1)['代码'].iloc[0]
+                print(f"已处理 {done} 只股票，参与排名 {len(self.ranking)} 只，当前第一名 {leader}")
+        if fetcher.skipped:
+            print(f"超出请求预算，跳过 {len(fetcher.skipped)} 只股票")
+
+        if not rows:
             print("未能获取到财务数据")
             return None
 
+        financial_data = pd.DataFrame(rows).rename(columns=FINANCIAL_COLUMNS)
         print(f"成功获取{len(financial_data)}只股票的财务数据")
         return financial_data
 
@@ -127,14 +268,10 @@ class MagicFormulaScreener:
             self.stocks_data['ROIC_proxy'] = self.stocks_data['净资产收益率']
         else:
             # 使用市盈率倒数作为盈利能力的替代
-            self.stocks_data['ROIC_proxy'] = 1 / self.stocks_data['市盈率-动态'].replace(
-                [0, float('inf')], 0
-            )
+            self.stocks_data['ROIC_proxy'] = earnings_yield(self.stocks_data['市盈率-动态'])
 
         # 2. 盈利收益率（Earnings Yield）的替代：市盈率倒数
-        self.stocks_data['earnings_yield'] = 1 / self.stocks_data['市盈率-动态'].replace(
-            [0, float('inf')], 0
-        )
+        self.stocks_data['earnings_yield'] = earnings_yield(self.stocks_data['市盈率-动态'])
 
         # 处理异常值
         self.stocks_data['ROIC_proxy'] = self.stocks_data['ROIC_proxy'].replace(
@@ -155,29 +292,28 @@ class MagicFormulaScreener:
         print("正在应用神奇公式筛选...")
 
         # 过滤有效数据
-        valid_data = self.stocks_data[
-            (self.stocks_data['ROIC_proxy'] > 0)
-            & (self.stocks_data['earnings_yield'] > 0)
-            & (self.stocks_data['市盈率-动态'] > 0)
-            & (self.stocks_data['市盈率-动态'] < 50)
-        ].copy()  # 排除过高市盈率
+        result = self.rules.evaluate(self.stocks_data)
+        print(result.report())
+        valid_data = result.select(self.stocks_data).copy()
 
         if valid_data.empty:
             print("没有符合条件的股票")
             return
 
-        # 计算排名
-        # ROIC 排名（越高越好）
-        valid_data['ROIC_rank'] = valid_data['ROIC_proxy'].rank(ascending=False)
-
-        # 盈利收益率排名（越高越好）
-        valid_data['earnings_yield_rank'] = valid_data['earnings_yield'].rank(ascending=False)
-
-        # 综合排名（越小越好）
-        valid_data['magic_score'] = valid_data['ROIC_rank'] + valid_data['earnings_yield_rank']
-
-        # 按综合排名排序
-        self.screened_stocks = valid_data.sort_values('magic_score').head(50)  # 取前50名
+        # 计算排名：ROIC 与盈利收益率各自越高越好，名次之和越小越好
+        # 每个指标建名次索引，前50名用部分选择得到，不对全表排序
+        key = '代码' if '代码' in valid_data.columns else None
+        if self.ranking_streamed and key is not None:
+            # 获取财务数据时已逐只计入排名，只需移出未通过过滤条件的股票
+            for code in self.stocks_data.loc[~result.mask, key]:
+                self.ranking.remove(code)
+        else:
+            self.ranking = MagicFormulaRanking.from_frame(valid_data, key)
+        top = self.ranking.top(50)  # 取前50名
+        keys = valid_data.index if key is None else pd.Index(valid_data[key])
+        self.screened_stocks = valid_data.iloc[keys.get_indexer(top['代码'])].copy()
+        for column in ('ROIC_rank', 'earnings_yield_rank', 'magic_score'):
+            self.screened_stocks[column] = top[column].to_numpy()
 
         print(f"筛选出{len(self.screened_stocks)}只符合神奇公式的股票")
 
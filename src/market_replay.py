@@ -0,0 +1,198 @@
+"""离线回放与合成的全市场数据
+
+测试与基准不再逐个 mock akshare，而是给 ``DataProvider`` 换一个后端：
+
+- ``SyntheticBackend``：按指定规模（如 5000 只股票 × 1000 个交易日）生成确定性的
+  行情快照、财务指标与日线，同一 ``seed`` 每次结果相同
+- ``record_universe``：把任意后端的数据录制为本地快照与日线存储，之后用
+  ``data_provider.SnapshotBackend`` 离线回放
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd  # pylint: disable=import-error
+
+try:
+    from src.bar_store import BarStore
+    from src.snapshot_store import SnapshotStore
+except ImportError:  # 作为脚本直接运行时
+    from bar_store import BarStore
+    from snapshot_store import SnapshotStore
+
+# 与 ak.stock_zh_a_spot_em 的列顺序一致（vcp.select_symbols 按位置读取）
+SPOT_COLUMNS = ['序号', '代码', '名称', '最新价', '涨跌幅', '涨跌额', '成交量', '成交额', '振幅',
+                '最高', '最低', '今开', '昨收', '量比', '换手率', '市盈率-动态', '市净率',
+                '总市值', '流通市值', '涨速', '5分钟涨跌', '60日涨跌幅', '年初至今涨跌幅']
+
+# 沪深主板与创业板代码前缀，依次轮流分配
+BOARD_PREFIXES = ('00', '60', '30')
+
+
+def exchange_symbol(code: str) -> str:
+    """6 位代码加交易所前缀，如 ``600000`` → ``sh600000``"""
+    return ('sh' if code.startswith('6') else 'sz') + code
+
+
+class SyntheticBackend:
+    """确定性的合成行情后端，接口与 ``data_provider.AkshareBackend`` 一致
+
+    收盘价为带个股漂移与波动率的对数随机游走，第一次用到时一次生成整个面板；
+    财务指标按股票单独的随机流生成，不依赖请求顺序。
+
+    Args:
+        n_stocks: 股票数量（不超过 30000）
+        n_days: 交易日数量
+        seed: 随机种子
+        end_date: 最后一个交易日
+        st_every: 每隔多少只股票生成一只 ST 股票，0 表示不生成
+        n_quarters: 每只股票的财务报告期数量
+    """
+
+    def __init__(self, n_stocks: int = 5000, n_days: int = 1000, seed: int = 0,
+                 end_date: str = '2025-12-31', st_every: int = 50, n_quarters: int = 8):
+        if not 0 < n_stocks <= 10000 * len(BOARD_PREFIXES):
+            raise ValueError("n_stocks 必须在 1 到 30000 之间")
+        if n_days < 2:
+            raise ValueError("n_days 至少为 2")
+        self.n_stocks = n_stocks
+        self.n_days = n_days
+        self.seed = seed
+        self.n_quarters = n_quarters
+        self.dates = pd.bdate_range(end=end_date, periods=n_days)
+        self.codes = [BOARD_PREFIXES[i % len(BOARD_PREFIXES)] + f'{i // len(BOARD_PREFIXES):04d}'
+                      for i in range(n_stocks)]
+        self.names = [('*ST' if st_every and i % st_every == st_every - 1 else '股票') + code
+                      for i, code in enumerate(self.codes)]
+        self._position = {code: i for i, code in enumerate(self.codes)}
+        self._close: Optional[np.ndarray] = None
+        self.calls: Dict[str, int] = {'spot': 0, 'financial': 0, 'daily': 0}
+
+    @property
+    def close(self) -> np.ndarray:
+        """(交易日 × 股票) 收盘价面板"""
+        if self._close is None:
+            rng = np.random.default_rng(self.seed)
+            drift = rng.normal(0.0003, 0.0005, self.n_stocks)
+            vol = rng.uniform(0.01, 0.04, self.n_stocks)
+            start = rng.uniform(3.0, 80.0, self.n_stocks)
+            log_returns = rng.standard_normal((self.n_days, self.n_stocks)) * vol + drift
+            log_returns[0] = 0.0
+            self._close = start * np.exp(np.cumsum(log_returns, axis=0))
+        return self._close
+
+    def _rng(self, position: int, stream: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, stream, position])
+
+    def spot(self) -> pd.DataFrame:
+        """最后一个交易日的行情快照"""
+        self.calls['spot'] += 1
+        close = self.close
+        last, prev = close[-1], close[-2]
+        rng = np.random.default_rng([self.seed, 0])
+        n = self.n_stocks
+        shares = np.exp(rng.uniform(np.log(1e8), np.log(1e10), n))
+        volume = np.round(shares * rng.uniform(0.0, 0.05, n) / 100)
+        volume[rng.random(n) < 0.01] = 0.0  # 停牌
+        high = np.maximum(last, prev) * (1 + rng.uniform(0, 0.03, n))
+        low = np.minimum(last, prev) * (1 - rng.uniform(0, 0.03, n))
+        earnings = rng.normal(0.06, 0.08, n)
+        frame = pd.DataFrame({
+            '序号': np.arange(1, n + 1),
+            '代码': self.codes,
+            '名称': self.names,
+            '最新价': last.round(2),
+            '涨跌幅': ((last / prev - 1) * 100).round(2),
+            '涨跌额': (last - prev).round(2),
+            '成交量': volume,
+            '成交额': (volume * 100 * last).round(2),
+            '振幅': ((high - low) / prev * 100).round(2),
+            '最高': high.round(2),
+            '最低': low.round(2),
+            '今开': prev.round(2),
+            '昨收': prev.round(2),
+            '量比': rng.uniform(0.3, 3.0, n).round(2),
+            '换手率': (volume * 100 / shares * 100).round(2),
+            '市盈率-动态': np.where(np.abs(earnings) < 1e-3, 0.0, 1 / earnings).round(2),
+            '市净率': rng.lognormal(0.3, 0.6, n).round(2),
+            '总市值': (shares * last).round(0),
+            '流通市值': (shares * last * rng.uniform(0.3, 1.0, n)).round(0),
+            '涨速': rng.normal(0, 0.2, n).round(2),
+            '5分钟涨跌': rng.normal(0, 0.3, n).round(2),
+            '60日涨跌幅': ((last / close[max(0, self.n_days - 61)] - 1) * 100).round(2),
+            '年初至今涨跌幅': ((last / close[0] - 1) * 100).round(2),
+        })
+        return frame[SPOT_COLUMNS]
+
+    def financial(self, symbol: str, start_year: str) -> pd.DataFrame:
+        """按报告期升序的财务分析指标，只返回 ``start_year`` 起的报告期"""
+        self.calls['financial'] += 1
+        position = self._position.get(symbol[-6:])
+        if position is None:
+            return pd.DataFrame()
+        rng = self._rng(position, 1)
+        periods = pd.date_range(end=self.dates[-1], periods=self.n_quarters, freq='QE')
+        n = len(periods)
+        frame = pd.DataFrame({
+            '日期': periods.strftime('%Y-%m-%d'),
+            '摊薄每股收益(元)': rng.normal(0.5, 0.6, n).round(3),
+            '净资产收益率(%)': rng.normal(8.0, 8.0, n).round(2),
+            '资产负债率(%)': np.clip(rng.normal(50.0, 18.0, n), 1.0, 99.0).round(2),
+            '净利润增长率(%)': rng.normal(5.0, 30.0, n).round(2),
+            '主营业务收入增长率(%)': rng.normal(8.0, 20.0, n).round(2),
+            '每股净资产_调整后(元)': rng.lognormal(1.5, 0.5, n).round(3),
+        })
+        return frame[frame['日期'] >= str(start_year)].reset_index(drop=True)
+
+    def daily(self, symbol: str, start_date: str, end_date: str,
+              adjust: str = 'qfq') -> pd.DataFrame:
+        """日线（``date/open/high/low/close/volume``），按日期区间截取"""
+        self.calls['daily'] += 1
+        position = self._position.get(symbol[-6:])
+        if position is None:
+            return pd.DataFrame()
+        lo = self.dates.searchsorted(pd.Timestamp(start_date), side='left')
+        hi = self.dates.searchsorted(pd.Timestamp(end_date), side='right')
+        if lo >= hi:
+            return pd.DataFrame()
+        close = self.close[:, position]
+        rng = self._rng(position, 2)
+        spread = rng.uniform(0.0, 0.03, (2, self.n_days))
+        volume = rng.lognormal(13.0, 0.5, self.n_days).round()
+        opens = np.concatenate(([close[0]], close[:-1]))
+        frame = pd.DataFrame({
+            'date': self.dates[lo:hi].date,
+            'open': opens[lo:hi],
+            'high': np.maximum(opens, close)[lo:hi] * (1 + spread[0, lo:hi]),
+            'low': np.minimum(opens, close)[lo:hi] * (1 - spread[1, lo:hi]),
+            'close': close[lo:hi],
+            'volume': volume[lo:hi],
+        })
+        return frame
+
+
+def record_universe(backend, store: SnapshotStore, codes: Optional[Iterable[str]] = None,
+                    start_year: str = '2024', date: Optional[str] = None,
+                    bar_store: Optional[BarStore] = None,
+                    end_date: Optional[str] = None) -> Dict[str, int]:
+    """把后端的行情快照与财务指标录制为 ``spot`` / ``financial`` 快照
+
+    ``codes`` 默认为快照中的全部股票；传入 ``bar_store`` 时同时把这些股票的日线
+    更新到 ``end_date``（日线存储的 ``fetch_func`` 应指向同一后端）。
+    返回录制的股票数、财务行数与日线股票数。
+    """
+    spot = backend.spot()
+    store.save('spot', spot, date)
+    codes = spot['代码'].astype(str).tolist() if codes is None else list(codes)
+    frames: List[pd.DataFrame] = []
+    for code in codes:
+        financial = backend.financial(code, start_year)
+        if financial is not None and not financial.empty:
+            frames.append(financial.assign(代码=code))
+    financial = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame({'代码': []})
+    store.save('financial', financial, date)
+    bars = 0
+    if bar_store is not None:
+        bars = len(bar_store.update_many([exchange_symbol(code) for code in codes], end_date,
+                                         progress_every=0))
+    return {'stocks': len(spot), 'financial_rows': len(financial), 'bars': bars}
@@ -0,0 +1,171 @@
+"""按内容寻址的 PDF 存储
+
+同一份公告（如基金公司公告）常出现在多只基金的公告列表中，原先每只基金目录都会
+单独下载保存一份。这里把文件内容按 sha256 保存为唯一的 blob
+（``root/.blobs/ab/abcdef....pdf``），基金目录中的文件只是指向 blob 的硬链接
+（不支持硬链接时退回复制，并在索引中记为 ``copied``，``prune`` 不会删除这类 blob）。
+
+索引 ``root/.blobs/index.json`` 记录公告 ID 到 sha256 的映射，下载前先按 ID 查找，
+已有的公告直接建立链接，不再请求网络；同一 ID 同时被多只基金请求时只下载一次。
+"""
+
+import asyncio
+import json
+import os
+import shutil
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+try:
+    from src.fund_sync import file_sha256
+except ImportError:  # 作为脚本直接运行时
+    from fund_sync import file_sha256
+
+BLOB_DIR = '.blobs'
+INDEX_FILE = 'index.json'
+
+
+class PdfStore:
+    """按内容寻址的 blob 存储与公告 ID 索引
+
+    Args:
+        root: 下载根目录，blob 保存在其中的 ``.blobs`` 子目录
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self.blob_root = os.path.join(root, BLOB_DIR)
+        self.staging = os.path.join(self.blob_root, 'tmp')
+        os.makedirs(self.staging, exist_ok=True)
+        self._index_path = os.path.join(self.blob_root, INDEX_FILE)
+        self.index: Dict[str, Dict] = self._load_index()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+
+    def _load_index(self) -> Dict[str, Dict]:
+        if not os.path.exists(self._index_path):
+            return {}
+        try:
+            with open(self._index_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError) as err:
+            print(f"读取 PDF 索引失败，将重新建立: {err}")
+            return {}
+
+    def save(self) -> None:
+        """原子写回索引"""
+        if not self._dirty:
+            return
+        tmp_path = f'{self._index_path}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=0)
+        os.replace(tmp_path, self._index_path)
+        self._dirty = False
+
+    def blob_path(self, sha256: str) -> str:
+        """blob 文件路径，按哈希前两位分目录"""
+        return os.path.join(self.blob_root, sha256[:2], f'{sha256}.pdf')
+
+    def lookup(self, report_id: str) -> Optional[Dict]:
+        """按公告 ID 查找已保存的 blob，返回 ``{'sha256', 'size'}``"""
+        entry = self.index.get(str(report_id))
+        if entry is not None and os.path.exists(self.blob_path(entry['sha256'])):
+            return entry
+        return None
+
+    def add(self, report_id: str, path: str, sha256: Optional[str] = None) -> Dict:
+        """把已下载的文件移入 blob 存储并记录 ID，内容已存在时丢弃该文件"""
+        sha256 = sha256 or file_sha256(path)
+        blob = self.blob_path(sha256)
+        if os.path.exists(blob):
+            os.remove(path)
+        else:
+            os.makedirs(os.path.dirname(blob), exist_ok=True)
+            os.replace(path, blob)
+        entry = {'sha256': sha256, 'size': os.path.getsize(blob)}
+        self.index[str(report_id)] = entry
+        self._dirty = True
+        return entry
+
+    def link(self, entry: Dict, dest: str) -> None:
+        """在 ``dest`` 建立指向 blob 的硬链接（已存在则替换）"""
+        blob = self.blob_path(entry['sha256'])
+        directory = os.path.dirname(dest)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if os.path.exists(dest) and os.path.samefile(blob, dest):
+            return
+        tmp_path = f'{dest}.link'
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        try:
+            os.link(blob, tmp_path)
+        except OSError:
+            shutil.copyfile(blob, tmp_path)
+            self._mark_copied(entry['sha256'])
+        os.replace(tmp_path, dest)
+
+    def _mark_copied(self, sha256: str) -> None:
+        """记录该 blob 曾以复制方式放入基金目录，链接数不再能反映是否仍被使用"""
+        for entry in self.index.values():
+            if entry['sha256'] == sha256 and not entry.get('copied'):
+                entry['copied'] = True
+                self._dirty = True
+
+    async def fetch_once(self, report_id: str,
+                         download: Callable[[str], Awaitable[Tuple[int, str]]]) -> Optional[Dict]:
+        """取得公告的 blob：已有时直接返回，否则调用 ``download(暂存路径)`` 下载一次
+
+        同一 ID 的并发请求共享同一次下载。``download`` 返回 (字节数, sha256)，
+        字节数为 0 时返回 None。
+        """
+        report_id = str(report_id)
+        entry = self.lookup(report_id)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        if report_id in self._inflight:
+            self.hits += 1
+            return await asyncio.shield(self._inflight[report_id])
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[report_id] = future
+        try:
+            staging = os.path.join(self.staging, f'{report_id}.pdf')
+            size, sha256 = await download(staging)
+            entry = self.add(report_id, staging, sha256) if size else None
+            future.set_result(entry)
+            return entry
+        except BaseException as err:
+            future.set_exception(err)
+            # 没有其他等待者时避免 "exception was never retrieved" 警告
+            future.exception()
+            raise
+        finally:
+            del self._inflight[report_id]
+
+    def stats(self) -> Dict[str, int]:
+        """ID 命中/未命中次数、公告数、blob 数与 blob 总字节数"""
+        blobs = {entry['sha256']: entry['size'] for entry in self.index.values()}
+        return {'hits': self.hits, 'misses': self.misses, 'ids': len(self.index),
+                'blobs': len(blobs), 'bytes': sum(blobs.values())}
+
+    def prune(self) -> int:
+        """删除不再被任何基金目录链接的 blob，返回删除数量
+
+        只能按硬链接数判断：曾以复制方式放入基金目录的 blob（索引中 ``copied``）一律保留。
+        """
+        copied = {entry['sha256'] for entry in self.index.values() if entry.get('copied')}
+        removed = 0
+        for report_id, entry in list(self.index.items()):
+            blob = self.blob_path(entry['sha256'])
+            if entry['sha256'] in copied:
+                continue
+            if os.path.exists(blob) and os.stat(blob).st_nlink == 1:
+                os.remove(blob)
+                removed += 1
+            if not os.path.exists(blob):
+                del self.index[report_id]
+                self._dirty = True
+        return removed
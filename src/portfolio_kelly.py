@@ -0,0 +1,208 @@
+"""多资产凯利仓位分配
+
+``kelly.py`` 只处理单个二元下注。同时持有多只股票时，按连续时间凯利准则最大化
+组合的期望对数增长率（二阶近似）::
+
+    g(w) = r_f + w·(mu - r_f) - 0.5 * w'Σw
+
+无约束最优解为 ``Σ⁻¹(mu - r_f)``，实际使用时还需限制总杠杆 ``Σ|w_i| <= leverage``
+与单只仓位上限 ``|w_i| <= cap``。这里用加速投影梯度法求解：每步只有一次矩阵-向量乘法，
+投影到 "盒约束 ∩ L1 球" 时对阈值二分，几百只股票也只需毫秒级。
+
+``PortfolioKelly`` 会缓存最近的结果，收益面板与参数不变时直接返回；
+输入变化时以上一次的权重作为初值，重新平衡通常很快收敛。
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+
+def estimate_moments(returns: pd.DataFrame, periods: int = 1,
+                     shrinkage: float = 0.0) -> Tuple[pd.Series, pd.DataFrame]:
+    """由收益面板估计期望收益与协方差矩阵
+
+    Args:
+        returns: (日期 × 资产) 的简单收益面板
+        periods: 年化等换算倍数，如日收益换算为年收益传 252
+        shrinkage: 向对角矩阵收缩的比例（0-1），资产多、样本少时使协方差矩阵更稳定
+    Returns:
+        (期望收益 Series, 协方差 DataFrame)
+    """
+    values = returns.to_numpy(dtype=np.float64)
+    if np.isnan(values).any():
+        # 有缺失值时按两两可用样本计算
+        mu = returns.mean().to_numpy()
+        cov = returns.cov().to_numpy()
+    else:
+        mu = values.mean(axis=0)
+        centered = values - mu
+        cov = centered.T @ centered / max(len(values) - 1, 1)
+    if shrinkage:
+        cov = (1 - shrinkage) * cov + shrinkage * np.diag(np.diag(cov))
+    columns = returns.columns
+    return (pd.Series(mu * periods, index=columns, name='mu'),
+            pd.DataFrame(cov * periods, index=columns, columns=columns))
+
+
+def project(values: np.ndarray, cap: float, leverage: float, allow_short: bool = False,
+            iterations: int = 60) -> np.ndarray:
+    """投影到 ``{|w_i| <= cap, Σ|w_i| <= leverage}``（不允许做空时另有 ``w_i >= 0``）
+
+    投影形如 ``sign(v) * clip(|v| - τ, 0, cap)``，τ 由二分法确定。
+    """
+    magnitude = np.abs(values) if allow_short else np.maximum(values, 0.0)
+    sign = np.sign(values) if allow_short else 1.0
+    clipped = np.minimum(magnitude, cap)
+    if clipped.sum() <= leverage:
+        return sign * clipped
+    low, high = 0.0, float(magnitude.max())
+    for _ in range(iterations):
+        tau = (low + high) / 2
+        if np.clip(magnitude - tau, 0.0, cap).sum() > leverage:
+            low = tau
+        else:
+            high = tau
+    return sign * np.clip(magnitude - high, 0.0, cap)
+
+
+def growth(weights: np.ndarray, mu: np.ndarray, cov: np.ndarray,
+           risk_free: float = 0.0) -> float:
+    """组合期望对数增长率的二阶近似"""
+    return float(risk_free + weights @ (mu - risk_free) - 0.5 * weights @ cov @ weights)
+
+
+def solve(mu: np.ndarray, cov: np.ndarray, cap: float = 1.0, leverage: float = 1.0,
+          allow_short: bool = False, risk_free: float = 0.0,
+          initial: Optional[np.ndarray] = None, max_iter: int = 5000,
+          tol: float = 1e-10) -> Tuple[np.ndarray, Dict]:
+    """在杠杆与单只仓位上限约束下求增长最优权重
+
+    Returns:
+        (权重数组, 求解信息 ``{'iterations', 'converged', 'growth'}``)
+    """
+    mu = np.asarray(mu, dtype=np.float64)
+    cov = np.asarray(cov, dtype=np.float64)
+    excess = mu - risk_free
+    # 梯度的 Lipschitz 常数为协方差矩阵的最大特征值
+    lipschitz = float(np.linalg.eigvalsh(cov)[-1]) if len(mu) else 0.0
+    step = 1.0 / lipschitz if lipschitz > 0 else 1.0
+
+    weights = project(np.zeros(len(mu)) if initial is None else np.asarray(initial, float),
+                      cap, leverage, allow_short)
+    momentum = weights.copy()
+    t = 1.0
+    converged = False
+    iteration = 0
+    for iteration in range(1, max_iter + 1):
+        gradient = excess - cov @ momentum
+        updated = project(momentum + step * gradient, cap, leverage, allow_short)
+        t_next = (1 + np.sqrt(1 + 4 * t * t)) / 2
+        momentum = updated + (t - 1) / t_next * (updated - weights)
+        change = float(np.abs(updated - weights).max())
+        weights, t = updated, t_next
+        if change < tol:
+            converged = True
+            break
+    info = {'iterations': iteration, 'converged': converged,
+            'growth': growth(weights, mu, cov, risk_free)}
+    return weights, info
+
+
+def _digest(labels, *arrays: np.ndarray) -> str:
+    sha = hashlib.sha1('\x00'.join(map(str, labels)).encode())
+    for array in arrays:
+        array = np.ascontiguousarray(array)
+        sha.update(str(array.shape).encode())
+        sha.update(array.tobytes())
+    return sha.hexdigest()
+
+
+class PortfolioKelly:
+    """带结果缓存的多资产凯利仓位分配
+
+    Args:
+        leverage: 总杠杆上限（权重绝对值之和）
+        cap: 单只仓位上限
+        fraction: 对最优权重的缩放，0.5 为半凯利（在约束内求解后整体缩放）
+        allow_short: 是否允许做空
+        risk_free: 无风险收益率（与收益面板同周期）
+        shrinkage: 协方差向对角收缩的比例
+        cache_size: 缓存的结果数量
+    """
+
+    def __init__(self, leverage: float = 1.0, cap: float = 0.2, fraction: float = 1.0,
+                 allow_short: bool = False, risk_free: float = 0.0, shrinkage: float = 0.0,
+                 max_iter: int = 5000, tol: float = 1e-10, cache_size: int = 32):
+        self.leverage = leverage
+        self.cap = cap
+        self.fraction = fraction
+        self.allow_short = allow_short
+        self.risk_free = risk_free
+        self.shrinkage = shrinkage
+        self.max_iter = max_iter
+        self.tol = tol
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, Tuple[pd.Series, Dict]]" = OrderedDict()
+        self._previous: Optional[pd.Series] = None
+        self.hits = 0
+        self.misses = 0
+        self.info: Dict = {}
+
+    def stats(self) -> Dict[str, int]:
+        """命中、未命中次数与当前条目数"""
+        return {'hits': self.hits, 'misses': self.misses, 'entries': len(self._cache)}
+
+    def _params(self, *extra: float) -> np.ndarray:
+        return np.array([self.leverage, self.cap, self.fraction, float(self.allow_short),
+                         self.risk_free, self.shrinkage, self.max_iter, self.tol, *extra])
+
+    def _cached(self, key: str) -> Optional[pd.Series]:
+        if key not in self._cache:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._cache.move_to_end(key)
+        weights, self.info = self._cache[key]
+        return weights.copy()
+
+    def _store(self, key: str, weights: pd.Series) -> None:
+        self._cache[key] = (weights, self.info)
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _solve(self, mu: pd.Series, cov: pd.DataFrame) -> pd.Series:
+        initial = None
+        if self._previous is not None and self.fraction:
+            # 以上一次结果（去掉缩放）为初值
+            initial = self._previous.reindex(mu.index).fillna(0.0).to_numpy() / self.fraction
+        raw, self.info = solve(mu.to_numpy(np.float64), cov.to_numpy(np.float64), self.cap,
+                               self.leverage, self.allow_short, self.risk_free, initial,
+                               self.max_iter, self.tol)
+        self._previous = pd.Series(raw * self.fraction, index=mu.index, name='weight')
+        return self._previous
+
+    def allocate_moments(self, mu: pd.Series, cov: pd.DataFrame) -> pd.Series:
+        """由期望收益与协方差矩阵计算权重"""
+        cov = cov.reindex(index=mu.index, columns=mu.index)
+        key = 'moments:' + _digest(mu.index, mu.to_numpy(np.float64),
+                                   cov.to_numpy(np.float64), self._params())
+        weights = self._cached(key)
+        if weights is None:
+            weights = self._solve(mu, cov)
+            self._store(key, weights)
+        return weights.copy()
+
+    def allocate(self, returns: pd.DataFrame, periods: int = 1) -> pd.Series:
+        """由收益面板估计参数并计算权重；面板与参数不变时不重新估计"""
+        key = 'returns:' + _digest(returns.columns, returns.to_numpy(np.float64),
+                                   self._params(periods))
+        weights = self._cached(key)
+        if weights is None:
+            mu, cov = estimate_moments(returns, periods, self.shrinkage)
+            weights = self._solve(mu, cov)
+            self._store(key, weights)
+        return weights.copy()
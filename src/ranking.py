@@ -0,0 +1,241 @@
+"""增量名次索引与多指标综合排名的前 K 名
+
+神奇公式按各指标名次（降序，并列取平均名次）之和排序。全量写法每次对整列排名后再整表排序，
+这里改为每个指标维护一个有序数组：
+
+- ``RankIndex``：单个指标的有序值数组，更新一只股票是二分查找加一次数组插入/删除，
+  按值查询名次为二分查找
+- ``CompositeRanking``：多个指标名次之和，``top(k)`` 用阈值算法只对各指标最优端的前若干名
+  计算综合分并部分选择前 k 名；未扫描股票可能达到的最小分数不低于第 k 名时扩大扫描深度，
+  通常只需扫描各指标的前几百名
+
+盘中行情变化时只需更新变化的股票，再取前 k 名，不必重新排名全市场。
+"""
+
+from bisect import bisect_left, bisect_right
+from typing import Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+
+class RankIndex:
+    """单个指标的有序值数组，每个值对应调用方的整数编号
+
+    值越大名次越靠前，并列取平均名次（同 ``Series.rank(ascending=False)``）。
+    数组按倍数预留容量，插入与删除在原数组上平移一段元素。
+    """
+
+    def __init__(self, ids: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None):
+        ids = np.empty(0, np.int64) if ids is None else np.asarray(ids, np.int64)
+        values = np.empty(0) if values is None else np.asarray(values, np.float64)
+        if np.isnan(values).any():
+            raise ValueError("名次索引不接受 NaN")
+        order = np.argsort(values, kind='stable')
+        self._size = len(values)
+        capacity = max(16, 2 * self._size)
+        self._buffer = np.empty(capacity)
+        self._id_buffer = np.empty(capacity, np.int64)
+        self._buffer[:self._size] = values[order]
+        self._id_buffer[:self._size] = ids[order]
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def keys(self) -> np.ndarray:
+        """升序排列的值（视图）"""
+        return self._buffer[:self._size]
+
+    def insert(self, item: int, value: float) -> None:
+        """加入一个值"""
+        if value != value:
+            raise ValueError("名次索引不接受 NaN")
+        size = self._size
+        if size == len(self._buffer):
+            self._buffer = np.concatenate([self._buffer, np.empty(size)])
+            self._id_buffer = np.concatenate([self._id_buffer, np.empty(size, np.int64)])
+        pos = bisect_right(self._buffer, value, 0, size)
+        self._buffer[pos + 1:size + 1] = self._buffer[pos:size]
+        self._id_buffer[pos + 1:size + 1] = self._id_buffer[pos:size]
+        self._buffer[pos] = value
+        self._id_buffer[pos] = item
+        self._size = size + 1
+
+    def delete(self, item: int, value: float) -> None:
+        """删除编号为 ``item``、值为 ``value`` 的项，只在同值区间内查找编号"""
+        size = self._size
+        pos = bisect_left(self._buffer, value, 0, size)
+        while pos < size and self._buffer[pos] == value and self._id_buffer[pos] != item:
+            pos += 1
+        if pos == size or self._buffer[pos] != value:
+            raise KeyError(item)
+        self._buffer[pos:size - 1] = self._buffer[pos + 1:size]
+        self._id_buffer[pos:size - 1] = self._id_buffer[pos + 1:size]
+        self._size = size - 1
+
+    def rank(self, values):
+        """值在降序中的名次（从 1 开始），与已有值并列时取平均名次；支持数组"""
+        keys = self.keys
+        lo = keys.searchsorted(values, side='left')
+        hi = keys.searchsorted(values, side='right')
+        return self._size - hi + (hi - lo + 1) / 2
+
+    def best(self, count: int) -> np.ndarray:
+        """值最大的 ``count`` 项的编号"""
+        return self._id_buffer[self._size - count:self._size]
+
+    def value_at(self, depth: int) -> float:
+        """降序第 ``depth`` 个（从 0 开始）的值"""
+        return float(self._buffer[self._size - 1 - depth])
+
+
+class CompositeRanking:
+    """多个指标名次之和的排名，综合分越小越好
+
+    Args:
+        metrics: 参与排名的指标名，每个指标一个 ``RankIndex``
+    """
+
+    def __init__(self, metrics: Sequence[str]):
+        self.metrics = tuple(metrics)
+        self._ids: Dict[Hashable, int] = {}
+        self._codes: List[Hashable] = []
+        self._free: List[int] = []
+        self._values = np.full((16, len(self.metrics)), np.nan)
+        self._depth = 0
+        self.indexes: Dict[str, RankIndex] = {metric: RankIndex() for metric in self.metrics}
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame, metrics: Sequence[str],
+                   key: Optional[str] = None) -> 'CompositeRanking':
+        """由数据表一次排序批量构建，``key`` 为代码列，默认使用行索引；重复代码以最后一次为准"""
+        ranking = cls(metrics)
+        codes = frame.index.tolist() if key is None else frame[key].tolist()
+        last = {code: row for row, code in enumerate(codes)}
+        rows = np.fromiter(last.values(), dtype=np.int64, count=len(last))
+        values = frame[list(ranking.metrics)].to_numpy(dtype=np.float64)[rows]
+        ranking._codes = list(last)
+        ranking._ids = {code: item for item, code in enumerate(ranking._codes)}
+        if len(values):
+            ranking._values = values
+        ids = np.arange(len(rows))
+        ranking.indexes = {metric: RankIndex(ids, values[:, column])
+                           for column, metric in enumerate(ranking.metrics)}
+        return ranking
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, code: Hashable) -> bool:
+        return code in self._ids
+
+    def _allocate(self, code: Hashable) -> int:
+        """为新代码分配编号，优先复用已移出代码的编号"""
+        if self._free:
+            item = self._free.pop()
+            self._codes[item] = code
+        else:
+            item = len(self._codes)
+            self._codes.append(code)
+            if item == len(self._values):
+                grown = np.full((2 * len(self._values), len(self.metrics)), np.nan)
+                grown[:item] = self._values
+                self._values = grown
+        self._ids[code] = item
+        return item
+
+    def update(self, code: Hashable, values: Dict[str, float]) -> None:
+        """加入或更新一只股票，``values`` 须包含全部指标"""
+        missing = [metric for metric in self.metrics if metric not in values]
+        if missing:
+            raise KeyError(f"缺少指标: {missing}")
+        new = [float(values[metric]) for metric in self.metrics]
+        if any(value != value for value in new):
+            raise ValueError("名次索引不接受 NaN")
+        item = self._ids.get(code)
+        if item is None:
+            item = self._allocate(code)
+            for index, value in zip(self.indexes.values(), new):
+                index.insert(item, value)
+        else:
+            for column, (index, value) in enumerate(zip(self.indexes.values(), new)):
+                old = float(self._values[item, column])
+                if old != value:
+                    index.delete(item, old)
+                    index.insert(item, value)
+        self._values[item] = new
+
+    def remove(self, code: Hashable) -> bool:
+        """移出一只股票，不在排名中时返回 False"""
+        item = self._ids.pop(code, None)
+        if item is None:
+            return False
+        for column, index in enumerate(self.indexes.values()):
+            index.delete(item, float(self._values[item, column]))
+        self._values[item] = np.nan
+        self._codes[item] = None
+        self._free.append(item)
+        return True
+
+    def _scores(self, items: np.ndarray) -> np.ndarray:
+        """指定编号的综合分"""
+        scores = np.zeros(len(items))
+        for column, index in enumerate(self.indexes.values()):
+            scores += index.rank(self._values[items, column])
+        return scores
+
+    def ranks(self, code: Hashable) -> Dict[str, float]:
+        """股票在各指标上的名次"""
+        item = self._ids[code]
+        return {metric: float(index.rank(self._values[item, column]))
+                for column, (metric, index) in enumerate(self.indexes.items())}
+
+    def score(self, code: Hashable) -> float:
+        """综合分：各指标名次之和"""
+        return float(self._scores(np.array([self._ids[code]]))[0])
+
+    def top(self, k: int) -> List[Tuple[Hashable, float]]:
+        """综合分最小的 ``k`` 只股票 ``[(代码, 综合分)]``，同分按代码排序"""
+        size = len(self)
+        k = min(k, size)
+        if k <= 0:
+            return []
+        indexes = list(self.indexes.values())
+        # 从上次停止时的深度开始，盘中小幅更新后通常一次即可确定
+        depth = min(size, max(2 * k, 64, self._depth))
+        while True:
+            items = np.unique(np.concatenate([index.best(depth) for index in indexes]))
+            scores = self._scores(items)
+            kth = np.partition(scores, k - 1)[k - 1] if len(items) >= k else np.inf
+            if depth == size:
+                break
+            # 未扫描到的股票每个指标的值都不超过当前深度的值，综合分不小于 threshold
+            threshold = sum(float(index.rank(index.value_at(depth))) for index in indexes)
+            if kth < threshold:
+                break
+            depth = min(size, 2 * depth)
+        self._depth = depth
+        chosen = np.flatnonzero(scores <= kth)
+        ranked = sorted(((self._codes[items[pos]], float(scores[pos])) for pos in chosen),
+                        key=lambda item: (item[1], item[0]))
+        return ranked[:k]
+
+    def lookup(self, codes: Iterable[Hashable]) -> Tuple[np.ndarray, np.ndarray]:
+        """指定股票的指标值与名次，均为 (股票数 × 指标数) 数组"""
+        items = np.array([self._ids[code] for code in codes], dtype=np.int64)
+        values = self._values[items]
+        ranks = np.empty_like(values)
+        for column, index in enumerate(self.indexes.values()):
+            ranks[:, column] = index.rank(values[:, column])
+        return values, ranks
+
+    def frame(self, codes: Iterable[Hashable]) -> pd.DataFrame:
+        """指定股票的指标值与名次，列为 ``<指标>`` 与 ``<指标>_rank``"""
+        codes = list(codes)
+        values, ranks = self.lookup(codes)
+        data = {}
+        for column, metric in enumerate(self.metrics):
+            data[metric] = values[:, column]
+            data[f'{metric}_rank'] = ranks[:, column]
+        return pd.DataFrame(data, index=codes)
@@ -0,0 +1,334 @@
+"""基金报告全文索引
+
+扫描下载目录（``root/基金代码/标题.pdf``）中新增或修改过的 PDF，在进程池中逐页提取文本，
+结果按完成顺序写入本地 SQLite 全文索引（FTS5），不依赖任何外部服务。
+
+中文没有空格分词，这里把连续的中文字符切成重叠的二元组（“医药行业” →
+“医药 药行 行业”），英文与数字按单词切分；查询时按同样方式切分并作为短语匹配，
+任意长度不少于两个字的中文词都能命中。同一文件的多个硬链接（见 ``pdf_store``）
+只提取一次文本。
+
+用法::
+
+    index = ReportIndex('reports.db')
+    index.update('.', workers=4)
+    index.funds_mentioning('新能源', title='第三季度报告')
+"""
+
+import os
+import re
+import sqlite3
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+try:
+    from pypdf import PdfReader  # pylint: disable=import-error
+except ImportError:
+    PdfReader = None
+
+try:
+    from src.pdf_store import BLOB_DIR
+except ImportError:  # 作为脚本直接运行时
+    from pdf_store import BLOB_DIR
+
+_CJK = r'㐀-䶿一-鿿豈-﫿'
+_TOKEN_RE = re.compile(rf'[{_CJK}]+|[a-z0-9]+(?:\.[0-9]+)?')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE,
+    code TEXT,
+    title TEXT,
+    size INTEGER,
+    mtime REAL,
+    inode TEXT
+);
+CREATE INDEX IF NOT EXISTS documents_inode ON documents(inode);
+CREATE INDEX IF NOT EXISTS documents_code ON documents(code);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    tokens, text UNINDEXED, doc_id UNINDEXED, page UNINDEXED
+);
+"""
+# 页的 rowid 为 (doc_id << PAGE_BITS) + 页码，按文件删除或读取时是 rowid 区间查找，
+# 不必扫描 UNINDEXED 的 doc_id 列
+PAGE_BITS = 20
+SCHEMA_VERSION = 1
+
+
+def _runs(text: str) -> Iterator[str]:
+    return iter(_TOKEN_RE.findall(text.lower()))
+
+
+def _is_cjk(run: str) -> bool:
+    return run[0] >= '㐀'
+
+
+def _bigrams(run: str) -> List[str]:
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def _run_tokens(run: str) -> List[str]:
+    if not _is_cjk(run) or len(run) == 1:
+        return [run]
+    # 中文二元组，另加末字单字：任何一个字都是某个索引词的首字，单字查询可用前缀匹配
+    return _bigrams(run) + [run[-1]]
+
+
+def tokenize(text: str) -> str:
+    """把文本切分为以空格分隔的索引词"""
+    return ' '.join(token for run in _runs(text) for token in _run_tokens(run))
+
+
+def match_expression(query: str) -> str:
+    """把查询转换为 FTS5 表达式：每段中文或单词为一个短语，多段之间为 AND"""
+    phrases = []
+    for run in _runs(query):
+        if not _is_cjk(run):
+            phrases.append(f'"{run}"')
+        elif len(run) == 1:
+            phrases.append(f'"{run}" *')
+        else:
+            phrases.append('"' + ' '.join(_bigrams(run)) + '"')
+    if not phrases:
+        raise ValueError("查询中没有可检索的文字")
+    return ' AND '.join(phrases)
+
+
+def extract_pages(path: str) -> List[str]:
+    """用 pypdf 逐页提取文本"""
+    if PdfReader is None:
+        raise ImportError("缺少依赖 pypdf，无法提取 PDF 文本")
+    reader = PdfReader(path)
+    return [page.extract_text() or '' for page in reader.pages]
+
+
+def _extract(path: str, extractor: Callable[[str], List[str]]) -> Tuple[str, List[str], str]:
+    """子进程：提取一个文件，出错时返回错误信息而不是抛出"""
+    try:
+        return path, extractor(path), ''
+    except Exception as err:  # pylint: disable=broad-except  # 损坏的 PDF 不应中断整个批次
+        return path, [], repr(err)
+
+
+class ReportIndex:
+    """基金报告的本地全文索引
+
+    Args:
+        db_path: SQLite 数据库文件
+        extractor: 提取函数，参数为 PDF 路径，返回每页文本；默认使用 pypdf。
+            多进程时需为模块级函数
+    """
+
+    def __init__(self, db_path: str, extractor: Optional[Callable[[str], List[str]]] = None):
+        self.db_path = db_path
+        self.extractor = extractor or extract_pages
+        self.conn = sqlite3.connect(db_path)
+        version, = self.conn.execute('PRAGMA user_version').fetchone()
+        if version != SCHEMA_VERSION:
+            # 旧版索引的页 rowid 不按文件编号，重建后全部重新索引
+            self.conn.executescript('DROP TABLE IF EXISTS pages; DROP TABLE IF EXISTS documents;')
+            self.conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+        self.conn.executescript(SCHEMA)
+        self.errors: Dict[str, str] = {}
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self.conn.close()
+
+    def __enter__(self) -> 'ReportIndex':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def scan(root: str) -> Iterator[Tuple[str, str, str, os.stat_result]]:
+        """遍历 ``root/基金代码/*.pdf``，返回 (路径, 基金代码, 标题, 文件状态)"""
+        for code in sorted(os.listdir(root)):
+            directory = os.path.join(root, code)
+            if code == BLOB_DIR or not os.path.isdir(directory):
+                continue
+            for name in sorted(os.listdir(directory)):
+                if name.endswith('.pdf'):
+                    path = os.path.join(directory, name)
+                    yield path, code, name[:-4], os.stat(path)
+
+    def pending(self, root: str) -> List[Tuple[str, str, str, os.stat_result]]:
+        """新增或大小、修改时间变化的文件"""
+        return self._pending(list(self.scan(root)))
+
+    def _pending(self, items: List[Tuple]) -> List[Tuple]:
+        known = {path: (size, mtime) for path, size, mtime
+                 in self.conn.execute('SELECT path, size, mtime FROM documents')}
+        return [item for item in items
+                if known.get(item[0]) != (item[3].st_size, item[3].st_mtime)]
+
+    def _insert(self, path: str, code: str, title: str, stat: os.stat_result,
+                pages: List[str]) -> None:
+        self._delete(path)
+        cursor = self.conn.execute(
+            'INSERT INTO documents (path, code, title, size, mtime, inode) VALUES (?,?,?,?,?,?)',
+            (path, code, title, stat.st_size, stat.st_mtime, f'{stat.st_dev}:{stat.st_ino}'))
+        if len(pages) >= 1 << PAGE_BITS:
+            raise ValueError(f"{path} 页数过多: {len(pages)}")
+        doc_id = cursor.lastrowid
+        self.conn.executemany(
+            'INSERT INTO pages (rowid, tokens, text, doc_id, page) VALUES (?,?,?,?,?)',
+            [((doc_id << PAGE_BITS) + number, tokenize(text), text, doc_id, number)
+             for number, text in enumerate(pages, start=1)])
+
+    @staticmethod
+    def _page_range(doc_id: int) -> Tuple[int, int]:
+        """文件各页 rowid 的区间"""
+        return doc_id << PAGE_BITS, ((doc_id + 1) << PAGE_BITS) - 1
+
+    def _delete(self, path: str) -> None:
+        row = self.conn.execute('SELECT id FROM documents WHERE path = ?', (path,)).fetchone()
+        if row is not None:
+            self.conn.execute('DELETE FROM pages WHERE rowid BETWEEN ? AND ?',
+                              self._page_range(row[0]))
+            self.conn.execute('DELETE FROM documents WHERE id = ?', row)
+
+    def _indexed_pages(self, inode: str, stat: os.stat_result) -> Optional[List[str]]:
+        """同一文件（硬链接）已按相同大小与修改时间索引过时直接复用其文本"""
+        row = self.conn.execute(
+            'SELECT id FROM documents WHERE inode = ? AND size = ? AND mtime = ? LIMIT 1',
+            (inode, stat.st_size, stat.st_mtime)).fetchone()
+        if row is None:
+            return None
+        return [text for text, in self.conn.execute(
+            'SELECT text FROM pages WHERE rowid BETWEEN ? AND ? ORDER BY rowid',
+            self._page_range(row[0]))]
+
+    def update(self, root: str, workers: int = 1, batch: int = 50,
+               progress_every: int = 200) -> int:
+        """把 ``root`` 下新增或修改的 PDF 加入索引，返回新索引的文件数
+
+        提取在进程池中进行，结果按完成顺序每 ``batch`` 个提交一次，中途中断时
+        已提交的部分不会丢失。
+        """
+        scanned = list(self.scan(root))
+        items = self._pending(scanned)
+        # 已删除的文件从索引中移除
+        existing = {item[0] for item in scanned}
+        for (path,) in self.conn.execute('SELECT path FROM documents').fetchall():
+            if path not in existing:
+                self._delete(path)
+
+        by_inode: Dict[str, List[Tuple]] = {}
+        for item in items:
+            by_inode.setdefault(f'{item[3].st_dev}:{item[3].st_ino}', []).append(item)
+        to_extract = []
+        indexed = 0
+        for inode, group in by_inode.items():
+            pages = self._indexed_pages(inode, group[0][3])
+            if pages is None:
+                to_extract.append((inode, group[0][0]))
+                continue
+            for item in group:
+                self._insert(*item, pages)
+            indexed += len(group)
+        self.conn.commit()
+
+        inodes = dict((path, inode) for inode, path in to_extract)
+        for done, (path, pages, error) in enumerate(
+                self._extract_all([path for _, path in to_extract], workers), start=1):
+            if error:
+                self.errors[path] = error
+            else:
+                group = by_inode[inodes[path]]
+                for item in group:
+                    self._insert(*item, pages)
+                indexed += len(group)
+            if done % batch == 0:
+                self.conn.commit()
+            if progress_every and done % progress_every == 0:
+                print(f"已提取 {done}/{len(to_extract)} 个文件")
+        self.conn.commit()
+        return indexed
+
+    def _extract_all(self, paths: List[str],
+                     workers: int) -> Iterable[Tuple[str, List[str], str]]:
+        if workers <= 1 or len(paths) < 2:
+            for path in paths:
+                yield _extract(path, self.extractor)
+            return
+        window = workers * 4
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # 只保持有限个任务在途，避免大量文本同时驻留内存
+            iterator = iter(paths)
+            futures = {executor.submit(_extract, path, self.extractor)
+                       for path, _ in zip(iterator, range(window))}
+            while futures:
+                future = next(as_completed(futures))
+                futures.remove(future)
+                yield future.result()
+                for path in iterator:
+                    futures.add(executor.submit(_extract, path, self.extractor))
+                    break
+
+    def search(self, query: str, code: Optional[str] = None, title: Optional[str] = None,
+               limit: int = 50) -> List[Dict]:
+        """全文检索，返回按相关度排序的命中页
+
+        Args:
+            query: 查询文字
+            code: 只检索该基金
+            title: 只检索标题包含该文字的报告（如 ``第三季度报告``）
+        Returns:
+            list: ``{'code', 'title', 'path', 'page', 'snippet'}``
+        """
+        sql = ('SELECT d.code, d.title, d.path, p.page, p.text FROM pages p '
+               'JOIN documents d ON d.id = p.doc_id WHERE pages MATCH ?')
+        params: list = [match_expression(query)]
+        if code is not None:
+            sql += ' AND d.code = ?'
+            params.append(code)
+        if title is not None:
+            sql += " AND d.title LIKE ? ESCAPE '\\'"
+            params.append('%' + re.sub(r'([%_\\])', r'\\\1', title) + '%')
+        sql += ' ORDER BY bm25(pages) LIMIT ?'
+        params.append(limit)
+        results = []
+        for code_, title_, path, page, text in self.conn.execute(sql, params):
+            results.append({'code': code_, 'title': title_, 'path': path, 'page': page,
+                            'snippet': _snippet(text, query)})
+        return results
+
+    def funds_mentioning(self, query: str, title: Optional[str] = None) -> List[str]:
+        """提到 ``query`` 的基金代码（可按报告标题过滤）"""
+        sql = ('SELECT DISTINCT d.code FROM pages p JOIN documents d ON d.id = p.doc_id '
+               'WHERE pages MATCH ?')
+        params = [match_expression(query)]
+        if title is not None:
+            sql += " AND d.title LIKE ? ESCAPE '\\'"
+            params.append('%' + re.sub(r'([%_\\])', r'\\\1', title) + '%')
+        return sorted(code for code, in self.conn.execute(sql + ' ORDER BY d.code', params))
+
+    def stats(self) -> Dict[str, int]:
+        """已索引的文件数与页数"""
+        documents, = self.conn.execute('SELECT COUNT(*) FROM documents').fetchone()
+        pages, = self.conn.execute('SELECT COUNT(*) FROM pages').fetchone()
+        return {'documents': documents, 'pages': pages, 'errors': len(self.errors)}
+
+
+def _snippet(text: str, query: str, width: int = 40) -> str:
+    """命中位置附近的原文"""
+    compact = re.sub(r'\s+', '', text)
+    position = compact.lower().find(re.sub(r'\s+', '', query).lower())
+    if position < 0:
+        return compact[:2 * width]
+    return compact[max(0, position - width):position + len(query) + width]
+
+
+def main() -> None:
+    """演示：索引当前目录下载的报告并检索"""
+    with ReportIndex('reports.db') as index:
+        print(f"新索引 {index.update('.', workers=os.cpu_count() or 1)} 个文件")
+        for hit in index.search('新能源', title='季度报告', limit=10):
+            print(hit['code'], hit['title'], hit['page'], hit['snippet'])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+"""相对强度（RS）评级
+
+按多周期加权收益给全市场股票打分，再换算成 1-99 的百分位评级（99 为最强）。
+默认权重与常见的 RS Rating 计算方式一致：最近一个季度权重 40%，
+此前三个季度各 20%，即 63/126/189/252 个交易日收益的加权和。
+
+``rs_rating`` 对价格面板一次性向量化计算；``RSRatingEngine`` 只保留最近
+一年的收盘价，每日追加一行即可得到新的评级，不需要重算全部历史。
+"""
+
+from typing import Optional, Sequence, Tuple, Union
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+DEFAULT_HORIZONS: Tuple[int, ...] = (63, 126, 189, 252)
+DEFAULT_WEIGHTS: Tuple[float, ...] = (0.4, 0.2, 0.2, 0.2)
+
+
+def _weighted_returns(latest: np.ndarray, lagged: np.ndarray,
+                      weights: Sequence[float]) -> np.ndarray:
+    """各周期收益的加权和；缺少较长周期价格的股票按已有周期重新归一化权重"""
+    with np.errstate(invalid='ignore', divide='ignore'):
+        returns = latest / lagged - 1.0
+    weights = np.asarray(weights, dtype=np.float64)[:, None]
+    valid = ~np.isnan(returns)
+    total_weight = (weights * valid).sum(axis=0)
+    score = (np.where(valid, returns, 0.0) * weights).sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(valid[0], score / total_weight, np.nan)
+
+
+def percentile_rating(scores: np.ndarray) -> np.ndarray:
+    """把分数换算为 1-99 的百分位评级，并列取平均名次，缺失分数的评级为 NaN"""
+    scores = np.asarray(scores, dtype=np.float64)
+    ranks = pd.Series(scores).rank(method='average', pct=True).to_numpy()
+    return np.clip(np.ceil(ranks * 99), 1, 99)
+
+
+def rs_scores(close: pd.DataFrame, as_of: Optional[int] = None,
+              horizons: Sequence[int] = DEFAULT_HORIZONS,
+              weights: Sequence[float] = DEFAULT_WEIGHTS) -> pd.Series:
+    """计算 ``as_of`` 行（默认最后一行）全部股票的加权收益分数"""
+    end = len(close) - 1 if as_of is None else as_of
+    values = close.to_numpy(dtype=np.float64)
+    lagged = np.full((len(horizons), values.shape[1]), np.nan)
+    for i, horizon in enumerate(horizons):
+        if end - horizon >= 0:
+            lagged[i] = values[end - horizon]
+    score = _weighted_returns(values[end], lagged, weights)
+    return pd.Series(score, index=close.columns, name='rs_score')
+
+
+def rs_rating(close: pd.DataFrame, as_of: Optional[int] = None,
+              horizons: Sequence[int] = DEFAULT_HORIZONS,
+              weights: Sequence[float] = DEFAULT_WEIGHTS) -> pd.Series:
+    """计算全市场 1-99 的 RS 评级"""
+    score = rs_scores(close, as_of, horizons, weights)
+    return pd.Series(percentile_rating(score.to_numpy()), index=close.columns, name='rs_rating')
+
+
+class RSRatingEngine:
+    """可逐日增量更新的 RS 评级
+
+    内部用环形缓冲保存最近 ``max(horizons) + 1`` 个交易日的收盘价，
+    每次 ``update`` 只写入一行并计算一次横截面排名。
+
+    Args:
+        symbols: 股票代码，决定列顺序
+        history: 可选的历史收盘价面板，用于初始化缓冲
+    """
+
+    def __init__(self, symbols: Sequence[str], history: Optional[pd.DataFrame] = None,
+                 horizons: Sequence[int] = DEFAULT_HORIZONS,
+                 weights: Sequence[float] = DEFAULT_WEIGHTS):
+        if len(horizons) != len(weights):
+            raise ValueError("horizons 与 weights 长度不一致")
+        self.symbols = pd.Index(symbols)
+        self.horizons = tuple(horizons)
+        self.weights = tuple(weights)
+        self._size = max(self.horizons) + 1
+        self._buffer = np.full((self._size, len(self.symbols)), np.nan)
+        self._count = 0
+        if history is not None:
+            values = history.reindex(columns=self.symbols).to_numpy(dtype=np.float64)
+            for row in values[-self._size:]:
+                self._append(row)
+
+    def _append(self, row: np.ndarray) -> None:
+        self._buffer[self._count % self._size] = row
+        self._count += 1
+
+    def _lagged(self, horizon: int) -> np.ndarray:
+        if horizon >= self._count:
+            return np.full(len(self.symbols), np.nan)
+        return self._buffer[(self._count - 1 - horizon) % self._size]
+
+    def scores(self) -> pd.Series:
+        """当前最新一日的加权收益分数"""
+        if not self._count:
+            return pd.Series(np.nan, index=self.symbols, name='rs_score')
+        lagged = np.vstack([self._lagged(h) for h in self.horizons])
+        score = _weighted_returns(self._lagged(0), lagged, self.weights)
+        return pd.Series(score, index=self.symbols, name='rs_score')
+
+    def ratings(self) -> pd.Series:
+        """当前最新一日的 1-99 评级"""
+        return pd.Series(percentile_rating(self.scores().to_numpy()), index=self.symbols,
+                         name='rs_rating')
+
+    def update(self, close: Union[pd.Series, np.ndarray]) -> pd.Series:
+        """追加一个交易日的收盘价（Series 按代码对齐，缺失记为 NaN），返回新的评级"""
+        if isinstance(close, pd.Series):
+            row = close.reindex(self.symbols).to_numpy(dtype=np.float64)
+        else:
+            row = np.asarray(close, dtype=np.float64)
+        self._append(row)
+        return self.ratings()
@@ -0,0 +1,323 @@
+"""声明式选股规则
+
+规则可以在代码中构造，也可以从配置（字典/JSON）读取，例如::
+
+    RuleSet.from_config({'name': 'schloss', 'rules': [
+        {'name': '市盈率', 'rule': '0 < 市盈率-动态 < 20'},
+        '资产负债率 < 50',
+        {'column': '名称', 'op': 'in', 'value': ['平安银行']},
+    ]})
+
+每个规则集编译为快照列上的 NumPy 布尔运算：用到的列只转换一次为数组，
+各规则的结果按位与合并，不复制数据表。快照中缺少某列时，默认跳过该列上的规则
+（``missing='fail'`` 时全部不通过），并在结果中报告。``evaluate_many`` 在同一份
+快照上一次计算多个规则集，相同的规则只计算一次。
+"""
+
+import json
+import re
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+COMPARISONS = {
+    '>': np.greater,
+    '>=': np.greater_equal,
+    '<': np.less,
+    '<=': np.less_equal,
+    '==': np.equal,
+    '!=': np.not_equal,
+}
+# between 为开区间 (lo, hi)
+OPERATORS = tuple(COMPARISONS) + ('between', 'in', 'notna')
+MISSING_POLICIES = ('skip', 'fail')
+
+_NUMBER = r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?'
+_BETWEEN_RE = re.compile(rf'^\s*({_NUMBER})\s*<\s*(.+?)\s*<\s*({_NUMBER})\s*$')
+_COMPARE_RE = re.compile(r'^\s*(.+?)\s*(>=|<=|==|!=|>|<)\s*(\S+)\s*$')
+_NOTNA_RE = re.compile(r'^\s*(.+?)\s+notna\s*$')
+
+
+def _literal(text: str) -> Union[float, str]:
+    """规则文本中的值：数字或去掉引号的字符串"""
+    try:
+        return float(text)
+    except ValueError:
+        return text.strip('\'"')
+
+
+class Rule:
+    """单列上的一个条件
+
+    Args:
+        column: 快照列名
+        op: ``>``、``>=``、``<``、``<=``、``==``、``!=``、``between``（开区间）、``in``、``notna``
+        value: 比较值；``between`` 为 ``(下限, 上限)``，``in`` 为取值列表
+        name: 规则名称，默认为规则文本
+        missing: 快照缺少该列时 ``skip``（跳过）或 ``fail``（全部不通过）
+    """
+
+    def __init__(self, column: str, op: str, value: Any = None, name: Optional[str] = None,
+                 missing: str = 'skip'):
+        if op not in OPERATORS:
+            raise ValueError(f"未知的运算符: {op}")
+        if missing not in MISSING_POLICIES:
+            raise ValueError(f"missing 只能为 {MISSING_POLICIES}")
+        if op == 'between':
+            low, high = value
+            value = (float(low), float(high))
+        elif op == 'in' or isinstance(value, list):
+            # 列表转为元组，保证 key 可哈希
+            value = tuple(value)
+        self.column = column
+        self.op = op
+        self.value = value
+        self.missing = missing
+        self.name = name or str(self)
+
+    def __str__(self) -> str:
+        if self.op == 'between':
+            return f'{self.value[0]:g} < {self.column} < {self.value[1]:g}'
+        if self.op == 'notna':
+            return f'{self.column} notna'
+        value = f'{self.value:g}' if isinstance(self.value, float) else self.value
+        return f'{self.column} {self.op} {value}'
+
+    def __repr__(self) -> str:
+        return f'Rule({self.name!r}: {self})'
+
+    @property
+    def key(self) -> Tuple:
+        """判断两个规则是否相同（与名称无关）"""
+        return (self.column, self.op, self.value, self.missing)
+
+    @property
+    def numeric(self) -> bool:
+        """是否按数值比较"""
+        return self.op in ('>', '>=', '<', '<=', 'between') or isinstance(self.value, float)
+
+    @classmethod
+    def parse(cls, text: str, name: Optional[str] = None, missing: str = 'skip') -> 'Rule':
+        """解析 ``列 运算符 值``、``下限 < 列 < 上限`` 或 ``列 notna``"""
+        match = _BETWEEN_RE.match(text)
+        if match:
+            low, column, high = match.groups()
+            return cls(column, 'between', (low, high), name, missing)
+        match = _NOTNA_RE.match(text)
+        if match:
+            return cls(match.group(1), 'notna', None, name, missing)
+        match = _COMPARE_RE.match(text)
+        if match:
+            column, op, value = match.groups()
+            return cls(column, op, _literal(value), name, missing)
+        raise ValueError(f"无法解析规则: {text}")
+
+    @classmethod
+    def from_config(cls, item: Union[str, Dict[str, Any], 'Rule']) -> 'Rule':
+        """由规则文本或字典（``rule`` 文本，或 ``column``/``op``/``value``）构造"""
+        if isinstance(item, Rule):
+            return item
+        if isinstance(item, str):
+            return cls.parse(item)
+        item = dict(item)
+        name, missing = item.get('name'), item.get('missing', 'skip')
+        if 'rule' in item:
+            return cls.parse(item['rule'], name, missing)
+        value = item.get('value')
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = float(value)
+        return cls(item['column'], item['op'], value, name, missing)
+
+    def to_config(self) -> Dict[str, Any]:
+        """可写入 JSON 的字典"""
+        value = list(self.value) if isinstance(self.value, tuple) else self.value
+        return {'name': self.name, 'column': self.column, 'op': self.op, 'value': value,
+                'missing': self.missing}
+
+    def evaluate(self, values: np.ndarray) -> np.ndarray:
+        """对列数组求值，缺失值不通过"""
+        if self.op == 'between':
+            low, high = self.value
+            mask = np.greater(values, low)
+            mask &= np.less(values, high)
+            return mask
+        if self.op == 'in':
+            return pd.Index(values).isin(self.value)
+        if self.op == 'notna':
+            return ~pd.isna(values)
+        if not self.numeric:
+            # 字符串比较：逐元素相等
+            equal = np.asarray(values == self.value, dtype=bool)
+            return equal if self.op == '==' else ~equal & ~pd.isna(values)
+        mask = COMPARISONS[self.op](values, self.value)
+        if self.op == '!=':
+            mask &= ~np.isnan(values)
+        return mask
+
+
+def column_array(series: pd.Series, numeric: bool = True) -> np.ndarray:
+    """规则求值用的列数组：数值转为 float64（无法解析的值为 NaN），否则保留原值"""
+    if not numeric:
+        return series.to_numpy()
+    if pd.api.types.is_numeric_dtype(series.dtype):
+        return series.to_numpy(dtype=np.float64, na_value=np.nan)
+    return pd.to_numeric(series, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+class _Columns:
+    """快照列到 NumPy 数组的缓存，每列只转换一次"""
+
+    def __init__(self, frame: pd.DataFrame):
+        self.frame = frame
+        self._arrays: Dict[Tuple[str, bool], np.ndarray] = {}
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.frame.columns
+
+    def get(self, column: str, numeric: bool) -> np.ndarray:
+        """列数组：数值规则转为 float64（无法解析的值为 NaN），其余保留原值"""
+        key = (column, numeric)
+        if key not in self._arrays:
+            self._arrays[key] = column_array(self.frame[column], numeric)
+        return self._arrays[key]
+
+
+class ScreenResult:
+    """规则集的求值结果
+
+    Attributes:
+        mask: 全部规则都通过的行
+        counts: 各规则单独的通过行数
+        funnel: 按顺序依次应用各规则后剩余的行数
+        skipped: 因缺少列而跳过的规则名称
+    """
+
+    def __init__(self, name: str, total: int, mask: np.ndarray, counts: Dict[str, int],
+                 funnel: Dict[str, int], skipped: List[str], rules: List[Rule]):
+        self.name = name
+        self.total = total
+        self.mask = mask
+        self.counts = counts
+        self.funnel = funnel
+        self.skipped = skipped
+        self.rules = rules
+
+    @property
+    def selected(self) -> int:
+        """通过的行数"""
+        return int(self.mask.sum())
+
+    def select(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """通过的行（新的数据表）"""
+        return frame[self.mask]
+
+    def report(self) -> str:
+        """每条规则的通过数与累计剩余数"""
+        lines = [f"规则集 {self.name or '(未命名)'}：共 {self.total} 行"]
+        for rule in self.rules:
+            if rule.name in self.skipped:
+                lines.append(f"  {rule.name}: 缺少列 {rule.column}，已跳过")
+            else:
+                lines.append(f"  {rule.name}: 通过 {self.counts[rule.name]}，"
+                             f"累计剩余 {self.funnel[rule.name]}")
+        lines.append(f"  最终通过 {self.selected}")
+        return '\n'.join(lines)
+
+
+class RuleSet:
+    """按顺序组合（逻辑与）的一组规则
+
+    Args:
+        rules: ``Rule``、规则文本或规则字典
+        name: 规则集名称
+    """
+
+    def __init__(self, rules: Iterable[Union[str, Dict[str, Any], Rule]], name: str = ''):
+        self.rules = [Rule.from_config(rule) for rule in rules]
+        self.name = name
+        names = [rule.name for rule in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"规则集 {name} 中有重名规则")
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def __repr__(self) -> str:
+        return f'RuleSet({self.name!r}, {[str(rule) for rule in self.rules]})'
+
+    @property
+    def columns(self) -> List[str]:
+        """用到的列"""
+        return list(dict.fromkeys(rule.column for rule in self.rules))
+
+    @classmethod
+    def from_config(cls, config: Union[Dict[str, Any], List]) -> 'RuleSet':
+        """由 ``{'name': ..., 'rules': [...]}`` 或规则列表构造"""
+        if isinstance(config, dict):
+            return cls(config['rules'], config.get('name', ''))
+        return cls(config)
+
+    @classmethod
+    def load(cls, path: str) -> 'RuleSet':
+        """从 JSON 文件读取"""
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls.from_config(json.load(f))
+
+    def to_config(self) -> Dict[str, Any]:
+        """可写入 JSON 的字典"""
+        return {'name': self.name, 'rules': [rule.to_config() for rule in self.rules]}
+
+    def with_rules(self, *rules: Union[str, Dict[str, Any], Rule],
+                   name: Optional[str] = None) -> 'RuleSet':
+        """新的规则集：与已有规则同名的替换原规则，其余追加在末尾"""
+        by_name = {rule.name: rule for rule in map(Rule.from_config, rules)}
+        merged = [by_name.pop(rule.name, rule) for rule in self.rules]
+        return RuleSet(merged + list(by_name.values()), self.name if name is None else name)
+
+    def evaluate(self, frame: pd.DataFrame) -> ScreenResult:
+        """在快照上求值"""
+        return _evaluate(self, _Columns(frame), {}, len(frame))
+
+
+def _evaluate(ruleset: RuleSet, columns: _Columns, memo: Dict[Tuple, np.ndarray],
+              total: int) -> ScreenResult:
+    mask = np.ones(total, dtype=bool)
+    counts: Dict[str, int] = {}
+    funnel: Dict[str, int] = {}
+    skipped: List[str] = []
+    for rule in ruleset.rules:
+        if rule.column not in columns and rule.missing == 'skip':
+            skipped.append(rule.name)
+            continue
+        rule_mask = memo.get(rule.key)
+        if rule_mask is None:
+            if rule.column in columns:
+                rule_mask = rule.evaluate(columns.get(rule.column, rule.numeric))
+            else:
+                rule_mask = np.zeros(total, dtype=bool)
+            memo[rule.key] = rule_mask
+        mask &= rule_mask
+        counts[rule.name] = int(np.count_nonzero(rule_mask))
+        funnel[rule.name] = int(np.count_nonzero(mask))
+    return ScreenResult(ruleset.name, total, mask, counts, funnel, skipped, ruleset.rules)
+
+
+def evaluate_many(frame: pd.DataFrame,
+                  rulesets: Iterable[RuleSet]) -> Tuple[np.ndarray, pd.DataFrame]:
+    """在同一份快照上一次计算多个规则集
+
+    列数组与相同规则的结果在规则集之间共享。返回 (规则集数 × 行数) 的通过掩码，
+    以及每个规则集一行的统计表（各规则通过数与 ``selected``，跳过的规则为 NaN）。
+    """
+    rulesets = list(rulesets)
+    columns = _Columns(frame)
+    memo: Dict[Tuple, np.ndarray] = {}
+    masks = np.empty((len(rulesets), len(frame)), dtype=bool)
+    rows = []
+    for i, ruleset in enumerate(rulesets):
+        result = _evaluate(ruleset, columns, memo, len(frame))
+        masks[i] = result.mask
+        rows.append({**result.counts, 'selected': result.selected})
+    names = [ruleset.name or str(i) for i, ruleset in enumerate(rulesets)]
+    return masks, pd.DataFrame(rows, index=pd.Index(names, name='ruleset'))
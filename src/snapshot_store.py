@@ -0,0 +1,169 @@
+"""选股数据快照存储模块
+
+以列式格式（Parquet/Feather）按日期分区保存选股用的全市场数据快照，
+保留列类型（如 ``000001`` 这类代码保持为字符串），读取时可只加载需要的列。
+目录结构::
+
+    root/
+      stock_data_all_by_ws/
+        date=2025-01-02/data.parquet
+        date=2025-01-03/data.parquet
+
+未安装 pyarrow 时退回 pickle 格式，同样保留类型，但读取时无法只加载部分列。
+"""
+
+import os
+import shutil
+from datetime import datetime
+from typing import List, Optional, Sequence
+
+import pandas as pd  # pylint: disable=import-error
+
+try:
+    import pyarrow  # noqa: F401  pylint: disable=import-error,unused-import
+    _HAS_ARROW = True
+except ImportError:
+    _HAS_ARROW = False
+
+FORMATS = {
+    'parquet': '.parquet',
+    'feather': '.feather',
+    'pickle': '.pkl',
+}
+
+DATE_PREFIX = 'date='
+
+
+def normalize_object_columns(frame: pd.DataFrame) -> pd.DataFrame:
+    """把混合类型的对象列统一为单一类型，以便写入列式格式
+
+    含数字的混合列（如接口用 ``--`` 表示缺失）转为数值，无法转换的值记为 NaN；
+    其余混合列转为字符串。
+    """
+    frame = frame.copy()
+    for col in [col for col, dtype in frame.dtypes.items()
+                if pd.api.types.is_object_dtype(dtype)]:
+        kind = pd.api.types.infer_dtype(frame[col], skipna=True)
+        if kind in ('mixed', 'mixed-integer', 'mixed-integer-float'):
+            numeric = pd.to_numeric(frame[col], errors='coerce')
+            if kind != 'mixed' or numeric.notna().any():
+                frame[col] = numeric
+            else:
+                frame[col] = frame[col].map(lambda v: v if pd.isna(v) else str(v))
+    return frame
+
+
+def write_frame(frame: pd.DataFrame, path: str, fmt: str) -> None:
+    """按指定格式写入单个文件，先写临时文件再替换"""
+    tmp_path = f'{path}.tmp'
+    # 列式格式要求列名为字符串、索引为默认索引
+    frame = frame.reset_index(drop=True)
+    frame.columns = [str(col) for col in frame.columns]
+    if fmt != 'pickle':
+        frame = normalize_object_columns(frame)
+    if fmt == 'parquet':
+        frame.to_parquet(tmp_path, index=False)
+    elif fmt == 'feather':
+        frame.to_feather(tmp_path)
+    else:
+        frame.to_pickle(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def read_frame(path: str, fmt: str, columns: Optional[Sequence[str]] = None) -> pd.DataFrame:
+    """按指定格式读取单个文件，``columns`` 为需要加载的列（不存在的列忽略）"""
+    if fmt == 'pickle':
+        frame = pd.read_pickle(path)
+        if columns is not None:
+            frame = frame[[col for col in columns if col in frame.columns]]
+        return frame
+
+    if columns is not None:
+        schema_columns = _schema_columns(path, fmt)
+        columns = [col for col in columns if col in schema_columns]
+    if fmt == 'parquet':
+        return pd.read_parquet(path, columns=columns)
+    # feather 文件以内存映射方式读取，只物化需要的列
+    import pyarrow.feather as feather  # pylint: disable=import-outside-toplevel
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+
+def _schema_columns(path: str, fmt: str) -> List[str]:
+    """只读取文件元数据获得列名"""
+    # pylint: disable=import-outside-toplevel
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_schema(path).names
+    import pyarrow.ipc as ipc
+    with ipc.open_file(path) as reader:
+        return reader.schema.names
+
+
+class SnapshotStore:
+    """按日期分区的快照存储
+
+    Args:
+        root: 存储根目录
+        fmt: ``parquet``、``feather`` 或 ``pickle``，默认在有 pyarrow 时使用 parquet
+        keep: 每个快照最多保留的日期数，None 表示全部保留
+    """
+
+    def __init__(self, root: str, fmt: Optional[str] = None, keep: Optional[int] = None):
+        if fmt is None:
+            fmt = 'parquet' if _HAS_ARROW else 'pickle'
+        if fmt not in FORMATS:
+            raise ValueError(f"不支持的格式: {fmt}")
+        if fmt != 'pickle' and not _HAS_ARROW:
+            raise ImportError(f"{fmt} 格式需要安装 pyarrow")
+        self.root = root
+        self.fmt = fmt
+        self.keep = keep
+
+    def _partition(self, name: str, date: str) -> str:
+        return os.path.join(self.root, name, f'{DATE_PREFIX}{date}')
+
+    def path(self, name: str, date: str) -> str:
+        """快照文件路径"""
+        return os.path.join(self._partition(name, date), f'data{FORMATS[self.fmt]}')
+
+    def dates(self, name: str) -> List[str]:
+        """已保存的日期（升序），只统计当前格式的文件"""
+        directory = os.path.join(self.root, name)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(
+            entry[len(DATE_PREFIX):] for entry in os.listdir(directory)
+            if entry.startswith(DATE_PREFIX)
+            and os.path.exists(self.path(name, entry[len(DATE_PREFIX):]))
+        )
+
+    def save(self, name: str, frame: pd.DataFrame, date: Optional[str] = None) -> str:
+        """保存快照，``date`` 默认为今天，同一天重复保存会覆盖；返回文件路径"""
+        date = date or datetime.now().strftime('%Y-%m-%d')
+        os.makedirs(self._partition(name, date), exist_ok=True)
+        path = self.path(name, date)
+        write_frame(frame, path, self.fmt)
+        if self.keep is not None:
+            self.prune(name, self.keep)
+        return path
+
+    def load(self, name: str, date: Optional[str] = None,
+             columns: Optional[Sequence[str]] = None) -> Optional[pd.DataFrame]:
+        """读取快照，``date`` 默认为最新一天，不存在时返回 None"""
+        if date is None:
+            dates = self.dates(name)
+            if not dates:
+                return None
+            date = dates[-1]
+        path = self.path(name, date)
+        if not os.path.exists(path):
+            return None
+        return read_frame(path, self.fmt, columns)
+
+    def prune(self, name: str, keep: int) -> List[str]:
+        """只保留最近 ``keep`` 天的快照，返回被删除的日期"""
+        dates = self.dates(name)
+        removed = dates[:-keep] if keep > 0 else dates
+        for date in removed:
+            shutil.rmtree(self._partition(name, date), ignore_errors=True)
+        return removed
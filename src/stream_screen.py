@@ -0,0 +1,312 @@
+"""盘中流式重新筛选
+
+施洛斯与神奇公式的 ``run`` 都是一次性批处理。这里把财务数据常驻内存，按间隔轮询行情快照，
+与上一次快照按列向量化比较，只对价格相关列（最新价、市盈率、市净率、总市值）有变化的股票
+重新计算规则，并输出入选/移出事件：
+
+- ``StreamScreener``：按规则集筛选（施洛斯策略）
+- ``MagicFormulaStreamScreener``：规则过滤后按 ``MagicFormulaRanking`` 增量排名，取前 k 名
+
+运行：python src/stream_screen.py --strategy schloss --interval 30
+"""
+
+import argparse
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+try:
+    from src.data_provider import get_provider
+    from src.financial_fetcher import RETRY_EXCEPTIONS
+    from src.magic_formula import (
+        MAGIC_FORMULA_RULES,
+        MagicFormulaRanking,
+        MagicFormulaScreener,
+        earnings_yield,
+    )
+    from src.rules import Rule, RuleSet, column_array
+    from src.walter_schloss import SCHLOSS_RULES, SchlossStockScreening
+except ImportError:  # 作为脚本直接运行时
+    from data_provider import get_provider
+    from financial_fetcher import RETRY_EXCEPTIONS
+    from magic_formula import (
+        MAGIC_FORMULA_RULES,
+        MagicFormulaRanking,
+        MagicFormulaScreener,
+        earnings_yield,
+    )
+    from rules import Rule, RuleSet, column_array
+    from walter_schloss import SCHLOSS_RULES, SchlossStockScreening
+
+# 随行情变化的列，其余列视为常驻内存的财务数据
+PRICE_COLUMNS = ('最新价', '市盈率-动态', '市净率', '总市值')
+
+
+class ScreenEvent(NamedTuple):
+    """筛选结果的变化"""
+    kind: str  # entry 入选 / exit 移出
+    code: str
+    name: str
+
+
+def format_event(event: ScreenEvent) -> str:
+    """一行事件文本"""
+    action = '入选' if event.kind == 'entry' else '移出'
+    return f"[{datetime.now().strftime('%H:%M:%S')}] {action} {event.code} {event.name}"
+
+
+class StreamScreener:
+    """按行情快照差异增量重新筛选
+
+    Args:
+        rules: 规则集
+        fundamentals: 每只股票一行的财务数据（含代码列），其中的价格列会被忽略
+        price_columns: 随行情变化的列
+        key: 代码列名
+    """
+
+    # 由价格列推导出的列，子类在 ``_derive`` 中计算
+    DERIVED: Tuple[str, ...] = ()
+
+    def __init__(self, rules: RuleSet, fundamentals: pd.DataFrame,
+                 price_columns: Sequence[str] = PRICE_COLUMNS, key: str = '代码'):
+        self.rules = rules
+        self.key = key
+        self.price_columns = list(price_columns)
+        fundamentals = fundamentals.drop_duplicates(key, keep='last')
+        self.fundamentals = fundamentals.drop(
+            columns=[column for column in self.price_columns if column in fundamentals.columns]
+        ).set_index(key)
+        available = set(self.price_columns) | set(self.fundamentals.columns) | set(self.DERIVED)
+        self._dynamic = np.array([rule.column in self.price_columns or rule.column in self.DERIVED
+                                  for rule in rules.rules], dtype=bool)
+        self._missing = [rule.column not in available for rule in rules.rules]
+
+        self.codes = pd.Index([], dtype=object)
+        self.names = np.empty(0, dtype=object)
+        self.selected = np.empty(0, dtype=bool)
+        self._prices = np.empty((0, len(self.price_columns)))
+        self._fundamental: Dict[Tuple[str, bool], np.ndarray] = {}
+        self._derived: Dict[str, np.ndarray] = {column: np.empty(0) for column in self.DERIVED}
+        self._masks = np.empty((len(rules), 0), dtype=bool)
+        self._fresh = np.empty(0, dtype=bool)
+        self._raw = np.empty(0, dtype=object)
+        self._take = np.empty(0, dtype=np.int64)
+        self.ticks = 0
+        self.changed = 0  # 上次更新中重新计算的股票数
+
+    @property
+    def selected_codes(self) -> List[str]:
+        """当前入选的股票代码"""
+        return self.codes[self.selected].tolist()
+
+    def _column(self, column: str, rows: np.ndarray, numeric: bool = True) -> np.ndarray:
+        """指定行在某列上的当前值"""
+        if column in self._derived:
+            return self._derived[column][rows]
+        if column in self.price_columns:
+            return self._prices[rows, self.price_columns.index(column)]
+        key = (column, numeric)
+        if key not in self._fundamental:
+            self._fundamental[key] = column_array(
+                self.fundamentals[column].reindex(self.codes), numeric)
+        return self._fundamental[key][rows]
+
+    def _evaluate(self, index: int, rule: Rule, rows: np.ndarray) -> None:
+        """重新计算一条规则在指定行上的结果"""
+        if self._missing[index]:
+            self._masks[index, rows] = rule.missing == 'skip'
+        else:
+            self._masks[index, rows] = rule.evaluate(self._column(rule.column, rows, rule.numeric))
+
+    def _realign(self, codes: pd.Index, names: np.ndarray) -> List[ScreenEvent]:
+        """股票集合或顺序变化时按代码重排状态，返回已不在快照中的入选股票的移出事件"""
+        old = self.codes.get_indexer(codes)
+        keep = old >= 0
+        removed = np.flatnonzero(~self.codes.isin(codes))
+        events = [ScreenEvent('exit', self.codes[row], self.names[row])
+                  for row in removed if self.selected[row]]
+        self._drop(self.codes[removed].tolist())
+
+        prices = np.full((len(codes), len(self.price_columns)), np.nan)
+        prices[keep] = self._prices[old[keep]]
+        masks = np.zeros((len(self.rules), len(codes)), dtype=bool)
+        masks[:, keep] = self._masks[:, old[keep]]
+        selected = np.zeros(len(codes), dtype=bool)
+        selected[keep] = self.selected[old[keep]]
+        for column, values in self._derived.items():
+            derived = np.full(len(codes), np.nan)
+            derived[keep] = values[old[keep]]
+            self._derived[column] = derived
+
+        self.codes = codes
+        self.names = names
+        self._prices = prices
+        self._masks = masks
+        self.selected = selected
+        self._fundamental = {}
+        self._fresh = ~keep
+        return events
+
+    def _prices_of(self, spot: pd.DataFrame) -> np.ndarray:
+        """快照中参与筛选的行的价格列矩阵，缺少的列为 NaN"""
+        prices = np.full((len(self._take), len(self.price_columns)), np.nan)
+        for j, column in enumerate(self.price_columns):
+            if column in spot.columns:
+                prices[:, j] = column_array(spot[column])[self._take]
+        return prices
+
+    def _align(self, spot: pd.DataFrame) -> List[ScreenEvent]:
+        """代码列与上次快照不同时，重新确定参与筛选的行（有财务数据、去重）并对齐状态"""
+        raw = spot[self.key].to_numpy(dtype=object)
+        if len(raw) == len(self._raw) and (raw == self._raw).all():
+            return []
+        self._raw = raw
+        take = np.flatnonzero(self.fundamentals.index.get_indexer(raw) >= 0)
+        take = take[~pd.Index(raw[take]).duplicated()]
+        self._take = take
+        codes = pd.Index(raw[take], dtype=object)
+        if codes.equals(self.codes):
+            return []
+        names = spot['名称'].to_numpy(dtype=object)[take] if '名称' in spot.columns \
+            else codes.to_numpy()
+        return self._realign(codes, names)
+
+    def update(self, spot: pd.DataFrame) -> List[ScreenEvent]:
+        """用新的行情快照更新筛选结果，返回入选/移出事件"""
+        events = self._align(spot)
+        codes = self.codes
+        prices = self._prices_of(spot)
+        same = (prices == self._prices) | (np.isnan(prices) & np.isnan(self._prices))
+        changed = ~same.all(axis=1) | self._fresh
+        rows = np.flatnonzero(changed)
+        fresh = np.flatnonzero(self._fresh)
+        self._prices[rows] = prices[rows]
+        if len(rows):
+            self._derive(rows)
+        for index, rule in enumerate(self.rules.rules):
+            if self._dynamic[index]:
+                self._evaluate(index, rule, rows)
+            elif len(fresh):
+                self._evaluate(index, rule, fresh)
+        self._fresh = np.zeros(len(codes), dtype=bool)
+
+        selected = self._select(rows)
+        for row in np.flatnonzero(selected != self.selected):
+            kind = 'entry' if selected[row] else 'exit'
+            events.append(ScreenEvent(kind, self.codes[row], self.names[row]))
+        self.selected = selected
+        self.changed = len(rows)
+        self.ticks += 1
+        return events
+
+    def _derive(self, rows: np.ndarray) -> None:
+        """重新计算指定行的推导列，默认没有推导列"""
+
+    def _drop(self, codes: List[str]) -> None:
+        """股票离开快照时的清理，默认无需处理"""
+
+    def _select(self, rows: np.ndarray) -> np.ndarray:
+        """入选掩码：全部规则通过"""
+        return self._masks.all(axis=0)
+
+    def run(self, fetch_spot: Callable[[], pd.DataFrame], interval: float = 30.0,
+            iterations: Optional[int] = None,
+            on_event: Callable[[ScreenEvent], None] = lambda event: print(format_event(event)),
+            sleep: Callable[[float], None] = time.sleep) -> None:
+        """按间隔轮询行情快照，``iterations`` 为 None 时一直运行"""
+        tick = 0
+        while iterations is None or tick < iterations:
+            start = time.perf_counter()
+            try:
+                spot = fetch_spot()
+            except RETRY_EXCEPTIONS as err:
+                print(f"获取行情快照失败: {err}")
+            else:
+                for event in self.update(spot):
+                    on_event(event)
+                print(f"第 {self.ticks} 次更新：重新计算 {self.changed} 只，"
+                      f"入选 {int(self.selected.sum())} 只，"
+                      f"耗时 {(time.perf_counter() - start) * 1000:.1f} ms")
+            tick += 1
+            if iterations is None or tick < iterations:
+                sleep(max(0.0, interval - (time.perf_counter() - start)))
+
+
+class MagicFormulaStreamScreener(StreamScreener):
+    """神奇公式的流式筛选：规则过滤后按综合排名取前 ``top`` 名
+
+    ROIC 的替代指标来自常驻的财务数据（``净资产收益率``，缺少时为市盈率倒数），
+    盈利收益率随市盈率变化，排名只更新有变化的股票。
+    """
+
+    DERIVED = ('ROIC_proxy', 'earnings_yield')
+
+    def __init__(self, fundamentals: pd.DataFrame, rules: Optional[RuleSet] = None,
+                 top: int = 50, price_columns: Sequence[str] = PRICE_COLUMNS,
+                 key: str = '代码'):
+        super().__init__(rules if rules is not None else MAGIC_FORMULA_RULES, fundamentals,
+                         price_columns, key)
+        self.top = top
+        self.ranking = MagicFormulaRanking()
+
+    def _derive(self, rows: np.ndarray) -> None:
+        yields = earnings_yield(self._column('市盈率-动态', rows))
+        if '净资产收益率' in self.fundamentals.columns:
+            roic = self._column('净资产收益率', rows)
+        else:
+            roic = yields
+        self._derived['ROIC_proxy'][rows] = np.where(np.isinf(roic), 0, roic)
+        self._derived['earnings_yield'][rows] = yields
+
+    def _drop(self, codes: List[str]) -> None:
+        for code in codes:
+            self.ranking.remove(code)
+
+    def _select(self, rows: np.ndarray) -> np.ndarray:
+        passed = self._masks[:, rows].all(axis=0)
+        roic = self._derived['ROIC_proxy']
+        yields = self._derived['earnings_yield']
+        for row, ok in zip(rows.tolist(), passed.tolist()):
+            code = self.codes[row]
+            if ok:
+                self.ranking.update(code, roic[row], yields[row])
+            else:
+                self.ranking.remove(code)
+        selected = np.zeros(len(self.codes), dtype=bool)
+        top = self.ranking.top(self.top)
+        selected[self.codes.get_indexer(top['代码'])] = True
+        return selected
+
+
+def main() -> None:
+    """先获取一次财务数据，然后按间隔轮询行情快照并输出入选/移出事件"""
+    parser = argparse.ArgumentParser(description='盘中流式重新筛选')
+    parser.add_argument('--strategy', choices=['schloss', 'magic_formula'], default='schloss')
+    parser.add_argument('--interval', type=float, default=30.0, help='轮询间隔（秒）')
+    parser.add_argument('--iterations', type=int, default=None, help='轮询次数，默认一直运行')
+    args = parser.parse_args()
+
+    provider = get_provider()
+    if args.strategy == 'schloss':
+        screener = SchlossStockScreening(provider=provider)
+        screener.get_stock_data()
+        if screener.stocks_data is None:
+            return
+        stream = StreamScreener(SCHLOSS_RULES, screener.stocks_data)
+    else:
+        screener = MagicFormulaScreener(provider=provider)
+        screener.get_stock_data()
+        if screener.stocks_data is None:
+            return
+        stream = MagicFormulaStreamScreener(screener.stocks_data)
+
+    print(f"财务数据常驻内存：{len(stream.fundamentals)} 只股票，开始轮询行情快照")
+    stream.run(lambda: provider.tradable_spot(refresh=True), args.interval, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
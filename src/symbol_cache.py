@@ -0,0 +1,145 @@
+"""按股票缓存行情与财务数据
+
+以 ``(类别, 代码, 报告期)`` 为键保存单只股票的数据行，不同类别使用不同的有效期：
+行情快照变化快，默认 10 分钟过期；季度财务指标一年只更新几次，默认 30 天过期。
+缓存条目数有上限，超出时按最近最少使用（LRU）淘汰，并统计命中/未命中次数。
+读写由锁保护，可在多个线程间共用。
+"""
+
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd  # pylint: disable=import-error
+
+DEFAULT_TTL = {
+    'spot': 10 * 60,
+    'financial': 30 * 24 * 3600,
+}
+
+# 整张表（如全市场行情快照）使用的占位代码
+TABLE_CODE = '*'
+
+CacheKey = Tuple[str, str, Optional[str]]
+
+
+class SymbolCache:
+    """带有效期与 LRU 淘汰的按股票缓存
+
+    Args:
+        path: 持久化文件路径，为 None 时只在内存中缓存
+        ttl: 各类别的有效期（秒），未列出的类别使用 ``default_ttl``
+        max_entries: 最多保存的条目数
+        clock: 返回当前时间戳的函数，便于测试
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[Dict[str, float]] = None,
+                 default_ttl: float = 24 * 3600, max_entries: int = 50000,
+                 clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl = dict(DEFAULT_TTL)
+        self.ttl.update(ttl or {})
+        self.default_ttl = default_ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Any]]" = OrderedDict()
+        # 每只股票最新的报告期，用于不指定报告期的查询
+        self._latest: Dict[Tuple[str, str], Optional[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # get 会移动或删除条目并更新计数，读也需要加锁
+        self._lock = threading.RLock()
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """命中、未命中、淘汰次数与当前条目数"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'entries': len(self._entries)}
+
+    def _key(self, kind: str, code: str, period: Optional[str]) -> CacheKey:
+        if period is None:
+            period = self._latest.get((kind, code))
+        return kind, code, period
+
+    def _fresh(self, kind: str, stored_at: float) -> bool:
+        return self.clock() - stored_at < self.ttl.get(kind, self.default_ttl)
+
+    def get(self, kind: str, code: str, period: Optional[str] = None) -> Any:
+        """读取未过期的数据，不存在或已过期时返回 None（过期条目会被移除）"""
+        with self._lock:
+            key = self._key(kind, code, period)
+            entry = self._entries.get(key)
+            if entry is None or not self._fresh(kind, entry[0]):
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, kind: str, code: str, value: Any, period: Optional[str] = None) -> None:
+        """写入数据，``period`` 为报告期（如 ``2024-09-30``），同时记为该股票最新一期"""
+        key = (kind, code, period)
+        with self._lock:
+            self._entries[key] = (self.clock(), value)
+            self._entries.move_to_end(key)
+            self._latest[(kind, code)] = period
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                if old_key[:2] in self._latest and self._latest[old_key[:2]] == old_key[2]:
+                    del self._latest[old_key[:2]]
+                self.evictions += 1
+
+    def partition(self, kind: str, codes: Iterable[str]) -> Tuple[Dict[str, Any], List[str]]:
+        """把代码分为缓存命中（代码 -> 数据）与需要重新获取的两部分"""
+        fresh: Dict[str, Any] = {}
+        stale: List[str] = []
+        for code in codes:
+            value = self.get(kind, code)
+            if value is None:
+                stale.append(code)
+            else:
+                fresh[code] = value
+        return fresh, stale
+
+    def get_table(self, kind: str) -> Optional[pd.DataFrame]:
+        """读取整张表（如全市场行情快照）"""
+        return self.get(kind, TABLE_CODE)
+
+    def put_table(self, kind: str, table: pd.DataFrame) -> None:
+        """写入整张表"""
+        self.put(kind, TABLE_CODE, table)
+
+    def save(self) -> None:
+        """持久化到 ``path``，先写临时文件再替换"""
+        if not self.path:
+            return
+        tmp_path = f'{self.path}.tmp'
+        with self._lock, open(tmp_path, 'wb') as f:
+            pickle.dump({'entries': self._entries, 'latest': self._latest}, f,
+                        protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, self.path)
+
+    def load(self) -> None:
+        """从 ``path`` 读取，文件损坏时从空缓存开始"""
+        try:
+            with open(self.path, 'rb') as f:
+                state = pickle.load(f)
+            entries, latest = state['entries'], state['latest']
+        except (OSError, EOFError, KeyError, pickle.UnpicklingError) as err:
+            print(f"读取缓存文件 {self.path} 失败，将重新获取: {err}")
+            entries, latest = OrderedDict(), {}
+        with self._lock:
+            self._entries = entries
+            self._latest = latest
@@ -3,11 +3,32 @@
 实现基于VCP模式的股票筛选策略，用于识别第二阶段的突破机会。
 """
 
+import argparse
+import os
+from typing import List, Optional, Tuple
+
 import akshare as ak  # pylint: disable=import-error
 import mpl_finance as mpf  # pylint: disable=import-error
 import matplotlib.pyplot as plt  # pylint: disable=import-error
+import numpy as np  # pylint: disable=import-error
 import pandas as pd  # pylint: disable=import-error
 
+try:
+    from src.bar_store import BarStore
+    from src.data_provider import get_provider
+    from src.indicators import WindowSums, sma
+    from src.vcp_panel import screen_stage2, screen_stage2_parallel
+except ImportError:  # 作为脚本直接运行时
+    from bar_store import BarStore
+    from data_provider import get_provider
+    from indicators import WindowSums, sma
+    from vcp_panel import screen_stage2, screen_stage2_parallel
+
+# 本地日线存储目录，每次运行只下载缺失的部分
+BAR_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'bars')
+# 面板（交易日 × 股票）不少于该单元格数时才启用多进程，较小的面板单进程向量化更快
+PARALLEL_MIN_CELLS = 10_000_000
+
 #将股票时间转换为标准时间，不带时分秒的数据 目前有错.
 # def date_to_num(dates):
 #     num_time = []
@@ -19,8 +40,7 @@ import pandas as pd  # pylint: disable=import-error
 
 def mean_line() -> None:
     """绘制股票均线图表"""
-    df = ak.stock_zh_a_daily(symbol='sz002241', start_date="20220203", end_date="20230204",
-                             adjust="qfq")
+    df = get_provider().daily('sz002241', "20220203", "20230204", adjust="qfq")
     print(df['close'].iloc[-1])
     df.to_excel("歌尔股份k.xlsx")
     # 创建绘图的基本参数
@@ -32,7 +52,7 @@ def mean_line() -> None:
                           width=0.6, colorup='r', colordown='green', alpha=1.0)
     df['date'] = pd.to_datetime(df['date'])
     df['date'] = df['date'].apply(lambda x: x.strftime('%Y-%m-%d'))
-    df["SMA50"] = df["close"].rolling(50).mean()
+    df["SMA50"] = sma(df["close"], 50)
     print(df["SMA50"].iloc[-1])
     # df["SMA150"] = df["close"].rolling(150).mean()
     # df["SMA200"] = df["close"].rolling(200).mean()
@@ -51,23 +71,27 @@ def mean_line() -> None:
 # 5) 股价较52周高点不超过25%
 # 6) RS（Relative Strength）不低于70，最好是80多或90多.
 
-vcp = []
+def my_filter(symbol: str, name: str, store: Optional[BarStore] = None) -> Optional[str]:
+    """筛选符合VCP第二阶段条件的股票，符合时返回 ``代码+名称``，否则返回 None
 
-
-def my_filter(symbol: str, name: str) -> None:
-    """筛选符合VCP第二阶段条件的股票"""
-    df = ak.stock_zh_a_daily(symbol=symbol, start_date="20240203", end_date="20240417",
-                             adjust="qfq")
+    传入 ``store`` 时从本地日线存储读取并增量更新，否则通过默认数据提供者获取。
+    """
+    if store is not None:
+        df = store.update(symbol)
+    else:
+        df = get_provider().daily(symbol, "20240203", "20240417", adjust="qfq")
     if df.empty:
-        return
-    yesterday = df["close"].iloc[-1]
-    value_10 = df["close"].tail(10).mean()
-    value_20 = df["close"].tail(20).mean()
-    value_50 = df["close"].tail(50).mean()
+        return None
+    close = df["close"].to_numpy(dtype=np.float64)
+    # 累计和只算一次，各窗口、今昨两日的均线都是两行相减；历史不足一个窗口时取已有数据的均值
+    means = WindowSums(close)
+    last = len(close) - 1
+    yesterday = close[last]
+    value_10, value_20, value_50 = (means.mean(last, w, min_periods=1) for w in (10, 20, 50))
     if yesterday < max([value_50, value_20, value_10]):
-        return
+        return None
     if value_20 < value_50 or value_10 < value_20:
-        return
+        return None
 
     # df["SMA200"] = df["close"].rolling(200).mean()
     # if len(df["SMA200"]) < 262:
@@ -80,30 +104,37 @@ def my_filter(symbol: str, name: str) -> None:
     #     return
 
     # 筛选均线上扬较昨日突破
-    yesterday_value_10 = df["close"].iloc[-11:-1].mean()
-    yesterday_value_20 = df["close"].iloc[-21:-1].mean()
-    yesterday_value_50 = df["close"].iloc[-51:-1].mean()
+    yesterday_value_10, yesterday_value_20, yesterday_value_50 = (
+        means.mean(last - 1, w, min_periods=1) for w in (10, 20, 50))
     if yesterday_value_20 < yesterday_value_50 or yesterday_value_10 < yesterday_value_20:
         print(symbol, name)
-        vcp.append(symbol+name)
-    return
-
-
-def get_all_stocks() -> None:
-    """获取所有指数股票列表"""
-    # 打印所有指数股票，速度较慢
-    stock_df = ak.stock_zh_index_spot()
-    print(stock_df)
-    # stock_df.to_excel("all.xlsx")
-
-
-def main() -> None:
-    """主函数，执行VCP选股策略"""
-    df1 = ak.stock_zh_a_spot_em().query("昨收 <= 20")
-    # df1.to_excel("price_less_20.xlsx")
-
-    # my_filter('sz002235')
-    for _, row in df1.iterrows():
+        return symbol + name
+    return None
+
+
+def stage2_screen(symbols: List[str], store: Optional[BarStore] = None,
+                  workers: int = 1, end_date: Optional[str] = None) -> pd.DataFrame:
+    """增量更新本地日线后，对全部股票做一次向量化的第二阶段筛选，返回通过的股票
+
+    ``workers`` 大于 1 且面板不小于 ``PARALLEL_MIN_CELLS`` 时按股票分片到多个进程计算，
+    价格数据通过共享内存传递；``end_date`` 为日线更新的截止日期，默认今天。
+    """
+    store = store or get_provider().bar_store(BAR_STORE_DIR)
+    store.update_many(symbols, end_date)
+    close = store.load_panel(symbols)
+    if close.empty:
+        return pd.DataFrame()
+    if workers > 1 and close.size >= PARALLEL_MIN_CELLS:
+        mask, table = screen_stage2_parallel(close, workers=workers)
+    else:
+        mask, table = screen_stage2(close)
+    return table[mask]
+
+
+def select_symbols(spot: pd.DataFrame) -> List[Tuple[str, str]]:
+    """从行情快照中选出沪深主板股票，返回 ``(带交易所前缀的代码, 名称)``"""
+    selected = []
+    for _, row in spot.iterrows():
         # 序号    5280
         # 代码    002708
         # 名称    光洋股份
@@ -127,25 +158,64 @@ def main() -> None:
         # 分钟涨跌    0.060
         # 日涨跌幅    18.89
         # 年初至今涨跌幅    42.37
-        if 0 == row[14]:
+        if 0 == row.iloc[14]:
             continue
+        code, name = row.iloc[1], row.iloc[2]
         # 00 开头的股票是深交所主板的股票
-        if row[1][0:2] == '00':
-            symbol = 'sz' + row[1]
-            my_filter(symbol, row[2])
+        if code[0:2] == '00':
+            selected.append(('sz' + code, name))
         # 60 开头是股票是上交所主板的股票
-        elif row[1][0:2] == '60':
-            symbol = 'sh' + row[1]
-            my_filter(symbol, row[2])
+        elif code[0:2] == '60':
+            selected.append(('sh' + code, name))
         # 科创板 暂不处理 30:深交所创业板 68:上交所科创板 8:北交所新三板精选层
-        # elif row[1][0:2] == '30':
-        #     symbol = 'sz' + row[1]
-        # elif row[1][0:2] == '68':
-        #     symbol = 'sh' + row[1]
+        # elif code[0:2] == '30':
+        #     symbol = 'sz' + code
+        # elif code[0:2] == '68':
+        #     symbol = 'sh' + code
+    return selected
 
+
+def get_all_stocks() -> None:
+    """获取所有指数股票列表"""
+    # 打印所有指数股票，速度较慢
+    stock_df = ak.stock_zh_index_spot()
+    print(stock_df)
+    # stock_df.to_excel("all.xlsx")
+
+
+def main(batch: bool = False, workers: int = 1) -> List[str]:
+    """主函数，执行VCP选股策略，返回符合条件的股票 ``代码+名称``
+
+    默认用 ``my_filter`` 逐只筛选（10/20/50 日均线等条件）。``batch`` 为 True 时改用
+    ``stage2_screen`` 按完整的第二阶段条件一次筛选全部股票，条件不同，选出的股票也不同；
+    ``workers`` 大于 1 且面板足够大时多进程计算。
+    """
+    provider = get_provider()
+    df1 = provider.spot().query("昨收 <= 20")
+    store = provider.bar_store(BAR_STORE_DIR)
+    # df1.to_excel("price_less_20.xlsx")
+    symbols = select_symbols(df1)
+
+    vcp = []
+    if batch:
+        names = dict(symbols)
+        passed = stage2_screen(list(names), store, workers=workers)
+        vcp = [symbol + names[symbol] for symbol in passed.index]
+    else:
+        for symbol, name in symbols:
+            result = my_filter(symbol, name, store)
+            if result is not None:
+                vcp.append(result)
+        store.save_index()
     print(vcp)
     # df.to_excel("stock_zh_a_daily.xlsx")
+    return vcp
 
 
 if __name__ == '__main__':
-    main()
+    parser = argparse.ArgumentParser(description='VCP 选股')
+    parser.add_argument('--batch', action='store_true',
+                        help='按完整的第二阶段条件批量筛选（结果与默认的逐只筛选不同）')
+    parser.add_argument('--workers', type=int, default=1, help='批量筛选的进程数')
+    args = parser.parse_args()
+    main(args.batch, args.workers)
@@ -0,0 +1,228 @@
+"""VCP 第二阶段条件的批量向量化筛选
+
+输入为 (日期 × 股票) 的收盘价面板，一次计算全部股票在某个交易日的各项条件：
+均线由累计和相减得到，52 周高低点按列取极值，不再逐只股票循环。
+
+条件与 ``vcp.py`` 中的注释一致：
+1) 股价高于 50/150/200 日均线
+2) 50 日均线 > 150 日均线 > 200 日均线
+3) 200 日均线向上倾斜（默认与一个月前相比）
+4) 股价较 52 周低点至少高 30%
+5) 股价距 52 周高点不超过 25%
+6) RS 评级不低于 70（见 ``rs_rating``）
+以及 ``vcp.my_filter`` 中的短期条件：股价不低于 10/20/50 日均线且三者多头排列，
+并且前一交易日尚未形成多头排列（当日突破）。
+
+均线与波动收缩由 ``indicators`` 计算；收缩次数与最近一次回调幅度只对通过的股票计算，
+作为参考数值输出，不参与筛选。
+"""
+
+import os
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np  # pylint: disable=import-error
+import pandas as pd  # pylint: disable=import-error
+
+try:
+    from src.indicators import WindowSums, contraction_depths, shrinking_contractions
+    from src.rs_rating import DEFAULT_HORIZONS, rs_rating
+except ImportError:  # 作为脚本直接运行时
+    from indicators import WindowSums, contraction_depths, shrinking_contractions
+    from rs_rating import DEFAULT_HORIZONS, rs_rating
+
+DEFAULT_PARAMS = {
+    'short_windows': (10, 20, 50),
+    'long_windows': (50, 150, 200),
+    'slope_window': 21,        # 200 日均线与约一个月前比较
+    'year_window': 252,        # 52 周约 252 个交易日
+    'min_above_low': 1.3,      # 至少高于 52 周低点 30%
+    'max_below_high': 0.75,    # 不低于 52 周高点的 75%
+    'min_rs': 70,              # RS 评级下限
+    'pivot_order': 5,          # 波动收缩的摆动高点两侧比较的交易日数
+}
+
+RULES = (
+    'above_ma',
+    'ma_order',
+    'ma200_rising',
+    'above_52w_low',
+    'near_52w_high',
+    'rs',
+    'short_ma_order',
+    'crossover',
+)
+
+
+def _prepare(params: Optional[Dict], rules: Optional[Iterable[str]]) -> Tuple[Dict, Tuple]:
+    params = {**DEFAULT_PARAMS, **(params or {})}
+    rules = tuple(RULES if rules is None else rules)
+    unknown = set(rules) - set(RULES)
+    if unknown:
+        raise ValueError(f"未知的筛选条件: {', '.join(sorted(unknown))}")
+    return params, rules
+
+
+def _span(params: Dict) -> int:
+    """评估一个交易日需要的历史行数"""
+    return max(max(params['long_windows']) + params['slope_window'], params['year_window'],
+               max(params['short_windows']) + 1, max(DEFAULT_HORIZONS) + 1)
+
+
+def _window(close: pd.DataFrame, as_of: Optional[int], params: Dict) -> Tuple[int, int]:
+    """返回需要参与计算的行区间 [start, end]"""
+    end = len(close) - 1 if as_of is None else as_of
+    if end < 0:
+        raise ValueError("价格面板为空")
+    return max(0, end + 1 - _span(params)), end
+
+
+def _evaluate(values: np.ndarray, rs: np.ndarray, rules: Tuple,
+              params: Dict) -> Dict[str, np.ndarray]:
+    """对 (行 × 股票) 数组的最后一行计算各条件数值与结果"""
+    short = params['short_windows']
+    long = params['long_windows']
+    last = len(values) - 1
+    means = WindowSums(values)
+    price = values[last]
+
+    report = {'close': price}
+    for window in sorted(set(short) | set(long)):
+        report[f'sma{window}'] = means.mean(last, window)
+    for window in short:
+        report[f'prev_sma{window}'] = means.mean(last - 1, window)
+    report[f'sma{long[-1]}_lag'] = means.mean(last - params['slope_window'], long[-1])
+    year = values[max(0, last + 1 - params['year_window']):]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        report['high_52w'] = np.nanmax(year, axis=0)
+        report['low_52w'] = np.nanmin(year, axis=0)
+    report['rs_rating'] = rs
+
+    sma = {window: report[f'sma{window}'] for window in set(short) | set(long)}
+    prev = {window: report[f'prev_sma{window}'] for window in short}
+    with np.errstate(invalid='ignore'):
+        checks = {
+            'above_ma': np.logical_and.reduce([price > sma[w] for w in long]),
+            'ma_order': np.logical_and.reduce(
+                [sma[a] > sma[b] for a, b in zip(long[:-1], long[1:])]),
+            'ma200_rising': sma[long[-1]] > report[f'sma{long[-1]}_lag'],
+            'above_52w_low': price >= params['min_above_low'] * report['low_52w'],
+            'near_52w_high': price >= params['max_below_high'] * report['high_52w'],
+            'rs': report['rs_rating'] >= params['min_rs'],
+            'short_ma_order': (price >= np.fmax.reduce([sma[w] for w in short]))
+            & np.logical_and.reduce([sma[a] >= sma[b] for a, b in zip(short[:-1], short[1:])]),
+            # 前一日短期均线尚未多头排列（缺失值视为未排列）
+            'crossover': ~np.logical_and.reduce(
+                [prev[a] >= prev[b] for a, b in zip(short[:-1], short[1:])]),
+        }
+
+    for rule in RULES:
+        report[rule] = checks[rule]
+    report['passed'] = np.logical_and.reduce([checks[rule] for rule in rules]) if rules \
+        else np.ones(len(price), dtype=bool)
+    # 波动收缩只作为参考数值输出，不参与筛选，只对通过的股票计算
+    report['last_contraction'] = np.full(len(price), np.nan)
+    report['contractions'] = np.zeros(len(price), dtype=np.int64)
+    if report['passed'].any():
+        depths = contraction_depths(year[:, report['passed']], order=params['pivot_order'])
+        report['last_contraction'][report['passed']] = depths[-1]
+        report['contractions'][report['passed']] = shrinking_contractions(depths)
+    return report
+
+
+def _rs_values(close: pd.DataFrame, start: int, end: int,
+               rs: Optional[pd.Series]) -> np.ndarray:
+    # RS 是全市场横截面排名，必须在整个面板上计算，不能按分片各自计算
+    if rs is None:
+        rs = rs_rating(close.iloc[start:end + 1])
+    return rs.reindex(close.columns).to_numpy(dtype=np.float64)
+
+
+def screen_stage2(close: pd.DataFrame, as_of: Optional[int] = None,
+                  rules: Optional[Iterable[str]] = None,
+                  params: Optional[Dict] = None,
+                  rs: Optional[pd.Series] = None) -> Tuple[pd.Series, pd.DataFrame]:
+    """对收盘价面板做一次向量化的第二阶段筛选
+
+    Args:
+        close: 收盘价面板，行为按时间升序的交易日，列为股票代码
+        as_of: 评估的行位置，默认最后一行
+        rules: 参与筛选的条件名（见 ``RULES``），默认全部
+        params: 覆盖 ``DEFAULT_PARAMS`` 中的参数
+        rs: 预先计算的 RS 评级（如 ``RSRatingEngine.ratings()``），默认由面板计算
+    Returns:
+        (是否通过的布尔 Series, 每只股票的各条件数值与结果表)
+    """
+    params, rules = _prepare(params, rules)
+    start, end = _window(close, as_of, params)
+    values = close.iloc[start:end + 1].to_numpy(dtype=np.float64)
+    report = _evaluate(values, _rs_values(close, start, end, rs), rules, params)
+    table = pd.DataFrame(report, index=close.columns)
+    return table['passed'], table
+
+
+def _evaluate_buffer(buffer: memoryview, shape: Tuple[int, int], columns: Tuple[int, int],
+                     rs: np.ndarray, rules: Tuple, params: Dict) -> Dict[str, np.ndarray]:
+    values = np.ndarray(shape, dtype=np.float64, buffer=buffer)[:, columns[0]:columns[1]]
+    report = _evaluate(values, rs, rules, params)
+    # 复制结果，避免返回值仍引用共享内存
+    return {key: np.array(value) for key, value in report.items()}
+
+
+def _screen_shard(shm_name: str, shape: Tuple[int, int], columns: Tuple[int, int],
+                  rs: np.ndarray, rules: Tuple, params: Dict) -> Dict[str, np.ndarray]:
+    """子进程：挂载共享内存中的价格数组，只计算自己负责的列"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        return _evaluate_buffer(shm.buf, shape, columns, rs, rules, params)
+    finally:
+        shm.close()
+
+
+def screen_stage2_parallel(close: pd.DataFrame, workers: Optional[int] = None,
+                           as_of: Optional[int] = None,
+                           rules: Optional[Iterable[str]] = None,
+                           params: Optional[Dict] = None,
+                           rs: Optional[pd.Series] = None,
+                           shards_per_worker: int = 2) -> Tuple[pd.Series, pd.DataFrame]:
+    """多进程版本的 ``screen_stage2``，结果与单进程一致
+
+    价格数组只写入一次共享内存，子进程按名称挂载后按列分片计算，
+    不需要把 DataFrame 序列化传给每个进程。RS 评级是横截面排名，在主进程算好后分发。
+    """
+    params, rules = _prepare(params, rules)
+    start, end = _window(close, as_of, params)
+    workers = workers or os.cpu_count() or 1
+    rs_values = _rs_values(close, start, end, rs)
+    values = close.iloc[start:end + 1].to_numpy(dtype=np.float64)
+    n_symbols = values.shape[1]
+    if workers <= 1 or n_symbols < 2:
+        report = _evaluate(values, rs_values, rules, params)
+        table = pd.DataFrame(report, index=close.columns)
+        return table['passed'], table
+
+    n_shards = min(n_symbols, workers * shards_per_worker)
+    bounds = np.linspace(0, n_symbols, n_shards + 1).astype(int)
+    shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+    try:
+        shared = np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = values
+        del values
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_screen_shard, shm.name, shared.shape, (lo, hi),
+                                rs_values[lo:hi], rules, params)
+                for lo, hi in zip(bounds[:-1], bounds[1:]) if hi > lo
+            ]
+            parts = [future.result() for future in futures]
+        del shared
+    finally:
+        shm.close()
+        shm.unlink()
+
+    report = {key: np.concatenate([part[key] for part in parts]) for key in parts[0]}
+    table = pd.DataFrame(report, index=close.columns)
+    return table['passed'], table
@@ -5,17 +5,37 @@
 # pylint: disable=duplicate-code
 
 import warnings
-import time
 import os
 from datetime import datetime
 from typing import Optional
 
 import pandas as pd  # pylint: disable=import-error
-import akshare as ak  # pylint: disable=import-error
+
+try:
+    from src.data_provider import DataProvider, get_provider
+    from src.financial_fetcher import FinancialFetcher
+    from src.rules import RuleSet
+    from src.snapshot_store import SnapshotStore
+    from src.symbol_cache import SymbolCache
+except ImportError:  # 作为脚本直接运行时
+    from data_provider import DataProvider, get_provider
+    from financial_fetcher import FinancialFetcher
+    from rules import RuleSet
+    from snapshot_store import SnapshotStore
+    from symbol_cache import SymbolCache
 
 # 忽略警告
 warnings.filterwarnings('ignore')
 
+# 施洛斯选股条件，快照缺少某列时跳过对应条件
+SCHLOSS_RULES = RuleSet([
+    {'name': '市盈率', 'rule': '0 < 市盈率-动态 < 20'},      # 低市盈率（P/E）
+    {'name': '市净率', 'rule': '0 < 市净率 < 1.5'},          # 低市净率（P/B）
+    {'name': '资产负债率', 'rule': '资产负债率 < 50'},        # 适度的债务水平
+    {'name': '净利润增长率', 'rule': '净利润同比增长率 > 0'},  # 正的净利润增长率
+    {'name': '市值', 'rule': '总市值 > 1000000000'},         # 足够的流动性，10亿以上
+], name='schloss')
+
 
 class SchlossStockScreening:
     """沃尔特·施洛斯低估值选股策略类
@@ -23,12 +43,41 @@ class SchlossStockScreening:
     实现基于价值投资理念的选股策略，包括低市盈率、低市净率、
     适度债务水平和正向增长等筛选条件。
     """
-    def __init__(self):
-        """初始化选股策略类"""
+
+    # 策略用到的快照列，读取快照时只加载这些列
+    SNAPSHOT_COLUMNS = ['代码', '名称', '行业', '最新价', '涨跌幅', '总市值', '流通市值',
+                        '市盈率-动态', '市净率', '资产负债率', '净利润同比增长率']
+
+    def __init__(self, max_workers: int = 4, rate_limit: float = 3.0,
+                 fetcher: Optional[FinancialFetcher] = None,
+                 cache: Optional[SymbolCache] = None,
+                 provider: Optional[DataProvider] = None,
+                 rules: Optional[RuleSet] = None):
+        """初始化选股策略类
+
+        Args:
+            max_workers: 并发获取财务数据的线程数
+            rate_limit: 财务数据接口每秒请求数上限
+            fetcher: 自定义财务数据获取器，传入时忽略上面两个参数
+            cache: 按股票的行情/财务缓存，只传缓存时使用 akshare 后端
+            provider: 数据提供者，默认使用进程内共享的 ``get_provider()``
+            rules: 选股条件，默认 ``SCHLOSS_RULES``
+        """
+        self.max_workers = max_workers
+        self.rate_limit = rate_limit
+        self.fetcher = fetcher
+        self.rules = rules if rules is not None else SCHLOSS_RULES
         self.stocks_data = None
         self.screened_stocks = None
         self.script_dir = os.path.dirname(os.path.abspath(__file__))
-        self.data_path = os.path.join(self.script_dir, 'stock_data_all_by_ws.csv')
+        self.snapshot_name = 'stock_data_all_by_ws'
+        self.snapshot_store = SnapshotStore(os.path.join(self.script_dir, 'snapshots'))
+        if provider is None:
+            provider = DataProvider(cache=cache) if cache is not None else get_provider()
+        self.provider = provider
+        self.cache = provider.cache
+        if fetcher is not None and fetcher.cache is None:
+            fetcher.cache = self.cache
         self.result_path_csv = os.path.join(self.script_dir, '筛选结果.csv')
         self.today = datetime.now().strftime('%Y-%m-%d')
 
@@ -36,28 +85,16 @@ class SchlossStockScreening:
         """获取A股股票数据"""
         print("正在获取A股股票数据...")
 
-        # 检查是否有今天的本地数据
-        if os.path.exists(self.data_path):
-            file_mtime = datetime.fromtimestamp(os.path.getmtime(self.data_path))
-            file_date = file_mtime.strftime('%Y-%m-%d')
-
-            if file_date == self.today:
-                print("读取本地缓存数据...")
-                self.stocks_data = pd.read_csv(self.data_path)
-                print(f"成功读取{len(self.stocks_data)}只股票数据")
-                return
-
-        # 获取股票列表
-        stock_list = ak.stock_zh_a_spot_em()
-
-        # 过滤ST股票和退市股票
-        stock_list = stock_list[~stock_list['名称'].str.contains('ST|退')]
+        # 获取股票列表（已过滤ST股票和退市股票），行情快照在缓存有效期内直接复用
+        stock_list = self.provider.tradable_spot()
 
         # 调试少量数据
         # stock_list = stock_list[:3]
 
-        # 获取财务数据
+        # 获取财务数据，只请求缓存中缺失或过期的股票
         financial_data = self._get_financial_data(stock_list)
+        self.provider.save()
+        print(f"缓存统计: {self.cache.stats}")
 
         if financial_data is None:
             print("未能获取到任何财务数据，请检查接口是否正常")
@@ -81,44 +118,30 @@ class SchlossStockScreening:
             how='inner'
         )
 
-        # 保存数据到本地
-        self.stocks_data.to_csv(self.data_path, index=False)
+        # 保存当日快照
+        self.snapshot_store.save(self.snapshot_name, self.stocks_data)
         print(f"成功获取{len(self.stocks_data)}只股票数据并保存到本地")
 
+    def load_snapshot(self, date: Optional[str] = None) -> bool:
+        """读取已保存的快照（默认最新一天），只加载策略需要的列"""
+        data = self.snapshot_store.load(self.snapshot_name, date, columns=self.SNAPSHOT_COLUMNS)
+        if data is None:
+            print("没有可用的本地快照")
+            return False
+        self.stocks_data = data
+        print(f"成功读取{len(self.stocks_data)}只股票快照数据")
+        return True
+
     def _get_financial_data(self, stock_list: pd.DataFrame) -> Optional[pd.DataFrame]:
         """获取财务数据，使用指定start_year的stock_financial_analysis_indicator"""
         print("尝试获取财务数据...")
-        financial_data = pd.DataFrame()
         stock_codes = stock_list['代码'].tolist()
-        batch_size = 50  # 减小批次大小避免请求失败
-
-        for i in range(0, len(stock_codes), batch_size):
-            batch_codes = stock_codes[i:i+batch_size]
-            batch_data = pd.DataFrame()
-
-            for code in batch_codes:
-                try:
-                    # 获取单只股票的财务分析指标，指定start_year为2025
-                    stock_financial = ak.stock_financial_analysis_indicator(
-                        symbol=code,
-                        start_year="2025"
-                    )
-                    if not stock_financial.empty:
-                        # 只保留最新一期数据（假设最后一行是最新）
-                        if len(stock_financial) > 0:
-                            stock_financial = stock_financial.iloc[[-1]]
-                            stock_financial['代码'] = code
-                            batch_data = pd.concat([batch_data, stock_financial])
-                    time.sleep(0.3)  # 增加延时避免频繁请求
-                except (ValueError, KeyError, IndexError, AttributeError) as e:
-                    print(f"获取股票 {code} 财务数据时出错: {e}")
-                    continue
-
-            if not batch_data.empty:
-                financial_data = pd.concat([financial_data, batch_data])
-
-            processed = i + batch_size if i + batch_size < len(stock_codes) else len(stock_codes)
-            print(f"已获取 {processed}/{len(stock_codes)} 只股票财务数据")
+        fetcher = self.fetcher or self.provider.financial_fetcher(
+            start_year="2025",
+            max_workers=self.max_workers,
+            rate=self.rate_limit,
+        )
+        financial_data = fetcher.fetch(stock_codes, progress_every=50)
 
         if not financial_data.empty:
             # 转换列名以便匹配
@@ -155,54 +178,11 @@ class SchlossStockScreening:
             return
 
         print("正在应用施洛斯选股策略...")
-        required_columns = ['市盈率-动态', '市净率', '资产负债率', '净利润同比增长率']
-        available_columns = {
-            col: col for col in required_columns if col in self.stocks_data.columns
-        }
-        missing_columns = [col for col in required_columns if col not in available_columns]
-
-        if missing_columns:
-            print(f"警告: 缺少关键列 {', '.join(missing_columns)}，部分筛选条件将无法应用")
-
-        # 初始化筛选条件
-        pe_filter = pd.Series([True] * len(self.stocks_data), index=self.stocks_data.index)
-        pb_filter = pd.Series([True] * len(self.stocks_data), index=self.stocks_data.index)
-        debt_filter = pd.Series([True] * len(self.stocks_data), index=self.stocks_data.index)
-        profit_filter = pd.Series([True] * len(self.stocks_data), index=self.stocks_data.index)
-        market_value_filter = pd.Series(
-            [True] * len(self.stocks_data), index=self.stocks_data.index
-        )
-
-        # 1. 低市盈率（P/E）
-        if '市盈率-动态' in available_columns:
-            pe_filter = (self.stocks_data[available_columns['市盈率-动态']] > 0) & \
-                        (self.stocks_data[available_columns['市盈率-动态']] < 20)
-            print("应用市盈率筛选，保留PE在0-20之间的股票")
-
-        # 2. 低市净率（P/B）
-        if '市净率' in available_columns:
-            pb_filter = (self.stocks_data[available_columns['市净率']] > 0) & \
-                        (self.stocks_data[available_columns['市净率']] < 1.5)
-            print("应用市净率筛选，保留PB在0-1.5之间的股票")
-
-        # 3. 适度的债务水平
-        if '资产负债率' in available_columns:
-            debt_filter = self.stocks_data[available_columns['资产负债率']] < 50
-            print("应用资产负债率筛选，保留负债率低于50%的股票")
-
-        # 4. 正的净利润增长率
-        if '净利润同比增长率' in available_columns:
-            profit_filter = self.stocks_data[available_columns['净利润同比增长率']] > 0
-            print("应用净利润增长率筛选，保留增长率为正的股票")
-
-        # 5. 足够的流动性（市值）
-        if '总市值' in self.stocks_data.columns:
-            market_value_filter = self.stocks_data['总市值'] > 1000000000
-            print("应用市值筛选，保留总市值大于10亿元的股票")
-
-        # 综合筛选
-        final_filter = pe_filter & pb_filter & debt_filter & profit_filter & market_value_filter
-        self.screened_stocks = self.stocks_data[final_filter].copy()
+        result = self.rules.evaluate(self.stocks_data)
+        if result.skipped:
+            print(f"警告: 缺少关键列，条件 {', '.join(result.skipped)} 将无法应用")
+        print(result.report())
+        self.screened_stocks = result.select(self.stocks_data).copy()
 
         if self.screened_stocks.empty:
             print("没有筛选出符合条件的股票")
@@ -0,0 +1,84 @@
+"""测试共用的夹具：本地 HTTP 替身服务"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple, Union
+from urllib.parse import parse_qsl
+
+import pytest
+
+# 路由值为固定内容，或 ``func(最后一段路径, 查询参数)``，返回内容、错误状态码或 None（404）
+Route = Union[bytes, Callable[[str, Dict[str, str]], Union[bytes, int, None]]]
+
+
+class LocalServer:
+    """按路由表应答的本地服务，``url`` 为根地址，``requests`` 记录 (路径, Range 请求头)
+
+    路由表的键为完整路径（如 ``/list``），或以 ``{}`` 结尾的前缀（如 ``/pdf/{}``）。
+    带 ``Range: bytes=N-`` 请求头时返回 206 与剩余部分。
+    """
+
+    def __init__(self, routes: Dict[str, Route]):
+        self.routes = routes
+        self.requests: List[Tuple[str, Optional[str]]] = []
+        server = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):  # noqa: N802
+                """处理 GET 请求"""
+                path, _, query = self.path.partition('?')
+                server.requests.append((path, self.headers.get('Range')))
+                status, body = server.respond(path, dict(parse_qsl(query)))
+                header = self.headers.get('Range')
+                if status == 200 and header:
+                    start = int(header.split('=')[1].rstrip('-'))
+                    status, body = (206, body[start:]) if start < len(body) else (416, b'')
+                if status >= 400 and status != 416:
+                    self.send_error(status)
+                    return
+                self.send_response(status)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                """不输出访问日志"""
+
+        self._httpd = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self.url = f'http://127.0.0.1:{self._httpd.server_address[1]}'
+        threading.Thread(target=self._httpd.serve_forever, daemon=True).start()
+
+    @property
+    def paths(self) -> List[str]:
+        """按顺序请求过的路径"""
+        return [path for path, _ in self.requests]
+
+    def respond(self, path: str, params: Dict[str, str]) -> Tuple[int, bytes]:
+        """按路由表得到 (状态码, 内容)"""
+        prefix, _, name = path.rpartition('/')
+        route = self.routes.get(path, self.routes.get(f'{prefix}/{{}}'))
+        result = route(name, params) if callable(route) else route
+        if result is None:
+            return 404, b''
+        if isinstance(result, int):
+            return result, b''
+        return 200, result
+
+    def close(self) -> None:
+        """停止服务"""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+
+@pytest.fixture(name='http_server')
+def fixture_http_server():
+    """启动本地服务的工厂：``http_server(routes)``，测试结束时全部关闭"""
+    servers = []
+
+    def start(routes: Dict[str, Route]) -> LocalServer:
+        servers.append(LocalServer(routes))
+        return servers[-1]
+
+    yield start
+    for server in servers:
+        server.close()
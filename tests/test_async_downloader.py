@@ -0,0 +1,65 @@
+"""异步下载引擎测试用例"""
+
+import asyncio
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.async_downloader import AsyncDownloader, download_all
+
+pytest.importorskip('aiohttp')
+
+FILES = {
+    '/pdf/a.pdf': b'%PDF-a' * 50000,
+    '/pdf/b.pdf': b'%PDF-b' * 10,
+    '/pdf/empty.pdf': b'',
+}
+REPORTS = {'Data': [{'ID': 'a', 'TITLE': '年报'}, {'ID': 'b', 'TITLE': '季报'}]}
+
+
+ROUTES = {'/list': json.dumps(REPORTS).encode(), **FILES}
+
+
+@pytest.fixture(name='server')
+def fixture_server(http_server):
+    """启动本地 HTTP 服务：提供固定文件与公告列表"""
+    return http_server(ROUTES)
+
+
+class TestAsyncDownloader:
+    """异步下载器测试类"""
+
+    def test_no_thread_downloader_dependency(self):
+        """测试异步路径不依赖 multitasking（不导入 fund_downloader）"""
+        code = ("import sys; sys.modules['multitasking'] = None; "
+                "import src.fund_scheduler, src.fund_sync; "
+                "assert 'src.fund_downloader' not in sys.modules")
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        subprocess.run([sys.executable, '-c', code], cwd=root, check=True)
+
+    def test_download_many(self, server, tmp_path):
+        """并发流式下载，空文件与失败请求不留下文件"""
+        jobs = [(f'{server.url}{name}', str(tmp_path / 'out' / os.path.basename(name)))
+                for name in list(FILES) + ['/pdf/missing.pdf']]
+        sizes = download_all(jobs, concurrency=2, chunk_size=1024)
+        assert sizes[str(tmp_path / 'out' / 'a.pdf')] == len(FILES['/pdf/a.pdf'])
+        assert (tmp_path / 'out' / 'a.pdf').read_bytes() == FILES['/pdf/a.pdf']
+        assert (tmp_path / 'out' / 'b.pdf').read_bytes() == FILES['/pdf/b.pdf']
+        assert sorted(os.listdir(tmp_path / 'out')) == ['a.pdf', 'b.pdf']
+
+    def test_fetch_fund_reports(self, server, tmp_path):
+        """按公告列表下载到基金代码目录"""
+        async def run():
+            async with AsyncDownloader(concurrency=4) as downloader:
+                sizes = await downloader.fetch_fund_reports(
+                    '110011', str(tmp_path), list_url=f'{server.url}/list',
+                    pdf_url=server.url + '/pdf/{}.pdf')
+                return sizes, downloader
+        sizes, downloader = asyncio.run(run())
+        assert len(sizes) == 2
+        assert (tmp_path / '110011' / '年报.pdf').read_bytes() == FILES['/pdf/a.pdf']
+        assert downloader.bytes_downloaded == len(FILES['/pdf/a.pdf']) + len(FILES['/pdf/b.pdf'])
+        assert not downloader.errors
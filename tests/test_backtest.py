@@ -0,0 +1,206 @@
+"""时点回测测试用例"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.backtest import (
+    Backtester,
+    equal_weight,
+    magic_formula_strategy,
+    performance,
+    point_in_time,
+    publication_dates,
+    schloss_strategy,
+    top_by_rank,
+)
+from src.market_replay import SyntheticBackend
+from src.rules import RuleSet
+from src.walter_schloss import SCHLOSS_RULES
+
+
+def make_prices():
+    """两只股票：A 每月上涨 10%，B 不变"""
+    dates = pd.bdate_range('2024-01-01', '2024-12-31')
+    months = np.array([d.month for d in dates]) - 1
+    return pd.DataFrame({'A': 10 * 1.1 ** months, 'B': np.full(len(dates), 10.0)},
+                        index=dates)
+
+
+def make_fundamentals():
+    """A 的 2023 年报（4 月 30 日可见）与 2024 一季报"""
+    return pd.DataFrame({
+        '代码': ['A', 'A', 'B'],
+        '日期': ['2023-12-31', '2024-03-31', '2023-12-31'],
+        '摊薄每股收益(元)': [1.0, 0.5, -1.0],
+        '资产负债率(%)': [30.0, 35.0, 80.0],
+    })
+
+
+class TestPointInTime:
+    """时点财务数据测试类"""
+
+    def test_publication_dates(self):
+        """测试按法定截止日推算公告日期"""
+        dates = publication_dates(pd.Series(['2023-12-31', '2024-03-31', '2024-06-30',
+                                             '2024-09-30']))
+        assert dates.dt.strftime('%Y-%m-%d').tolist() == [
+            '2024-04-30', '2024-04-30', '2024-08-31', '2024-10-31']
+        with pytest.raises(ValueError):
+            publication_dates(pd.Series(['2024-02-15']))
+
+    def test_no_look_ahead(self):
+        """测试公告日之前不可见，同一天公告时取较晚的报告期"""
+        dates = pd.DatetimeIndex(['2024-03-29', '2024-04-30', '2024-05-31'])
+        panel = point_in_time(make_fundamentals(), dates, pd.Index(['A', 'B']),
+                              ['摊薄每股收益(元)'])
+        eps = panel['摊薄每股收益(元)']
+        assert np.isnan(eps[0]).all()
+        assert eps[1].tolist() == [0.5, -1.0]
+        assert panel['报告期季度'][2].tolist() == [1.0, 4.0]
+
+    def test_explicit_publication_date_and_lag(self):
+        """测试使用公告日期列与额外延迟"""
+        frame = make_fundamentals().assign(公告日期=['2024-03-20', '2024-04-25', '2024-03-01'])
+        dates = pd.DatetimeIndex(['2024-03-29'])
+        eps = point_in_time(frame, dates, pd.Index(['A', 'B']), ['摊薄每股收益(元)'])
+        assert eps['摊薄每股收益(元)'][0].tolist() == [1.0, -1.0]
+        lagged = point_in_time(frame, dates, pd.Index(['A', 'B']), ['摊薄每股收益(元)'],
+                               lag_days=10)
+        assert lagged['摊薄每股收益(元)'][0].tolist()[1] == -1.0
+        assert np.isnan(lagged['摊薄每股收益(元)'][0][0])
+
+    def test_whole_report_carried_forward(self):
+        """测试最新一期缺少某列时为缺失值，而不是混入上一期的值"""
+        frame = make_fundamentals()
+        frame.loc[1, '摊薄每股收益(元)'] = np.nan
+        panel = point_in_time(frame, pd.DatetimeIndex(['2024-05-31']), pd.Index(['A', 'B']),
+                              ['摊薄每股收益(元)', '资产负债率(%)'])
+        assert np.isnan(panel['摊薄每股收益(元)'][0][0])
+        assert panel['资产负债率(%)'][0].tolist() == [35.0, 80.0]
+        assert panel['报告期季度'][0].tolist() == [1.0, 4.0]
+
+
+class TestBacktester:
+    """回测引擎测试类"""
+
+    def test_rebalance_dates(self):
+        """测试每月最后一个交易日"""
+        dates = Backtester(make_prices(), make_fundamentals()).rebalance_dates()
+        assert len(dates) == 12
+        assert dates[0] == pd.Timestamp('2024-01-31')
+        assert dates[2] == pd.Timestamp('2024-03-29')
+
+    def test_features(self):
+        """测试由价格与时点财务数据计算估值"""
+        bt = Backtester(make_prices(), make_fundamentals(),
+                        shares=pd.Series({'A': 100.0, 'B': 50.0}))
+        panel = bt.features(pd.DatetimeIndex(['2024-03-29', '2024-05-31']))
+        assert np.isnan(panel['市盈率-动态'][0]).all()
+        # 5 月 A 的价格 10 * 1.1^4，一季报每股收益 0.5 年化为 2.0
+        assert panel['市盈率-动态'][1][0] == pytest.approx(10 * 1.1 ** 4 / 2.0)
+        assert panel['市盈率-动态'][1][1] == pytest.approx(-10.0)
+        assert panel['总市值'][1].tolist() == pytest.approx([100 * 10 * 1.1 ** 4, 500.0])
+        assert panel['资产负债率'][1].tolist() == [35.0, 80.0]
+
+    def test_returns_and_costs(self):
+        """测试持有期收益、换手率与交易成本"""
+        def hold_a(panel):
+            weights = np.zeros(panel.shape)
+            weights[:, 0] = 1.0
+            return weights
+
+        bt = Backtester(make_prices(), make_fundamentals(), cost_bps=100)
+        result = bt.run(hold_a)
+        assert len(result.returns) == 11
+        assert result.returns.iloc[0] == pytest.approx(0.1 - 0.01)
+        assert result.returns.iloc[1:].tolist() == pytest.approx([0.1] * 10)
+        assert result.benchmark.iloc[0] == pytest.approx(0.05)
+        assert result.turnover.iloc[0] == 0.5 and result.turnover.iloc[1] == 0.0
+        assert result.positions('2024-06-28').to_dict() == {'A': 1.0}
+        stats = result.stats()
+        assert stats['max_drawdown'] == 0.0
+        assert stats['avg_holdings'] == 1.0
+
+    def test_untradable_weights_dropped(self):
+        """测试调仓日没有价格的股票不持有"""
+        prices = make_prices()
+        prices.loc[:'2024-02-29', 'B'] = np.nan
+        bt = Backtester(prices, make_fundamentals())
+        result = bt.run(lambda panel: np.full(panel.shape, 0.5))
+        assert result.weights[0].tolist() == [0.5, 0.0]
+        assert result.holdings.iloc[-1] == 2
+
+    def test_suspended_and_delisted_positions_held(self):
+        """测试调仓日停牌或退市的持仓无法卖出，沿用上期权重，复牌后计入涨跌"""
+        prices = make_prices()
+        prices.loc['2024-03-20':'2024-04-10', 'A'] = np.nan
+        prices.loc['2024-11-15':, 'A'] = np.nan
+
+        def switch_to_b(panel):
+            weights = np.full(panel.shape, 0.5)
+            weights[2:4] = [0.0, 1.0]
+            return weights
+
+        result = Backtester(prices, make_fundamentals()).run(switch_to_b)
+        assert result.weights[1:5].tolist() == [[0.5, 0.5], [0.5, 0.5], [0.0, 1.0],
+                                                [0.5, 0.5]]
+        assert result.turnover.iloc[2] == 0.0
+        # 3 月末 A 停牌按 3 月 19 日收盘价计值，4 月的上涨计入 3 月末到 4 月末的持有期
+        assert result.returns.iloc[1:3].tolist() == pytest.approx([0.05, 0.05])
+        assert result.weights[-1].tolist() == [0.5, 0.5]
+        assert result.returns.iloc[-1] == 0.0
+
+    def test_magic_formula_applies_prefilter(self):
+        """测试神奇公式回测与选股器一样先按市值预筛选"""
+        fundamentals = pd.DataFrame({
+            '代码': ['A', 'B'],
+            '日期': ['2023-12-31', '2023-12-31'],
+            '摊薄每股收益(元)': [1.0, 0.5],
+            '净资产收益率(%)': [30.0, 10.0],
+        })
+        # A 排名更靠前，但市值只有约 15 亿
+        bt = Backtester(make_prices(), fundamentals,
+                        shares=pd.Series({'A': 1e8, 'B': 1e9}))
+        panel = bt.features(pd.DatetimeIndex(['2024-05-31']))
+        assert magic_formula_strategy(top=1)(panel).tolist() == [[0.0, 1.0]]
+        no_prefilter = magic_formula_strategy(top=1, prefilter=RuleSet([]))
+        assert no_prefilter(panel).tolist() == [[1.0, 0.0]]
+
+    def test_vectorized_screen_matches_per_date(self):
+        """测试全部调仓日一次筛选的结果与逐日筛选一致"""
+        backend = SyntheticBackend(n_stocks=90, n_days=600, seed=3, n_quarters=12)
+        prices = pd.DataFrame(backend.close, index=backend.dates, columns=backend.codes)
+        fundamentals = pd.concat([backend.financial(code, '1990').assign(代码=code)
+                                  for code in backend.codes], ignore_index=True)
+        bt = Backtester(prices, fundamentals)
+        panel = bt.features(bt.rebalance_dates())
+        mask = panel.screen(SCHLOSS_RULES)
+        for row in range(len(panel.dates)):
+            frame = pd.DataFrame({name: values[row] for name, values in panel.arrays.items()})
+            assert (SCHLOSS_RULES.evaluate(frame).mask & panel.tradable[row]).tolist() \
+                == mask[row].tolist()
+        assert mask.any()
+
+        summary = bt.run_many({'magic': magic_formula_strategy(top=10),
+                               'schloss': schloss_strategy()})
+        assert summary.index.tolist() == ['magic', 'schloss']
+        assert summary.loc['magic', 'avg_holdings'] <= 10
+
+
+class TestHelpers:
+    """辅助函数测试类"""
+
+    def test_equal_weight_and_top(self):
+        """测试等权与按名次选股"""
+        weights = equal_weight(np.array([[True, True, False], [False, False, False]]))
+        assert weights.tolist() == [[0.5, 0.5, 0.0], [0.0, 0.0, 0.0]]
+        top = top_by_rank(np.array([[3.0, 1.0, np.nan, 2.0]]), 2)
+        assert top.tolist() == [[False, True, False, True]]
+
+    def test_performance(self):
+        """测试绩效指标"""
+        stats = performance(pd.Series([0.1, -0.5, 0.2]), 12)
+        assert stats['total_return'] == pytest.approx(1.1 * 0.5 * 1.2 - 1)
+        assert stats['max_drawdown'] == pytest.approx(0.5)
+        assert performance(pd.Series([], dtype=float), 12)['total_return'] == 0.0
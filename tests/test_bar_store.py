@@ -0,0 +1,97 @@
+"""本地日线存储测试用例"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.bar_store import BarStore
+
+CALENDAR = pd.bdate_range('2024-01-01', '2024-12-31')
+
+
+class DailyStub:
+    """ak.stock_zh_a_daily 的替身，记录请求区间，可模拟除权后复权价格调整"""
+
+    def __init__(self):
+        self.calls = []
+        self.factor = 1.0
+
+    def __call__(self, symbol, start_date, end_date, adjust):
+        self.calls.append((symbol, start_date, end_date))
+        dates = CALENDAR[(CALENDAR >= pd.Timestamp(start_date))
+                         & (CALENDAR <= pd.Timestamp(end_date))]
+        base = np.arange(len(CALENDAR), dtype=float)[CALENDAR.isin(dates)] + 10
+        close = base * self.factor
+        return pd.DataFrame({
+            'date': [d.date() for d in dates],
+            'open': close, 'high': close + 1, 'low': close - 1, 'close': close,
+            'volume': np.full(len(dates), 1000.0),
+        })
+
+
+class TestBarStore:
+    """本地日线存储测试类"""
+
+    def setup_method(self):
+        """初始化测试环境"""
+        self.stub = DailyStub()
+
+    def make_store(self, root, fmt='feather'):
+        """创建存储"""
+        return BarStore(str(root), fetch_func=self.stub, start_date='20240101', fmt=fmt)
+
+    def test_first_update_fetches_full_history(self, tmp_path):
+        """测试首次更新获取全部历史并记录最后日期"""
+        store = self.make_store(tmp_path)
+        bars = store.update('sz000001', end_date='20240131')
+        assert self.stub.calls == [('sz000001', '20240101', '20240131')]
+        assert len(bars) == 23
+        assert store.last_date('sz000001') == '2024-01-31'
+
+    @pytest.mark.parametrize('fmt', ['feather', 'parquet', 'pickle'])
+    def test_incremental_append(self, tmp_path, fmt):
+        """测试再次更新只请求尾部数据"""
+        store = self.make_store(tmp_path, fmt)
+        store.update('sz000001', end_date='20240131')
+        store.save_index()
+        store = self.make_store(tmp_path, fmt)
+        bars = store.update('sz000001', end_date='20240209')
+        assert self.stub.calls[-1] == ('sz000001', '20240125', '20240209')
+        assert len(bars) == 30
+        assert bars['date'].is_monotonic_increasing and bars['date'].is_unique
+        pd.testing.assert_frame_equal(bars, store.load('sz000001'))
+        assert store.last_date('sz000001') == '2024-02-09'
+        assert not store.restatements
+
+    def test_up_to_date_skips_request(self, tmp_path):
+        """测试已是最新时不再请求"""
+        store = self.make_store(tmp_path)
+        store.update('sz000001', end_date='20240131')
+        store.update('sz000001', end_date='20240131')
+        assert len(self.stub.calls) == 1
+
+    def test_restatement_refetches_history(self, tmp_path):
+        """测试复权价格调整后重新获取全部历史"""
+        store = self.make_store(tmp_path)
+        store.update('sz000001', end_date='20240131')
+        self.stub.factor = 0.9
+        bars = store.update('sz000001', end_date='20240209')
+        assert store.restatements == ['sz000001']
+        assert self.stub.calls[-1] == ('sz000001', '20240101', '20240209')
+        assert bars['close'].iloc[0] == pytest.approx(9.0)
+        assert len(bars) == 30
+
+    def test_load_panel_projection(self, tmp_path):
+        """测试拼接收盘价面板"""
+        store = self.make_store(tmp_path)
+        store.update_many(['sz000001', 'sh600000'], end_date='20240131')
+        store.update('sh600000', end_date='20240209')
+        panel = store.load_panel(['sz000001', 'sh600000', 'sz999999'], start='2024-01-15')
+        assert list(panel.columns) == ['sz000001', 'sh600000']
+        assert panel.index[0] == pd.Timestamp('2024-01-15')
+        assert panel['sz000001'].isna().sum() == 7
+        assert list(store.load('sz000001', columns=['close']).columns) == ['date', 'close']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,109 @@
+"""紧凑内存快照测试用例"""
+
+import numpy as np
+import pandas as pd
+
+from src.compact_snapshot import (
+    CompactSnapshots,
+    compact_frame,
+    fits_float32,
+    memory_report,
+    strategy_columns,
+)
+from src.magic_formula import MagicFormulaScreener
+from src.snapshot_store import SnapshotStore
+from src.walter_schloss import SCHLOSS_RULES, SchlossStockScreening
+
+
+def make_snapshot(codes, seed=0):
+    """含无关列的合并快照"""
+    rng = np.random.default_rng(seed)
+    n = len(codes)
+    return pd.DataFrame({
+        '代码': codes,
+        '名称': [f'股票{code}' for code in codes],
+        '行业': rng.choice(['银行', '医药'], n),
+        '最新价': rng.uniform(1, 100, n).round(2),
+        '市盈率-动态': rng.uniform(-20, 60, n),
+        '市净率': rng.uniform(0.2, 5, n),
+        '资产负债率': rng.uniform(0, 100, n),
+        '净利润同比增长率': rng.normal(0, 30, n),
+        '总市值': rng.uniform(1e8, 1e12, n),
+        '成交量': rng.integers(0, 100, n),
+        '无关指标': rng.normal(size=n),
+    })
+
+
+class TestCompactFrame:
+    """单个快照压缩测试类"""
+
+    def test_strategy_columns(self):
+        """测试多个策略声明列的并集"""
+        columns = strategy_columns(SchlossStockScreening, MagicFormulaScreener, ['成交量'])
+        assert columns[:3] == ['代码', '名称', '行业']
+        assert '净资产收益率' in columns and columns[-1] == '成交量'
+        assert len(columns) == len(set(columns))
+        assert strategy_columns(SCHLOSS_RULES)[0] == '市盈率-动态'
+
+    def test_fits_float32(self):
+        """测试 float32 精度判断"""
+        assert fits_float32(np.array([1.5, 1e10, np.nan, np.inf]))
+        assert fits_float32(np.array([2.0 ** 24 + 1]))
+        assert not fits_float32(np.array([2.0 ** 24 + 1]), rtol=1e-9)
+        assert not fits_float32(np.array([1e39]))
+
+    def test_dtypes_and_values(self):
+        """测试只保留声明的列并压缩类型，数值误差在允许范围内"""
+        frame = make_snapshot([f'{i:06d}' for i in range(100)])
+        frame['市净率'] = frame['市净率'].astype(object)
+        frame.loc[0, '市净率'] = '--'
+        columns = strategy_columns(SchlossStockScreening, ['成交量'])
+        compact = compact_frame(frame, columns)
+        assert '无关指标' not in compact.columns
+        assert compact['代码'].dtype == 'category'
+        assert compact['最新价'].dtype == np.float32
+        assert compact['成交量'].dtype == np.int8
+        assert np.isnan(compact['市净率'].iloc[0])
+        np.testing.assert_allclose(compact['总市值'], frame['总市值'], rtol=1e-6)
+        assert compact['代码'].astype(str).tolist() == frame['代码'].tolist()
+        report = memory_report(compact)
+        assert report.loc['合计', 'bytes'] < memory_report(frame).loc['合计', 'bytes'] / 2
+
+    def test_rules_unchanged(self):
+        """测试压缩后施洛斯规则的筛选结果不变"""
+        frame = make_snapshot([f'{i:06d}' for i in range(2000)], seed=1)
+        compact = compact_frame(frame, SchlossStockScreening.SNAPSHOT_COLUMNS)
+        assert (SCHLOSS_RULES.evaluate(compact).mask.tolist()
+                == SCHLOSS_RULES.evaluate(frame).mask.tolist())
+
+
+class TestCompactSnapshots:
+    """多日期紧凑快照测试类"""
+
+    def test_shared_categories(self):
+        """测试各日期共用类别字典，新增取值后已加载的快照不变"""
+        snapshots = CompactSnapshots(SchlossStockScreening.SNAPSHOT_COLUMNS)
+        snapshots.add('2025-01-02', make_snapshot(['000001', '000002']))
+        snapshots.add('2025-01-03', make_snapshot(['000002', '000003', '600000'], seed=1))
+        first, second = snapshots.frame('2025-01-02'), snapshots.frame()
+        assert first['代码'].dtype is second['代码'].dtype
+        assert first['代码'].astype(str).tolist() == ['000001', '000002']
+        assert second['代码'].cat.codes.tolist() == [1, 2, 3]
+        memory = snapshots.memory()
+        assert memory['rows'] == 5 and memory['snapshots'] == 2
+        assert memory['total_bytes'] == memory['data_bytes'] + memory['dictionary_bytes']
+        assert '2 个日期' in snapshots.report()
+
+        panel = snapshots.panel('最新价')
+        assert panel.shape == (2, 4)
+        assert np.isnan(panel.loc['2025-01-02', '600000'])
+
+    def test_load_from_store(self, tmp_path):
+        """测试从快照存储只读取策略列"""
+        store = SnapshotStore(str(tmp_path))
+        for day, seed in (('2025-01-02', 0), ('2025-01-03', 1)):
+            store.save('stocks', make_snapshot(['000001', '000002'], seed), date=day)
+        snapshots = CompactSnapshots(strategy_columns(MagicFormulaScreener))
+        assert snapshots.load(store, 'stocks') == ['2025-01-02', '2025-01-03']
+        assert '资产负债率' not in snapshots.frame().columns
+        assert snapshots.frame()['市盈率-动态'].dtype == np.float32
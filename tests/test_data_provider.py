@@ -0,0 +1,177 @@
+"""统一数据提供层测试用例"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.data_provider import (
+    DataProvider,
+    FixtureBackend,
+    SnapshotBackend,
+    filter_tradable,
+    get_provider,
+    set_provider,
+)
+from src.magic_formula import MagicFormulaScreener
+from src.snapshot_store import SnapshotStore
+from src.symbol_cache import SymbolCache
+from src.walter_schloss import SchlossStockScreening
+
+SPOT = pd.DataFrame({
+    '代码': ['000001', '000002', '000003', '600000'],
+    '名称': ['平安银行', '*ST某某', '某某退', '浦发银行'],
+    '最新价': [10.0, 2.0, 1.0, 8.0],
+    '总市值': [2e11, 1e9, 1e8, 2e11],
+    '市盈率-动态': [5.0, -1.0, -1.0, 6.0],
+    '市净率': [0.6, 3.0, 1.0, 0.5],
+})
+
+
+def financial_frame(code):
+    """两期财务指标"""
+    return pd.DataFrame({'日期': ['2024-12-31', '2025-03-31'],
+                         '资产负债率(%)': [40.0, float(code[-1])],
+                         '净资产收益率(%)': [10.0, 12.0]})
+
+
+class SlowBackend(FixtureBackend):
+    """请求耗时较长的后端，用于验证并发请求合并"""
+
+    def spot(self):
+        time.sleep(0.05)
+        return super().spot()
+
+    def daily(self, symbol, start_date, end_date, adjust):
+        time.sleep(0.05)
+        return super().daily(symbol, start_date, end_date, adjust)
+
+
+def make_bars():
+    """一只股票的日线"""
+    dates = pd.bdate_range('2024-01-01', periods=30)
+    close = [float(i) for i in range(30)]
+    return pd.DataFrame({'date': dates, 'open': close, 'high': close,
+                         'low': close, 'close': close, 'volume': close})
+
+
+class TestDataProvider:
+    """数据提供者测试类"""
+
+    def make_provider(self, backend=None):
+        """创建使用内存缓存的提供者"""
+        backend = backend or FixtureBackend(
+            SPOT, {code: financial_frame(code) for code in SPOT['代码']},
+            {'sz000001': make_bars()})
+        return DataProvider(backend, cache=SymbolCache())
+
+    def test_filter_tradable(self):
+        """测试去掉ST与退市股票"""
+        assert filter_tradable(SPOT)['代码'].tolist() == ['000001', '600000']
+
+    def test_default_cache_in_memory_for_offline_backends(self):
+        """测试非 akshare 后端默认使用内存缓存，不读写持久化文件"""
+        provider = DataProvider(FixtureBackend(SPOT))
+        assert provider.cache.path is None and len(provider.cache) == 0
+
+    def test_spot_reused_across_strategies(self):
+        """测试多个策略共用提供者时行情快照只请求一次"""
+        provider = self.make_provider()
+        schloss = SchlossStockScreening(provider=provider)
+        magic = MagicFormulaScreener(provider=provider)
+        assert schloss.cache is magic.cache is provider.cache
+        assert schloss.provider.tradable_spot()['代码'].tolist() == ['000001', '600000']
+        magic.provider.tradable_spot()
+        assert provider.backend.calls['spot'] == 1
+        provider.spot(refresh=True)
+        assert provider.backend.calls['spot'] == 2
+
+    def test_concurrent_spot_coalesced(self):
+        """测试并发请求行情快照时只发起一次请求"""
+        provider = self.make_provider(SlowBackend(SPOT))
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(provider.spot()))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert provider.backend.calls['spot'] == 1
+        assert len(results) == 8
+        assert provider.stats['spot_requests'] == 1
+
+    def test_concurrent_daily_coalesced(self):
+        """测试同参数的并发日线请求合并"""
+        provider = self.make_provider(SlowBackend(bars={'sz000001': make_bars()}))
+        threads = [threading.Thread(
+            target=provider.daily, args=('sz000001', '20240101', '20240131'))
+            for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert provider.backend.calls['daily'] == 1
+
+    def test_daily_lru(self):
+        """测试日线结果在进程内复用，超过上限后淘汰最早的请求"""
+        provider = self.make_provider()
+        provider.max_bars = 2
+        first = provider.daily('sz000001', '20240101', '20240110')
+        first['close'] = -1.0
+        again = provider.daily('sz000001', '20240101', '20240110')
+        assert provider.backend.calls['daily'] == 1
+        assert (again['close'] >= 0).all()
+        provider.daily('sz000001', '20240101', '20240115')
+        provider.daily('sz000001', '20240101', '20240120')
+        provider.daily('sz000001', '20240101', '20240110')
+        assert provider.backend.calls['daily'] == 4
+
+    def test_bar_store_fetches_through_provider(self, tmp_path):
+        """测试本地日线存储通过提供者获取数据"""
+        provider = self.make_provider()
+        store = provider.bar_store(str(tmp_path / 'bars'), start_date='20240101')
+        bars = store.update('sz000001', end_date='20240131')
+        assert len(bars) > 0
+        assert provider.stats['daily_requests'] == 1
+
+    def test_financial_table_uses_cache(self):
+        """测试财务指标只取最新一期，已缓存的股票不再请求"""
+        provider = self.make_provider()
+        table = provider.financial_table(['000001', '600000'], start_year='2025',
+                                         max_workers=2, rate=1000)
+        assert table['资产负债率(%)'].tolist() == [1.0, 0.0]
+        provider.financial_table(['000001', '600000', '000002'], start_year='2025',
+                                 max_workers=2, rate=1000)
+        assert provider.backend.calls['financial'] == 3
+
+    def test_snapshot_backend(self, tmp_path):
+        """测试从本地快照读取行情与财务数据"""
+        store = SnapshotStore(str(tmp_path / 'snapshots'))
+        store.save('spot', SPOT)
+        financial = pd.concat([financial_frame(code).assign(代码=code)
+                               for code in ['000001', '600000']], ignore_index=True)
+        store.save('financial', financial)
+        provider = DataProvider(SnapshotBackend(store), cache=SymbolCache())
+        assert provider.spot()['代码'].tolist() == SPOT['代码'].tolist()
+        table = provider.financial_table(['000001', '600000', '000002'], start_year='2025',
+                                         rate=1000)
+        assert table['代码'].tolist() == ['000001', '600000']
+        assert provider.daily('sz000001', '20240101', '20240131').empty
+
+    def test_snapshot_backend_missing(self, tmp_path):
+        """测试没有快照时报错"""
+        provider = DataProvider(SnapshotBackend(SnapshotStore(str(tmp_path))),
+                                cache=SymbolCache())
+        with pytest.raises(KeyError):
+            provider.spot()
+
+    def test_default_provider(self):
+        """测试替换与恢复默认提供者"""
+        provider = self.make_provider()
+        set_provider(provider)
+        try:
+            assert get_provider() is provider
+            assert SchlossStockScreening().provider is provider
+        finally:
+            set_provider(None)
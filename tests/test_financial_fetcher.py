@@ -0,0 +1,213 @@
+"""并发财务数据获取器测试用例"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.financial_fetcher import FinancialFetcher, LatestRowAccumulator, TokenBucket
+from src.symbol_cache import SymbolCache
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        """模拟 sleep，直接推进时间"""
+        self.now += seconds
+
+
+def make_stub(latency=0.0, fail_times=None):
+    """构造带延迟的 stock_financial_analysis_indicator 替身"""
+    fail_times = dict(fail_times or {})
+    lock = threading.Lock()
+    state = {'active': 0, 'peak': 0, 'calls': 0}
+
+    def stub(symbol, start_year):
+        with lock:
+            state['active'] += 1
+            state['calls'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            remaining = fail_times.get(symbol, 0)
+            if remaining:
+                fail_times[symbol] = remaining - 1
+        try:
+            if latency:
+                time.sleep(latency)
+            if remaining:
+                raise ConnectionError("模拟网络错误")
+            if symbol.endswith('9'):
+                return pd.DataFrame()
+            return pd.DataFrame({
+                '日期': [f'{start_year}-03-31', f'{start_year}-06-30'],
+                '资产负债率(%)': [40.0, int(symbol) % 100],
+            })
+        finally:
+            with lock:
+                state['active'] -= 1
+
+    return stub, state
+
+
+class TestTokenBucket:
+    """令牌桶测试类"""
+
+    def test_burst_then_wait(self):
+        """测试容量耗尽后按速率等待"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2.0, capacity=2, clock=clock, sleep=clock.sleep)
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == pytest.approx(0.5)
+        assert bucket.acquire() == pytest.approx(0.5)
+
+    def test_refill(self):
+        """测试空闲期间补充令牌"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=1.0, capacity=1, clock=clock, sleep=clock.sleep)
+        bucket.acquire()
+        clock.now += 5
+        assert bucket.reserve() == 0
+
+    def test_invalid_rate(self):
+        """测试非法速率"""
+        with pytest.raises(ValueError):
+            TokenBucket(rate=0)
+
+
+class TestLatestRowAccumulator:
+    """最新一期数据收集器测试类"""
+
+    def test_matches_concat(self):
+        """测试结果与逐次 concat 最后一行一致"""
+        frames = {
+            '000001': pd.DataFrame({'日期': ['2024-06-30', '2024-09-30'], 'ROE': [1.0, 2.0]}),
+            '000002': pd.DataFrame(),
+            '000003': pd.DataFrame({'日期': ['2024-09-30'], 'ROE': [3.0], '额外': ['x']}),
+        }
+        accumulator = LatestRowAccumulator()
+        expected = pd.DataFrame()
+        for code, frame in frames.items():
+            accumulator.add(code, frame)
+            if not frame.empty:
+                latest = frame.iloc[[-1]].copy()
+                latest['代码'] = code
+                expected = pd.concat([expected, latest])
+        result = accumulator.build()
+        pd.testing.assert_frame_equal(
+            result, expected.reset_index(drop=True)[result.columns], check_dtype=False
+        )
+        assert len(accumulator) == 2
+        assert '000002' not in accumulator
+
+    def test_dtypes_match_concat(self):
+        """测试各列 dtype 与逐次 concat 的结果一致，整数列不转为浮点"""
+        published = pd.to_datetime(['2024-07-01', '2024-10-01'])
+        frames = {
+            '000001': pd.DataFrame({'日期': ['2024-06-30', '2024-09-30'], '股本': [10, 2 ** 60],
+                                    'ROE': [1.0, 2.0], '公告': published}),
+            '000002': pd.DataFrame({'日期': ['2024-09-30'], '股本': [30], 'ROE': [3.0],
+                                    '公告': published[1:]}),
+        }
+        expected = pd.DataFrame()
+        accumulator = LatestRowAccumulator()
+        for code, frame in frames.items():
+            accumulator.add(code, frame)
+            latest = frame.iloc[[-1]].copy()
+            latest['代码'] = code
+            expected = pd.concat([expected, latest])
+        pd.testing.assert_frame_equal(accumulator.build(), expected.reset_index(drop=True))
+
+        frames['000003'] = pd.DataFrame({'日期': ['2024-09-30'], '股本': [1.5], 'ROE': [4.0],
+                                         '公告': published[1:]})
+        accumulator.add('000003', frames['000003'])
+        latest = frames['000003'].assign(代码='000003')
+        expected = pd.concat([expected, latest]).reset_index(drop=True)
+        pd.testing.assert_frame_equal(accumulator.build(), expected)
+
+    def test_build_order_and_empty(self):
+        """测试指定顺序构建与空结果"""
+        assert LatestRowAccumulator().build().empty
+        accumulator = LatestRowAccumulator()
+        accumulator.add_row('000002', {'ROE': 2.0})
+        accumulator.add_row('000001', {'ROE': 1.0})
+        result = accumulator.build(order=['000001', '000002', '000003'])
+        assert result['代码'].tolist() == ['000001', '000002']
+
+    def test_non_numeric_value_in_numeric_column(self):
+        """测试数值列中出现非数值时保持原值"""
+        accumulator = LatestRowAccumulator()
+        accumulator.add_row('000001', {'ROE': 1.5})
+        accumulator.add_row('000002', {'ROE': '--'})
+        accumulator.add_row('000003', {'ROE': 3.0})
+        result = accumulator.build()
+        assert result['代码'].tolist() == ['000001', '000002', '000003']
+        assert result['ROE'].tolist() == [1.5, '--', 3.0]
+
+
+class TestFinancialFetcher:
+    """财务数据获取器测试类"""
+
+    codes = [f'{i:06d}' for i in range(1, 21)]
+
+    def test_concurrent_matches_sequential(self):
+        """测试并发获取结果与顺序获取一致"""
+        stub, _ = make_stub()
+        sequential = FinancialFetcher(stub, max_workers=1, rate=1000).fetch(self.codes)
+        concurrent = FinancialFetcher(stub, max_workers=8, rate=1000).fetch(self.codes)
+        pd.testing.assert_frame_equal(sequential, concurrent)
+        assert '000009' not in sequential['代码'].tolist()
+        assert len(sequential) == 18
+
+    def test_concurrency_bounded_and_faster(self):
+        """测试并发数受限且带延迟时明显快于顺序获取"""
+        stub, state = make_stub(latency=0.05)
+        start = time.perf_counter()
+        FinancialFetcher(stub, max_workers=4, rate=1000).fetch(self.codes)
+        elapsed = time.perf_counter() - start
+        assert state['peak'] <= 4
+        assert elapsed < 0.05 * len(self.codes) / 2
+
+    def test_retry_with_backoff(self):
+        """测试失败后退避重试"""
+        stub, state = make_stub(fail_times={'000001': 2})
+        waits = []
+        fetcher = FinancialFetcher(stub, max_workers=1, rate=1000, retries=2, backoff=0.1,
+                                   sleep=waits.append)
+        result = fetcher.fetch(['000001'])
+        assert len(result) == 1
+        assert state['calls'] == 3
+        assert [w for w in waits if w >= 0.1] == [0.1, 0.2]
+
+    def test_retry_exhausted(self):
+        """测试重试耗尽后跳过该股票"""
+        stub, _ = make_stub(fail_times={'000001': 5})
+        fetcher = FinancialFetcher(stub, max_workers=2, rate=1000, retries=1, backoff=0,
+                                   sleep=lambda _: None)
+        result = fetcher.fetch(['000001', '000002'])
+        assert result['代码'].tolist() == ['000002']
+        assert '000001' in fetcher.errors
+
+    def test_stream_with_budget(self):
+        """测试流式获取：缓存命中先产出，请求数不超过预算"""
+        stub, state = make_stub()
+        cache = SymbolCache()
+        cache.put('financial', '000005', {'日期': '2024-06-30', '资产负债率(%)': 1.0})
+        fetcher = FinancialFetcher(stub, max_workers=2, rate=1000, cache=cache)
+        rows = list(fetcher.stream(self.codes[:10], budget=3))
+        assert rows[0] == ('000005', {'日期': '2024-06-30', '资产负债率(%)': 1.0})
+        assert sorted(code for code, _ in rows[1:]) == ['000001', '000002', '000003']
+        assert state['calls'] == 3
+        assert fetcher.skipped == ['000004', '000006', '000007', '000008', '000009', '000010']
+        assert cache.get('financial', '000002')['资产负债率(%)'] == 2
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
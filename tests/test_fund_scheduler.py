@@ -0,0 +1,85 @@
+"""多基金下载调度测试用例"""
+
+import json
+import time
+
+import pytest
+
+from src.fund_scheduler import FundScheduler, SchedulerStats
+
+pytest.importorskip('aiohttp')
+
+FUNDS = {
+    '000001': [{'ID': '11', 'TITLE': '年报'}, {'ID': '12', 'TITLE': '季报'}],
+    '000002': [{'ID': '21', 'TITLE': '年报'}],
+    '000003': [],
+}
+
+
+def list_reports(name, params):
+    """公告列表按基金代码返回，未知基金返回 500"""
+    if params['fundcode'] not in FUNDS:
+        return 500
+    return json.dumps({'Data': FUNDS[params['fundcode']]}).encode()
+
+
+@pytest.fixture(name='server')
+def fixture_server(http_server):
+    """启动本地 HTTP 服务，PDF 内容为 ID 重复若干次"""
+    return http_server({'/list': list_reports,
+                        '/pdf/{}': lambda name, params: name.encode() * 1000})
+
+
+def make_scheduler(server, root, rates=None):
+    """指向本地服务的调度器"""
+    return FundScheduler(str(root), workers=4, rates=rates or {}, progress_every=0,
+                         list_url=f'{server.url}/list', pdf_url=server.url + '/pdf/{}')
+
+
+class TestFundScheduler:
+    """调度器测试类"""
+
+    def test_download_all_funds(self, server, tmp_path):
+        """全部基金列出并下载，重复运行时全部跳过"""
+        scheduler = make_scheduler(server, tmp_path)
+        summary = scheduler.run(list(FUNDS) + ['000001'])
+        assert summary['000001'] == {'listed': 2, 'skipped': 0, 'downloaded': 2, 'failed': 0}
+        assert summary['000003']['listed'] == 0
+        assert (tmp_path / '000002' / '年报.pdf').read_bytes() == b'21' * 1000
+        stats = scheduler.stats.snapshot()
+        assert stats['funds_done'] == 3 and stats['files_done'] == 3
+        assert stats['bytes'] == 6000
+
+        server.requests.clear()
+        summary = make_scheduler(server, tmp_path).run(FUNDS)
+        assert summary['000001']['skipped'] == 2
+        assert server.paths == ['/list'] * 3
+
+    def test_list_failure(self, server, tmp_path):
+        """列表请求失败的基金单独计数，不影响其他基金"""
+        scheduler = make_scheduler(server, tmp_path)
+        summary = scheduler.run(['999999', '000002'])
+        assert scheduler.stats.funds_failed == 1
+        assert summary['000002']['downloaded'] == 1
+
+    def test_rate_limit(self, server, tmp_path):
+        """按域名限速：4 个请求、每秒 20 个至少需要约 0.15 秒"""
+        start = time.perf_counter()
+        make_scheduler(server, tmp_path, rates={'127.0.0.1': 20}).run(['000001', '000002'])
+        assert time.perf_counter() - start >= 0.14
+        assert len(server.paths) == 5
+
+
+class TestSchedulerStats:
+    """统计测试类"""
+
+    def test_throughput(self):
+        """吞吐按耗时计算"""
+        now = [0.0]
+        stats = SchedulerStats(2, clock=lambda: now[0])
+        stats.files_done, stats.bytes = 10, 2 ** 21
+        now[0] = 2.0
+        snapshot = stats.snapshot()
+        assert snapshot['files_per_sec'] == 5
+        assert snapshot['mb_per_sec'] == 1
+        assert '基金 0/2' in stats.format()
@@ -0,0 +1,119 @@
+"""基金报告增量同步测试用例"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from src.async_downloader import AsyncDownloader
+from src.fund_sync import (
+    MANIFEST_FILE,
+    Manifest,
+    plan_reports,
+    report_filenames,
+    safe_filename,
+    sync_fund,
+)
+
+pytest.importorskip('aiohttp')
+
+FILES = {'1': b'A' * 300000, '2': b'B' * 1000}
+REPORTS = {'Data': [{'ID': '1', 'TITLE': '2024年报'}, {'ID': '2', 'TITLE': '一季报/更正'}]}
+
+
+@pytest.fixture(name='server')
+def fixture_server(http_server):
+    """启动支持 Range 的本地 HTTP 服务"""
+    return http_server({'/list': json.dumps(REPORTS).encode(),
+                        '/pdf/{}': lambda name, params: FILES.get(name)})
+
+
+def run_sync(server, root, verify=False):
+    """同步基金 000001"""
+    async def run():
+        async with AsyncDownloader(concurrency=2) as downloader:
+            return await sync_fund(downloader, '000001', str(root), verify,
+                                   list_url=f'{server.url}/list',
+                                   pdf_url=server.url + '/pdf/{}')
+    return asyncio.run(run())
+
+
+def pdf_requests(server):
+    """下载请求（不含列表请求）"""
+    return [req for req in server.requests if req[0].startswith('/pdf/')]
+
+
+class TestFundSync:
+    """增量同步测试类"""
+
+    def test_skip_existing(self, server, tmp_path):
+        """第二次同步不再下载"""
+        assert run_sync(server, tmp_path)['downloaded'] == 2
+        directory = tmp_path / '000001'
+        assert (directory / '2024年报.pdf').read_bytes() == FILES['1']
+        assert (directory / '一季报_更正.pdf').read_bytes() == FILES['2']
+        manifest = Manifest(str(directory))
+        assert manifest.reports['1']['size'] == len(FILES['1'])
+
+        server.requests.clear()
+        stats = run_sync(server, tmp_path)
+        assert stats == {'listed': 2, 'skipped': 2, 'downloaded': 0, 'failed': 0}
+        assert not pdf_requests(server)
+
+    def test_missing_or_corrupt_redownloaded(self, server, tmp_path):
+        """文件缺失时重新下载，同样大小但内容损坏时由 verify 发现"""
+        run_sync(server, tmp_path)
+        directory = tmp_path / '000001'
+        os.remove(directory / '一季报_更正.pdf')
+        (directory / '2024年报.pdf').write_bytes(b'X' * len(FILES['1']))
+        assert run_sync(server, tmp_path)['downloaded'] == 1
+        assert run_sync(server, tmp_path, verify=True)['downloaded'] == 1
+        assert (directory / '2024年报.pdf').read_bytes() == FILES['1']
+
+    def test_resume_partial(self, server, tmp_path):
+        """存在 .part 文件时只请求剩余部分"""
+        directory = tmp_path / '000001'
+        directory.mkdir()
+        (directory / '2024年报.pdf.part').write_bytes(FILES['1'][:100000])
+        run_sync(server, tmp_path)
+        assert ('/pdf/1', 'bytes=100000-') in pdf_requests(server)
+        assert (directory / '2024年报.pdf').read_bytes() == FILES['1']
+        assert not (directory / '2024年报.pdf.part').exists()
+        manifest = json.loads((directory / MANIFEST_FILE).read_text(encoding='utf-8'))
+        assert manifest['reports']['1']['size'] == len(FILES['1'])
+
+    def test_adopt_existing_files(self, server, tmp_path):
+        """已有文件直接纳入清单，不重新下载"""
+        directory = tmp_path / '000001'
+        directory.mkdir()
+        (directory / '2024年报.pdf').write_bytes(FILES['1'])
+        stats = run_sync(server, tmp_path)
+        assert stats['downloaded'] == 1
+        assert [path for path, _ in pdf_requests(server)] == ['/pdf/2']
+
+    def test_duplicate_titles(self, tmp_path):
+        """标题重复的公告各自使用带 ID 的文件名，已有同名文件不会被认领给两个公告"""
+        reports = [{'ID': '5', 'TITLE': '公司公告'}, {'ID': '6', 'TITLE': '公司公告'},
+                   {'ID': '7', 'TITLE': '年报'}]
+        (tmp_path / '公司公告.pdf').write_bytes(b'old')
+        manifest = Manifest(str(tmp_path))
+        assert report_filenames(manifest, reports) == [
+            ('5', '公司公告_5.pdf'), ('6', '公司公告_6.pdf'), ('7', '年报.pdf')]
+        pending, adopted = plan_reports(manifest, reports)
+        assert adopted == 0 and len({name for _, name in pending}) == 3
+
+    def test_filename_owned_by_other_report(self, tmp_path):
+        """清单中已有的公告沿用原文件名，新公告遇到同名文件时加 ID，且不认领该文件"""
+        (tmp_path / '公司公告.pdf').write_bytes(b'old')
+        manifest = Manifest(str(tmp_path))
+        manifest.record('5', '公司公告.pdf', 3, 'x')
+        reports = [{'ID': '6', 'TITLE': '公司公告'}]
+        assert report_filenames(manifest, reports) == [('6', '公司公告_6.pdf')]
+        assert not manifest.adopt('6', '公司公告.pdf')
+        reports.append({'ID': '5', 'TITLE': '公司公告'})
+        assert dict(report_filenames(manifest, reports))['5'] == '公司公告.pdf'
+
+    def test_safe_filename(self):
+        """去掉路径分隔符"""
+        assert safe_filename('a/b\\c ') == 'a_b_c'
@@ -0,0 +1,183 @@
+"""面板技术指标测试用例"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators import (
+    ExponentialAverage,
+    IndicatorEngine,
+    RollingExtreme,
+    RollingMean,
+    WindowSums,
+    atr,
+    contraction_depths,
+    ema,
+    rolling_max,
+    rolling_min,
+    shrinking_contractions,
+    sma,
+    true_range,
+    volume_ratio,
+)
+
+
+def make_panel(n_days=300, n_symbols=6, seed=0):
+    """随机游走价格面板，部分股票上市较晚或停牌"""
+    rng = np.random.default_rng(seed)
+    close = 10 * np.cumprod(1 + rng.normal(0, 0.02, (n_days, n_symbols)), axis=0)
+    close[:40, 0] = np.nan
+    close[100:103, 1] = np.nan
+    high = close * (1 + rng.uniform(0, 0.03, close.shape))
+    low = close * (1 - rng.uniform(0, 0.03, close.shape))
+    volume = rng.uniform(1e5, 1e6, close.shape)
+    return close, high, low, volume
+
+
+def reference_depths(high, low, order, count):
+    """逐日循环的收缩幅度参考实现"""
+    pivots = [t for t in range(len(high) - order)
+              if not np.isnan(high[t])
+              and high[t] > np.nanmax(np.r_[-np.inf, high[max(0, t - order):t]])
+              and high[t] >= np.nanmax(np.r_[-np.inf, high[t + 1:t + order + 1]])]
+    bounds = pivots + [len(high)]
+    depths = [1 - np.nanmin(low[a:b]) / high[a] for a, b in zip(bounds[:-1], bounds[1:])]
+    return np.r_[[np.nan] * count, depths][-count:]
+
+
+class TestBatchIndicators:
+    """批量指标测试类"""
+
+    @pytest.mark.parametrize('window,min_periods', [(1, None), (5, None), (50, 3), (252, 1),
+                                                    (400, None)])
+    def test_rolling_matches_pandas(self, window, min_periods):
+        """测试均线与滚动最高/最低与 pandas 一致"""
+        close = make_panel()[0]
+        rolling = pd.DataFrame(close).rolling(window, min_periods=min_periods or window)
+        assert np.allclose(sma(close, window, min_periods), rolling.mean(), rtol=1e-6,
+                           equal_nan=True)
+        assert np.allclose(rolling_max(close, window, min_periods), rolling.max(),
+                           equal_nan=True)
+        assert np.allclose(rolling_min(close, window, min_periods), rolling.min(),
+                           equal_nan=True)
+
+    def test_float32_and_vector_input(self):
+        """测试返回 float32，一维输入返回一维结果"""
+        close = make_panel()[0]
+        assert sma(close, 10).dtype == np.float32
+        assert rolling_max(close, 10).dtype == np.float32
+        np.testing.assert_array_equal(sma(close[:, 2], 10), sma(close, 10)[:, 2])
+        np.testing.assert_array_equal(rolling_min(close[:, 2], 10), rolling_min(close, 10)[:, 2])
+        series = pd.Series(close[:, 2])
+        assert WindowSums(series).mean(99, 20) == pytest.approx(series.iloc[80:100].mean())
+
+    def test_window_sums_partial_window(self):
+        """测试历史不足时的均值：默认为 NaN，min_periods=1 时取已有数据"""
+        means = WindowSums(np.array([1.0, 2.0, np.nan, 4.0]))
+        assert np.isnan(means.mean(3, 4))
+        assert means.mean(3, 4, min_periods=1) == pytest.approx(7 / 3)
+        assert means.mean(1, 10, min_periods=1) == pytest.approx(1.5)
+        assert np.isnan(means.mean(-1, 2))
+        with pytest.raises(ValueError):
+            sma([1.0, 2.0], 0)
+
+    def test_ema_and_atr_match_pandas(self):
+        """测试指数均线与 ATR 与 pandas ewm 一致"""
+        close, high, low, _ = make_panel()
+        expected = pd.DataFrame(close).ewm(span=10, adjust=False, ignore_na=True).mean()
+        assert np.allclose(ema(close, 10), expected, rtol=1e-6, equal_nan=True)
+
+        frame = pd.DataFrame({'high': high[:, 3], 'low': low[:, 3], 'close': close[:, 3]})
+        previous = frame['close'].shift()
+        tr = pd.concat([frame['high'] - frame['low'], (frame['high'] - previous).abs(),
+                        (frame['low'] - previous).abs()], axis=1).max(axis=1)
+        assert np.allclose(true_range(high, low, close)[:, 3], tr, rtol=1e-6)
+        assert np.allclose(atr(high, low, close, 14)[:, 3],
+                           tr.ewm(alpha=1 / 14, adjust=False).mean(), rtol=1e-6)
+        with pytest.raises(ValueError):
+            ema(close)
+
+    def test_volume_ratio(self):
+        """测试量比为当日成交量除以前 N 日均量"""
+        volume = make_panel()[3]
+        ratio = volume_ratio(volume, 20)
+        expected = volume[100, 4] / volume[80:100, 4].mean()
+        assert ratio[100, 4] == pytest.approx(expected, rel=1e-6)
+        assert np.isnan(ratio[:20]).all()
+
+    def test_contraction_depths_match_reference(self):
+        """测试收缩幅度与逐日循环的参考实现一致"""
+        _, high, low, _ = make_panel()
+        depths = contraction_depths(high, low, order=5, count=4)
+        assert depths.shape == (4, high.shape[1]) and depths.dtype == np.float32
+        for column in range(high.shape[1]):
+            expected = reference_depths(high[:, column], low[:, column], 5, 4)
+            assert np.allclose(depths[:, column], expected, rtol=1e-6, equal_nan=True)
+        np.testing.assert_array_equal(contraction_depths(high[:, 2], low[:, 2]), depths[:, 2])
+
+    def test_shrinking_contractions(self):
+        """测试逐次收窄的回调次数"""
+        high = np.array([10, 12, 11, 9.6, 11, 12.5, 11.9, 11, 12.2, 13, 12.7, 12.3, 12.6,
+                         13.2, 13.0, 12.9, 13.1, 13.1])
+        depths = contraction_depths(high, order=2, count=4)
+        np.testing.assert_allclose(depths, [0.2, 0.12, 0.0538462, 0.0227273], rtol=1e-5)
+        assert shrinking_contractions(depths) == 4
+        panel = np.array([[0.3, np.nan, 0.1], [0.2, np.nan, 0.2], [0.1, 0.05, np.nan]])
+        np.testing.assert_array_equal(shrinking_contractions(panel), [3, 1, 0])
+
+
+class TestIncrementalIndicators:
+    """逐行追加的指标测试类"""
+
+    @pytest.mark.parametrize('window,min_periods', [(10, None), (50, 3), (252, 1)])
+    def test_rolling_states_match_batch(self, window, min_periods):
+        """测试逐行追加的均值与极值与批量计算一致"""
+        close = make_panel()[0]
+        states = (RollingMean(window, close.shape[1], min_periods),
+                  RollingExtreme(window, close.shape[1], True, min_periods or window),
+                  RollingExtreme(window, close.shape[1], False, min_periods or window))
+        results = [np.array([state.append(row) for row in close]) for state in states]
+        assert np.allclose(results[0], sma(close, window, min_periods), rtol=1e-6,
+                           equal_nan=True)
+        np.testing.assert_array_equal(results[1], rolling_max(close, window, min_periods))
+        np.testing.assert_array_equal(results[2], rolling_min(close, window, min_periods))
+
+    def test_exponential_average(self):
+        """测试第一个有效值为初值，缺失值沿用上一值"""
+        average = ExponentialAverage(2, alpha=0.5)
+        average.append(np.array([np.nan, 2.0]))
+        np.testing.assert_array_equal(average.append(np.array([4.0, np.nan])), [4.0, 2.0])
+        np.testing.assert_array_equal(average.append(np.array([6.0, 4.0])), [5.0, 3.0])
+
+    def test_engine_matches_batch(self):
+        """测试引擎逐日追加的最新指标与批量计算的最后一行一致"""
+        close, high, low, volume = make_panel()
+        codes = [f'sz{i:06d}' for i in range(close.shape[1])]
+        panels = [pd.DataFrame(panel, columns=codes) for panel in (close, high, low, volume)]
+        engine = IndicatorEngine.from_history(*(panel.iloc[:-1] for panel in panels))
+        latest = engine.update(*(panel.iloc[-1] for panel in panels))
+        assert engine.count == len(close)
+        assert np.allclose(latest['sma50'], sma(close, 50)[-1], rtol=1e-6, equal_nan=True)
+        assert np.allclose(latest['ema21'], ema(close, 21)[-1], rtol=1e-6, equal_nan=True)
+        np.testing.assert_array_equal(latest['high_252'], rolling_max(high, 252, 1)[-1])
+        np.testing.assert_array_equal(latest['low_252'], rolling_min(low, 252, 1)[-1])
+        assert np.allclose(latest['atr14'], atr(high, low, close)[-1], rtol=1e-5)
+        assert np.allclose(latest['volume_ratio'], volume_ratio(volume, 50)[-1], rtol=1e-5)
+        assert all(value.dtype == np.float32 for value in latest.values())
+        frame = engine.frame()
+        assert list(frame.index) == codes and 'volume_sma50' in frame.columns
+
+    def test_engine_aligns_series_and_close_only(self):
+        """测试按代码对齐的 Series 输入，只有收盘价时以收盘价计算高低点"""
+        engine = IndicatorEngine(['a', 'b'], sma_windows=(2,), ema_spans=(), extreme_window=3)
+        engine.update(pd.Series({'b': 2.0, 'a': 1.0}))
+        latest = engine.update(pd.Series({'a': 3.0}))
+        np.testing.assert_array_equal(latest['sma2'], [2.0, np.nan])
+        np.testing.assert_array_equal(latest['high_3'], [3.0, 2.0])
+        assert 'volume_ratio' not in latest
+        with pytest.raises(ValueError):
+            engine.update([1.0, 2.0, 3.0])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
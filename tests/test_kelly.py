@@ -1,7 +1,11 @@
 """Kelly公式测试用例"""
 
+import tracemalloc
+
+import numpy as np
 import pytest
-from src.kelly import kelly, kelly_from_odds
+from src.kelly import (growth_rate, kelly, kelly_from_odds, kelly_sweep, monte_carlo_kelly,
+                       monte_carlo_odds, simulate_paths)
 
 
 class TestKellyFormula:
@@ -65,5 +69,109 @@ class TestKellyFormula:
         assert 0 < result < 1
 
 
+class TestMonteCarlo:
+    """蒙特卡洛模拟测试类"""
+
+    def test_seed_reproducible(self):
+        """相同种子结果一致"""
+        first = monte_carlo_kelly(0.55, 0.1, 0.1, n_paths=200, n_steps=100, seed=7)
+        second = monte_carlo_kelly(0.55, 0.1, 0.1, n_paths=200, n_steps=100, seed=7)
+        assert first == second
+        assert first['fraction'] == pytest.approx(kelly(0.55, 0.45, 0.1, 0.1))
+
+    def test_chunking_does_not_change_result(self):
+        """分批模拟与一次模拟结果一致"""
+        whole = simulate_paths(0.2, 0.6, 0.5, 0.5, n_paths=300, n_steps=50, seed=3)
+        chunked = simulate_paths(0.2, 0.6, 0.5, 0.5, n_paths=300, n_steps=50, seed=3,
+                                 chunk_size=7)
+        for a, b in zip(whole, chunked):
+            np.testing.assert_array_equal(a, b)
+
+    def test_default_chunk_bounds_memory(self):
+        """默认分批时千万个元素的模拟峰值内存远小于一次性分配"""
+        tracemalloc.start()
+        try:
+            simulate_paths(0.1, 0.55, 0.1, 0.1, n_paths=10000, n_steps=1000, seed=1)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        assert peak < 150 * 2 ** 20
+
+    def test_terminal_matches_win_count(self):
+        """终值只由获胜次数决定，与逐步连乘结果一致"""
+        fraction, p, win, lose, steps = 0.25, 0.6, 0.4, 0.3, 40
+        terminal, drawdown, _ = simulate_paths(fraction, p, win, lose, n_paths=50,
+                                               n_steps=steps, seed=11)
+        wins = np.random.default_rng(11).random((50, steps)) < p
+        expected = np.prod(np.where(wins, 1 + fraction * win, 1 - fraction * lose), axis=1)
+        np.testing.assert_allclose(terminal, expected)
+        assert ((drawdown >= 0) & (drawdown <= 1)).all()
+
+    def test_full_loss_is_ruin(self):
+        """全部下注且输光本金时视为破产"""
+        result = monte_carlo_kelly(0.5, 1.0, 1.0, fraction=1.0, n_paths=100, n_steps=20,
+                                   seed=0)
+        assert result['ruin_probability'] == 1.0
+        assert result['p99_drawdown'] == 1.0
+
+    def test_odds_form(self):
+        """赔率形式使用 kelly_from_odds 的比例"""
+        result = monte_carlo_odds(2.0, 0.6, n_paths=100, n_steps=10, seed=0)
+        assert result['fraction'] == kelly_from_odds(2.0, 0.6)
+
+    def test_half_kelly_lower_drawdown(self):
+        """半凯利的回撤低于全凯利"""
+        full = monte_carlo_kelly(0.6, 1.0, 1.0, n_paths=500, n_steps=200, seed=1)
+        half = monte_carlo_kelly(0.6, 1.0, 1.0, fraction_scale=0.5, n_paths=500,
+                                 n_steps=200, seed=1)
+        assert half['median_drawdown'] < full['median_drawdown']
+
+
+class TestKellySweep:
+    """凯利参数网格测试类"""
+
+    def test_grid_shape_and_values(self):
+        """网格按全部组合展开，比例为增长最优的 (p*w - q*l) / (w*l)"""
+        table = kelly_sweep([0.55, 0.6, 0.8], [0.1, 0.2], [0.1, 0.15], fraction=[1.0, 0.5])
+        assert len(table) == 3 * 2 * 2 * 2
+        for row in table.itertuples():
+            expected = ((row.p * row.win_return - row.q * row.lose_return)
+                        / (row.win_return * row.lose_return))
+            assert row.kelly == pytest.approx(expected)
+            assert row.bet_fraction == pytest.approx(expected * row.scale)
+
+    def test_full_fraction_is_growth_argmax(self):
+        """全凯利比例等于网格上增长率的最大值点（期望为负时为负比例，即反向下注）"""
+        table = kelly_sweep([0.55, 0.6, 0.8], [0.1, 0.2], [0.1, 0.15], fraction=1.0)
+        for row in table.itertuples():
+            grid = np.linspace(-1 / row.win_return, 1 / row.lose_return, 400001)[1:-1]
+            rates = growth_rate(grid, row.p, row.win_return, row.lose_return)
+            assert row.bet_fraction == pytest.approx(grid[np.argmax(rates)], abs=1e-3)
+            assert row.growth_rate == pytest.approx(rates.max(), abs=1e-9)
+
+    def test_invalid_cells_masked(self):
+        """胜率小于失败率时不抛异常，结果为 NaN"""
+        table = kelly_sweep([0.4, 0.6], 0.1, 0.2)
+        invalid = table[table['p'] == 0.4]
+        assert not invalid['valid'].any()
+        assert invalid['kelly'].isna().all()
+        assert invalid['growth_rate'].isna().all()
+        assert table[table['p'] == 0.6]['valid'].all()
+
+    def test_growth_rate(self):
+        """增长率为期望对数增长，输光本金时为 -inf"""
+        rate = growth_rate(0.2, 0.6, 1.0, 1.0)
+        assert rate == pytest.approx(0.6 * np.log(1.2) + 0.4 * np.log(0.8))
+        assert growth_rate(1.0, 0.6, 1.0, 1.0) == -np.inf
+
+    def test_simulated_growth_close_to_expected(self):
+        """模拟增长率的中位数接近期望增长率"""
+        table = kelly_sweep(0.6, 1.0, 1.0, fraction=[1.0, 0.5], n_steps=2000, n_paths=500,
+                            seed=0)
+        np.testing.assert_allclose(table['sim_growth_median'], table['growth_rate'],
+                                   atol=0.01)
+        assert (table['sim_growth_p05'] <= table['sim_growth_median']).all()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
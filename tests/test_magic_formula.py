@@ -3,7 +3,16 @@
 
 import pytest
 import pandas as pd
-from src.magic_formula import MagicFormulaScreener
+from src.data_provider import DataProvider
+from src.magic_formula import (
+    MAGIC_FORMULA_RULES,
+    MagicFormulaRanking,
+    MagicFormulaScreener,
+    earnings_yield,
+)
+from src.market_replay import SyntheticBackend
+from src.snapshot_store import SnapshotStore
+from src.symbol_cache import SymbolCache
 
 
 class TestMagicFormulaScreener:
@@ -87,6 +96,17 @@ class TestMagicFormulaMetrics:
         self.screener.calculate_magic_formula_metrics()
         assert 'earnings_yield' in self.screener.stocks_data.columns
 
+    def test_earnings_yield_scalar(self):
+        """测试标量市盈率：返回浮点数，市盈率为 0 时为 0"""
+        assert earnings_yield(20.0) == pytest.approx(0.05)
+        assert earnings_yield(0) == 0.0
+        assert isinstance(earnings_yield(20.0), float)
+
+    def test_earnings_yield_array(self):
+        """测试数组市盈率：市盈率为 0 的位置为 0"""
+        result = earnings_yield(pd.Series([10.0, 0.0, 25.0]))
+        assert result.tolist() == pytest.approx([0.1, 0.0, 0.04])
+
     def test_magic_score_calculation(self):
         """测试神奇分数计算"""
         self.screener.stocks_data = pd.DataFrame({
@@ -101,5 +121,74 @@ class TestMagicFormulaMetrics:
             assert 'magic_score' in self.screener.screened_stocks.columns
 
 
+class TestFullUniversePipeline:
+    """全市场预筛选与流式获取测试类"""
+
+    def make_screener(self, tmp_path, cache=None, **kwargs):
+        """使用合成全市场数据的选股器"""
+        backend = SyntheticBackend(n_stocks=400, n_days=30, seed=1)
+        provider = DataProvider(backend, cache=cache if cache is not None else SymbolCache())
+        screener = MagicFormulaScreener(provider=provider, rate_limit=1e9, max_workers=2,
+                                        **kwargs)
+        screener.snapshot_store = SnapshotStore(str(tmp_path / 'snapshots'))
+        return screener, provider
+
+    def test_fetches_all_prefiltered(self, tmp_path):
+        """测试只为预筛选通过的股票请求财务数据，且不再限制为前100只"""
+        screener, provider = self.make_screener(tmp_path)
+        survivors = screener.prefilter.evaluate(provider.tradable_spot()).selected
+        screener.get_stock_data()
+        assert survivors > 100
+        assert provider.requests['financial'] == survivors
+        assert len(screener.stocks_data) == survivors
+        assert '净资产收益率' in screener.stocks_data.columns
+
+    def test_request_budget_prefers_high_earnings_yield(self, tmp_path):
+        """测试超出请求预算时只请求市盈率最低的股票，缓存命中不占预算"""
+        cache = SymbolCache()
+        screener, provider = self.make_screener(tmp_path, cache=cache, request_budget=20)
+        spot = screener.prefilter.evaluate(provider.tradable_spot()).select(
+            provider.tradable_spot())
+        screener.get_stock_data()
+        assert provider.requests['financial'] == 20
+        expected = spot.sort_values('市盈率-动态', kind='stable')['代码'].head(20)
+        assert sorted(screener.stocks_data['代码']) == sorted(expected)
+
+        screener, provider = self.make_screener(tmp_path, cache=cache, request_budget=20)
+        screener.get_stock_data()
+        assert provider.requests['financial'] == 20
+        assert len(screener.stocks_data) == 40
+
+    @pytest.mark.parametrize('strict', [False, True])
+    def test_streamed_ranking_reused_by_screening(self, tmp_path, strict):
+        """测试获取过程中逐只计入的排名被筛选沿用（移出未通过过滤的股票），与重建的排名一致"""
+        rules = MAGIC_FORMULA_RULES.with_rules('ROIC_proxy > 10') if strict else None
+        screener, _ = self.make_screener(tmp_path, rules=rules)
+        screener.get_stock_data()
+        streamed = screener.ranking
+        assert screener.ranking_streamed and len(streamed) > 50
+        screener.calculate_magic_formula_metrics()
+        screener.apply_magic_formula_screening()
+        assert screener.ranking is streamed
+        valid = screener.rules.evaluate(screener.stocks_data).select(screener.stocks_data)
+        rebuilt = MagicFormulaRanking.from_frame(valid)
+        assert len(streamed) == len(rebuilt)
+        pd.testing.assert_frame_equal(streamed.top(50), rebuilt.top(50))
+        top = screener.ranking.top(50)
+        assert top['magic_score'].tolist() == screener.screened_stocks['magic_score'].tolist()
+
+    def test_ranking_update(self):
+        """测试排名更新、无效指标移出与并列取平均名次"""
+        ranking = MagicFormulaRanking()
+        ranking.update('A', 10, 0.1)
+        ranking.update('B', 20, 0.05)
+        assert not ranking.update('C', '--', 0.2)
+        assert ranking.top()['magic_score'].tolist() == [3.0, 3.0]
+        ranking.update('C', 30, 0.2)
+        assert ranking.top(1)['代码'].tolist() == ['C']
+        ranking.update('C', -1, 0.2)
+        assert len(ranking) == 2
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
@@ -0,0 +1,109 @@
+"""离线回放与合成数据测试用例"""
+
+import pandas as pd
+import pytest
+
+from src.bar_store import BarStore
+from src.data_provider import DataProvider, SnapshotBackend
+from src.magic_formula import MagicFormulaScreener
+from src.market_replay import SPOT_COLUMNS, SyntheticBackend, exchange_symbol, record_universe
+from src.snapshot_store import SnapshotStore
+from src.symbol_cache import SymbolCache
+from src.vcp import select_symbols, stage2_screen
+from src.walter_schloss import SchlossStockScreening
+
+
+class TestSyntheticBackend:
+    """合成数据后端测试类"""
+
+    def setup_method(self):
+        """初始化测试环境"""
+        self.backend = SyntheticBackend(n_stocks=60, n_days=300, seed=7)
+
+    def test_deterministic(self):
+        """测试相同种子的结果一致，且与请求顺序无关"""
+        other = SyntheticBackend(n_stocks=60, n_days=300, seed=7)
+        pd.testing.assert_frame_equal(self.backend.spot(), other.spot())
+        other.financial('000003', '2024')
+        pd.testing.assert_frame_equal(self.backend.financial('600000', '2024'),
+                                      other.financial('600000', '2024'))
+        different = SyntheticBackend(n_stocks=60, n_days=300, seed=8)
+        assert not different.spot()['最新价'].equals(self.backend.spot()['最新价'])
+
+    def test_spot_layout(self):
+        """测试行情快照的列顺序与代码、ST 股票"""
+        spot = self.backend.spot()
+        assert spot.columns.tolist() == SPOT_COLUMNS
+        assert spot['代码'].is_unique
+        assert set(spot['代码'].str[:2]) == {'00', '60', '30'}
+        assert spot['名称'].str.contains('ST').sum() == 1
+        assert select_symbols(spot)
+
+    def test_daily_consistent_with_spot(self):
+        """测试日线按区间截取，最后收盘价与快照一致"""
+        spot = self.backend.spot().set_index('代码')
+        bars = self.backend.daily('sz000000', '20000101', '20991231')
+        assert len(bars) == 300
+        assert bars['close'].iloc[-1] == pytest.approx(spot.loc['000000', '最新价'], abs=0.01)
+        assert (bars['high'] >= bars['low']).all()
+        window = self.backend.daily('sz000000', bars['date'].iloc[10].strftime('%Y%m%d'),
+                                    bars['date'].iloc[19].strftime('%Y%m%d'))
+        assert window['close'].tolist() == bars['close'].iloc[10:20].tolist()
+        assert self.backend.daily('sz999999', '20000101', '20991231').empty
+
+    def test_financial_start_year(self):
+        """测试财务指标按起始年份过滤"""
+        full = self.backend.financial('000000', '1990')
+        assert len(full) == 8
+        assert full['日期'].is_monotonic_increasing
+        recent = self.backend.financial('000000', '2025')
+        assert (recent['日期'] >= '2025').all() and len(recent) < len(full)
+
+    def test_invalid_size(self):
+        """测试规模参数校验"""
+        with pytest.raises(ValueError):
+            SyntheticBackend(n_stocks=0)
+        with pytest.raises(ValueError):
+            SyntheticBackend(n_days=1)
+
+    def test_screeners_run_offline(self, tmp_path):
+        """测试两个选股策略在合成数据上完整运行"""
+        provider = DataProvider(self.backend, cache=SymbolCache())
+        magic = MagicFormulaScreener(provider=provider, rate_limit=1e9)
+        magic.snapshot_store = SnapshotStore(str(tmp_path / 'snapshots'))
+        magic.result_path = str(tmp_path / 'magic.csv')
+        magic.run()
+        schloss = SchlossStockScreening(rate_limit=1e9, provider=provider)
+        schloss.snapshot_store = magic.snapshot_store
+        schloss.result_path_csv = str(tmp_path / 'schloss.csv')
+        schloss.run()
+        assert self.backend.calls['spot'] == 1
+        assert schloss.stocks_data is not None and len(schloss.stocks_data) > 0
+
+
+class TestRecordUniverse:
+    """录制与回放测试类"""
+
+    def test_record_and_replay(self, tmp_path):
+        """测试录制后用快照后端离线回放得到相同的数据"""
+        backend = SyntheticBackend(n_stocks=12, n_days=260, seed=1)
+        store = SnapshotStore(str(tmp_path / 'snapshots'))
+        first = backend.dates[0].strftime('%Y%m%d')
+        last = backend.dates[-1].strftime('%Y%m%d')
+        bars = BarStore(str(tmp_path / 'bars'), fetch_func=backend.daily, start_date=first)
+        summary = record_universe(backend, store, bar_store=bars, end_date=last)
+        assert summary['stocks'] == 12 and summary['bars'] == 12
+
+        replay = DataProvider(SnapshotBackend(store, bar_store=bars), cache=SymbolCache())
+        pd.testing.assert_frame_equal(replay.spot(), backend.spot())
+        financial = replay.financial_table(['000000', '600000'], start_year='2024', rate=1e9)
+        assert financial['代码'].tolist() == ['000000', '600000']
+        symbol = exchange_symbol('600000')
+        assert symbol == 'sh600000'
+        pd.testing.assert_series_equal(
+            replay.daily(symbol, first, last)['close'],
+            backend.daily(symbol, first, last)['close'])
+
+        passed = stage2_screen([exchange_symbol(code) for code in backend.codes], bars,
+                               end_date=last)
+        assert isinstance(passed, pd.DataFrame)
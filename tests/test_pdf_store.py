@@ -0,0 +1,122 @@
+"""按内容寻址的 PDF 存储测试用例"""
+
+import asyncio
+import json
+import os
+
+import pytest
+
+from src.fund_scheduler import FundScheduler
+from src.pdf_store import PdfStore
+
+pytest.importorskip('aiohttp')
+
+# 公告 9 同时出现在两只基金中；公告 8 与 9 内容相同但 ID 不同
+FUNDS = {
+    '000001': [{'ID': '1', 'TITLE': '年报'}, {'ID': '9', 'TITLE': '公司公告'}],
+    '000002': [{'ID': '9', 'TITLE': '公司公告'}, {'ID': '8', 'TITLE': '公司公告(重发)'}],
+}
+CONTENT = {'1': b'one' * 1000, '8': b'shared' * 1000, '9': b'shared' * 1000}
+
+
+@pytest.fixture(name='server')
+def fixture_server(http_server):
+    """启动本地 HTTP 服务：公告列表按基金代码返回"""
+    return http_server({
+        '/list': lambda name, params: json.dumps({'Data': FUNDS[params['fundcode']]}).encode(),
+        '/pdf/{}': lambda name, params: CONTENT[name]})
+
+
+class TestPdfStore:
+    """blob 存储测试类"""
+
+    def test_add_and_link(self, tmp_path):
+        """相同内容只保存一份，基金目录中为硬链接"""
+        store = PdfStore(str(tmp_path))
+        for report_id in ('a', 'b'):
+            staging = tmp_path / f'{report_id}.tmp'
+            staging.write_bytes(b'same')
+            entry = store.add(report_id, str(staging))
+            store.link(entry, str(tmp_path / report_id / 'x.pdf'))
+        assert store.stats()['blobs'] == 1
+        assert os.path.samefile(tmp_path / 'a' / 'x.pdf', tmp_path / 'b' / 'x.pdf')
+        store.save()
+        assert PdfStore(str(tmp_path)).lookup('a') == entry
+
+    def test_fetch_once_coalesces(self, tmp_path):
+        """同一 ID 的并发请求只下载一次"""
+        store = PdfStore(str(tmp_path))
+        calls = []
+
+        async def download(path):
+            calls.append(path)
+            await asyncio.sleep(0.01)
+            with open(path, 'wb') as f:
+                f.write(b'data')
+            return 4, ''
+
+        async def run():
+            return await asyncio.gather(*(store.fetch_once('42', download) for _ in range(5)))
+
+        entries = asyncio.run(run())
+        assert len(calls) == 1
+        assert all(entry == entries[0] for entry in entries)
+        assert store.stats()['misses'] == 1
+
+    def test_prune(self, tmp_path):
+        """没有基金目录链接的 blob 被删除"""
+        store = PdfStore(str(tmp_path))
+        staging = tmp_path / 'a.tmp'
+        staging.write_bytes(b'x')
+        entry = store.add('a', str(staging))
+        store.link(entry, str(tmp_path / 'f' / 'a.pdf'))
+        assert store.prune() == 0
+        os.remove(tmp_path / 'f' / 'a.pdf')
+        assert store.prune() == 1
+        assert store.lookup('a') is None
+
+    def test_prune_keeps_copied_blobs(self, tmp_path, monkeypatch):
+        """不支持硬链接时退回复制，复制过的 blob 无法按链接数判断，prune 保留"""
+        def no_link(*args):
+            raise OSError('硬链接不可用')
+
+        store = PdfStore(str(tmp_path))
+        staging = tmp_path / 'a.tmp'
+        staging.write_bytes(b'x')
+        entry = store.add('a', str(staging))
+        monkeypatch.setattr(os, 'link', no_link)
+        store.link(entry, str(tmp_path / 'f' / 'a.pdf'))
+        assert (tmp_path / 'f' / 'a.pdf').read_bytes() == b'x'
+        staging.write_bytes(b'x')
+        store.add('b', str(staging))
+        assert store.prune() == 0
+        store.save()
+        reloaded = PdfStore(str(tmp_path))
+        assert reloaded.lookup('a')['copied'] and reloaded.prune() == 0
+
+
+class TestDedupedScheduler:
+    """去重调度测试类"""
+
+    def test_shared_reports_downloaded_once(self, server, tmp_path):
+        """多只基金共有的公告只请求一次，相同内容只占一份空间"""
+        scheduler = FundScheduler(str(tmp_path), workers=4, rates={}, progress_every=0,
+                                  list_url=f'{server.url}/list', pdf_url=server.url + '/pdf/{}',
+                                  dedupe=True)
+        summary = scheduler.run(FUNDS)
+        assert summary['000002']['downloaded'] == 2
+        pdf_paths = [path for path in server.paths if path.startswith('/pdf/')]
+        assert sorted(pdf_paths) == ['/pdf/1', '/pdf/8', '/pdf/9']
+        assert os.path.samefile(tmp_path / '000001' / '公司公告.pdf',
+                                tmp_path / '000002' / '公司公告(重发).pdf')
+        assert scheduler.store.stats()['blobs'] == 2
+
+        # 删除一个基金目录后重新同步，不再请求 PDF
+        for name in os.listdir(tmp_path / '000002'):
+            os.remove(tmp_path / '000002' / name)
+        server.requests.clear()
+        FundScheduler(str(tmp_path), workers=4, rates={}, progress_every=0,
+                      list_url=f'{server.url}/list', pdf_url=server.url + '/pdf/{}',
+                      dedupe=True).run(['000002'])
+        assert server.paths == ['/list']
+        assert (tmp_path / '000002' / '公司公告.pdf').read_bytes() == CONTENT['9']
@@ -0,0 +1,97 @@
+"""多资产凯利仓位分配测试用例"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.portfolio_kelly import PortfolioKelly, estimate_moments, project, solve
+
+
+def make_returns(n_days=500, n_assets=20, seed=0):
+    """生成带公共因子的随机收益面板"""
+    rng = np.random.default_rng(seed)
+    market = rng.normal(0.0003, 0.01, (n_days, 1))
+    values = rng.normal(0.0005, 0.02, (n_days, n_assets)) + market
+    return pd.DataFrame(values, columns=[f'{i:06d}' for i in range(n_assets)])
+
+
+class TestMoments:
+    """参数估计测试类"""
+
+    def test_matches_pandas(self):
+        """无缺失值时与 pandas 的结果一致"""
+        returns = make_returns(n_assets=5)
+        mu, cov = estimate_moments(returns, periods=252)
+        np.testing.assert_allclose(mu, returns.mean() * 252)
+        np.testing.assert_allclose(cov, returns.cov() * 252)
+
+    def test_missing_values_and_shrinkage(self):
+        """有缺失值时按两两样本计算，收缩只作用于非对角元素"""
+        returns = make_returns(n_assets=4)
+        returns.iloc[:10, 0] = np.nan
+        _, cov = estimate_moments(returns)
+        np.testing.assert_allclose(cov, returns.cov())
+        _, shrunk = estimate_moments(returns, shrinkage=0.5)
+        np.testing.assert_allclose(np.diag(shrunk), np.diag(cov))
+        assert shrunk.iloc[0, 1] == pytest.approx(0.5 * cov.iloc[0, 1])
+
+
+class TestSolver:
+    """求解器测试类"""
+
+    def test_projection_constraints(self):
+        """投影结果满足仓位上限与杠杆约束"""
+        values = np.array([0.5, 0.3, -0.4, 0.05])
+        long_only = project(values, cap=0.25, leverage=0.4)
+        assert (long_only >= 0).all() and long_only.max() <= 0.25
+        assert long_only.sum() == pytest.approx(0.4)
+        short = project(values, cap=0.25, leverage=0.6, allow_short=True)
+        assert short[2] < 0
+        assert np.abs(short).sum() == pytest.approx(0.6)
+
+    def test_unconstrained_matches_closed_form(self):
+        """约束不生效时等于 Σ⁻¹μ"""
+        mu, cov = estimate_moments(make_returns(n_assets=6), periods=252)
+        weights, info = solve(mu.to_numpy(), cov.to_numpy(), cap=100, leverage=100,
+                              allow_short=True)
+        assert info['converged']
+        np.testing.assert_allclose(weights, np.linalg.solve(cov, mu), atol=1e-6)
+
+    def test_constrained_is_optimal(self):
+        """约束下的解不劣于随机可行解"""
+        mu, cov = estimate_moments(make_returns(), periods=252)
+        mu, cov = mu.to_numpy(), cov.to_numpy()
+        weights, info = solve(mu, cov, cap=0.1, leverage=1.0)
+        assert weights.max() <= 0.1 + 1e-12 and weights.sum() <= 1.0 + 1e-9
+        rng = np.random.default_rng(1)
+        for _ in range(50):
+            candidate = project(rng.random(len(mu)), cap=0.1, leverage=1.0)
+            assert candidate @ mu - 0.5 * candidate @ cov @ candidate <= info['growth'] + 1e-9
+
+
+class TestPortfolioKelly:
+    """仓位分配缓存测试类"""
+
+    def test_cache_hit(self):
+        """输入不变时命中缓存"""
+        allocator = PortfolioKelly(cap=0.1, leverage=1.0)
+        returns = make_returns()
+        first = allocator.allocate(returns, periods=252)
+        second = allocator.allocate(returns, periods=252)
+        pd.testing.assert_series_equal(first, second)
+        assert allocator.stats() == {'hits': 1, 'misses': 1, 'entries': 1}
+        allocator.cap = 0.05
+        assert allocator.allocate(returns, periods=252).max() <= 0.05 + 1e-12
+        assert allocator.stats()['misses'] == 2
+
+    def test_fractional_and_warm_start(self):
+        """半凯利整体缩放；输入变化后以上一次权重为初值，结果与冷启动一致"""
+        returns = make_returns()
+        full = PortfolioKelly(cap=0.1).allocate(returns, periods=252)
+        half = PortfolioKelly(cap=0.1, fraction=0.5).allocate(returns, periods=252)
+        np.testing.assert_allclose(half, full * 0.5)
+
+        allocator = PortfolioKelly(cap=0.1)
+        allocator.allocate(returns.iloc[:-1], periods=252)
+        warm = allocator.allocate(returns, periods=252)
+        np.testing.assert_allclose(warm, full, atol=1e-6)
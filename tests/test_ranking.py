@@ -0,0 +1,114 @@
+"""增量名次索引测试用例"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.magic_formula import MagicFormulaRanking, MagicFormulaScreener
+from src.ranking import CompositeRanking, RankIndex
+
+
+def brute_force_top(values: dict, k: int):
+    """全量排名后排序"""
+    frame = pd.DataFrame(values)
+    score = sum(frame[column].rank(ascending=False) for column in frame.columns)
+    ordered = sorted(score.items(), key=lambda item: (item[1], item[0]))
+    return ordered[:k]
+
+
+class TestRankIndex:
+    """单指标名次索引测试类"""
+
+    def test_ranks_match_pandas_after_updates(self):
+        """测试随机插入与删除后名次与 pandas 一致（含并列）"""
+        rng = np.random.default_rng(0)
+        current = dict(enumerate(rng.integers(0, 20, 200).astype(float)))
+        index = RankIndex(np.array(list(current)), np.array(list(current.values())))
+        for item in rng.choice(200, 60, replace=False).tolist():
+            index.delete(item, current.pop(item))
+        for item in range(200, 260):
+            current[item] = float(rng.integers(0, 20))
+            index.insert(item, current[item])
+        expected = pd.Series(current).rank(ascending=False)
+        assert len(index) == len(current)
+        assert index.rank(np.array(list(current.values()))).tolist() == expected.tolist()
+        assert index.value_at(0) == max(current.values())
+        assert current[int(index.best(1)[0])] == max(current.values())
+
+    def test_invalid(self):
+        """测试不接受 NaN，删除不存在的项报错"""
+        with pytest.raises(ValueError):
+            RankIndex().insert(0, float('nan'))
+        with pytest.raises(ValueError):
+            RankIndex(np.array([0]), np.array([np.nan]))
+        with pytest.raises(KeyError):
+            RankIndex(np.array([0]), np.array([1.0])).delete(1, 1.0)
+
+
+class TestCompositeRanking:
+    """多指标综合排名测试类"""
+
+    def test_top_matches_full_sort(self):
+        """测试阈值算法的前 k 名与全量排序一致，更新后仍一致"""
+        rng = np.random.default_rng(1)
+        codes = [f'{i:04d}' for i in range(1000)]
+        values = {'a': dict(zip(codes, rng.integers(0, 50, 1000).astype(float))),
+                  'b': dict(zip(codes, rng.normal(size=1000)))}
+        ranking = CompositeRanking.from_frame(pd.DataFrame(values), ['a', 'b'])
+        for k in (1, 10, 50, 1000, 2000):
+            assert ranking.top(k) == brute_force_top(values, k)
+
+        for code in rng.choice(codes, 50, replace=False):
+            update = {'a': float(rng.integers(0, 50)), 'b': float(rng.normal())}
+            ranking.update(code, update)
+            values['a'][code], values['b'][code] = update['a'], update['b']
+        ranking.remove(codes[0])
+        del values['a'][codes[0]], values['b'][codes[0]]
+        assert ranking.top(50) == brute_force_top(values, 50)
+        assert ranking.ranks(codes[1]) == {
+            'a': pd.Series(values['a']).rank(ascending=False)[codes[1]],
+            'b': pd.Series(values['b']).rank(ascending=False)[codes[1]]}
+
+    def test_empty_and_missing_metric(self):
+        """测试空排名与缺少指标"""
+        ranking = CompositeRanking(['a', 'b'])
+        assert ranking.top(5) == []
+        with pytest.raises(KeyError):
+            ranking.update('A', {'a': 1.0})
+
+
+class TestMagicFormulaRanking:
+    """神奇公式排名测试类"""
+
+    def test_screening_matches_full_rank(self):
+        """测试筛选结果与原全量排名写法的分数一致"""
+        rng = np.random.default_rng(2)
+        frame = pd.DataFrame({'代码': [f'{i:06d}' for i in range(500)],
+                              '名称': [f'股票{i}' for i in range(500)],
+                              '市盈率-动态': rng.uniform(-10, 80, 500).round(1),
+                              '净资产收益率': rng.uniform(-5, 30, 500).round(0)})
+        screener = MagicFormulaScreener()
+        screener.stocks_data = frame
+        screener.calculate_magic_formula_metrics()
+        screener.apply_magic_formula_screening()
+
+        valid = screener.rules.evaluate(screener.stocks_data).select(screener.stocks_data)
+        score = (valid['ROIC_proxy'].rank(ascending=False)
+                 + valid['earnings_yield'].rank(ascending=False))
+        result = screener.screened_stocks
+        assert sorted(result['magic_score']) == sorted(score)[:50]
+        assert result['magic_score'].is_monotonic_increasing
+        assert (result['magic_score']
+                == result['ROIC_rank'] + result['earnings_yield_rank']).all()
+        assert result['名称'].tolist() == [f'股票{int(code)}' for code in result['代码']]
+
+    def test_intraday_update(self):
+        """测试盘中更新盈利收益率后前几名随之变化"""
+        frame = pd.DataFrame({'代码': ['A', 'B', 'C'], 'ROIC_proxy': [10.0, 20.0, 30.0],
+                              'earnings_yield': [0.3, 0.2, -0.1]})
+        ranking = MagicFormulaRanking.from_frame(frame)
+        assert len(ranking) == 2
+        assert ranking.top()['magic_score'].tolist() == [3.0, 3.0]
+        ranking.update('C', 30.0, 0.5)
+        assert ranking.top(1)['代码'].tolist() == ['C']
+        assert ranking.top(1)['magic_score'].tolist() == [2.0]
@@ -0,0 +1,130 @@
+"""基金报告全文索引测试用例"""
+
+import os
+import time
+
+import pytest
+
+from src.report_index import PAGE_BITS, ReportIndex, match_expression, tokenize
+
+
+def text_pages(path):
+    """测试用提取函数：按换页符把文本文件拆成多页"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    if content.startswith('损坏'):
+        raise ValueError('无法解析')
+    return content.split('\f')
+
+
+def write(path, text):
+    """写入测试文件"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding='utf-8')
+
+
+@pytest.fixture(name='root')
+def fixture_root(tmp_path):
+    """两只基金的报告目录"""
+    write(tmp_path / '000001' / '2024年第三季度报告.pdf',
+          '报告期内本基金增持新能源汽车产业链。\f第二页：医药行业仓位下降，ROE 12.5%。')
+    write(tmp_path / '000001' / '2024年年度报告.pdf', '全年重点配置消费与医药。')
+    write(tmp_path / '000002' / '2024年第三季度报告.pdf', '本基金主要投资于半导体与新能源。')
+    write(tmp_path / '000002' / '损坏文件.pdf', '损坏')
+    return tmp_path
+
+
+class TestTokenize:
+    """分词测试类"""
+
+    def test_bigrams(self):
+        """中文切分为二元组，英文与数字按词切分"""
+        assert tokenize('医药行业 ROE') == '医药 药行 行业 业 roe'
+
+    def test_match_expression(self):
+        """查询转换为短语，单字使用前缀匹配"""
+        assert match_expression('新能源 ROE') == '"新能 能源" AND "roe"'
+        assert match_expression('药') == '"药" *'
+        with pytest.raises(ValueError):
+            match_expression('，。')
+
+
+class TestReportIndex:
+    """全文索引测试类"""
+
+    def test_search(self, root, tmp_path):
+        """按内容、基金与标题检索"""
+        with ReportIndex(str(tmp_path / 'index.db'), extractor=text_pages) as index:
+            assert index.update(str(root)) == 3
+            assert list(index.errors) == [str(root / '000002' / '损坏文件.pdf')]
+            assert index.funds_mentioning('新能源') == ['000001', '000002']
+            assert index.funds_mentioning('医药', title='第三季度') == ['000001']
+            hits = index.search('医药行业')
+            assert len(hits) == 1
+            assert hits[0]['page'] == 2 and '医药行业' in hits[0]['snippet']
+            assert {hit['title'] for hit in index.search('医药', code='000001')} \
+                == {'2024年第三季度报告', '2024年年度报告'}
+            assert index.search('半导', code='000001') == []
+            assert index.search('roe')[0]['code'] == '000001'
+            assert index.funds_mentioning('导') == ['000002']
+
+    def test_incremental(self, root, tmp_path):
+        """只处理新增或修改的文件，删除的文件移出索引"""
+        db_path = str(tmp_path / 'index.db')
+        with ReportIndex(db_path, extractor=text_pages) as index:
+            index.update(str(root))
+        with ReportIndex(db_path, extractor=text_pages) as index:
+            assert [item[0] for item in index.pending(str(root))] \
+                == [str(root / '000002' / '损坏文件.pdf')]
+            path = root / '000002' / '2024年第三季度报告.pdf'
+            write(path, '本基金转向人工智能。')
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+            os.remove(root / '000001' / '2024年年度报告.pdf')
+            assert index.update(str(root)) == 1
+            assert index.funds_mentioning('新能源') == ['000001']
+            assert index.funds_mentioning('人工智能') == ['000002']
+            assert index.funds_mentioning('消费') == []
+
+    def test_pages_keyed_by_document(self, root, tmp_path):
+        """页的 rowid 按文件编号分段，重新索引时只替换该文件的页；旧版索引重建"""
+        db_path = str(tmp_path / 'index.db')
+        with ReportIndex(db_path, extractor=text_pages) as index:
+            index.update(str(root))
+            pages = index.stats()['pages']
+            rows = index.conn.execute('SELECT rowid, doc_id, page FROM pages').fetchall()
+            assert all(rowid == (doc_id << PAGE_BITS) + page for rowid, doc_id, page in rows)
+            path = root / '000002' / '2024年第三季度报告.pdf'
+            write(path, '本基金转向人工智能。')
+            stat = os.stat(path)
+            os.utime(path, (stat.st_atime, stat.st_mtime + 10))
+            index.update(str(root))
+            assert index.stats()['pages'] == pages
+            index.conn.execute('PRAGMA user_version = 0')
+            index.conn.commit()
+        with ReportIndex(db_path, extractor=text_pages) as index:
+            assert index.stats()['documents'] == 0
+            assert index.update(str(root)) == 3
+
+    def test_hard_links_extracted_once(self, root, tmp_path):
+        """同一文件的硬链接只提取一次"""
+        calls = []
+
+        def counting(path):
+            calls.append(path)
+            return text_pages(path)
+
+        os.link(root / '000002' / '2024年第三季度报告.pdf', root / '000001' / '共享.pdf')
+        with ReportIndex(str(tmp_path / 'index.db'), extractor=counting) as index:
+            index.update(str(root))
+            assert len(calls) == 4
+            assert index.stats()['documents'] == 4
+            assert index.funds_mentioning('半导体') == ['000001', '000002']
+
+    def test_process_pool(self, root, tmp_path):
+        """多进程提取与单进程结果一致，查询为毫秒级"""
+        with ReportIndex(str(tmp_path / 'index.db'), extractor=text_pages) as index:
+            assert index.update(str(root), workers=2) == 3
+            start = time.perf_counter()
+            assert index.funds_mentioning('新能源') == ['000001', '000002']
+            assert time.perf_counter() - start < 0.1
@@ -0,0 +1,85 @@
+"""RS 评级测试用例"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.rs_rating import RSRatingEngine, percentile_rating, rs_rating, rs_scores
+
+
+def make_panel(n_days=300, n_symbols=50, seed=1):
+    """构造随机游走价格面板"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0005, 0.02, (n_days, n_symbols))
+    return pd.DataFrame(10 * np.cumprod(1 + returns, axis=0),
+                        columns=[f's{i}' for i in range(n_symbols)])
+
+
+class TestRSRating:
+    """RS 评级测试类"""
+
+    def test_scores_match_formula(self):
+        """测试加权收益分数"""
+        close = make_panel()
+        score = rs_scores(close)
+        s = close['s3']
+        expected = sum(w * (s.iloc[-1] / s.iloc[-1 - h] - 1)
+                       for w, h in zip((0.4, 0.2, 0.2, 0.2), (63, 126, 189, 252)))
+        assert score['s3'] == pytest.approx(expected)
+
+    def test_rating_is_percentile(self):
+        """测试评级为 1-99 且与分数同序"""
+        close = make_panel()
+        rating = rs_rating(close)
+        score = rs_scores(close)
+        assert rating.between(1, 99).all()
+        assert rating[score.idxmax()] == 99
+        assert rating[score.idxmin()] == 2
+        assert (rating.rank() == score.rank()).all()
+
+    def test_short_history_and_missing(self):
+        """测试上市不足一年按已有周期计算，当日无价格时评级缺失"""
+        close = make_panel()
+        close.iloc[:200, 0] = np.nan
+        close.iloc[-1, 1] = np.nan
+        score = rs_scores(close)
+        s = close['s0']
+        expected = (0.4 * (s.iloc[-1] / s.iloc[-64] - 1)) / 0.4
+        assert score['s0'] == pytest.approx(expected)
+        assert np.isnan(rs_rating(close)['s1'])
+
+    def test_percentile_ties(self):
+        """测试并列分数取相同评级"""
+        rating = percentile_rating(np.array([1.0, 1.0, 2.0, np.nan]))
+        assert rating[0] == rating[1]
+        assert rating[2] == 99
+        assert np.isnan(rating[3])
+
+
+class TestRSRatingEngine:
+    """增量 RS 评级测试类"""
+
+    def test_incremental_matches_full(self):
+        """测试逐日追加与全量计算一致"""
+        close = make_panel(n_days=320)
+        engine = RSRatingEngine(close.columns, history=close.iloc[:300])
+        pd.testing.assert_series_equal(engine.ratings(), rs_rating(close.iloc[:300]))
+        for day in range(300, 320):
+            ratings = engine.update(close.iloc[day])
+            pd.testing.assert_series_equal(ratings, rs_rating(close.iloc[:day + 1]))
+
+    def test_update_aligns_by_symbol(self):
+        """测试按代码对齐追加"""
+        close = make_panel(n_days=260, n_symbols=3)
+        engine = RSRatingEngine(close.columns, history=close.iloc[:-1])
+        shuffled = close.iloc[-1][['s2', 's0', 's1']]
+        pd.testing.assert_series_equal(engine.update(shuffled), rs_rating(close))
+
+    def test_invalid_weights(self):
+        """测试周期与权重长度不一致"""
+        with pytest.raises(ValueError):
+            RSRatingEngine(['s0'], horizons=(63,), weights=(0.5, 0.5))
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
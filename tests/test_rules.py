@@ -0,0 +1,139 @@
+"""声明式选股规则测试用例"""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.magic_formula import MAGIC_FORMULA_RULES
+from src.rules import Rule, RuleSet, evaluate_many
+from src.walter_schloss import SCHLOSS_RULES, SchlossStockScreening
+
+FRAME = pd.DataFrame({
+    '代码': ['000001', '000002', '000003', '000004'],
+    '名称': ['甲', '乙', '丙', '丁'],
+    '市盈率-动态': [15.0, 25.0, 10.0, np.nan],
+    '市净率': ['1.2', '2.0', '0.8', '--'],
+    '资产负债率': [40, 60, 30, 20],
+    '总市值': [1e10, 5e9, 2e10, 3e9],
+})
+
+
+class TestRule:
+    """单条规则测试类"""
+
+    def test_parse(self):
+        """测试规则文本解析"""
+        rule = Rule.parse('市盈率-动态 >= -1.5')
+        assert (rule.column, rule.op, rule.value) == ('市盈率-动态', '>=', -1.5)
+        rule = Rule.parse('0 < 市净率 < 1.5')
+        assert (rule.column, rule.op, rule.value) == ('市净率', 'between', (0.0, 1.5))
+        assert Rule.parse('名称 == 甲').value == '甲'
+        assert Rule.parse('市净率 notna').op == 'notna'
+        assert str(Rule.parse('0 < 市净率 < 1.5')) == '0 < 市净率 < 1.5'
+        with pytest.raises(ValueError):
+            Rule.parse('市盈率')
+        with pytest.raises(ValueError):
+            Rule('市盈率', '~', 1)
+
+    def test_evaluate_with_missing_values(self):
+        """测试缺失值与无法解析的字符串不通过"""
+        result = RuleSet(['0 < 市净率 < 1.5', '市盈率-动态 < 20']).evaluate(FRAME)
+        assert result.counts == {'0 < 市净率 < 1.5': 2, '市盈率-动态 < 20': 2}
+        assert result.mask.tolist() == [True, False, True, False]
+
+    def test_string_rules(self):
+        """测试字符串相等与取值列表"""
+        ruleset = RuleSet(['名称 != 甲', {'column': '代码', 'op': 'in',
+                                          'value': ['000001', '000002']}])
+        assert ruleset.evaluate(FRAME).mask.tolist() == [False, True, False, False]
+
+    def test_not_equal_excludes_missing(self):
+        """测试 != 对缺失值不通过，列表值的规则可哈希"""
+        assert Rule.parse('市盈率-动态 != 15').evaluate(
+            FRAME['市盈率-动态'].to_numpy()).tolist() == [False, True, True, False]
+        names = np.array(['甲', None, '丙'], dtype=object)
+        assert Rule.parse('名称 != 甲').evaluate(names).tolist() == [False, False, True]
+        rule = Rule.from_config({'column': '名称', 'op': '==', 'value': ['甲', '乙']})
+        assert rule.value == ('甲', '乙') and len({rule.key, rule.key}) == 1
+
+
+class TestRuleSet:
+    """规则集测试类"""
+
+    def test_missing_column_skipped(self):
+        """测试缺少列时跳过规则并报告，fail 策略时全部不通过"""
+        ruleset = RuleSet(['资产负债率 < 50', '净利润同比增长率 > 0'])
+        result = ruleset.evaluate(FRAME)
+        assert result.skipped == ['净利润同比增长率 > 0']
+        assert result.selected == 3
+        assert '已跳过' in result.report()
+        strict = RuleSet([{'rule': '净利润同比增长率 > 0', 'missing': 'fail'}])
+        assert strict.evaluate(FRAME).selected == 0
+
+    def test_funnel(self):
+        """测试按顺序累计的剩余数"""
+        result = RuleSet(['资产负债率 < 50', '总市值 > 5000000000']).evaluate(FRAME)
+        assert list(result.funnel.values()) == [3, 2]
+        assert result.select(FRAME)['代码'].tolist() == ['000001', '000003']
+
+    def test_config_round_trip(self, tmp_path):
+        """测试配置文件读写"""
+        path = tmp_path / 'rules.json'
+        path.write_text(json.dumps(SCHLOSS_RULES.to_config(), ensure_ascii=False),
+                        encoding='utf-8')
+        loaded = RuleSet.load(str(path))
+        assert loaded.name == 'schloss'
+        assert [rule.key for rule in loaded.rules] == [rule.key for rule in SCHLOSS_RULES.rules]
+        assert loaded.columns == ['市盈率-动态', '市净率', '资产负债率', '净利润同比增长率',
+                                  '总市值']
+
+    def test_with_rules(self):
+        """测试替换同名规则与追加规则"""
+        variant = SCHLOSS_RULES.with_rules({'name': '市盈率', 'rule': '0 < 市盈率-动态 < 12'},
+                                           '市净率 notna', name='strict')
+        assert len(variant) == len(SCHLOSS_RULES) + 1
+        assert variant.rules[0].value == (0.0, 12.0)
+        assert SCHLOSS_RULES.rules[0].value == (0.0, 20.0)
+        with pytest.raises(ValueError):
+            RuleSet(['市净率 > 0', '市净率 > 0'])
+
+    def test_evaluate_many(self):
+        """测试一次计算多个规则集，结果与逐个计算一致，且不修改数据表"""
+        before = FRAME.copy()
+        variants = [SCHLOSS_RULES.with_rules(
+            {'name': '市盈率', 'rule': f'0 < 市盈率-动态 < {pe}'}, name=f'pe{pe}')
+            for pe in range(5, 55)]
+        masks, summary = evaluate_many(FRAME, variants)
+        assert masks.shape == (50, len(FRAME))
+        for mask, variant in zip(masks, variants):
+            assert mask.tolist() == variant.evaluate(FRAME).mask.tolist()
+        assert summary.loc['pe12', 'selected'] == 1
+        assert summary.loc['pe30', 'selected'] == 2
+        assert summary.loc['pe5', 'selected'] == 0
+        pd.testing.assert_frame_equal(FRAME, before)
+
+
+class TestStrategyRules:
+    """策略默认规则测试类"""
+
+    def test_schloss_rules_match_thresholds(self):
+        """测试施洛斯策略的默认条件"""
+        screener = SchlossStockScreening()
+        screener.stocks_data = pd.DataFrame({
+            '代码': ['000001', '000002', '000003'],
+            '市盈率-动态': [15, 25, 10],
+            '市净率': [1.2, 2.0, 0.8],
+            '资产负债率': [40, 60, 30],
+            '净利润同比增长率': [10, -5, 20],
+            '总市值': [10000000000, 5000000000, 800000000],
+        })
+        screener.apply_schloss_strategy()
+        assert screener.screened_stocks['代码'].tolist() == ['000001']
+
+    def test_magic_formula_rules(self):
+        """测试神奇公式排名前的过滤条件"""
+        frame = pd.DataFrame({'ROIC_proxy': [0.1, -0.1, 0.2], 'earnings_yield': [0.1, 0.1, 0.01],
+                              '市盈率-动态': [10, 10, 100]})
+        assert MAGIC_FORMULA_RULES.evaluate(frame).mask.tolist() == [True, False, False]
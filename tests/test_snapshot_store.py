@@ -0,0 +1,77 @@
+"""快照存储测试用例"""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.snapshot_store import SnapshotStore, normalize_object_columns
+
+
+def make_snapshot():
+    """构造带前导零代码的快照"""
+    return pd.DataFrame({
+        '代码': ['000001', '600000', '300750'],
+        '名称': ['平安银行', '浦发银行', '宁德时代'],
+        '市盈率-动态': [5.1, 4.8, 20.3],
+        '总市值': [2.1e11, 2.4e11, 8.9e11],
+    })
+
+
+class TestSnapshotStore:
+    """快照存储测试类"""
+
+    @pytest.mark.parametrize('fmt', ['parquet', 'feather', 'pickle'])
+    def test_round_trip_keeps_dtypes(self, tmp_path, fmt):
+        """测试保存后读取保持代码为字符串"""
+        store = SnapshotStore(str(tmp_path), fmt=fmt)
+        store.save('ws', make_snapshot(), date='2025-01-02')
+        loaded = store.load('ws')
+        assert loaded['代码'].tolist() == ['000001', '600000', '300750']
+        assert loaded['市盈率-动态'].dtype == 'float64'
+
+    @pytest.mark.parametrize('fmt', ['parquet', 'feather', 'pickle'])
+    def test_column_projection(self, tmp_path, fmt):
+        """测试只加载需要的列，不存在的列忽略"""
+        store = SnapshotStore(str(tmp_path), fmt=fmt)
+        store.save('ws', make_snapshot(), date='2025-01-02')
+        loaded = store.load('ws', columns=['代码', '总市值', '不存在'])
+        assert list(loaded.columns) == ['代码', '总市值']
+
+    def test_dated_partitions_and_prune(self, tmp_path):
+        """测试按日期分区保存、读取指定日期与清理历史"""
+        store = SnapshotStore(str(tmp_path), keep=2)
+        for i, day in enumerate(['2025-01-02', '2025-01-03', '2025-01-06']):
+            frame = make_snapshot()
+            frame['总市值'] = frame['总市值'] + i
+            store.save('ws', frame, date=day)
+        assert store.dates('ws') == ['2025-01-03', '2025-01-06']
+        assert store.load('ws', date='2025-01-02') is None
+        assert store.load('ws', date='2025-01-03')['总市值'].iloc[0] == 2.1e11 + 1
+        assert store.load('ws')['总市值'].iloc[0] == 2.1e11 + 2
+        assert store.load('missing') is None
+
+    def test_mixed_object_column(self, tmp_path):
+        """测试接口返回的混合类型列可以写入 parquet"""
+        frame = make_snapshot()
+        frame['净资产收益率'] = pd.Series([1.5, '--', 3], dtype=object)
+        store = SnapshotStore(str(tmp_path), fmt='parquet')
+        store.save('ws', frame, date='2025-01-02')
+        loaded = store.load('ws')
+        assert loaded['净资产收益率'].iloc[0] == 1.5
+        assert pd.isna(loaded['净资产收益率'].iloc[1])
+
+    def test_normalize_text_column(self):
+        """测试不含数字的混合列转为字符串"""
+        frame = pd.DataFrame({'备注': pd.Series(['a', date(2025, 1, 2), None], dtype=object)})
+        result = normalize_object_columns(frame)
+        assert result['备注'].tolist()[:2] == ['a', '2025-01-02']
+
+    def test_invalid_format(self, tmp_path):
+        """测试不支持的格式"""
+        with pytest.raises(ValueError):
+            SnapshotStore(str(tmp_path), fmt='xlsx')
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,129 @@
+"""盘中流式重新筛选测试用例"""
+
+import numpy as np
+import pandas as pd
+
+from src.magic_formula import MagicFormulaScreener
+from src.market_replay import SyntheticBackend
+from src.stream_screen import MagicFormulaStreamScreener, ScreenEvent, StreamScreener
+from src.walter_schloss import SCHLOSS_RULES
+
+FUNDAMENTALS = pd.DataFrame({
+    '代码': ['000001', '000002', '000003', '000004'],
+    '资产负债率': [40, 60, 30, 20],
+    '净利润同比增长率': [10, 5, 20, 8],
+})
+
+SPOT = pd.DataFrame({
+    '代码': ['000001', '000002', '000003', '000004'],
+    '名称': ['甲', '乙', '丙', '丁'],
+    '最新价': [10.0, 20.0, 30.0, 40.0],
+    '市盈率-动态': [15.0, 10.0, 12.0, 30.0],
+    '市净率': [1.2, 1.0, 0.8, 1.1],
+    '总市值': [1e10, 1e10, 2e10, 3e10],
+})
+
+
+def synthetic_universe(n_stocks=300, seed=5):
+    """合成行情与最新一期财务数据"""
+    backend = SyntheticBackend(n_stocks=n_stocks, n_days=30, seed=seed)
+    spot = backend.spot()
+    financial = pd.DataFrame([backend.financial(code, '1990').iloc[-1] for code in spot['代码']])
+    financial = financial.rename(columns={'资产负债率(%)': '资产负债率',
+                                          '净利润增长率(%)': '净利润同比增长率',
+                                          '净资产收益率(%)': '净资产收益率'})
+    financial['代码'] = spot['代码'].to_numpy()
+    return spot, financial.reset_index(drop=True)
+
+
+def tick(spot, rng, fraction=0.1):
+    """随机一部分股票的价格变化，估值随价格同比例变化"""
+    spot = spot.copy()
+    rows = rng.random(len(spot)) < fraction
+    factor = rng.uniform(0.8, 1.25, rows.sum())
+    for column in ('最新价', '市盈率-动态', '市净率', '总市值'):
+        spot.loc[rows, column] = spot.loc[rows, column] * factor
+    return spot
+
+
+class TestStreamScreener:
+    """规则流式筛选测试类"""
+
+    def test_entry_exit_and_changed_rows(self):
+        """测试首次入选、价格变化移出与只重新计算变化的股票"""
+        stream = StreamScreener(SCHLOSS_RULES, FUNDAMENTALS)
+        events = stream.update(SPOT)
+        assert events == [ScreenEvent('entry', '000001', '甲'),
+                          ScreenEvent('entry', '000003', '丙')]
+        assert stream.changed == 4
+
+        spot = SPOT.copy()
+        spot.loc[0, '市盈率-动态'] = 25.0
+        assert stream.update(spot) == [ScreenEvent('exit', '000001', '甲')]
+        assert stream.changed == 1
+        assert stream.update(spot) == []
+        assert stream.changed == 0
+        assert stream.selected_codes == ['000003']
+
+    def test_universe_changes(self):
+        """测试股票离开快照时移出，新出现或重新排序时正确对齐"""
+        stream = StreamScreener(SCHLOSS_RULES, FUNDAMENTALS)
+        stream.update(SPOT)
+        events = stream.update(SPOT[SPOT['代码'] != '000003'])
+        assert events == [ScreenEvent('exit', '000003', '丙')]
+        events = stream.update(SPOT.iloc[::-1])
+        assert events == [ScreenEvent('entry', '000003', '丙')]
+        assert stream.changed == 1
+        assert sorted(stream.selected_codes) == ['000001', '000003']
+
+    def test_matches_full_evaluation(self):
+        """测试多次增量更新后与整表重新筛选一致"""
+        spot, financial = synthetic_universe()
+        stream = StreamScreener(SCHLOSS_RULES, financial)
+        rng = np.random.default_rng(0)
+        for _ in range(10):
+            spot = tick(spot, rng)
+            stream.update(spot)
+            merged = pd.merge(spot, financial, on='代码')
+            expected = SCHLOSS_RULES.evaluate(merged).select(merged)['代码']
+            assert stream.selected_codes == expected.tolist()
+        assert 0 < stream.changed < len(spot)
+
+    def test_run(self):
+        """测试轮询：获取失败时跳过本次并继续"""
+        snapshots = [SPOT, OSError("网络错误"), SPOT]
+        waits, events = [], []
+
+        def fetch():
+            item = snapshots.pop(0)
+            if isinstance(item, Exception):
+                raise item
+            return item
+
+        stream = StreamScreener(SCHLOSS_RULES, FUNDAMENTALS)
+        stream.run(fetch, interval=5, iterations=3, on_event=events.append, sleep=waits.append)
+        assert stream.ticks == 2
+        assert len(events) == 2
+        assert len(waits) == 2
+
+
+class TestMagicFormulaStreamScreener:
+    """神奇公式流式筛选测试类"""
+
+    def test_matches_batch_screening(self):
+        """测试增量排名的前 k 名与批量筛选的分数一致"""
+        spot, financial = synthetic_universe()
+        stream = MagicFormulaStreamScreener(financial, top=20)
+        rng = np.random.default_rng(1)
+        for _ in range(5):
+            spot = tick(spot, rng)
+            stream.update(spot)
+            screener = MagicFormulaScreener()
+            screener.stocks_data = pd.merge(spot, financial, on='代码')
+            screener.calculate_magic_formula_metrics()
+            with_scores = screener.stocks_data
+            screener.apply_magic_formula_screening()
+            assert sorted(stream.ranking.top(20)['magic_score']) == \
+                sorted(screener.screened_stocks['magic_score'].head(20))
+            assert set(stream.selected_codes) == set(stream.ranking.top(20)['代码'])
+            assert len(stream.ranking) == screener.rules.evaluate(with_scores).selected
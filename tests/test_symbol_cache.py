@@ -0,0 +1,153 @@
+"""按股票缓存测试用例"""
+
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+from src.financial_fetcher import FinancialFetcher
+from src.symbol_cache import SymbolCache
+
+
+class FakeClock:
+    """可手动推进的时钟"""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSymbolCache:
+    """按股票缓存测试类"""
+
+    def setup_method(self):
+        """初始化测试环境"""
+        self.clock = FakeClock()
+        self.cache = SymbolCache(ttl={'spot': 60, 'financial': 3600}, max_entries=3,
+                                 clock=self.clock)
+
+    def test_hit_and_miss(self):
+        """测试命中与未命中计数"""
+        assert self.cache.get('financial', '000001') is None
+        self.cache.put('financial', '000001', {'ROE': 1.0}, period='2024-09-30')
+        assert self.cache.get('financial', '000001') == {'ROE': 1.0}
+        assert self.cache.get('financial', '000001', period='2024-09-30') == {'ROE': 1.0}
+        assert self.cache.get('financial', '000001', period='2024-06-30') is None
+        assert self.cache.stats['hits'] == 2
+        assert self.cache.stats['misses'] == 2
+
+    def test_ttl_per_kind(self):
+        """测试不同类别的有效期"""
+        self.cache.put_table('spot', pd.DataFrame({'代码': ['000001']}))
+        self.cache.put('financial', '000001', {'ROE': 1.0})
+        self.clock.now += 120
+        assert self.cache.get_table('spot') is None
+        assert self.cache.get('financial', '000001') is not None
+        self.clock.now += 3600
+        assert self.cache.get('financial', '000001') is None
+        assert len(self.cache) == 0
+
+    def test_lru_eviction(self):
+        """测试超出容量时淘汰最近最少使用的条目"""
+        for code in ['000001', '000002', '000003']:
+            self.cache.put('financial', code, {'code': code})
+        self.cache.get('financial', '000001')
+        self.cache.put('financial', '000004', {'code': '000004'})
+        assert self.cache.get('financial', '000002') is None
+        assert self.cache.get('financial', '000001') is not None
+        assert self.cache.stats['evictions'] == 1
+
+    def test_concurrent_get_and_put(self):
+        """测试多线程同时读写时逐个进入缓存，命中与未命中计数不丢失"""
+        state = {'active': 0, 'peak': 0}
+        lock = threading.Lock()
+
+        def slow_clock():
+            # 读写条目时会调用时钟，期间让出 GIL，未加锁时其他线程会同时进入
+            with lock:
+                state['active'] += 1
+                state['peak'] = max(state['peak'], state['active'])
+            time.sleep(0.0005)
+            with lock:
+                state['active'] -= 1
+            return 0.0
+
+        cache = SymbolCache(max_entries=4, clock=slow_clock)
+
+        def work(seed):
+            for i in range(50):
+                code = f'{(seed * 7 + i) % 6:06d}'
+                if cache.get('spot', code) is None:
+                    cache.put('spot', code, i)
+
+        threads = [threading.Thread(target=work, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert state['peak'] == 1
+        assert cache.stats['hits'] + cache.stats['misses'] == 4 * 50
+        assert len(cache) <= 4
+
+    def test_partition(self):
+        """测试划分命中与过期的代码"""
+        self.cache.put('financial', '000001', {'ROE': 1.0})
+        self.cache.put('financial', '000002', {})
+        fresh, stale = self.cache.partition('financial', ['000001', '000002', '000003'])
+        assert fresh == {'000001': {'ROE': 1.0}, '000002': {}}
+        assert stale == ['000003']
+
+    def test_save_and_load(self, tmp_path):
+        """测试持久化后重新加载"""
+        path = str(tmp_path / 'cache.pkl')
+        cache = SymbolCache(path, clock=self.clock)
+        cache.put('financial', '000001', {'ROE': 1.0}, period='2024-09-30')
+        cache.save()
+        reloaded = SymbolCache(path, clock=self.clock)
+        assert reloaded.get('financial', '000001') == {'ROE': 1.0}
+
+    def test_corrupt_file(self, tmp_path):
+        """测试缓存文件损坏时从空缓存开始"""
+        path = tmp_path / 'cache.pkl'
+        path.write_bytes(b'not a pickle')
+        assert len(SymbolCache(str(path))) == 0
+
+
+class TestFetcherWithCache:
+    """带缓存的财务数据获取测试类"""
+
+    def test_rerun_fetches_only_stale(self):
+        """测试重复运行只请求过期的股票"""
+        clock = FakeClock()
+        cache = SymbolCache(ttl={'financial': 3600}, clock=clock)
+        calls = []
+
+        def stub(symbol, start_year):
+            calls.append(symbol)
+            if symbol == '000003':
+                return pd.DataFrame()
+            return pd.DataFrame({'日期': ['2024-09-30'], 'ROE': [float(symbol[-1])]})
+
+        fetcher = FinancialFetcher(stub, max_workers=2, rate=1000, cache=cache)
+        codes = ['000001', '000002', '000003']
+        first = fetcher.fetch(codes)
+        assert sorted(calls) == codes
+
+        calls.clear()
+        second = fetcher.fetch(codes)
+        assert not calls
+        pd.testing.assert_frame_equal(first, second)
+
+        cache.put('financial', '000002', {'日期': '2024-09-30', 'ROE': 2.0})
+        clock.now += 3000
+        cache.put('financial', '000002', {'日期': '2024-09-30', 'ROE': 2.0})
+        clock.now += 1000
+        fetcher.fetch(codes)
+        assert sorted(calls) == ['000001', '000003']
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -0,0 +1,112 @@
+"""VCP 选股测试用例"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import src.vcp as vcp
+from src.vcp import my_filter, select_symbols
+
+
+class FakeStore:
+    """只返回固定日线的存储替身"""
+
+    def __init__(self, close, falling=()):
+        self.close = close
+        self.falling = set(falling)
+
+    def _close(self, symbol):
+        return self.close[::-1] if symbol in self.falling else self.close
+
+    def update(self, symbol):
+        """返回日线，``falling`` 中的股票为反向走势"""
+        return pd.DataFrame({'close': self._close(symbol)})
+
+    def update_many(self, symbols, end_date=None):
+        """批量更新（无操作）"""
+        return {symbol: len(self.close) for symbol in symbols}
+
+    def load_panel(self, symbols):
+        """收盘价面板"""
+        return pd.DataFrame({symbol: self._close(symbol) for symbol in symbols})
+
+    def save_index(self):
+        """保存索引（无操作）"""
+
+
+class FakeProvider:
+    """返回固定行情快照与日线存储的数据提供者替身"""
+
+    def __init__(self, spot, store):
+        self._spot = spot
+        self._store = store
+
+    def spot(self):
+        """行情快照"""
+        return self._spot
+
+    def bar_store(self, root):
+        """日线存储"""
+        return self._store
+
+
+def breakout_close():
+    """回调后突破的收盘价序列"""
+    close = np.linspace(10, 20, 300)
+    close[-6:-1] = close[-7] * 0.97
+    close[-1] = close[-7] * 1.1
+    return close
+
+
+class TestMyFilter:
+    """单只股票筛选测试类"""
+
+    def test_returns_match_instead_of_global(self):
+        """测试符合条件时返回结果"""
+        assert my_filter('sz000001', '测试', FakeStore(breakout_close())) == 'sz000001测试'
+
+    def test_returns_none(self):
+        """测试不符合条件或无数据时返回 None"""
+        assert my_filter('sz000001', '测试', FakeStore(breakout_close()[::-1])) is None
+        assert my_filter('sz000001', '测试', FakeStore([])) is None
+
+
+def make_spot():
+    """沪深主板、创业板与无成交股票混合的行情快照"""
+    columns = ['序号', '代码', '名称', '最新价', '涨跌幅', '涨跌额', '成交量', '成交额', '振幅',
+               '最高', '最低', '今开', '昨收', '量比', '换手率']
+    rows = [
+        [1, '002708', '光洋股份'] + [1.0] * 11 + [11.3],
+        [2, '600000', '浦发银行'] + [1.0] * 11 + [0.0],
+        [3, '300750', '宁德时代'] + [1.0] * 11 + [2.0],
+        [4, '601318', '中国平安'] + [1.0] * 11 + [2.0],
+    ]
+    return pd.DataFrame(rows, columns=columns)
+
+
+class TestMain:
+    """入口函数测试类"""
+
+    @pytest.mark.parametrize('batch', [False, True])
+    def test_main_screens_selected_symbols(self, monkeypatch, batch):
+        """测试默认逐只筛选，批量筛选时在该数据上结果一致"""
+        provider = FakeProvider(make_spot(), FakeStore(breakout_close(), falling=['sh601318']))
+        monkeypatch.setattr(vcp, 'get_provider', lambda: provider)
+        assert vcp.main(batch=batch, workers=2) == ['sz002708光洋股份']
+
+    def test_small_panel_not_parallel(self, monkeypatch):
+        """测试面板较小时即使 workers 大于 1 也不启动进程池"""
+        monkeypatch.setattr(vcp, 'screen_stage2_parallel', None)
+        store = FakeStore(breakout_close(), falling=['sh601318'])
+        passed = vcp.stage2_screen(['sz002708', 'sh601318'], store, workers=4)
+        assert passed.index.tolist() == ['sz002708']
+
+
+def test_select_symbols():
+    """测试只选出沪深主板且有成交的股票"""
+    spot = make_spot()
+    assert select_symbols(spot) == [('sz002708', '光洋股份'), ('sh601318', '中国平安')]
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
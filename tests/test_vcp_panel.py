@@ -0,0 +1,124 @@
+"""VCP 批量筛选测试用例"""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.indicators import contraction_depths, shrinking_contractions
+from src.vcp_panel import RULES, screen_stage2, screen_stage2_parallel
+
+
+def make_panel(n_days=300, n_symbols=40, seed=0):
+    """构造随机游走价格面板，部分股票上市较晚"""
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.001, 0.02, (n_days, n_symbols))
+    close = pd.DataFrame(10 * np.cumprod(1 + returns, axis=0),
+                         index=pd.bdate_range('2023-01-02', periods=n_days),
+                         columns=[f'sz{i:06d}' for i in range(n_symbols)])
+    close.iloc[:150, 0] = np.nan
+    close.iloc[:280, 1] = np.nan
+    return close
+
+
+def reference(series):
+    """逐只股票的参考实现（沿用 vcp.my_filter 的写法）"""
+    s = series.dropna()
+    price = s.iloc[-1]
+    sma = {w: s.tail(w).mean() if len(s) >= w else np.nan for w in (10, 20, 50, 150, 200)}
+    prev = {w: s.iloc[-w - 1:-1].mean() if len(s) > w else np.nan for w in (10, 20, 50)}
+    lag = s.iloc[-221:-21].mean() if len(s) >= 221 else np.nan
+    high, low = s.tail(252).max(), s.tail(252).min()
+    return {
+        'above_ma': price > sma[50] and price > sma[150] and price > sma[200],
+        'ma_order': sma[50] > sma[150] > sma[200],
+        'ma200_rising': sma[200] > lag,
+        'above_52w_low': price >= 1.3 * low,
+        'near_52w_high': price >= 0.75 * high,
+        'short_ma_order': price >= max(sma[10], sma[20], sma[50])
+        and sma[10] >= sma[20] >= sma[50],
+        'crossover': not (prev[10] >= prev[20] and prev[20] >= prev[50]),
+    }
+
+
+class TestScreenStage2:
+    """第二阶段批量筛选测试类"""
+
+    def test_matches_per_symbol_reference(self):
+        """测试与逐只计算的结果一致"""
+        close = make_panel()
+        mask, table = screen_stage2(close)
+        for symbol in close.columns:
+            expected = reference(close[symbol])
+            for rule in expected:
+                assert bool(table.at[symbol, rule]) == bool(expected[rule]), (symbol, rule)
+        assert mask.equals(table[list(RULES)].all(axis=1).rename('passed'))
+        assert table.at['sz000001', 'sma200'] != table.at['sz000001', 'sma200']  # NaN
+
+    def test_moving_average_values(self):
+        """测试均线数值"""
+        close = make_panel()
+        _, table = screen_stage2(close)
+        symbol = close.columns[5]
+        assert table.at[symbol, 'sma50'] == pytest.approx(close[symbol].tail(50).mean())
+        assert table.at[symbol, 'prev_sma20'] == pytest.approx(close[symbol].iloc[-21:-1].mean())
+        assert table.at[symbol, 'high_52w'] == close[symbol].tail(252).max()
+
+    def test_as_of_and_rule_subset(self):
+        """测试指定评估日期与条件子集"""
+        close = make_panel()
+        _, full = screen_stage2(close.iloc[:250])
+        mask, table = screen_stage2(close, as_of=249, rules=['above_ma', 'ma_order'])
+        # 收缩数值只对通过的股票计算，随条件子集变化
+        derived = ['passed', 'last_contraction', 'contractions']
+        pd.testing.assert_frame_equal(table.drop(columns=derived), full.drop(columns=derived))
+        assert mask.equals((table['above_ma'] & table['ma_order']).rename('passed'))
+
+    def test_rs_rule(self):
+        """测试 RS 评级条件与传入的评级"""
+        close = make_panel()
+        _, table = screen_stage2(close)
+        assert (table['rs'] == (table['rs_rating'] >= 70)).all()
+        rs = pd.Series(99.0, index=close.columns)
+        _, table = screen_stage2(close, rs=rs)
+        assert table['rs'].all()
+
+    def test_stage2_uptrend_passes(self):
+        """测试稳定上涨后突破的股票通过全部条件"""
+        trend = np.linspace(10, 20, 300)
+        # 回调 5 日使短期均线失去多头排列，最后一日放量突破
+        trend[-6:-1] = trend[-7] * 0.97
+        trend[-1] = trend[-7] * 1.1
+        close = pd.DataFrame({'sz000001': trend, 'sz000002': trend[::-1]})
+        mask, table = screen_stage2(close)
+        assert table.loc['sz000001', 'rs_rating'] == 99
+        assert mask['sz000001']
+        assert not table.loc['sz000002', ['above_ma', 'ma_order', 'ma200_rising']].any()
+
+    def test_contraction_columns(self):
+        """测试波动收缩数值只对通过的股票计算、不参与筛选"""
+        close = make_panel()
+        mask, table = screen_stage2(close, rules=['above_52w_low'])
+        assert 0 < mask.sum() < len(mask)
+        depths = contraction_depths(close.tail(252).loc[:, mask].to_numpy())
+        np.testing.assert_allclose(table.loc[mask, 'last_contraction'], depths[-1], rtol=1e-6)
+        np.testing.assert_array_equal(table.loc[mask, 'contractions'],
+                                      shrinking_contractions(depths))
+        assert table.loc[~mask, 'last_contraction'].isna().all()
+        assert (table.loc[~mask, 'contractions'] == 0).all()
+
+    def test_parallel_matches_serial(self):
+        """测试多进程分片结果与单进程一致"""
+        close = make_panel(n_symbols=37)
+        mask, table = screen_stage2(close)
+        parallel_mask, parallel_table = screen_stage2_parallel(close, workers=2)
+        pd.testing.assert_series_equal(mask, parallel_mask)
+        pd.testing.assert_frame_equal(table, parallel_table)
+
+    def test_unknown_rule(self):
+        """测试未知条件名"""
+        with pytest.raises(ValueError):
+            screen_stage2(make_panel(), rules=['volume'])
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v"])
@@ -1,12 +1,13 @@
 """施洛斯选股策略测试用例"""
 # pylint: disable=protected-access,attribute-defined-outside-init
 
-import os
-from unittest.mock import patch
-
 import pandas as pd
 import pytest
 
+from src.data_provider import DataProvider, FixtureBackend
+from src.financial_fetcher import FinancialFetcher
+from src.snapshot_store import SnapshotStore
+from src.symbol_cache import SymbolCache
 from src.walter_schloss import SchlossStockScreening
 
 
@@ -22,7 +23,7 @@ class TestSchlossStockScreening:
         assert self.screener.stocks_data is None
         assert self.screener.screened_stocks is None
         assert self.screener.script_dir is not None
-        assert "stock_data_all_by_ws.csv" in self.screener.data_path
+        assert self.screener.snapshot_name == "stock_data_all_by_ws"
 
     def test_get_merge_key_success(self):
         """测试成功获取合并键"""
@@ -48,28 +49,60 @@ class TestSchlossStockScreening:
         assert '资产负债率' in result.columns
         assert '净利润同比增长率' in result.columns
 
+    def test_get_financial_data_with_fetcher(self):
+        """测试通过并发获取器获取并映射财务数据"""
+        def stub(symbol, start_year):
+            return pd.DataFrame({'日期': [start_year], '资产负债率(%)': [int(symbol)]})
+
+        screener = SchlossStockScreening(cache=SymbolCache(),
+                                         fetcher=FinancialFetcher(stub, max_workers=4, rate=1000))
+        stock_list = pd.DataFrame({'代码': ['000001', '000002', '000003']})
+        result = screener._get_financial_data(stock_list)
+        assert result['代码'].tolist() == ['000001', '000002', '000003']
+        assert result['资产负债率'].tolist() == [1, 2, 3]
+
     def test_apply_schloss_strategy_no_data(self):
         """测试无数据时应用策略"""
         self.screener.stocks_data = None
         self.screener.apply_schloss_strategy()
         assert self.screener.screened_stocks is None
 
-    @patch('src.walter_schloss.os.path.exists')
-    def test_get_stock_data_with_cached_file(self, mock_exists):
-        """测试从缓存文件读取数据"""
-        mock_exists.return_value = True
-        mock_data = pd.DataFrame({
-            '代码': ['000001'],
-            '名称': ['测试股票'],
-            '市盈率-动态': [15],
-            '市净率': [1.2]
-        })
-
-        with patch('src.walter_schloss.pd.read_csv') as mock_read:
-            mock_read.return_value = mock_data
-            with patch('src.walter_schloss.os.path.getmtime') as mock_time:
-                mock_time.return_value = os.path.getmtime('src/walter_schloss.py')
-                self.screener.get_stock_data()
+    def test_get_stock_data_with_cached_file(self, tmp_path):
+        """测试缓存有效时不再请求接口，只获取过期的股票"""
+        cache = SymbolCache(str(tmp_path / 'cache.pkl'))
+        cache.put_table('spot', pd.DataFrame({
+            '代码': ['000001', '000002'],
+            '名称': ['测试股票', '测试股票2'],
+            '市盈率-动态': [15, 12],
+            '市净率': [1.2, 0.9]
+        }))
+        cache.put('financial', '000001', {'日期': '2025-03-31', '资产负债率(%)': 30.0},
+                  period='2025-03-31')
+        cache.save()
+
+        fetched = []
+
+        def stub(symbol, start_year):
+            fetched.append(symbol)
+            return pd.DataFrame({'日期': ['2025-03-31'], '资产负债率(%)': [45.0]})
+
+        backend = FixtureBackend()
+        screener = SchlossStockScreening(
+            fetcher=FinancialFetcher(stub, max_workers=1, rate=1000),
+            provider=DataProvider(backend, cache=SymbolCache(str(tmp_path / 'cache.pkl'))),
+        )
+        screener.snapshot_store = SnapshotStore(str(tmp_path / 'snapshots'))
+        screener.get_stock_data()
+        assert backend.calls['spot'] == 0
+        assert fetched == ['000002']
+        assert screener.stocks_data['资产负债率'].tolist() == [30.0, 45.0]
+        assert screener.snapshot_store.dates('stock_data_all_by_ws')
+
+        reloaded = SchlossStockScreening(cache=SymbolCache())
+        reloaded.snapshot_store = screener.snapshot_store
+        assert reloaded.load_snapshot()
+        assert reloaded.stocks_data['代码'].tolist() == ['000001', '000002']
+        assert '日期' not in reloaded.stocks_data.columns
 
 
 class TestSchlossStrategyFilters: